@@ -58,6 +58,24 @@ Grupos de relatórios:
    - gerar_relatorio_tempo_processamento
 
 
+
+
+
+5. Relatórios a partir dos agregados diários (services/history_rollup.py)
+
+
+   - gerar_relatorio_indicadores_qualidade_rollup
+
+
+   - gerar_relatorio_producao_rollup
+
+
+   - gerar_relatorio_positividade_exame_rollup
+
+
+   - gerar_relatorio_produtividade_equipamento_rollup
+
+
 """
 
 
@@ -2647,3 +2665,687 @@ def gerar_relatorio_tempo_processamento(
     return rel.reset_index(drop=True)
 
 
+
+
+
+
+
+
+# ============================================================================
+
+
+# 5. RELATÓRIOS A PARTIR DOS AGREGADOS DIÁRIOS (ROLLUP)
+
+
+# ============================================================================
+
+
+#
+
+
+# Versões dos relatórios de período que leem os agregados diários mantidos por
+
+
+# services/history_rollup.py em vez do histórico bruto: o custo é proporcional
+
+
+# a dias × grupos, não ao número de linhas do histórico. As colunas de saída
+
+
+# são as mesmas das versões sobre o histórico bruto.
+
+
+#
+
+
+# df_rollup  : colunas data, exame, equipamento, tipo_amostra, tipo_controle,
+
+
+#              resultado, n, n_invalidos, n_inconclusivos, n_retestes, ct_n,
+
+
+#              ct_soma, ct_soma_quadrados, ct_min, ct_max
+
+
+# df_corridas: colunas data, exame, equipamento, n_corridas
+
+
+#
+
+
+# Os limites periodo_inicio / periodo_fim são aplicados por dia inteiro.
+
+
+
+
+
+
+
+
+def _rollup_no_periodo(
+
+
+    df: pd.DataFrame,
+
+
+    periodo_inicio: Optional[pd.Timestamp],
+
+
+    periodo_fim: Optional[pd.Timestamp],
+
+
+    frequencia: str,
+
+
+) -> pd.DataFrame:
+
+
+    """Filtra os dias do período e acrescenta a coluna '__periodo__'."""
+
+
+    dia = pd.to_datetime(df["data"], errors="coerce")
+
+
+    mask = dia.notna()
+
+
+    if periodo_inicio is not None:
+
+
+        mask &= dia >= pd.Timestamp(periodo_inicio).normalize()
+
+
+    if periodo_fim is not None:
+
+
+        mask &= dia <= pd.Timestamp(periodo_fim)
+
+
+    df = df.loc[mask].copy()
+
+
+    df["__periodo__"] = dia.loc[mask].dt.to_period(frequencia).astype(str)
+
+
+    return df
+
+
+
+
+
+
+
+
+def _amostras_rollup(df: pd.DataFrame) -> pd.DataFrame:
+
+
+    tipo_amostra = df["tipo_amostra"].astype(str).str.strip().str.lower()
+
+
+    return df.loc[tipo_amostra == "amostra"]
+
+
+
+
+
+
+
+
+def _ordenar_relatorio(rel: pd.DataFrame, chaves: List[str]) -> pd.DataFrame:
+
+
+    rel = rel.sort_values(by=chaves, kind="stable", na_position="last")
+
+
+    return rel.reset_index(drop=True)
+
+
+
+
+
+
+
+
+def gerar_relatorio_indicadores_qualidade_rollup(
+
+
+    df_rollup: pd.DataFrame,
+
+
+    periodo_inicio: Optional[pd.Timestamp] = None,
+
+
+    periodo_fim: Optional[pd.Timestamp] = None,
+
+
+    frequencia: str = "M",
+
+
+) -> pd.DataFrame:
+
+
+    """Indicadores de Qualidade por Período a partir dos agregados diários.
+
+
+
+
+
+    Mesmo resultado de gerar_relatorio_indicadores_qualidade_periodo; média e
+
+
+    desvio padrão (ddof=0) do Ct dos controles positivos vêm das somas e somas
+
+
+    dos quadrados acumuladas por dia.
+
+
+    """
+
+
+    colunas = [
+
+
+        "periodo",
+
+
+        "exame",
+
+
+        "equipamento",
+
+
+        "total_amostras",
+
+
+        "total_retestes",
+
+
+        "taxa_reteste",
+
+
+        "total_invalidos",
+
+
+        "total_inconclusivos",
+
+
+        "perc_invalidos",
+
+
+        "perc_inconclusivos",
+
+
+        "ct_pos_controle_medio",
+
+
+        "ct_pos_controle_min",
+
+
+        "ct_pos_controle_max",
+
+
+        "ct_pos_controle_desvio",
+
+
+    ]
+
+
+    if df_rollup.empty:
+
+
+        return pd.DataFrame(columns=colunas)
+
+
+
+
+
+    df = _rollup_no_periodo(df_rollup, periodo_inicio, periodo_fim, frequencia)
+
+
+    chaves = ["__periodo__", "exame", "equipamento"]
+
+
+
+
+
+    amostras = _amostras_rollup(df)
+
+
+    if amostras.empty:
+
+
+        return pd.DataFrame(columns=colunas)
+
+
+    rel = amostras.groupby(chaves, dropna=False)[
+
+
+        ["n", "n_retestes", "n_invalidos", "n_inconclusivos"]
+
+
+    ].sum()
+
+
+
+
+
+    tipo_controle = df["tipo_controle"].fillna("").astype(str).str.strip().str.lower()
+
+
+    mask_pos = df["tipo_amostra"].astype(str).str.strip().str.lower().eq("controle") & (
+
+
+        tipo_controle.str.contains("positivo", na=False)
+
+
+    )
+
+
+    ct = df.loc[mask_pos].groupby(chaves, dropna=False).agg(
+
+
+        ct_n=("ct_n", "sum"),
+
+
+        ct_soma=("ct_soma", "sum"),
+
+
+        ct_soma_quadrados=("ct_soma_quadrados", "sum"),
+
+
+        ct_min=("ct_min", "min"),
+
+
+        ct_max=("ct_max", "max"),
+
+
+    )
+
+
+    rel = rel.join(ct, how="left")
+
+
+
+
+
+    total = rel["n"].astype(int)
+
+
+    ct_n = rel["ct_n"].where(rel["ct_n"] > 0)
+
+
+    ct_medio = rel["ct_soma"] / ct_n
+
+
+    ct_var = (rel["ct_soma_quadrados"] / ct_n - ct_medio ** 2).clip(lower=0.0)
+
+
+
+
+
+    rel = pd.DataFrame(
+
+
+        {
+
+
+            "total_amostras": total,
+
+
+            "total_retestes": rel["n_retestes"].astype(int),
+
+
+            "taxa_reteste": rel["n_retestes"] / total,
+
+
+            "total_invalidos": rel["n_invalidos"].astype(int),
+
+
+            "total_inconclusivos": rel["n_inconclusivos"].astype(int),
+
+
+            "perc_invalidos": rel["n_invalidos"] / total,
+
+
+            "perc_inconclusivos": rel["n_inconclusivos"] / total,
+
+
+            "ct_pos_controle_medio": ct_medio,
+
+
+            "ct_pos_controle_min": rel["ct_min"].where(ct_n.notna()),
+
+
+            "ct_pos_controle_max": rel["ct_max"].where(ct_n.notna()),
+
+
+            "ct_pos_controle_desvio": ct_var ** 0.5,
+
+
+        }
+
+
+    )
+
+
+    rel = rel.rename_axis(["periodo", "exame", "equipamento"]).reset_index()
+
+
+    return _ordenar_relatorio(rel[colunas], ["periodo", "exame", "equipamento"])
+
+
+
+
+
+
+
+
+def gerar_relatorio_producao_rollup(
+
+
+    df_rollup: pd.DataFrame,
+
+
+    df_corridas: pd.DataFrame,
+
+
+    periodo_inicio: Optional[pd.Timestamp] = None,
+
+
+    periodo_fim: Optional[pd.Timestamp] = None,
+
+
+    frequencia: str = "D",
+
+
+) -> pd.DataFrame:
+
+
+    """Produção por Período a partir dos agregados diários.
+
+
+
+
+
+    Mesmo resultado de gerar_relatorio_producao_periodo. n_corridas soma as
+
+
+    corridas de cada dia: cada corrida pertence a um único dia.
+
+
+    """
+
+
+    colunas = ["periodo", "exame", "equipamento", "n_corridas", "n_exames"]
+
+
+    if df_rollup.empty:
+
+
+        return pd.DataFrame(columns=colunas)
+
+
+
+
+
+    chaves = ["__periodo__", "exame", "equipamento"]
+
+
+    amostras = _amostras_rollup(
+
+
+        _rollup_no_periodo(df_rollup, periodo_inicio, periodo_fim, frequencia)
+
+
+    )
+
+
+    if amostras.empty:
+
+
+        return pd.DataFrame(columns=colunas)
+
+
+    rel = amostras.groupby(chaves, dropna=False)["n"].sum().rename("n_exames").to_frame()
+
+
+
+
+
+    corridas = _rollup_no_periodo(df_corridas, periodo_inicio, periodo_fim, frequencia)
+
+
+    n_corridas = corridas.groupby(chaves, dropna=False)["n_corridas"].sum()
+
+
+    rel["n_corridas"] = n_corridas.reindex(rel.index).fillna(0).astype(int)
+
+
+    rel["n_exames"] = rel["n_exames"].astype(int)
+
+
+
+
+
+    rel = rel.rename_axis(["periodo", "exame", "equipamento"]).reset_index()
+
+
+    return _ordenar_relatorio(rel[colunas], ["periodo", "exame", "equipamento"])
+
+
+
+
+
+
+
+
+def gerar_relatorio_positividade_exame_rollup(
+
+
+    df_rollup: pd.DataFrame,
+
+
+    periodo_inicio: Optional[pd.Timestamp] = None,
+
+
+    periodo_fim: Optional[pd.Timestamp] = None,
+
+
+    frequencia: str = "M",
+
+
+) -> pd.DataFrame:
+
+
+    """Positividade por Exame / Período a partir dos agregados diários.
+
+
+
+
+
+    Mesmo resultado de gerar_relatorio_positividade_exame_periodo.
+
+
+    """
+
+
+    colunas = [
+
+
+        "periodo",
+
+
+        "exame",
+
+
+        "n_amostras",
+
+
+        "n_positivas",
+
+
+        "n_negativas",
+
+
+        "perc_positivas",
+
+
+        "perc_negativas",
+
+
+    ]
+
+
+    if df_rollup.empty:
+
+
+        return pd.DataFrame(columns=colunas)
+
+
+
+
+
+    amostras = _amostras_rollup(
+
+
+        _rollup_no_periodo(df_rollup, periodo_inicio, periodo_fim, frequencia)
+
+
+    )
+
+
+    if amostras.empty:
+
+
+        return pd.DataFrame(columns=colunas)
+
+
+
+
+
+    resultado = amostras["resultado"].fillna("").astype(str).str.strip().str.lower()
+
+
+    amostras = amostras.assign(
+
+
+        _pos=amostras["n"].where(resultado == "positivo", 0),
+
+
+        _neg=amostras["n"].where(resultado == "negativo", 0),
+
+
+    )
+
+
+    rel = amostras.groupby(["__periodo__", "exame"], dropna=False)[["n", "_pos", "_neg"]].sum()
+
+
+    rel = pd.DataFrame(
+
+
+        {
+
+
+            "n_amostras": rel["n"].astype(int),
+
+
+            "n_positivas": rel["_pos"].astype(int),
+
+
+            "n_negativas": rel["_neg"].astype(int),
+
+
+            "perc_positivas": rel["_pos"] / rel["n"],
+
+
+            "perc_negativas": rel["_neg"] / rel["n"],
+
+
+        }
+
+
+    )
+
+
+    rel = rel.rename_axis(["periodo", "exame"]).reset_index()
+
+
+    return _ordenar_relatorio(rel[colunas], ["periodo", "exame"])
+
+
+
+
+
+
+
+
+def gerar_relatorio_produtividade_equipamento_rollup(
+
+
+    df_rollup: pd.DataFrame,
+
+
+    df_corridas: pd.DataFrame,
+
+
+    periodo_inicio: Optional[pd.Timestamp] = None,
+
+
+    periodo_fim: Optional[pd.Timestamp] = None,
+
+
+    frequencia: str = "M",
+
+
+) -> pd.DataFrame:
+
+
+    """Produtividade por Equipamento a partir dos agregados diários.
+
+
+
+
+
+    Mesmo resultado de gerar_relatorio_produtividade_equipamento.
+
+
+    """
+
+
+    colunas = ["periodo", "equipamento", "n_corridas", "n_amostras"]
+
+
+    rel = gerar_relatorio_producao_rollup(
+
+
+        df_rollup, df_corridas, periodo_inicio, periodo_fim, frequencia
+
+
+    )
+
+
+    if rel.empty:
+
+
+        return pd.DataFrame(columns=colunas)
+
+
+
+
+
+    rel = rel.groupby(["periodo", "equipamento"], dropna=False)[
+
+
+        ["n_corridas", "n_exames"]
+
+
+    ].sum()
+
+
+    rel = rel.rename(columns={"n_exames": "n_amostras"}).reset_index()
+
+
+    return _ordenar_relatorio(rel[colunas], ["periodo", "equipamento"])
+
+
@@ -49,7 +49,7 @@ import hashlib
 
 
 
-import uuid
+import io
 
 
 
@@ -57,7 +57,7 @@ import uuid
 
 
 
-from dataclasses import dataclass
+import os
 
 
 
@@ -65,7 +65,7 @@ from dataclasses import dataclass
 
 
 
-from datetime import datetime, timedelta
+import threading
 
 
 
@@ -73,7 +73,7 @@ from datetime import datetime, timedelta
 
 
 
-from enum import Enum
+import uuid
 
 
 
@@ -81,7 +81,7 @@ from enum import Enum
 
 
 
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
 
 
 
@@ -89,6 +89,7 @@ from typing import Any, Dict, List, Optional, Tuple
 
 
 
+from dataclasses import dataclass
 
 
 
@@ -96,14 +97,15 @@ from typing import Any, Dict, List, Optional, Tuple
 
 
 
+from datetime import datetime, timedelta
 
-import bcrypt
 
 
 
 
 
 
+from enum import Enum
 
 
 
@@ -111,6 +113,7 @@ import bcrypt
 
 
 
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 
 
@@ -121,15 +124,14 @@ import bcrypt
 
 
 
-class NivelAcesso(Enum):
 
 
 
 
 
+import bcrypt
 
 
-    """Níveis de acesso hierárquicos"""
 
 
 
@@ -143,9 +145,9 @@ class NivelAcesso(Enum):
 
 
 
+from services.csv_lock import csv_lock
 
 
-    ADMINISTRADOR = "ADMIN"
 
 
 
@@ -153,21 +155,21 @@ class NivelAcesso(Enum):
 
 
 
-    MASTER = "MASTER"
 
 
 
 
 
 
+CAMPOS_USUARIO = [
 
-    DIAGNOSTICO = "DIAGNOSTICO"
 
 
 
 
 
 
+    "id",
 
 
 
@@ -175,6 +177,7 @@ class NivelAcesso(Enum):
 
 
 
+    "usuario",
 
 
 
@@ -182,22 +185,23 @@ class NivelAcesso(Enum):
 
 
 
+    "senha_hash",
 
 
 
-class StatusUsuario(Enum):
 
 
 
 
+    "nivel_acesso",
 
 
 
-    """Status possíveis do usuário"""
 
 
 
 
+    "status",
 
 
 
@@ -205,38 +209,39 @@ class StatusUsuario(Enum):
 
 
 
+    "data_criacao",
 
 
 
 
-    ATIVO = "ATIVO"
 
 
 
+    "ultimo_acesso",
 
 
 
 
-    INATIVO = "INATIVO"
 
 
 
+    "tentativas_falhas",
 
 
 
 
-    BLOQUEADO = "BLOQUEADO"
 
 
 
+    "bloqueado_ate",
 
 
 
 
-    EXPIRADO = "EXPIRADO"
 
 
 
+    "preferencias",
 
 
 
@@ -244,6 +249,7 @@ class StatusUsuario(Enum):
 
 
 
+]
 
 
 
@@ -257,25 +263,25 @@ class StatusUsuario(Enum):
 
 
 
-@dataclass
 
 
+# bcrypt é lento de propósito (~0,2 s por verificação): autenticar_async roda
 
 
 
 
 
-class Usuario:
 
 
+# a verificação nestas threads para não congelar a tela de login
 
 
 
 
 
-    """Estrutura de dados do usuário"""
 
 
+_executor_senhas: Optional[ThreadPoolExecutor] = None
 
 
 
@@ -283,13 +289,13 @@ class Usuario:
 
 
 
+_executor_lock = threading.Lock()
 
 
 
 
 
 
-    id: str
 
 
 
@@ -297,7 +303,6 @@ class Usuario:
 
 
 
-    usuario: str
 
 
 
@@ -305,55 +310,54 @@ class Usuario:
 
 
 
-    senha_hash: str
 
 
 
+def _obter_executor_senhas() -> ThreadPoolExecutor:
 
 
 
 
-    nivel_acesso: NivelAcesso
 
 
 
+    global _executor_senhas
 
 
 
 
-    status: StatusUsuario
 
 
 
+    with _executor_lock:
 
 
 
 
-    data_criacao: str
 
 
 
+        if _executor_senhas is None:
 
 
 
 
-    ultimo_acesso: str
 
 
 
+            _executor_senhas = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bcrypt")
 
 
 
 
-    tentativas_falhas: int = 0
 
 
 
+        return _executor_senhas
 
 
 
 
-    bloqueado_ate: Optional[str] = None
 
 
 
@@ -361,7 +365,6 @@ class Usuario:
 
 
 
-    preferencias: Dict[str, Any] = None
 
 
 
@@ -374,6 +377,7 @@ class Usuario:
 
 
 
+class NivelAcesso(Enum):
 
 
 
@@ -381,11 +385,11 @@ class Usuario:
 
 
 
+    """Níveis de acesso hierárquicos"""
 
 
 
 
-class UserManager:
 
 
 
@@ -393,31 +397,30 @@ class UserManager:
 
 
 
-    """
 
 
 
 
+    ADMINISTRADOR = "ADMIN"
 
 
 
-    Gerenciador completo de usuários do sistema IntegraGAL
 
 
 
 
+    MASTER = "MASTER"
 
 
 
-    Responsável por autenticação, autorização e gerenciamento de contas
 
 
 
 
+    DIAGNOSTICO = "DIAGNOSTICO"
 
 
 
-    """
 
 
 
@@ -433,23 +436,22 @@ class UserManager:
 
 
 
-    def __init__(self, csv_path: str = "banco/usuarios.csv"):
 
 
 
 
 
+class StatusUsuario(Enum):
 
 
-        self.csv_path = csv_path
 
 
 
 
 
+    """Status possíveis do usuário"""
 
 
-        self._garantir_arquivo_existe()
 
 
 
@@ -457,21 +459,21 @@ class UserManager:
 
 
 
-        self._session_timeout = timedelta(hours=8)  # 8 horas de sessão
 
 
 
 
 
 
+    ATIVO = "ATIVO"
 
-        self._max_tentativas = 3
 
 
 
 
 
 
+    INATIVO = "INATIVO"
 
 
 
@@ -479,17 +481,17 @@ class UserManager:
 
 
 
+    BLOQUEADO = "BLOQUEADO"
 
 
-    def _garantir_arquivo_existe(self) -> None:
 
 
 
 
 
+    EXPIRADO = "EXPIRADO"
 
 
-        """Garante que o arquivo CSV de usuários existe com headers"""
 
 
 
@@ -497,7 +499,6 @@ class UserManager:
 
 
 
-        try:
 
 
 
@@ -505,7 +506,6 @@ class UserManager:
 
 
 
-            with open(self.csv_path, "x", newline="", encoding="utf-8") as file:
 
 
 
@@ -513,7 +513,7 @@ class UserManager:
 
 
 
-                writer = csv.DictWriter(
+@dataclass
 
 
 
@@ -521,7 +521,7 @@ class UserManager:
 
 
 
-                    file,
+class Usuario:
 
 
 
@@ -529,7 +529,7 @@ class UserManager:
 
 
 
-                    fieldnames=[
+    """Estrutura de dados do usuário"""
 
 
 
@@ -537,7 +537,6 @@ class UserManager:
 
 
 
-                        "id",
 
 
 
@@ -545,87 +544,86 @@ class UserManager:
 
 
 
-                        "usuario",
 
+    id: str
 
 
 
 
 
 
-                        "senha_hash",
 
+    usuario: str
 
 
 
 
 
 
-                        "nivel_acesso",
 
+    senha_hash: str
 
 
 
 
 
 
-                        "status",
 
+    nivel_acesso: NivelAcesso
 
 
 
 
 
 
-                        "data_criacao",
 
+    status: StatusUsuario
 
 
 
 
 
 
-                        "ultimo_acesso",
 
+    data_criacao: str
 
 
 
 
 
 
-                        "tentativas_falhas",
 
+    ultimo_acesso: str
 
 
 
 
 
 
-                        "bloqueado_ate",
 
+    tentativas_falhas: int = 0
 
 
 
 
 
 
-                        "preferencias",
 
+    bloqueado_ate: Optional[str] = None
 
 
 
 
 
 
-                    ],
 
+    preferencias: Dict[str, Any] = None
 
 
 
 
 
 
-                )
 
 
 
@@ -633,7 +631,6 @@ class UserManager:
 
 
 
-                writer.writeheader()
 
 
 
@@ -641,18 +638,18 @@ class UserManager:
 
 
 
-        except FileExistsError:
 
 
 
+class UserManager:
 
 
 
 
-            pass  # Arquivo já existe
 
 
 
+    """
 
 
 
@@ -660,28 +657,28 @@ class UserManager:
 
 
 
+    Gerenciador completo de usuários do sistema IntegraGAL
 
 
 
 
 
-    def _carregar_usuarios(self) -> List[Usuario]:
 
 
+    Responsável por autenticação, autorização e gerenciamento de contas
 
 
 
 
 
-        """Carrega usuários do arquivo CSV"""
 
 
+    """
 
 
 
 
 
-        usuarios = []
 
 
 
@@ -689,95 +686,94 @@ class UserManager:
 
 
 
-        try:
 
 
 
+    def __init__(self, csv_path: str = "banco/usuarios.csv"):
 
 
 
 
-            with open(self.csv_path, "r", encoding="utf-8") as file:
 
 
 
+        self.csv_path = csv_path
 
 
 
 
-                reader = csv.DictReader(file)
 
 
 
+        self._garantir_arquivo_existe()
 
 
 
 
-                for row in reader:
 
 
 
+        self._session_timeout = timedelta(hours=8)  # 8 horas de sessão
 
 
 
 
-                    usuario = Usuario(
 
 
 
+        self._max_tentativas = 3
 
 
 
 
-                        id=row["id"],
 
 
 
+        # Índice em memória (usuario.lower() -> Usuario), relido só quando o
 
 
 
 
-                        usuario=row["usuario"],
 
 
 
+        # arquivo muda (mtime/tamanho) - inclusive por outra estação da rede
 
 
 
 
-                        senha_hash=row["senha_hash"],
 
 
 
+        self._lock = threading.RLock()
 
 
 
 
-                        nivel_acesso=NivelAcesso(row["nivel_acesso"]),
 
 
 
+        self._usuarios: List[Usuario] = []
 
 
 
 
-                        status=StatusUsuario(row["status"]),
 
 
 
+        self._indice: Dict[str, Usuario] = {}
 
 
 
 
-                        data_criacao=row["data_criacao"],
 
 
 
+        self._assinatura: Optional[Tuple[int, int]] = None
 
 
 
 
-                        ultimo_acesso=row["ultimo_acesso"],
 
 
 
@@ -785,67 +781,67 @@ class UserManager:
 
 
 
-                        tentativas_falhas=int(row.get("tentativas_falhas", 0)),
 
 
 
 
+    def _garantir_arquivo_existe(self) -> None:
 
 
 
-                        bloqueado_ate=row.get("bloqueado_ate"),
 
 
 
 
+        """Garante que o arquivo CSV de usuários existe com headers"""
 
 
 
-                        preferencias=self._parse_json(row.get("preferencias", "{}")),
 
 
 
 
+        try:
 
 
 
-                    )
 
 
 
 
+            with open(self.csv_path, "x", newline="", encoding="utf-8") as file:
 
 
 
-                    usuarios.append(usuario)
 
 
 
 
+                writer = csv.DictWriter(file, fieldnames=CAMPOS_USUARIO)
 
 
 
-        except Exception as e:
 
 
 
 
+                writer.writeheader()
 
 
 
-            print(f"Erro ao carregar usuários: {e}")
 
 
 
 
+        except FileExistsError:
 
 
 
-        return usuarios
 
 
 
 
+            pass  # Arquivo já existe
 
 
 
@@ -857,55 +853,54 @@ class UserManager:
 
 
 
-    def _salvar_usuarios(self, usuarios: List[Usuario]) -> bool:
 
 
 
 
+    def _assinatura_arquivo(self) -> Optional[Tuple[int, int]]:
 
 
 
-        """Salva lista de usuários no arquivo CSV"""
 
 
 
 
+        try:
 
 
 
-        try:
 
 
 
 
+            st = os.stat(self.csv_path)
 
 
 
-            with open(self.csv_path, "w", newline="", encoding="utf-8") as file:
 
 
 
 
+        except OSError:
 
 
 
-                writer = csv.DictWriter(
 
 
 
 
+            return None
 
 
 
-                    file,
 
 
 
 
+        return st.st_mtime_ns, st.st_size
 
 
 
-                    fieldnames=[
 
 
 
@@ -913,95 +908,94 @@ class UserManager:
 
 
 
-                        "id",
 
 
 
 
 
+    def _obter_indice(self) -> Dict[str, Usuario]:
 
 
-                        "usuario",
 
 
 
 
 
+        """Índice de usuários por nome (minúsculo), relendo o CSV só se ele mudou"""
 
 
-                        "senha_hash",
 
 
 
 
 
+        with self._lock:
 
 
-                        "nivel_acesso",
 
 
 
 
 
+            assinatura = self._assinatura_arquivo()
 
 
-                        "status",
 
 
 
 
 
+            if assinatura is None or assinatura != self._assinatura:
 
 
-                        "data_criacao",
 
 
 
 
 
+                self._usuarios = self._ler_arquivo()
 
 
-                        "ultimo_acesso",
 
 
 
 
 
+                self._indice = {}
 
 
-                        "tentativas_falhas",
 
 
 
 
 
+                for usuario in self._usuarios:
 
 
-                        "bloqueado_ate",
 
 
 
 
 
+                    self._indice.setdefault(usuario.usuario.lower(), usuario)
 
 
-                        "preferencias",
 
 
 
 
 
+                self._assinatura = assinatura
 
 
-                    ],
 
 
 
 
 
+            return self._indice
 
 
-                )
 
 
 
@@ -1009,13 +1003,13 @@ class UserManager:
 
 
 
-                writer.writeheader()
 
 
 
 
 
 
+    def invalidar_cache(self) -> None:
 
 
 
@@ -1023,25 +1017,25 @@ class UserManager:
 
 
 
+        """Força a releitura do CSV na próxima consulta"""
 
 
-                for usuario in usuarios:
 
 
 
 
 
+        with self._lock:
 
 
-                    row = {
 
 
 
 
 
+            self._assinatura = None
 
 
-                        "id": usuario.id,
 
 
 
@@ -1049,47 +1043,46 @@ class UserManager:
 
 
 
-                        "usuario": usuario.usuario,
 
 
 
 
 
 
+    def _carregar_usuarios(self) -> List[Usuario]:
 
-                        "senha_hash": usuario.senha_hash,
 
 
 
 
 
 
+        """Usuários cadastrados (índice em memória)"""
 
-                        "nivel_acesso": usuario.nivel_acesso.value,
 
 
 
 
 
 
+        with self._lock:
 
-                        "status": usuario.status.value,
 
 
 
 
 
 
+            self._obter_indice()
 
-                        "data_criacao": usuario.data_criacao,
 
 
 
 
 
 
+            return list(self._usuarios)
 
-                        "ultimo_acesso": usuario.ultimo_acesso,
 
 
 
@@ -1097,7 +1090,6 @@ class UserManager:
 
 
 
-                        "tentativas_falhas": usuario.tentativas_falhas,
 
 
 
@@ -1105,7 +1097,7 @@ class UserManager:
 
 
 
-                        "bloqueado_ate": usuario.bloqueado_ate,
+    def _ler_arquivo(self) -> List[Usuario]:
 
 
 
@@ -1113,7 +1105,7 @@ class UserManager:
 
 
 
-                        "preferencias": self._to_json(usuario.preferencias or {}),
+        """Carrega usuários do arquivo CSV"""
 
 
 
@@ -1121,7 +1113,7 @@ class UserManager:
 
 
 
-                    }
+        usuarios = []
 
 
 
@@ -1129,7 +1121,7 @@ class UserManager:
 
 
 
-                    writer.writerow(row)
+        try:
 
 
 
@@ -1137,7 +1129,7 @@ class UserManager:
 
 
 
-            return True
+            with open(self.csv_path, "r", encoding="utf-8") as file:
 
 
 
@@ -1145,7 +1137,7 @@ class UserManager:
 
 
 
-        except Exception as e:
+                reader = csv.DictReader(file)
 
 
 
@@ -1153,7 +1145,7 @@ class UserManager:
 
 
 
-            print(f"Erro ao salvar usuários: {e}")
+                for row in reader:
 
 
 
@@ -1161,7 +1153,7 @@ class UserManager:
 
 
 
-            return False
+                    usuario = Usuario(
 
 
 
@@ -1169,6 +1161,7 @@ class UserManager:
 
 
 
+                        id=row["id"],
 
 
 
@@ -1176,38 +1169,39 @@ class UserManager:
 
 
 
+                        usuario=row["usuario"],
 
-    def _parse_json(self, json_str: str) -> Dict[str, Any]:
 
 
 
 
 
 
+                        senha_hash=row["senha_hash"],
 
-        """Parse string JSON de forma segura"""
 
 
 
 
 
 
+                        nivel_acesso=NivelAcesso(row["nivel_acesso"]),
 
-        try:
 
 
 
 
 
 
+                        status=StatusUsuario(row["status"]),
 
-            import json
 
 
 
 
 
 
+                        data_criacao=row["data_criacao"],
 
 
 
@@ -1215,30 +1209,31 @@ class UserManager:
 
 
 
+                        ultimo_acesso=row["ultimo_acesso"],
 
 
-            return json.loads(json_str) if json_str else {}
 
 
 
 
 
+                        tentativas_falhas=int(row.get("tentativas_falhas", 0)),
 
 
-        except Exception:
 
 
 
 
 
+                        bloqueado_ate=row.get("bloqueado_ate"),
 
 
-            return {}
 
 
 
 
 
+                        preferencias=self._parse_json(row.get("preferencias", "{}")),
 
 
 
@@ -1246,38 +1241,39 @@ class UserManager:
 
 
 
+                    )
 
 
 
-    def _to_json(self, obj: Any) -> str:
 
 
 
 
+                    usuarios.append(usuario)
 
 
 
-        """Converte objeto para string JSON de forma segura"""
 
 
 
 
+        except Exception as e:
 
 
 
-        try:
 
 
 
 
+            print(f"Erro ao carregar usuários: {e}")
 
 
 
-            import json
 
 
 
 
+        return usuarios
 
 
 
@@ -1289,27 +1285,27 @@ class UserManager:
 
 
 
-            return json.dumps(obj)
 
 
 
 
+    def _linha_de_usuario(self, usuario: Usuario) -> Dict[str, Any]:
 
 
 
-        except Exception:
 
 
 
 
+        return {
 
 
 
-            return "{}"
 
 
 
 
+            "id": usuario.id,
 
 
 
@@ -1317,70 +1313,71 @@ class UserManager:
 
 
 
+            "usuario": usuario.usuario,
 
 
 
 
-    def autenticar(
 
 
 
+            "senha_hash": usuario.senha_hash,
 
 
 
 
-        self, username: str, password: str, nivel_solicitado: str = None
 
 
 
+            "nivel_acesso": usuario.nivel_acesso.value,
 
 
 
 
-    ) -> Optional[Tuple[Usuario, str]]:
 
 
 
+            "status": usuario.status.value,
 
 
 
 
-        """
 
 
 
+            "data_criacao": usuario.data_criacao,
 
 
 
 
-        Autentica usuário no sistema
 
 
 
+            "ultimo_acesso": usuario.ultimo_acesso,
 
 
 
 
-        Retorna tupla (usuario, token_sessao) ou None
 
 
 
+            "tentativas_falhas": usuario.tentativas_falhas,
 
 
 
 
-        """
 
 
 
+            "bloqueado_ate": usuario.bloqueado_ate,
 
 
 
 
-        usuarios = self._carregar_usuarios()
 
 
 
+            "preferencias": self._to_json(usuario.preferencias or {}),
 
 
 
@@ -1388,12 +1385,12 @@ class UserManager:
 
 
 
+        }
 
 
 
 
 
-        # Buscar usuário
 
 
 
@@ -1401,42 +1398,42 @@ class UserManager:
 
 
 
-        usuario_encontrado = None
 
 
 
+    def _salvar_usuarios(self, usuarios: List[Usuario]) -> bool:
 
 
 
 
-        for usuario in usuarios:
 
 
 
+        """Salva lista de usuários no arquivo CSV (regrava o arquivo inteiro)"""
 
 
 
 
-            if usuario.usuario.lower() == username.lower():
 
 
 
+        try:
 
 
 
 
-                usuario_encontrado = usuario
 
 
 
+            with self._lock, csv_lock(self.csv_path, timeout=10):
 
 
 
 
-                break
 
 
 
+                with open(self.csv_path, "w", newline="", encoding="utf-8") as file:
 
 
 
@@ -1444,20 +1441,20 @@ class UserManager:
 
 
 
+                    writer = csv.DictWriter(file, fieldnames=CAMPOS_USUARIO)
 
 
 
 
 
-        if not usuario_encontrado:
 
 
+                    writer.writeheader()
 
 
 
 
 
-            return None
 
 
 
@@ -1468,30 +1465,31 @@ class UserManager:
 
 
 
+                    for usuario in usuarios:
 
 
 
 
 
-        # Verificar status
 
 
+                        writer.writerow(self._linha_de_usuario(usuario))
 
 
 
 
 
-        if usuario_encontrado.status != StatusUsuario.ATIVO:
 
 
+                self.invalidar_cache()
 
 
 
 
 
-            return None
 
 
+            return True
 
 
 
@@ -1499,37 +1497,37 @@ class UserManager:
 
 
 
+        except Exception as e:
 
 
 
 
 
 
-        # Verificar bloqueio
 
+            print(f"Erro ao salvar usuários: {e}")
 
 
 
 
 
 
-        if usuario_encontrado.bloqueado_ate:
 
+            self.invalidar_cache()
 
 
 
 
 
 
-            bloqueado_ate = datetime.strptime(
 
+            return False
 
 
 
 
 
 
-                usuario_encontrado.bloqueado_ate, "%Y-%m-%d %H:%M:%S"
 
 
 
@@ -1537,25 +1535,25 @@ class UserManager:
 
 
 
-            )
 
 
+    def _atualizar_usuario(
 
 
 
 
 
-            if datetime.now() < bloqueado_ate:
 
 
+        self, username: str, alteracao: Callable[[Usuario], None]
 
 
 
 
 
-                return None
 
 
+    ) -> Optional[Usuario]:
 
 
 
@@ -1563,21 +1561,21 @@ class UserManager:
 
 
 
+        """
 
 
 
 
 
 
-        # Verificar senha
 
+        Aplica `alteracao` ao registro atual do usuário e grava só a linha dele
 
 
 
 
 
 
-        if not bcrypt.checkpw(
 
 
 
@@ -1585,33 +1583,33 @@ class UserManager:
 
 
 
-            password.encode("utf-8"), usuario_encontrado.senha_hash.encode("utf-8")
 
 
+        Com o CSV travado, o índice é relido se outra estação alterou o arquivo:
 
 
 
 
 
-        ):
 
 
+        logins simultâneos não sobrescrevem os contadores uns dos outros.
 
 
 
 
 
-            # Incrementar tentativas falhas
 
 
+        """
 
 
 
 
 
-            usuario_encontrado.tentativas_falhas += 1
 
 
+        try:
 
 
 
@@ -1619,54 +1617,55 @@ class UserManager:
 
 
 
+            with self._lock, csv_lock(self.csv_path, timeout=10):
 
 
 
 
 
 
-            # Bloquear após 3 tentativas
 
+                usuario = self._obter_indice().get(username.lower())
 
 
 
 
 
 
-            if usuario_encontrado.tentativas_falhas >= self._max_tentativas:
 
+                if usuario is None:
 
 
 
 
 
 
-                usuario_encontrado.status = StatusUsuario.BLOQUEADO
 
+                    return None
 
 
 
 
 
 
-                usuario_encontrado.bloqueado_ate = (
 
+                alteracao(usuario)
 
 
 
 
 
 
-                    datetime.now() + timedelta(minutes=30)
 
+                self._gravar_linha(usuario)
 
 
 
 
 
 
-                ).strftime("%Y-%m-%d %H:%M:%S")
 
+                self._assinatura = self._assinatura_arquivo()
 
 
 
@@ -1674,6 +1673,7 @@ class UserManager:
 
 
 
+                return usuario
 
 
 
@@ -1681,7 +1681,7 @@ class UserManager:
 
 
 
-            self._salvar_usuarios(usuarios)
+        except Exception as e:
 
 
 
@@ -1689,7 +1689,7 @@ class UserManager:
 
 
 
-            return None
+            print(f"Erro ao salvar usuário: {e}")
 
 
 
@@ -1697,6 +1697,7 @@ class UserManager:
 
 
 
+            self.invalidar_cache()
 
 
 
@@ -1704,8 +1705,8 @@ class UserManager:
 
 
 
+            return None
 
-        # Reset tentativas falhas
 
 
 
@@ -1713,7 +1714,6 @@ class UserManager:
 
 
 
-        usuario_encontrado.tentativas_falhas = 0
 
 
 
@@ -1721,7 +1721,7 @@ class UserManager:
 
 
 
-        usuario_encontrado.ultimo_acesso = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    def _gravar_linha(self, usuario: Usuario) -> None:
 
 
 
@@ -1729,6 +1729,7 @@ class UserManager:
 
 
 
+        """
 
 
 
@@ -1736,8 +1737,8 @@ class UserManager:
 
 
 
+        Regrava apenas a linha do usuário no CSV
 
-        # Verificar nível de acesso solicitado
 
 
 
@@ -1745,7 +1746,6 @@ class UserManager:
 
 
 
-        if nivel_solicitado:
 
 
 
@@ -1753,7 +1753,7 @@ class UserManager:
 
 
 
-            nivel_enum = NivelAcesso(nivel_solicitado.upper())
+        Se a linha nova tem o mesmo tamanho em bytes (caso comum: último acesso,
 
 
 
@@ -1761,7 +1761,7 @@ class UserManager:
 
 
 
-            hierarquia = {
+        contador zerado), ela é sobrescrita no lugar; senão só o trecho do
 
 
 
@@ -1769,7 +1769,7 @@ class UserManager:
 
 
 
-                NivelAcesso.DIAGNOSTICO: 1,
+        arquivo a partir dela é regravado.
 
 
 
@@ -1777,7 +1777,7 @@ class UserManager:
 
 
 
-                NivelAcesso.MASTER: 2,
+        """
 
 
 
@@ -1785,7 +1785,7 @@ class UserManager:
 
 
 
-                NivelAcesso.ADMINISTRADOR: 3,
+        with open(self.csv_path, "r+b") as file:
 
 
 
@@ -1793,7 +1793,7 @@ class UserManager:
 
 
 
-            }
+            conteudo = file.read()
 
 
 
@@ -1801,6 +1801,7 @@ class UserManager:
 
 
 
+            linhas = conteudo.splitlines(keepends=True)
 
 
 
@@ -1808,22 +1809,23 @@ class UserManager:
 
 
 
+            cabecalho = next(csv.reader([linhas[0].decode("utf-8-sig")])) if linhas else CAMPOS_USUARIO
 
-            if hierarquia[usuario_encontrado.nivel_acesso] < hierarquia[nivel_enum]:
 
 
 
 
 
 
+            terminador = "\n" if linhas and not linhas[0].endswith(b"\r\n") else "\r\n"
 
-                return None
 
 
 
 
 
 
+            buffer = io.StringIO()
 
 
 
@@ -1831,22 +1833,23 @@ class UserManager:
 
 
 
+            csv.DictWriter(
 
 
-        # Gerar token de sessão
 
 
 
 
 
+                buffer, fieldnames=cabecalho, lineterminator=terminador, extrasaction="ignore"
 
 
-        token_sessao = self._gerar_token_sessao(usuario_encontrado)
 
 
 
 
 
+            ).writerow(self._linha_de_usuario(usuario))
 
 
 
@@ -1854,10 +1857,10 @@ class UserManager:
 
 
 
+            nova = buffer.getvalue().encode("utf-8")
 
 
 
-        # Salvar alterações
 
 
 
@@ -1865,12 +1868,12 @@ class UserManager:
 
 
 
-        self._salvar_usuarios(usuarios)
 
 
 
 
 
+            inicio, fim = self._localizar_linha(linhas, cabecalho, usuario.id)
 
 
 
@@ -1878,14 +1881,15 @@ class UserManager:
 
 
 
+            if inicio is None:
 
 
 
-        return usuario_encontrado, token_sessao
 
 
 
 
+                # linha removida por outra estação: volta para o fim do arquivo
 
 
 
@@ -1893,30 +1897,31 @@ class UserManager:
 
 
 
+                file.seek(0, os.SEEK_END)
 
 
 
 
-    def _gerar_token_sessao(self, usuario: Usuario) -> str:
 
 
 
+                if conteudo and not conteudo.endswith(b"\n"):
 
 
 
 
-        """Gera token único de sessão"""
 
 
 
+                    file.write(terminador.encode("utf-8"))
 
 
 
 
-        import secrets
 
 
 
+                file.write(nova)
 
 
 
@@ -1924,30 +1929,31 @@ class UserManager:
 
 
 
+            elif fim - inicio == len(nova):
 
 
 
 
 
-        timestamp = datetime.now().timestamp()
 
 
+                file.seek(inicio)
 
 
 
 
 
-        data = f"{usuario.id}:{usuario.usuario}:{timestamp}:{secrets.token_hex(16)}"
 
 
+                file.write(nova)
 
 
 
 
 
-        return hashlib.sha256(data.encode()).hexdigest()[:32]
 
 
+            else:
 
 
 
@@ -1955,29 +1961,29 @@ class UserManager:
 
 
 
+                file.seek(inicio)
 
 
 
 
 
 
-    def criar_usuario(
 
+                file.write(nova + conteudo[fim:])
 
 
 
 
 
 
-        self, username: str, password: str, nivel_acesso: NivelAcesso, criador: str
 
+                file.truncate()
 
 
 
 
 
 
-    ) -> Tuple[bool, str]:
 
 
 
@@ -1985,41 +1991,41 @@ class UserManager:
 
 
 
-        """
 
 
+    @staticmethod
 
 
 
 
 
-        Cria novo usuário (apenas ADMINISTRADOR)
 
 
+    def _localizar_linha(
 
 
 
 
 
-        Retorna (sucesso, mensagem)
 
 
+        linhas: List[bytes], cabecalho: List[str], id_usuario: str
 
 
 
 
 
-        """
 
 
+    ) -> Tuple[Optional[int], Optional[int]]:
 
 
 
 
 
-        usuarios = self._carregar_usuarios()
 
 
+        """Posição (início, fim) em bytes da linha do usuário `id_usuario`"""
 
 
 
@@ -2027,30 +2033,31 @@ class UserManager:
 
 
 
+        if not linhas or "id" not in cabecalho:
 
 
 
 
 
 
-        # Verificar se usuário já existe
 
+            return None, None
 
 
 
 
 
 
-        if any(u.usuario.lower() == username.lower() for u in usuarios):
 
+        col_id = cabecalho.index("id")
 
 
 
 
 
 
-            return False, "Usuário já existe"
 
+        id_bytes = id_usuario.encode("utf-8")
 
 
 
@@ -2058,6 +2065,7 @@ class UserManager:
 
 
 
+        pos = len(linhas[0])
 
 
 
@@ -2065,7 +2073,7 @@ class UserManager:
 
 
 
-        # Validar senha
+        for linha in linhas[1:]:
 
 
 
@@ -2073,7 +2081,7 @@ class UserManager:
 
 
 
-        if len(password) < 8:
+            if id_bytes in linha:
 
 
 
@@ -2081,7 +2089,7 @@ class UserManager:
 
 
 
-            return False, "Senha deve ter pelo menos 8 caracteres"
+                campos = next(csv.reader([linha.decode("utf-8")]), [])
 
 
 
@@ -2089,6 +2097,7 @@ class UserManager:
 
 
 
+                if len(campos) > col_id and campos[col_id] == id_usuario:
 
 
 
@@ -2096,24 +2105,24 @@ class UserManager:
 
 
 
+                    return pos, pos + len(linha)
 
-        # Hash da senha
 
 
 
 
 
 
+            pos += len(linha)
 
-        senha_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode(
 
 
 
 
 
 
+        return None, None
 
-            "utf-8"
 
 
 
@@ -2121,7 +2130,6 @@ class UserManager:
 
 
 
-        )
 
 
 
@@ -2129,6 +2137,7 @@ class UserManager:
 
 
 
+    def _parse_json(self, json_str: str) -> Dict[str, Any]:
 
 
 
@@ -2136,24 +2145,24 @@ class UserManager:
 
 
 
+        """Parse string JSON de forma segura"""
 
-        # Criar novo usuário
 
 
 
 
 
 
+        try:
 
-        novo_usuario = Usuario(
 
 
 
 
 
 
+            import json
 
-            id=str(uuid.uuid4())[:8],
 
 
 
@@ -2161,7 +2170,6 @@ class UserManager:
 
 
 
-            usuario=username,
 
 
 
@@ -2169,7 +2177,7 @@ class UserManager:
 
 
 
-            senha_hash=senha_hash,
+            return json.loads(json_str) if json_str else {}
 
 
 
@@ -2177,7 +2185,7 @@ class UserManager:
 
 
 
-            nivel_acesso=nivel_acesso,
+        except Exception:
 
 
 
@@ -2185,7 +2193,7 @@ class UserManager:
 
 
 
-            status=StatusUsuario.ATIVO,
+            return {}
 
 
 
@@ -2193,7 +2201,6 @@ class UserManager:
 
 
 
-            data_criacao=datetime.now().strftime("%Y-%m-%d"),
 
 
 
@@ -2201,31 +2208,880 @@ class UserManager:
 
 
 
-            ultimo_acesso=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
 
+    def _to_json(self, obj: Any) -> str:
 
 
 
 
 
 
-            preferencias={"tema": "claro", "idioma": "pt_BR", "notificacoes": True},
 
+        """Converte objeto para string JSON de forma segura"""
 
 
 
 
 
 
-        )
+
+        try:
+
+
+
+
+
+
+
+            import json
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+            return json.dumps(obj)
+
+
+
+
+
+
+
+        except Exception:
+
+
+
+
+
+
+
+            return "{}"
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+    def autenticar(
+
+
+
+
+
+
+
+        self, username: str, password: str, nivel_solicitado: str = None
+
+
+
+
+
+
+
+    ) -> Optional[Tuple[Usuario, str]]:
+
+
+
+
+
+
+
+        """
+
+
+
+
+
+
+
+        Autentica usuário no sistema
+
+
+
+
+
+
+
+        Retorna tupla (usuario, token_sessao) ou None
+
+
+
+
+
+
+
+        """
+
+
+
+
+
+
+
+        # Buscar usuário
+
+
+
+
+
+
+
+        usuario_encontrado = self._obter_indice().get(username.lower())
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        if not usuario_encontrado:
+
+
+
+
+
+
+
+            return None
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        # Verificar status
+
+
+
+
+
+
+
+        if usuario_encontrado.status != StatusUsuario.ATIVO:
+
+
+
+
+
+
+
+            return None
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        # Verificar bloqueio
+
+
+
+
+
+
+
+        if usuario_encontrado.bloqueado_ate:
+
+
+
+
+
+
+
+            bloqueado_ate = datetime.strptime(
+
+
+
+
+
+
+
+                usuario_encontrado.bloqueado_ate, "%Y-%m-%d %H:%M:%S"
+
+
+
+
+
+
+
+            )
+
+
+
+
+
+
+
+            if datetime.now() < bloqueado_ate:
+
+
+
+
+
+
+
+                return None
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        # Verificar senha
+
+
+
+
+
+
+
+        if not bcrypt.checkpw(
+
+
+
+
+
+
+
+            password.encode("utf-8"), usuario_encontrado.senha_hash.encode("utf-8")
+
+
+
+
+
+
+
+        ):
+
+
+
+
+
+
+
+            def registrar_falha(usuario: Usuario) -> None:
+
+
+
+
+
+
+
+                # Incrementar tentativas falhas
+
+
+
+
+
+
+
+                usuario.tentativas_falhas += 1
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+                # Bloquear após 3 tentativas
+
+
+
+
+
+
+
+                if usuario.tentativas_falhas >= self._max_tentativas:
+
+
+
+
+
+
+
+                    usuario.status = StatusUsuario.BLOQUEADO
+
+
+
+
+
+
+
+                    usuario.bloqueado_ate = (
+
+
+
+
+
+
+
+                        datetime.now() + timedelta(minutes=30)
+
+
+
+
+
+
+
+                    ).strftime("%Y-%m-%d %H:%M:%S")
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+            self._atualizar_usuario(usuario_encontrado.usuario, registrar_falha)
+
+
+
+
+
+
+
+            return None
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        # Verificar nível de acesso solicitado
+
+
+
+
+
+
+
+        if nivel_solicitado:
+
+
+
+
+
+
+
+            nivel_enum = NivelAcesso(nivel_solicitado.upper())
+
+
+
+
+
+
+
+            hierarquia = {
+
+
+
+
+
+
+
+                NivelAcesso.DIAGNOSTICO: 1,
+
+
+
+
+
+
+
+                NivelAcesso.MASTER: 2,
+
+
+
+
+
+
+
+                NivelAcesso.ADMINISTRADOR: 3,
+
+
+
+
+
+
+
+            }
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+            if hierarquia[usuario_encontrado.nivel_acesso] < hierarquia[nivel_enum]:
+
+
+
+
+
+
+
+                return None
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        def registrar_acesso(usuario: Usuario) -> None:
+
+
+
+
+
+
+
+            # Reset tentativas falhas
+
+
+
+
+
+
+
+            usuario.tentativas_falhas = 0
+
+
+
+
+
+
+
+            usuario.ultimo_acesso = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        # Salvar alterações (só a linha do usuário)
+
+
+
+
+
+
+
+        usuario_encontrado = (
+
+
+
+
+
+
+
+            self._atualizar_usuario(usuario_encontrado.usuario, registrar_acesso)
+
+
+
+
+
+
+
+            or usuario_encontrado
+
+
+
+
+
+
+
+        )
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        # Gerar token de sessão
+
+
+
+
+
+
+
+        token_sessao = self._gerar_token_sessao(usuario_encontrado)
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        return usuario_encontrado, token_sessao
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+    def autenticar_async(
+
+
+
+
+
+
+
+        self, username: str, password: str, nivel_solicitado: str = None
+
+
+
+
+
+
+
+    ) -> "Future[Optional[Tuple[Usuario, str]]]":
+
+
+
+
+
+
+
+        """
+
+
+
+
+
+
+
+        Executa `autenticar` (e o bcrypt.checkpw) numa thread de trabalho
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        A tela de login consulta o Future com `after` em vez de esperar o hash:
+
+
+
+
+
+
+
+            futuro = manager.autenticar_async(usuario, senha)
+
+
+
+
+
+
+
+            if futuro.done():
+
+
+
+
+
+
+
+                resultado = futuro.result()
+
+
+
+
+
+
+
+        """
+
+
+
+
+
+
+
+        return _obter_executor_senhas().submit(
+
+
+
+
+
+
+
+            self.autenticar, username, password, nivel_solicitado
+
+
+
+
+
+
+
+        )
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+    def _gerar_token_sessao(self, usuario: Usuario) -> str:
+
+
+
+
+
+
+
+        """Gera token único de sessão"""
+
+
+
+
+
+
+
+        import secrets
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        timestamp = datetime.now().timestamp()
+
+
+
+
+
+
+
+        data = f"{usuario.id}:{usuario.usuario}:{timestamp}:{secrets.token_hex(16)}"
+
+
+
+
+
+
+
+        return hashlib.sha256(data.encode()).hexdigest()[:32]
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+    def criar_usuario(
+
+
+
+
+
+
+
+        self, username: str, password: str, nivel_acesso: NivelAcesso, criador: str
+
+
+
+
+
+
+
+    ) -> Tuple[bool, str]:
+
+
+
+
+
+
+
+        """
+
+
+
+
+
+
+
+        Cria novo usuário (apenas ADMINISTRADOR)
+
+
+
 
 
 
 
+        Retorna (sucesso, mensagem)
+
+
+
 
 
 
 
+        """
 
 
 
@@ -2233,7 +3089,7 @@ class UserManager:
 
 
 
-        usuarios.append(novo_usuario)
+        # Verificar se usuário já existe
 
 
 
@@ -2241,6 +3097,7 @@ class UserManager:
 
 
 
+        if username.lower() in self._obter_indice():
 
 
 
@@ -2248,8 +3105,8 @@ class UserManager:
 
 
 
+            return False, "Usuário já existe"
 
-        if self._salvar_usuarios(usuarios):
 
 
 
@@ -2257,7 +3114,6 @@ class UserManager:
 
 
 
-            return True, f"Usuário '{username}' criado com sucesso"
 
 
 
@@ -2265,7 +3121,247 @@ class UserManager:
 
 
 
-        else:
+        # Validar senha
+
+
+
+
+
+
+
+        if len(password) < 8:
+
+
+
+
+
+
+
+            return False, "Senha deve ter pelo menos 8 caracteres"
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        # Hash da senha
+
+
+
+
+
+
+
+        senha_hash = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode(
+
+
+
+
+
+
+
+            "utf-8"
+
+
+
+
+
+
+
+        )
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        # Criar novo usuário
+
+
+
+
+
+
+
+        novo_usuario = Usuario(
+
+
+
+
+
+
+
+            id=str(uuid.uuid4())[:8],
+
+
+
+
+
+
+
+            usuario=username,
+
+
+
+
+
+
+
+            senha_hash=senha_hash,
+
+
+
+
+
+
+
+            nivel_acesso=nivel_acesso,
+
+
+
+
+
+
+
+            status=StatusUsuario.ATIVO,
+
+
+
+
+
+
+
+            data_criacao=datetime.now().strftime("%Y-%m-%d"),
+
+
+
+
+
+
+
+            ultimo_acesso=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+
+
+
+
+
+
+
+            preferencias={"tema": "claro", "idioma": "pt_BR", "notificacoes": True},
+
+
+
+
+
+
+
+        )
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+        try:
+
+
+
+
+
+
+
+            with self._lock, csv_lock(self.csv_path, timeout=10):
+
+
+
+
+
+
+
+                # outra estação pode ter criado o mesmo usuário durante o hash
+
+
+
+
+
+
+
+                if username.lower() in self._obter_indice():
+
+
+
+
+
+
+
+                    return False, "Usuário já existe"
+
+
+
+
+
+
+
+                self._gravar_linha(novo_usuario)  # acrescenta ao fim do arquivo
+
+
+
+
+
+
+
+                self.invalidar_cache()
+
+
+
+
+
+
+
+        except Exception as e:
+
+
+
+
+
+
+
+            print(f"Erro ao salvar usuário: {e}")
+
+
+
+
+
+
+
+            self.invalidar_cache()
 
 
 
@@ -2289,6 +3385,22 @@ class UserManager:
 
 
 
+        return True, f"Usuário '{username}' criado com sucesso"
+
+
+
+
+
+
+
+
+
+
+
+
+
+
+
     def listar_usuarios(self, filtro_status: StatusUsuario = None) -> List[Usuario]:
 
 
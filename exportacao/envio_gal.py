@@ -22,7 +22,7 @@ FLUXO DE ENVIO:
 2. Autenticar no sistema GAL
 3. Navegar para formulário de entrada
 4. Preencher campos com resultados
-5. Submeter e validar resposta
+5. Submeter em paralelo (sessão HTTP com os cookies do login) e validar resposta
 6. Registrar histórico de envio
 
 Ver: ANALISE_TECNICA_FUNCIONAMENTO.md (Seção 4 - Exportação GAL)
@@ -33,15 +33,19 @@ import os
 import sys
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import wraps
 from pathlib import Path
 from tkinter import filedialog, messagebox, simpledialog
 from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
 
 import customtkinter as ctk
 import pandas as pd
+import requests
 import simplejson as json
+from requests.adapters import HTTPAdapter
 from services.config_service import config_service
 from services.exam_registry import get_exam_cfg
 from utils.io_utils import read_data_with_auto_detection
@@ -148,10 +152,105 @@ def retry_with_backoff(
 # ==============================================================================
 # 2. CLASSE DE SERVIÇO (LÓGICA DE NEGÓCIO DESACOPLADA DA UI)
 # ==============================================================================
+METADADOS_CONFIG = GAL_CONFIG.get("metadados", {}) or {}
+
+
+def _codigo_gal(ex: Dict) -> int:
+    """`codigo` do exame no GAL como inteiro (0 se ausente/inválido)."""
+    try:
+        return int(ex.get("codigo", 0) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class CacheMetadadosGAL:
+    """
+    Cache em disco (JSON) dos metadados da lista de trabalho do GAL por codigoAmostra.
+
+    Mantém o exame de maior `codigo` de cada amostra; entradas mais antigas que
+    `ttl_horas` são descartadas. Permite reenviar um lote (ou enviar outro no
+    mesmo dia) sem baixar a lista de trabalho novamente.
+
+    O arquivo é compartilhado entre instâncias do GAL: cada entrada é guardada
+    sob `escopo` (base_url e laboratório), e uma amostra vista num escopo nunca
+    é devolvida para outro.
+    """
+
+    def __init__(self, arquivo: str, ttl_horas: float = 12.0):
+        self.arquivo = Path(arquivo)
+        self.ttl_segundos = float(ttl_horas) * 3600
+        self._lock = threading.Lock()
+        self._entradas: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def _carregar(self) -> Dict[str, Dict[str, Any]]:
+        if self._entradas is None:
+            entradas: Dict[str, Dict[str, Any]] = {}
+            try:
+                with open(self.arquivo, "r", encoding="utf-8") as f:
+                    entradas = json.load(f)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                registrar_log("Cache Metadados GAL", f"Cache ignorado ({e})", "WARNING")
+            limite = time.time() - self.ttl_segundos
+            self._entradas = {
+                ca: item
+                for ca, item in entradas.items()
+                if isinstance(item, dict) and item.get("salvo_em", 0) >= limite
+            }
+        return self._entradas
+
+    @staticmethod
+    def _chave(escopo: str, ca: str) -> str:
+        return f"{escopo}|{ca}"
+
+    def obter(self, codigos: Set[str], escopo: str = "") -> Dict[str, Dict]:
+        """Metadados válidos (dentro do TTL) das amostras pedidas que estão no cache do escopo."""
+        with self._lock:
+            entradas = self._carregar()
+            limite = time.time() - self.ttl_segundos
+            encontrados = {}
+            for ca in codigos:
+                item = entradas.get(self._chave(escopo, ca))
+                if item is not None and item.get("salvo_em", 0) >= limite:
+                    encontrados[ca] = item["meta"]
+            return encontrados
+
+    def atualizar(self, metas: Dict[str, Dict], escopo: str = "") -> None:
+        """Grava os metadados vistos no escopo, preservando o maior `codigo` por amostra."""
+        if not metas:
+            return
+        with self._lock:
+            entradas = self._carregar()
+            agora = time.time()
+            for ca, ex in metas.items():
+                chave = self._chave(escopo, ca)
+                atual = entradas.get(chave)
+                if atual is None or _codigo_gal(ex) >= _codigo_gal(atual["meta"]):
+                    entradas[chave] = {"salvo_em": agora, "meta": ex}
+            try:
+                self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+                temp = self.arquivo.with_suffix(self.arquivo.suffix + ".tmp")
+                with open(temp, "w", encoding="utf-8") as f:
+                    json.dump(entradas, f, ensure_ascii=False)
+                temp.replace(self.arquivo)
+            except Exception as e:
+                registrar_log("Cache Metadados GAL", f"Falha ao gravar cache: {e}", "WARNING")
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas = {}
+            try:
+                self.arquivo.unlink()
+            except FileNotFoundError:
+                pass
+
+
 class GalService:
     def __init__(self, logger_callback):
         self.log = logger_callback
         self.base_url = GAL_CONFIG.get("base_url")
+        self.laboratorio = GAL_CONFIG.get("laboratorio") or "LACEN"
         self.login_ids = GAL_CONFIG.get("login_ids", {})
         self.endpoints = GAL_CONFIG.get("api_endpoints", {})
         # Une os painéis configurados com o painel padrão utilizado nos scripts antigos
@@ -171,6 +270,15 @@ class GalService:
                 merged_panels[k] = merged
         self.panel_tests = merged_panels
         self.timeout = int(GAL_CONFIG.get("request_timeout", 30))
+        self.paginas_paralelas = max(1, int(METADADOS_CONFIG.get("paginas_paralelas", 4)))
+        self.cache_metadados = CacheMetadadosGAL(
+            METADADOS_CONFIG.get("cache_arquivo")
+            or os.path.join(
+                os.path.dirname(PATHS_CONFIG.get("log_file") or "logs/sistema.log"),
+                "cache_metadados_gal.json",
+            ),
+            ttl_horas=float(METADADOS_CONFIG.get("ttl_horas", 12)),
+        )
 
     @retry_with_backoff()
     def realizar_login(self, driver: WebDriver, usuario: str, senha: str):
@@ -192,7 +300,7 @@ class GalService:
             time.sleep(1)
             modulo.send_keys(Keys.TAB)
             time.sleep(1)
-            lab.send_keys("LACEN")
+            lab.send_keys(self.laboratorio)
             time.sleep(2)
             lab.send_keys(Keys.TAB)
             time.sleep(1)
@@ -281,17 +389,36 @@ class GalService:
 
     @retry_with_backoff()
     def buscar_metadados(
-        self, driver: WebDriver, codigos_amostra_set: Set[str]
+        self, driver: WebDriver, codigos_amostra_set: Set[str], usar_cache: bool = True
     ) -> Dict[str, Any]:
-        encontrados = {}
-        url = self.base_url + self.endpoints.get("metadata")
-        start, total, limit = 0, float("inf"), 500
+        """
+        Busca os metadados (exame de maior `codigo`) de cada codigoAmostra pedido.
+
+        Amostras presentes no cache local (do mesmo base_url e laboratório) não são
+        buscadas de novo. Para as demais, a lista de trabalho é paginada apenas até
+        cobrir o conjunto pedido: a primeira página informa o `total`, e as seguintes
+        são baixadas em paralelo (`paginas_paralelas` por vez). Todas as linhas vistas
+        alimentam o cache.
+        """
+        codigos = {str(c).strip() for c in codigos_amostra_set}
+        escopo = f"{self.base_url}|{self.laboratorio}"
+        encontrados = self.cache_metadados.obter(codigos, escopo) if usar_cache else {}
+        faltantes = codigos - set(encontrados)
 
         self.log(
-            f"Iniciando busca de metadados para {len(codigos_amostra_set)} amostras.",
+            f"Iniciando busca de metadados para {len(codigos)} amostras "
+            f"({len(encontrados)} em cache).",
             "info",
         )
-        while start < total and len(encontrados) < len(codigos_amostra_set):
+        if not faltantes:
+            self.log("Busca de metadados finalizada: todas as amostras em cache.", "info")
+            return encontrados
+
+        url = self.base_url + self.endpoints.get("metadata")
+        limit = 500
+        vistos: Dict[str, Dict] = {}
+
+        def buscar_pagina(start: int) -> Dict[str, Any]:
             payload = {"limit": limit, "start": start, "dtInicio": "", "dtFim": ""}
             resp = driver.request(
                 "POST",
@@ -301,26 +428,35 @@ class GalService:
                 timeout=self.timeout,
             )
             resp.raise_for_status()
-            data = resp.json()
-            total = data.get("total", 0)
-
-            if not data.get("dados"):
-                break
+            return resp.json()
 
-            for ex in data.get("dados", []):
+        def absorver(data: Dict[str, Any]) -> None:
+            for ex in data.get("dados") or []:
                 ca = str(ex.get("codigoAmostra", "")).strip()
-                if ca in codigos_amostra_set and (
-                    ca not in encontrados
-                    or ex.get("codigo", 0) > encontrados[ca].get("codigo", 0)
-                ):
-                    encontrados[ca] = ex
-
-            start += len(data.get("dados", []))
+                if ca and (ca not in vistos or _codigo_gal(ex) > _codigo_gal(vistos[ca])):
+                    vistos[ca] = ex
+
+        primeira = buscar_pagina(0)
+        absorver(primeira)
+        total = int(primeira.get("total", 0) or 0)
+        tamanho = len(primeira.get("dados") or []) or limit
+        inicios = list(range(tamanho, total, tamanho)) if primeira.get("dados") else []
+
+        while inicios and not faltantes <= vistos.keys():
+            lote, inicios = inicios[: self.paginas_paralelas], inicios[self.paginas_paralelas :]
+            with ThreadPoolExecutor(max_workers=len(lote)) as executor:
+                for data in executor.map(buscar_pagina, lote):
+                    absorver(data)
             self.log(
-                f"Progresso da busca: {len(encontrados)}/{len(codigos_amostra_set)} encontrados.",
+                f"Progresso da busca: {len(faltantes & vistos.keys())}/{len(faltantes)} encontrados.",
                 "debug",
             )
 
+        self.cache_metadados.atualizar(vistos, escopo)
+        for ca in codigos & vistos.keys():
+            if ca not in encontrados or _codigo_gal(vistos[ca]) > _codigo_gal(encontrados[ca]):
+                encontrados[ca] = vistos[ca]
+
         self.log(
             f"Busca de metadados finalizada: {len(encontrados)} encontrados.", "info"
         )
@@ -490,7 +626,17 @@ class GalService:
         success = bool(data.get("success") is True)
         return success, data
 
-    def enviar_amostra(self, driver: WebDriver, payload: Dict) -> Dict[str, Any]:
+    def enviar_amostra(
+        self, driver: WebDriver, payload: Dict, envio=None
+    ) -> Dict[str, Any]:
+        """
+        Envia uma amostra e, em caso de recusa, valida os campos um a um.
+
+        `driver` pode ser o WebDriver (selenium-requests) ou uma `requests.Session`
+        autenticada: ambos expõem `.request(...)`. `envio` substitui
+        `_enviar_payload_completo` (ex.: versão com retentativa do envio paralelo).
+        """
+        envio = envio or self._enviar_payload_completo
         ca = payload.get("registroInterno")
         paciente = payload.get("paciente")
         resultado: Dict[str, Any] = {
@@ -503,7 +649,7 @@ class GalService:
 
         try:
             self.log(f"A enviar payload para {ca} (Paciente: {paciente})", "info")
-            success, response = self._enviar_payload_completo(driver, payload)
+            success, response = envio(driver, payload)
 
             if success:
                 resultado["status"] = "sucesso"
@@ -688,7 +834,172 @@ class GalService:
 
 
 # ==============================================================================
-# 3. CLASSE DE INTERFACE GRÁFICA (UI) - COM FEEDBACK MELHORADO
+# 3. ENVIO EM PARALELO (SESSÃO HTTP COMPARTILHADA)
+# ==============================================================================
+ENVIO_PARALELO_CONFIG = GAL_CONFIG.get("envio_paralelo", {}) or {}
+
+# Respostas HTTP tratadas como falha transitória (a amostra é reenviada)
+STATUS_HTTP_TRANSITORIOS = {429, 502, 503, 504}
+
+
+class ErroTransitorioGAL(Exception):
+    """Resposta do GAL que justifica nova tentativa (sobrecarga / indisponibilidade)."""
+
+
+def criar_sessao_autenticada(driver: WebDriver, pool: int = 4) -> requests.Session:
+    """
+    Cria uma `requests.Session` com os cookies da sessão autenticada no navegador.
+
+    O login continua sendo feito pelo Selenium (`GalService.realizar_login`);
+    depois disso as requisições usam conexões keep-alive do pool da sessão em
+    vez de passar pelo WebDriver.
+    """
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    for cookie in driver.get_cookies():
+        sessao.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+        )
+    sessao.headers["X-Requested-With"] = "XMLHttpRequest"
+    try:
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        if user_agent:
+            sessao.headers["User-Agent"] = user_agent
+    except Exception:
+        pass
+    return sessao
+
+
+class LimitadorTaxa:
+    """Espaça as requisições para no máximo `por_segundo` (0 ou None = sem limite)."""
+
+    def __init__(self, por_segundo: Optional[float] = None):
+        self.intervalo = 1.0 / por_segundo if por_segundo else 0.0
+        self._proxima = 0.0
+        self._lock = threading.Lock()
+
+    def aguardar(self) -> None:
+        if not self.intervalo:
+            return
+        with self._lock:
+            agora = time.monotonic()
+            vez = max(agora, self._proxima)
+            self._proxima = vez + self.intervalo
+        if vez > agora:
+            time.sleep(vez - agora)
+
+
+class _SessaoLimitada:
+    """Envolve a sessão aplicando concorrência máxima por host e limite de taxa."""
+
+    def __init__(self, sessao, max_por_host: int, limitador: LimitadorTaxa):
+        self._sessao = sessao
+        self._max_por_host = max(1, int(max_por_host))
+        self._limitador = limitador
+        self._semaforos: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaforo(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._semaforos:
+                self._semaforos[host] = threading.BoundedSemaphore(self._max_por_host)
+            return self._semaforos[host]
+
+    def request(self, method: str, url: str, **kwargs):
+        with self._semaforo(url):
+            self._limitador.aguardar()
+            return self._sessao.request(method, url, **kwargs)
+
+
+class EnvioParaleloGAL:
+    """
+    Envia payloads ao GAL por um pool limitado de threads sobre uma sessão HTTP.
+
+    - concorrência total (`max_workers`) e por host (`max_por_host`);
+    - limite opcional de requisições por segundo;
+    - cada amostra é reenviada conforme `retry_with_backoff` em falhas de rede
+      ou HTTP 429/5xx transitório;
+    - os resultados voltam na mesma ordem dos payloads.
+
+    Uso:
+        sessao = criar_sessao_autenticada(driver)
+        resultados = EnvioParaleloGAL(gal_service, sessao).enviar(payloads)
+    """
+
+    def __init__(
+        self,
+        gal_service: GalService,
+        sessao,
+        max_workers: Optional[int] = None,
+        max_por_host: Optional[int] = None,
+        requisicoes_por_segundo: Optional[float] = None,
+        politica_retentativa=None,
+    ):
+        self.gal_service = gal_service
+        self.log = gal_service.log
+        self.max_workers = max(
+            1, int(max_workers or ENVIO_PARALELO_CONFIG.get("max_workers", 4))
+        )
+        if max_por_host is None:
+            max_por_host = ENVIO_PARALELO_CONFIG.get("max_por_host", self.max_workers)
+        if requisicoes_por_segundo is None:
+            requisicoes_por_segundo = ENVIO_PARALELO_CONFIG.get(
+                "requisicoes_por_segundo", 0
+            )
+        self.sessao = _SessaoLimitada(
+            sessao, max_por_host, LimitadorTaxa(requisicoes_por_segundo)
+        )
+        politica = politica_retentativa or retry_with_backoff()
+        self._postar_com_retentativa = politica(self._postar)
+
+    def _postar(self, sessao, payload: Dict) -> Tuple[bool, Any]:
+        success, response = self.gal_service._enviar_payload_completo(sessao, payload)
+        status = response.get("_http_status")
+        if not success and status in STATUS_HTTP_TRANSITORIOS:
+            raise ErroTransitorioGAL(f"HTTP {status} no envio de {payload.get('registroInterno')}")
+        return success, response
+
+    def enviar(self, payloads: List[Dict], progresso=None) -> List[Dict[str, Any]]:
+        """
+        Envia todos os payloads e devolve os resultados na ordem de entrada.
+
+        Args:
+            payloads: Payloads montados por `GalService.construir_payload`
+            progresso: Callback opcional `(concluidos, total)`, chamado das threads
+        """
+        total = len(payloads)
+        resultados: List[Optional[Dict[str, Any]]] = [None] * total
+        concluidos = 0
+        lock = threading.Lock()
+
+        def enviar_um(indice: int) -> None:
+            nonlocal concluidos
+            resultados[indice] = self.gal_service.enviar_amostra(
+                self.sessao, payloads[indice], envio=self._postar_com_retentativa
+            )
+            with lock:
+                concluidos += 1
+                feitos = concluidos
+            if progresso:
+                progresso(feitos, total)
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, max(total, 1)),
+            thread_name_prefix="envio-gal",
+        ) as executor:
+            for futuro in [executor.submit(enviar_um, i) for i in range(total)]:
+                futuro.result()
+        return resultados
+
+
+# ==============================================================================
+# 4. CLASSE DE INTERFACE GRÁFICA (UI) - COM FEEDBACK MELHORADO
 # ==============================================================================
 class IntegrationApp(ctk.CTkToplevel):
     def __init__(self, master, usuario_logado: str, app_state: Optional[Any] = None):
@@ -957,35 +1268,24 @@ class IntegrationApp(ctk.CTkToplevel):
                 "Passo 4/6: A buscar metadados no GAL...", 4 / total_steps
             )
             kit = str(df.iloc[0]["kit"]) if not df.empty else "N/A"
-            metas = self.gal_service.buscar_metadados(driver, set(df["codigoamostra"]))
+            # Login feito pelo Selenium; as requisições usam a sessão HTTP com pool de conexões
+            sessao = criar_sessao_autenticada(driver)
+            metas = self.gal_service.buscar_metadados(sessao, set(df["codigoamostra"]))
             if not metas:
                 raise ValueError("Nenhum metadado encontrado para as amostras.")
 
             relatorio_final, relatorio_local = [], []
-            total_amostras = len(df)
-
-            for i, (_, row) in enumerate(df.iterrows()):
-                progress = (4 / total_steps) + (
-                    (i + 1) / total_amostras * (1 / total_steps)
-                )
-                self._update_progress(
-                    f"Passo 5/6: A enviar amostra {i+1} de {total_amostras}...",
-                    progress,
-                )
+            payloads: List[Dict] = []
+            posicoes: List[int] = []  # posição de cada payload em relatorio_local
+            for _, row in df.iterrows():
                 ca = str(row.get("codigoamostra", ""))
                 if ca in metas:
                     payload = self.gal_service.construir_payload(
                         metas[ca], row, self.observacao
                     )
-                    resultado_envio = self.gal_service.enviar_amostra(driver, payload)
-                    relatorio_local.append(resultado_envio)
-                    if resultado_envio["status"] == "sucesso":
-                        registro_sucesso = {
-                            **payload,
-                            "usuario": self.usuario_logado,
-                            "timestamp": datetime.now().isoformat(),
-                        }
-                        relatorio_final.append(registro_sucesso)
+                    payloads.append(payload)
+                    posicoes.append(len(relatorio_local))
+                    relatorio_local.append(None)  # preenchido após o envio
                 else:
                     relatorio_local.append(
                         {
@@ -997,6 +1297,25 @@ class IntegrationApp(ctk.CTkToplevel):
                         }
                     )
 
+            def progresso_envio(feitos: int, total: int):
+                self._update_progress(
+                    f"Passo 5/6: {feitos} de {total} amostras enviadas...",
+                    (4 / total_steps) + (feitos / total * (1 / total_steps)),
+                )
+
+            envio = EnvioParaleloGAL(self.gal_service, sessao)
+            resultados = envio.enviar(payloads, progresso=progresso_envio)
+            for pos, payload, resultado_envio in zip(posicoes, payloads, resultados):
+                relatorio_local[pos] = resultado_envio
+                if resultado_envio["status"] == "sucesso":
+                    relatorio_final.append(
+                        {
+                            **payload,
+                            "usuario": self.usuario_logado,
+                            "timestamp": datetime.now().isoformat(),
+                        }
+                    )
+
             self._update_progress("Passo 6/6: A salvar relatórios...", 6 / total_steps)
             self.gal_service.salvar_relatorios(
                 relatorio_final,
@@ -1027,7 +1346,7 @@ class IntegrationApp(ctk.CTkToplevel):
 
 
 # ==============================================================================
-# 4. PONTO DE ENTRADA
+# 5. PONTO DE ENTRADA
 # ==============================================================================
 def abrir_janela_envio_gal(master, usuario_logado, app_state: Optional[Any] = None):
     janela = IntegrationApp(master, usuario_logado, app_state)
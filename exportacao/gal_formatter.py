@@ -27,12 +27,245 @@ Ver: RELATORIO_REDUNDANCIA_CONFLITOS.md (FASE 2, Etapa 2.1)
 
 import os
 import unicodedata
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from services.system_paths import BASE_DIR
 from services.exam_registry import get_exam_cfg
 
 
+# Analitos exportados quando o exame não define export_fields
+CAMPOS_EXPORTACAO_PADRAO = [
+    "Influenzaa",
+    "influenzab",
+    "coronavirusncov",
+    "adenovirus",
+    "vsincicialresp",
+    "metapneumovirus",
+    "rinovirus",
+]
+CAMPOS_PAINEL_PADRAO = ["Influenzaa", "influenzab", "coronavirusncov", "adenovirus", "vsincicialresp"]
+
+# Aliases básicos painel -> alvo interno (INF A, ADV, ...)
+ALIASES_ANALITOS = {
+    "INFLUENZAA": "INF A",
+    "INFLUENZAB": "INF B",
+    "ADENOVIRUS": "ADV",
+    "METAPNEUMOVIRUS": "HMPV",
+    "RINOVIRUS": "HRV",
+    "SARS-COV-2": "SC2",
+    "SARSCOV2": "SC2",
+    "CORONAVIRUSNCOV": "SC2",
+    # Vírus Sincicial Respiratório (VSR/RSV)
+    "VSINCICIALRESP": "RSV",
+    "VSINCICIALRESPA": "RSV",
+    "VSINCICIALRESPB": "RSV",
+    "VSR": "RSV",
+}
+
+# Códigos GAL: "1" (Detectado), "2" (Não Detectado), "3" (Inconclusivo)
+CODIGOS_RESULTADO = {
+    "DET": "1",
+    "DETECTADO": "1",
+    "ND": "2",
+    "NÃO DETECTADO": "2",
+    "NAO DETECTADO": "2",
+    "INC": "3",
+    "INCONCLUSIVO": "3",
+}
+
+# Analitos resolvidos por configuração de exame: {chave: [(analito, coluna_saida, chave_busca)]}
+_CACHE_ANALITOS: dict = {}
+_CACHE_ANALITOS_MAX = 64
+
+
+def _strip_accents(txt: str) -> str:
+    return (
+        unicodedata.normalize("NFKD", txt)
+        .encode("ASCII", "ignore")
+        .decode("ASCII")
+    )
+
+
+def _norm(col: str) -> str:
+    col2 = str(col).strip()
+    col2 = _strip_accents(col2)
+    return col2.replace(" ", "_").lower()
+
+
+def _clean(s: str) -> str:
+    return (
+        _strip_accents(s)
+        .upper()
+        .replace("RESULTADO", "")
+        .replace("_", "")
+        .replace(" ", "")
+    )
+
+
+def _codigo_resultado(val) -> str:
+    """Código GAL de um único valor de resultado (aplicado apenas aos valores distintos)."""
+    if val is None or (isinstance(val, float) and pd.isna(val)):
+        return ""
+    s = str(val).strip().upper()
+    if s in CODIGOS_RESULTADO:
+        return CODIGOS_RESULTADO[s]
+
+    # Fallback para textos antigos
+    if "INCONCL" in s:
+        return "3"
+    if ("NAO" in s or "NÃO" in s) and "DETECT" in s:
+        return "2"
+    if "DETECT" in s:
+        return "1"
+    return ""
+
+
+def mapear_resultados(serie: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna de resultados em códigos GAL ("1", "2", "3" ou "").
+
+    A coluna é fatorada: o mapeamento roda uma vez por valor distinto
+    (Detectado, ND, ...) e é expandido para todas as linhas por índice.
+    """
+    codigos, valores = pd.factorize(serie, use_na_sentinel=True)
+    tabela = np.array([_codigo_resultado(v) for v in valores] + [""], dtype=object)
+    return pd.Series(tabela[codigos], index=serie.index)
+
+
+def mascara_exportavel(codigos: pd.Series, cfg) -> np.ndarray:
+    """
+    Linhas exportáveis ao GAL: código numérico que não contém nenhum dos
+    identificadores de controle (CN/CP) do exame.
+    """
+    texto = codigos.where(codigos.notna(), "").astype(str)
+    mascara = texto.str.isdigit().to_numpy(dtype=bool)
+    try:
+        controles = cfg.controles or {"cn": [], "cp": []}
+        marcadores = [str(x).upper() for x in (controles.get("cn") or []) + (controles.get("cp") or [])]
+    except Exception:
+        marcadores = ["CN", "CP"]
+    # Só códigos numéricos sobrevivem: basta procurar os marcadores neles
+    # (maiúsculas/minúsculas não importam em dígitos)
+    numericos = texto[mascara]
+    for marcador in marcadores:
+        if marcador and not numericos.empty:
+            mascara[mascara] = ~numericos.str.contains(marcador, regex=False).to_numpy(dtype=bool)
+            numericos = texto[mascara]
+    return mascara
+
+
+def _analitos_exportacao(cfg, campos_padrao) -> list:
+    """
+    Resolve, uma vez por configuração de exame, cada analito exportado em
+    (analito, coluna de saída, chave de busca da coluna de resultado).
+    """
+    campos = list(cfg.export_fields or []) or list(campos_padrao)
+    chave = (id(cfg), tuple(campos), tuple(sorted((getattr(cfg, "mapa_alvos", None) or {}).items())))
+    if chave in _CACHE_ANALITOS:
+        return _CACHE_ANALITOS[chave]
+
+    analitos = []
+    for analito in campos:
+        alvo_norm = cfg.normalize_target(analito)
+        tnorm_raw = _strip_accents(alvo_norm).upper().replace("_", " ").replace("-", " ").strip()
+        tnorm_raw = ALIASES_ANALITOS.get(tnorm_raw, tnorm_raw)
+        # aplica normalize_target do exame (mapeia INFA -> INF A, etc.)
+        tnorm = cfg.normalize_target(tnorm_raw).upper()
+        col_nome = _strip_accents(analito).replace(" ", "").replace("-", "").replace("_", "").lower()
+        analitos.append((analito, col_nome, _clean(tnorm)))
+
+    if len(_CACHE_ANALITOS) >= _CACHE_ANALITOS_MAX:
+        _CACHE_ANALITOS.clear()
+    _CACHE_ANALITOS[chave] = analitos
+    return analitos
+
+
+def formatar_tabela_gal(
+    df,
+    cfg,
+    campos_padrao=CAMPOS_EXPORTACAO_PADRAO,
+    somente_exportaveis: bool = True,
+    painel_antes_do_resultado: bool = True,
+) -> pd.DataFrame:
+    """
+    Motor único da formatação GAL (usado por formatar_para_gal e gerar_painel_csvs).
+
+    Opera sobre colunas inteiras: máscara de exportação com operações de string
+    vetorizadas, resultados mapeados por valor distinto e colunas de resultado
+    localizadas por dicionário a partir dos analitos resolvidos (em cache) para
+    o exame.
+
+    Args:
+        df: DataFrame com resultados brutos
+        cfg: Configuração do exame
+        campos_padrao: Analitos usados quando cfg.export_fields está vazio
+        somente_exportaveis: Remove controles e códigos não numéricos
+        painel_antes_do_resultado: Ordem das colunas "painel" e "resultado"
+    """
+    df_in = df.drop(columns=[c for c in ["Unnamed: 0", "index"] if c in df.columns])
+
+    colmap = {_norm(c): c for c in df_in.columns}
+    col_codigo = colmap.get("codigo", colmap.get("amostra"))
+    if col_codigo is not None:
+        cod_col = df_in[col_codigo]
+    else:
+        cod_col = pd.Series([""] * len(df_in))
+
+    if somente_exportaveis:
+        mascara = mascara_exportavel(cod_col, cfg)
+        cod_col = cod_col.loc[mascara]
+        df_in = df_in.loc[mascara]
+    cod_col = cod_col.reset_index(drop=True)
+    df_in = df_in.reset_index(drop=True)
+
+    painel = cfg.panel_tests_id or "1"
+    colunas = {
+        "codigoAmostra": cod_col,
+        "codigo": cod_col,
+        "requisicao": "",
+        "paciente": "",
+        "exame": cfg.nome_exame or "VRSRT",
+        "metodo": "RTTR",
+        "registroInterno": cod_col,
+        "kit": str(cfg.kit_codigo or "427"),
+        "reteste": "",
+        "loteKit": "",
+        "dataProcessamentoFim": datetime.now().strftime("%d/%m/%Y"),
+        "valorReferencia": "",
+        "observacao": "",
+    }
+    if painel_antes_do_resultado:
+        colunas.update(painel=painel, resultado="")
+    else:
+        colunas.update(resultado="", painel=painel)
+
+    # chave de busca -> primeira coluna do DataFrame que a satisfaz
+    colunas_resultado = {}
+    for norm_col, coluna in colmap.items():
+        colunas_resultado.setdefault(_clean(norm_col), coluna)
+
+    vazia = pd.Series([""] * len(df_in), dtype=object)
+    ausentes = []
+    for analito, col_nome, chave in _analitos_exportacao(cfg, campos_padrao):
+        res_col = colunas_resultado.get(chave)
+        if res_col is None:
+            ausentes.append(analito)
+            colunas[col_nome] = vazia
+        else:
+            colunas[col_nome] = mapear_resultados(df_in[res_col])
+
+    if ausentes:
+        from utils.logger import registrar_log
+        registrar_log(
+            "GAL Debug",
+            f"Sem coluna de resultado para {len(ausentes)} analito(s): {ausentes}",
+            "WARNING",
+        )
+
+    return pd.DataFrame(colunas, index=cod_col.index)
+
+
 def formatar_para_gal(df, exam_cfg=None, exame: str | None = None):
     """
     Formata o resultado para layout GAL usando metadados do exame (registry).
@@ -50,190 +283,7 @@ def formatar_para_gal(df, exam_cfg=None, exame: str | None = None):
         - Colunas de alvos (influenzaa, influenzab, adenovirus, etc.)
     """
     cfg = exam_cfg or (get_exam_cfg(exame) if exame else get_exam_cfg(""))
-
-    df_in = df.copy()
-    for c in ["Unnamed: 0", "index"]:
-        if c in df_in.columns:
-            df_in = df_in.drop(columns=[c])
-
-    def _strip_accents(txt: str) -> str:
-        return (
-            unicodedata.normalize("NFKD", txt)
-            .encode("ASCII", "ignore")
-            .decode("ASCII")
-        )
-
-    def _norm(col: str) -> str:
-        col2 = str(col).strip()
-        col2 = _strip_accents(col2)
-        return col2.replace(" ", "_").lower()
-
-    colmap = {_norm(c): c for c in df_in.columns}
-
-    def _get(col_names, default=""):
-        for name in col_names:
-            key = _norm(name)
-            if key in colmap:
-                return df_in[colmap[key]]
-        return pd.Series([default] * len(df_in))
-
-    def _map_result(val):
-        if val is None or (isinstance(val, float) and pd.isna(val)):
-            return ""
-        s = str(val).strip().upper()
-        
-        # Aceita: "Det", "Detectado", "DETECTADO"
-        if s in ("DET", "DETECTADO"):
-            return "1"
-        
-        # Aceita: "ND", "Não Detectado", "NAO DETECTADO"
-        if s in ("ND", "NÃƒO DETECTADO", "NAO DETECTADO"):
-            return "2"
-        
-        # Aceita: "Inc", "Inconclusivo"
-        if s in ("INC", "INCONCLUSIVO"):
-            return "3"
-        
-        # Fallback para textos antigos
-        if "INCONCL" in s:
-            return "3"
-        if ("NAO" in s or "NÃƒO" in s) and "DETECT" in s:
-            return "2"
-        if "DETECT" in s:
-            return "1"
-        
-        return ""
-
-    df_out = pd.DataFrame()
-    cod_col = _get(["codigo", "amostra"])
-    df_out["codigoAmostra"] = cod_col
-    df_out["codigo"] = cod_col
-    df_out["requisicao"] = ""
-    df_out["paciente"] = ""
-    df_out["exame"] = cfg.nome_exame or "VRSRT"
-    df_out["metodo"] = "RTTR"
-    df_out["registroInterno"] = cod_col
-    df_out["kit"] = str(cfg.kit_codigo or "427")
-    df_out["reteste"] = ""
-    df_out["loteKit"] = ""
-    df_out["dataProcessamentoFim"] = datetime.now().strftime("%d/%m/%Y")
-    df_out["valorReferencia"] = ""
-    df_out["observacao"] = ""
-    df_out["painel"] = cfg.panel_tests_id or "1"
-    df_out["resultado"] = ""
-
-    export_fields = cfg.export_fields or []
-    if not export_fields:
-        export_fields = [
-            "Influenzaa",
-            "influenzab",
-            "coronavirusncov",
-            "adenovirus",
-            "vsincicialresp",
-            "metapneumovirus",
-            "rinovirus",
-        ]
-
-    def _find_result_col(target_norm: str):
-        """
-        Procura coluna de resultado compatível com o analito exportado,
-        usando alias para mapear nomes de painel (influenzaa, adenovirus, etc.)
-        para os alvos internos (INF A, ADV, ...).
-        """
-        # aliases básicos painel -> alvo interno
-        aliases = {
-            "INFLUENZAA": "INF A",
-            "INFLUENZAB": "INF B",
-            "ADENOVIRUS": "ADV",
-            "ADENOVÃRUS": "ADV",
-            "METAPNEUMOVIRUS": "HMPV",
-            "RINOVIRUS": "HRV",
-            "RINOVÃRUS": "HRV",
-            "SARS-COV-2": "SC2",
-            "SARSCOV2": "SC2",
-            "CORONAVIRUSNCOV": "SC2",
-            # Vírus Sincicial Respiratório (VSR/RSV)
-            "VSINCICIALRESP": "RSV",
-            "VSINCICIALRESPA": "RSV",
-            "VSINCICIALRESPB": "RSV",
-            "VSR": "RSV",
-        }
-        # normaliza alvo exportado
-        tnorm_raw = _strip_accents(target_norm).upper().replace("_", " ").replace("-", " ").strip()
-        if tnorm_raw in aliases:
-            tnorm_raw = aliases[tnorm_raw]
-        # aplica normalize_target do exame (mapeia INFA -> INF A, etc.)
-        tnorm = cfg.normalize_target(tnorm_raw).upper()
-
-        def _clean(s: str) -> str:
-            return (
-                _strip_accents(s)
-                .upper()
-                .replace("RESULTADO", "")
-                .replace("_", "")
-                .replace(" ", "")
-            )
-
-        # tenta bater com colunas existentes
-        for k, v in colmap.items():
-            if _clean(k) == _clean(tnorm):
-                return v
-        # tenta prefácio Resultado_<alvo>
-        cand = f"Resultado_{tnorm}"
-        for k, v in colmap.items():
-            if _clean(k) == _clean(cand):
-                return v
-        return None
-
-    def _exportavel(code: str) -> bool:
-        if not code:
-            return False
-        c = code.upper()
-        # Usa lista de controles definida no exam_cfg quando disponível
-        try:
-            controles = cfg.controles or {"cn": [], "cp": []}
-            cn_list = [str(x).upper() for x in (controles.get("cn") or [])]
-            cp_list = [str(x).upper() for x in (controles.get("cp") or [])]
-            # comparar igualdade ou substring para cobrir variaçÃµes como 'CN', 'CONTROLE N'
-            for v in cn_list:
-                if v and v in c:
-                    return False
-            for v in cp_list:
-                if v and v in c:
-                    return False
-        except Exception:
-            # fallback para checagem simples
-            if "CN" in c or "CP" in c:
-                return False
-        # somente códigos numéricos são exportáveis
-        return c.isdigit()
-
-    export_mask = cod_col.apply(_exportavel)
-    df_out = df_out.loc[export_mask].reset_index(drop=True)
-    df_in = df_in.loc[export_mask].reset_index(drop=True)
-
-    for analito in export_fields:
-        alvo_norm = cfg.normalize_target(analito)
-        res_col = _find_result_col(alvo_norm)
-        
-        # DEBUG: Log para diagnóstico
-        from utils.logger import registrar_log
-        registrar_log("GAL Debug", f"Procurando '{analito}' â†’ normalizado: '{alvo_norm}' â†’ coluna encontrada: '{res_col}'", "DEBUG")
-        
-        if res_col and res_col in df_in.columns:
-            serie_res = df_in[res_col].apply(_map_result)
-            registrar_log("GAL Debug", f"  â””â”€ Valores: {serie_res.value_counts().to_dict()}", "DEBUG")
-        else:
-            serie_res = pd.Series([""] * len(df_in))
-            if res_col:
-                registrar_log("GAL Debug", f"  â””â”€ AVISO: Coluna '{res_col}' não existe no DataFrame! Colunas disponíveis: {[c for c in df_in.columns if 'Resultado' in c]}", "WARNING")
-            else:
-                registrar_log("GAL Debug", f"  â””â”€ AVISO: Não encontrou coluna para '{alvo_norm}'", "WARNING")
-        
-        col_nome = _strip_accents(analito).replace(" ", "").replace("-", "").replace("_", "").lower()
-        df_out[col_nome] = serie_res
-
-    return df_out
+    return formatar_tabela_gal(df, cfg)
 
 
 def gerar_painel_csvs(df_resultados, exam_cfg=None, exame: str | None = None, output_dir: str | None = None):
@@ -258,122 +308,16 @@ def gerar_painel_csvs(df_resultados, exam_cfg=None, exame: str | None = None, ou
     os.makedirs(output_dir, exist_ok=True)
     
     cfg = exam_cfg or (get_exam_cfg(exame) if exame else get_exam_cfg(""))
-    
-    df_in = df_resultados.copy()
-    for c in ["Unnamed: 0", "index"]:
-        if c in df_in.columns:
-            df_in = df_in.drop(columns=[c])
-    
-    def _strip_accents(txt: str) -> str:
-        return (
-            unicodedata.normalize("NFKD", txt)
-            .encode("ASCII", "ignore")
-            .decode("ASCII")
-        )
-    
-    def _norm(col: str) -> str:
-        col2 = str(col).strip()
-        col2 = _strip_accents(col2)
-        return col2.replace(" ", "_").lower()
-    
-    colmap = {_norm(c): c for c in df_in.columns}
-    
-    def _get(col_names, default=""):
-        for name in col_names:
-            key = _norm(name)
-            if key in colmap:
-                return df_in[colmap[key]]
-        return pd.Series([default] * len(df_in))
-    
-    def _map_result(val):
-        if val is None or (isinstance(val, float) and pd.isna(val)):
-            return ""
-        s = str(val).strip().upper()
-        
-        # Aceita: "Det", "Detectado", "DETECTADO"
-        if s in ("DET", "DETECTADO"):
-            return "1"
-        
-        # Aceita: "ND", "Não Detectado", "NAO DETECTADO"
-        if s in ("ND", "NÃƒO DETECTADO", "NAO DETECTADO"):
-            return "2"
-        
-        # Aceita: "Inc", "Inconclusivo"
-        if s in ("INC", "INCONCLUSIVO"):
-            return "3"
-        
-        # Fallback para textos antigos
-        if "INCONCL" in s:
-            return "3"
-        if ("NAO" in s or "NÃƒO" in s) and "DETECT" in s:
-            return "2"
-        if "DETECT" in s:
-            return "1"
-        
-        return ""
-    
-    # Base de colunas padrão para todos os painéis
-    cod_col = _get(["codigo", "amostra"])
-    base_df = pd.DataFrame()
-    base_df["codigoAmostra"] = cod_col
-    base_df["codigo"] = cod_col
-    base_df["requisicao"] = ""
-    base_df["paciente"] = ""
-    base_df["exame"] = cfg.nome_exame or "VRSRT"
-    base_df["metodo"] = "RTTR"
-    base_df["registroInterno"] = cod_col
-    base_df["kit"] = str(cfg.kit_codigo or "427")
-    base_df["reteste"] = ""
-    base_df["loteKit"] = ""
-    base_df["dataProcessamentoFim"] = datetime.now().strftime("%d/%m/%Y")
-    base_df["valorReferencia"] = ""
-    base_df["observacao"] = ""
-    base_df["resultado"] = ""
-    
+
     # Agrupa alvos por painel (atualmente assume um único painel; pode expandir)
-    export_fields = cfg.export_fields or []
-    if not export_fields:
-        export_fields = ["Influenzaa", "influenzab", "coronavirusncov", "adenovirus", "vsincicialresp"]
-    
     panel_id = cfg.panel_tests_id or "1"
-    
-    def _find_result_col(target_norm: str):
-        """Procura coluna compatível (idem formatar_para_gal)"""
-        aliases = {
-            "INFLUENZAA": "INF A", "INFLUENZAB": "INF B", "ADENOVIRUS": "ADV",
-            "METAPNEUMOVIRUS": "HMPV", "RINOVIRUS": "HRV", 
-            "SARS-COV-2": "SC2", "SARSCOV2": "SC2", "CORONAVIRUSNCOV": "SC2",
-            "VSINCICIALRESP": "RSV", "VSINCICIALRESPA": "RSV", "VSINCICIALRESPB": "RSV", "VSR": "RSV",
-        }
-        tnorm_raw = _strip_accents(target_norm).upper().replace("_", " ").replace("-", " ").strip()
-        if tnorm_raw in aliases:
-            tnorm_raw = aliases[tnorm_raw]
-        tnorm = cfg.normalize_target(tnorm_raw).upper()
-        
-        def _clean(s: str) -> str:
-            return _strip_accents(s).upper().replace("RESULTADO", "").replace("_", "").replace(" ", "")
-        
-        for k, v in colmap.items():
-            if _clean(k) == _clean(tnorm):
-                return v
-        cand = f"Resultado_{tnorm}"
-        for k, v in colmap.items():
-            if _clean(k) == _clean(cand):
-                return v
-        return None
-    
-    df_painel = base_df.copy()
-    df_painel["painel"] = panel_id
-    
-    for analito in export_fields:
-        alvo_norm = cfg.normalize_target(analito)
-        res_col = _find_result_col(alvo_norm)
-        if res_col and res_col in df_in.columns:
-            serie_res = df_in[res_col].apply(_map_result)
-        else:
-            serie_res = pd.Series([""] * len(df_in))
-        col_nome = _strip_accents(analito).replace(" ", "").replace("-", "").replace("_", "").lower()
-        df_painel[col_nome] = serie_res
+    df_painel = formatar_tabela_gal(
+        df_resultados,
+        cfg,
+        campos_padrao=CAMPOS_PAINEL_PADRAO,
+        somente_exportaveis=False,
+        painel_antes_do_resultado=False,
+    )
     
     # Salva CSV para painel
     ts = datetime.now().strftime("%Y%m%dT%H%M%SZ")
@@ -9,6 +9,7 @@ from .historico_analises import HistoricoAnalises
 from .exportacao_relatorios import ExportadorRelatorios, exportar_pdf, exportar_excel, exportar_csv
 from .sistema_alertas import (
     GerenciadorAlertas, 
+    ArmazemAlertas,
     CentroNotificacoes, 
     Alerta, 
     TipoAlerta, 
@@ -27,6 +28,7 @@ __all__ = [
     'exportar_excel', 
     'exportar_csv',
     'GerenciadorAlertas',
+    'ArmazemAlertas',
     'CentroNotificacoes',
     'Alerta',
     'TipoAlerta',
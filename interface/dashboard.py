@@ -9,9 +9,18 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Dict, Optional
 import os
+import queue
+import threading
+import time
+
+from services.history_store import HistoricoStore
+from utils.after_mixin import AfterManagerMixin
+from utils.gui_utils import FonteDadosDataFrame, TabelaVirtual
 
 from .estilos import CORES, FONTES, STATUS_CORES, GRAFICO_CORES
 from .componentes import criar_card_estatistica
@@ -25,11 +34,116 @@ except ImportError:
     gerar_alertas_exemplo = None
 
 
-class Dashboard(ctk.CTkToplevel):
+CAMINHO_HISTORICO = "logs/historico_analises.csv"
+
+# Únicas colunas do histórico usadas pelo dashboard
+COLUNAS_DASHBOARD = ['data_hora_analise', 'data_hora', 'exame', 'equipamento', 'status_corrida']
+
+# Intervalo (ms) de verificação do resultado da carga em segundo plano
+INTERVALO_VERIFICACAO_MS = 50
+
+
+@dataclass
+class DadosDashboard:
+    """Histórico já agregado para o dashboard (montado fora da thread do Tk)"""
+    df_historico: pd.DataFrame
+    origem: str  # 'real' ou 'exemplo'
+    cards: Dict[str, str] = field(default_factory=dict)
+    por_dia: Optional[pd.DataFrame] = None
+    erro: str = ''
+    tempo_leitura: float = 0.0
+
+
+def _dados_exemplo() -> pd.DataFrame:
+    """Cria dados de exemplo para demonstração"""
+    # Dados fictícios para demonstração
+    dados = []
+    equipamentos = ["ABI 7500", "Biomanguinhos", "QuantStudio"]
+    exames = ["VR1e2 Biomanguinhos", "Dengue PCR", "Zika RT-PCR", "Chikungunya"]
+    status = ["Valida", "Valida", "Invalida", "Aviso"]
+    
+    for i in range(30):
+        data = datetime.now() - timedelta(days=29-i)
+        dados.append({
+            'data_hora': data.strftime("%Y-%m-%d %H:%M:%S"),
+            'exame': exames[i % len(exames)],
+            'equipamento': equipamentos[i % len(equipamentos)],
+            'status_corrida': status[i % len(status)],
+            'analista': 'Usuario Teste'
+        })
+    
+    return pd.DataFrame(dados)
+
+
+def agregar_historico(df: pd.DataFrame, origem: str = 'real') -> DadosDashboard:
+    """
+    Normaliza as colunas e calcula cards e contagem diária do histórico.
+    
+    data_hora é convertida uma única vez para datetime; equipamento ausente
+    usa o nome do exame (mesma regra da carga anterior).
+    """
+    df = df.copy()
+    if 'data_hora_analise' in df.columns and df['data_hora_analise'].notna().any():
+        df['data_hora'] = df['data_hora_analise']
+    if 'data_hora' not in df.columns:
+        df['data_hora'] = pd.NaT
+    if 'exame' not in df.columns:
+        df['exame'] = 'N/A'
+    if 'equipamento' not in df.columns or df['equipamento'].isna().all():
+        df['equipamento'] = df['exame']
+    if 'status_corrida' not in df.columns:
+        df['status_corrida'] = 'N/A'
+    df['data_hora'] = pd.to_datetime(df['data_hora'], errors='coerce')
+    df = df.drop(columns=['data_hora_analise'], errors='ignore').reset_index(drop=True)
+    
+    status = df['status_corrida']
+    ultima = df['data_hora'].max()
+    cards = {
+        'total': str(len(df)),
+        'validas': str(int((status == 'Valida').sum())),
+        'alertas': str(int(status.isin(['Aviso', 'Invalida']).sum())),
+        'ultima': ultima.strftime("%H:%M") if pd.notna(ultima) else '--:--',
+    }
+    por_dia = (
+        df['data_hora'].dropna().dt.date.value_counts().sort_index()
+        .rename_axis('data').reset_index(name='count')
+    )
+    return DadosDashboard(df_historico=df, origem=origem, cards=cards, por_dia=por_dia)
+
+
+def carregar_dados_dashboard(caminho: str = CAMINHO_HISTORICO) -> DadosDashboard:
+    """
+    Lê o histórico (somente COLUNAS_DASHBOARD) e agrega para o dashboard.
+    
+    Sem arquivo, vazio ou com erro de leitura, retorna dados de exemplo
+    (origem='exemplo'). Não toca em widgets: pode rodar em outra thread.
+    """
+    inicio = time.perf_counter()
+    try:
+        if Path(caminho).exists():
+            # Lê via HistoricoStore (aplica o schema lateral do histórico append-only)
+            df = HistoricoStore(str(caminho)).ler(usecols=COLUNAS_DASHBOARD, low_memory=False)
+            if len(df):
+                dados = agregar_historico(df, 'real')
+                dados.tempo_leitura = time.perf_counter() - inicio
+                return dados
+        dados = agregar_historico(_dados_exemplo(), 'exemplo')
+    except Exception as e:
+        dados = agregar_historico(_dados_exemplo(), 'exemplo')
+        dados.erro = str(e)
+    dados.tempo_leitura = time.perf_counter() - inicio
+    return dados
+
+
+class Dashboard(AfterManagerMixin, ctk.CTkToplevel):
     """
     Dashboard Principal do IntegaGal
     Exibe resumo de análises, gráficos e tabela de resultados recentes
     Implementado como janela filha (Toplevel) para integração com aplicação principal.
+    
+    O histórico é lido e agregado numa thread de fundo; o resultado volta à
+    thread do Tk por `schedule` (AfterManagerMixin) e a interface é
+    preenchida em etapas: cards, depois gráfico, depois tabela.
     """
     
     def __init__(self, master=None):
@@ -51,7 +165,12 @@ class Dashboard(ctk.CTkToplevel):
         
         # Dados
         self.df_historico = None
+        self.dados: Optional[DadosDashboard] = None
         self.cards = {}
+        self.carregando = False
+        self._fila_carga: Optional[queue.Queue] = None
+        self._inicio_carga = 0.0
+        self.tempo_carga: Optional[float] = None
         
         # Inicializar gerenciador de alertas
         if GerenciadorAlertas:
@@ -331,9 +450,6 @@ class Dashboard(ctk.CTkToplevel):
         frame_tree.grid(row=1, column=0, sticky="ew", padx=20, pady=(0, 15))
         frame_tree.grid_columnconfigure(0, weight=1)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(frame_tree, orient="vertical")
-        
         # Treeview (tabela)
         style = ttk.Style()
         style.theme_use("clam")
@@ -353,81 +469,94 @@ class Dashboard(ctk.CTkToplevel):
         )
         style.map('Treeview', background=[('selected', CORES['primaria_claro'])])
         
-        self.tree = ttk.Treeview(
+        # Tabela virtual: todo o histórico, só as linhas visíveis no Treeview
+        self.tabela = TabelaVirtual(
             frame_tree,
-            columns=("data_hora", "exame", "equipamento", "status"),
-            show="headings",
-            yscrollcommand=scrollbar.set,
+            colunas=[
+                ("data_hora", "Data/Hora", 150, "w"),
+                ("exame", "Exame", 250, "w"),
+                ("equipamento", "Equipamento", 200, "w"),
+                ("status", "Status", 120, "center"),
+            ],
             height=10
         )
-        
-        # Configurar colunas
-        self.tree.heading("data_hora", text="Data/Hora")
-        self.tree.heading("exame", text="Exame")
-        self.tree.heading("equipamento", text="Equipamento")
-        self.tree.heading("status", text="Status")
-        
-        self.tree.column("data_hora", width=150, anchor="w")
-        self.tree.column("exame", width=250, anchor="w")
-        self.tree.column("equipamento", width=200, anchor="w")
-        self.tree.column("status", width=120, anchor="center")
-        
-        scrollbar.config(command=self.tree.yview)
-        
-        self.tree.grid(row=0, column=0, sticky="ew")
-        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.tabela.grid(row=0, column=0, sticky="ew")
+        self.tree = self.tabela.tree
         
         # Bind para duplo clique (futura navegação para detalhes)
         self.tree.bind("<Double-1>", self._on_item_double_click)
     
     def carregar_dados(self):
-        """Carrega dados do histórico de análises"""
+        """Inicia a carga do histórico em segundo plano (não bloqueia a interface)"""
+        # TODO: DADOS REAIS - Integrar com banco PostgreSQL
+        # Atualmente carrega de logs/historico_analises.csv
+        if self.carregando:
+            return
+        self.carregando = True
+        self.tempo_carga = None
+        self._inicio_carga = time.perf_counter()
+        fila: queue.Queue = queue.Queue(maxsize=1)
+        self._fila_carga = fila
+        
+        def _trabalho():
+            fila.put(carregar_dados_dashboard(CAMINHO_HISTORICO))
+        
+        threading.Thread(target=_trabalho, name="dashboard-carga", daemon=True).start()
+        self.schedule(INTERVALO_VERIFICACAO_MS, self._verificar_carga)
+    
+    def _verificar_carga(self):
+        """Verifica (na thread do Tk) se a carga em segundo plano terminou"""
         try:
-            # TODO: DADOS REAIS - Integrar com banco PostgreSQL
-            # Atualmente carrega de logs/historico_analises.csv
-            # Para dados em tempo real, conectar com:
-            # - services/history_report.py (gerar_historico_csv)
-            # - db/db_utils.py (consultas PostgreSQL)
-            
-            # Tentar carregar histórico
-            caminho_historico = Path("logs/historico_analises.csv")
-            
-            if caminho_historico.exists():
-                # Usar separador ; e encoding utf-8 conforme formato do arquivo
-                self.df_historico = pd.read_csv(
-                    caminho_historico, 
-                    sep=';', 
-                    encoding='utf-8',
-                    low_memory=False
-                )
-                
-                # Ajustar colunas para compatibilidade com interface
-                if 'data_hora_analise' in self.df_historico.columns:
-                    self.df_historico['data_hora'] = self.df_historico['data_hora_analise']
-                
-                # Adicionar coluna 'equipamento' se não existir (extrair do nome do exame)
-                if 'equipamento' not in self.df_historico.columns:
-                    # Tentar deduzir do exame ou usar valor padrão
-                    self.df_historico['equipamento'] = self.df_historico.get('exame', 'N/A')
-                
-                print(f"✅ Dashboard carregado com {len(self.df_historico)} registros REAIS")
-                self._mostrar_banner_dados_reais()
-                self._atualizar_interface_com_dados()
+            dados = self._fila_carga.get_nowait()
+        except queue.Empty:
+            self.schedule(INTERVALO_VERIFICACAO_MS, self._verificar_carga)
+            return
+        self._aplicar_dados(dados)
+    
+    def _aplicar_dados(self, dados: DadosDashboard):
+        """Etapa 1: cards e banner; gráfico e tabela nas próximas iterações do Tk"""
+        self.dados = dados
+        self.df_historico = dados.df_historico
+        if dados.origem == 'real':
+            print(f"✅ Dashboard carregado com {len(self.df_historico)} registros REAIS")
+            self._mostrar_banner_dados_reais()
+        else:
+            if dados.erro:
+                print(f"❌ Erro ao carregar dados: {dados.erro}")
             else:
                 print("⚠️ AVISO: Arquivo historico_analises.csv não encontrado.")
-                print("   Dashboard exibindo dados de EXEMPLO.")
                 print("   Execute análises primeiro para ver dados reais.")
-                # Criar dados de exemplo
-                self._criar_dados_exemplo()
-                self._mostrar_banner_dados_exemplo()
-                self._atualizar_interface_com_dados()
-        
-        except Exception as e:
-            print(f"❌ Erro ao carregar dados: {e}")
             print("   Dashboard exibindo dados de EXEMPLO.")
-            self._criar_dados_exemplo()
             self._mostrar_banner_dados_exemplo()
-            self._atualizar_interface_com_dados()
+        self._atualizar_cards()
+        self.schedule(1, self._etapa_grafico)
+    
+    def _etapa_grafico(self):
+        self._atualizar_grafico()
+        self.schedule(1, self._etapa_tabela)
+    
+    def _etapa_tabela(self):
+        self._atualizar_tabela()
+        self.carregando = False
+        self.tempo_carga = time.perf_counter() - self._inicio_carga
+    
+    def aguardar_carga(self, timeout: float = 30.0) -> bool:
+        """
+        Processa eventos do Tk até a carga terminar (benchmarks/testes).
+        
+        Returns:
+            True se a carga terminou dentro do timeout.
+        """
+        limite = time.perf_counter() + timeout
+        while self.carregando and time.perf_counter() < limite:
+            self.update()
+            time.sleep(0.005)
+        return not self.carregando
+    
+    def destroy(self):
+        """Cancela callbacks pendentes (verificação da carga) antes de destruir"""
+        self.dispose()
+        super().destroy()
     
     def _mostrar_banner_dados_reais(self):
         """Mostra banner indicando que está usando dados reais"""
@@ -471,23 +600,8 @@ class Dashboard(ctk.CTkToplevel):
     
     def _criar_dados_exemplo(self):
         """Cria dados de exemplo para demonstração"""
-        # Dados fictícios para demonstração
-        dados = []
-        equipamentos = ["ABI 7500", "Biomanguinhos", "QuantStudio"]
-        exames = ["VR1e2 Biomanguinhos", "Dengue PCR", "Zika RT-PCR", "Chikungunya"]
-        status = ["Valida", "Valida", "Invalida", "Aviso"]
-        
-        for i in range(30):
-            data = datetime.now() - timedelta(days=29-i)
-            dados.append({
-                'data_hora': data.strftime("%Y-%m-%d %H:%M:%S"),
-                'exame': exames[i % len(exames)],
-                'equipamento': equipamentos[i % len(equipamentos)],
-                'status_corrida': status[i % len(status)],
-                'analista': 'Usuario Teste'
-            })
-        
-        self.df_historico = pd.DataFrame(dados)
+        self.dados = agregar_historico(_dados_exemplo(), 'exemplo')
+        self.df_historico = self.dados.df_historico
     
     def _atualizar_interface_com_dados(self):
         """Atualiza toda a interface com os dados carregados"""
@@ -504,42 +618,25 @@ class Dashboard(ctk.CTkToplevel):
         self._atualizar_tabela()
     
     def _atualizar_cards(self):
-        """Atualiza valores dos cards de resumo"""
-        if self.df_historico is None:
+        """Atualiza valores dos cards de resumo (total, válidas, alertas, última)"""
+        if self.dados is None:
             return
         
-        # Total
-        total = len(self.df_historico)
-        self.cards['total'].atualizar_valor(str(total))
-        
-        # Válidas
-        validas = len(self.df_historico[self.df_historico['status_corrida'] == 'Valida'])
-        self.cards['validas'].atualizar_valor(str(validas))
-        
-        # Alertas (avisos + inválidas)
-        alertas = len(self.df_historico[self.df_historico['status_corrida'].isin(['Aviso', 'Invalida'])])
-        self.cards['alertas'].atualizar_valor(str(alertas))
-        
-        # Última análise
-        if len(self.df_historico) > 0:
-            ultima = pd.to_datetime(self.df_historico['data_hora']).max()
-            self.cards['ultima'].atualizar_valor(ultima.strftime("%H:%M"))
+        for chave, valor in self.dados.cards.items():
+            if chave in self.cards:
+                self.cards[chave].atualizar_valor(valor)
     
     def _atualizar_grafico(self):
         """Atualiza gráfico de tendências"""
-        if self.df_historico is None or len(self.df_historico) == 0:
+        if self.dados is None or self.dados.por_dia is None or len(self.dados.por_dia) == 0:
             return
         
         # Limpar gráfico anterior
         if self.canvas_grafico:
             self.canvas_grafico.get_tk_widget().destroy()
         
-        # Preparar dados
-        df = self.df_historico.copy()
-        df['data'] = pd.to_datetime(df['data_hora']).dt.date
-        
-        # Agrupar por data
-        df_agrupado = df.groupby('data').size().reset_index(name='count')
+        # Contagem por data (agregada na carga)
+        df_agrupado = self.dados.por_dia
         
         # Criar figura matplotlib
         fig = Figure(figsize=(12, 4), dpi=100, facecolor=CORES['branco'])
@@ -576,42 +673,35 @@ class Dashboard(ctk.CTkToplevel):
         self.canvas_grafico.get_tk_widget().pack(fill="both", expand=True)
     
     def _atualizar_tabela(self):
-        """Atualiza tabela de análises recentes"""
+        """Atualiza tabela de análises (mais recentes primeiro)"""
         if self.df_historico is None:
             return
         
-        # Limpar tabela
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Pegar últimas 20 análises
-        df_recentes = self.df_historico.tail(20).sort_values('data_hora', ascending=False)
-        
-        # Adicionar linhas
-        for _, row in df_recentes.iterrows():
-            # Formatar data/hora
-            dt = pd.to_datetime(row['data_hora'])
-            data_hora_fmt = dt.strftime("%d/%m/%Y %H:%M")
-            
-            # Formatar status
-            status_map = {
-                'Valida': '✅ Válida',
-                'Invalida': '❌ Inválida',
-                'Aviso': '⚠️ Aviso'
-            }
-            status_fmt = status_map.get(row['status_corrida'], row.get('status_corrida', 'N/A'))
-            
-            # Inserir na tabela
-            self.tree.insert(
-                "",
-                "end",
-                values=(
-                    data_hora_fmt,
-                    row['exame'],
-                    row['equipamento'],
-                    status_fmt
-                )
-            )
+        # data_hora já convertida para datetime na carga (agregar_historico)
+        df = self.df_historico
+        df_tabela = pd.DataFrame({
+            'data_hora': df['data_hora'],
+            'exame': df['exame'],
+            'equipamento': df['equipamento'],
+            'status': df['status_corrida'],
+        })
+        
+        # Formatação vetorizada, aplicada só às linhas visíveis
+        status_map = {
+            'Valida': '✅ Válida',
+            'Invalida': '❌ Inválida',
+            'Aviso': '⚠️ Aviso'
+        }
+        fonte = FonteDadosDataFrame(
+            df_tabela,
+            ["data_hora", "exame", "equipamento", "status"],
+            formatadores={
+                'data_hora': lambda serie: serie.dt.strftime("%d/%m/%Y %H:%M"),
+                'status': lambda serie: serie.map(status_map).fillna(serie),
+            },
+        )
+        fonte.ordenar('data_hora', decrescente=True)
+        self.tabela.definir_fonte(fonte)
     
     def _on_item_double_click(self, event):
         """Handler para duplo clique na tabela - abre visualizador"""
@@ -11,8 +11,19 @@ import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 
+from utils.gui_utils import FonteDadosDataFrame, TabelaVirtual
+
 from .estilos import CORES, FONTES, STATUS_CORES
 
+FORMATO_DATA_HORA = '%d/%m/%Y %H:%M:%S'
+
+
+def _datas_historico(serie: pd.Series) -> pd.Series:
+    """Coluna data_hora como datetime (texto no formato dd/mm/aaaa hh:mm:ss)"""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    return pd.to_datetime(serie, format=FORMATO_DATA_HORA, errors='coerce')
+
 
 class HistoricoAnalises(ctk.CTkToplevel):
     """
@@ -30,7 +41,18 @@ class HistoricoAnalises(ctk.CTkToplevel):
         super().__init__(master)
         
         self.df_original = dados_historico if dados_historico is not None else self._gerar_dados_exemplo()
-        self.df_filtrado = self.df_original.copy()
+        self.df_original = self.df_original.reset_index(drop=True)
+        
+        # Colunas derivadas calculadas uma vez (filtros e ordenação vetorizados)
+        self._datas = _datas_historico(self.df_original['data_hora'])
+        self._texto_busca = (
+            self.df_original['exame'].astype(str) + "\n" + self.df_original['equipamento'].astype(str)
+        ).str.lower()
+        self.fonte = FonteDadosDataFrame(
+            self.df_original,
+            ["data_hora", "exame", "equipamento", "status"],
+            chaves_ordenacao={'data_hora': lambda _serie: self._datas},
+        )
         
         # Configurações da janela
         self.title("Histórico de Análises")
@@ -52,6 +74,11 @@ class HistoricoAnalises(ctk.CTkToplevel):
         # Focar na janela
         self.focus()
     
+    @property
+    def df_filtrado(self) -> pd.DataFrame:
+        """Registros filtrados, na ordem exibida"""
+        return self.fonte.dataframe()
+    
     def _criar_header(self):
         """Cria header com título"""
         header = ctk.CTkFrame(
@@ -287,39 +314,20 @@ class HistoricoAnalises(ctk.CTkToplevel):
             foreground=[('selected', CORES['branco'])]
         )
         
-        # Scrollbars
-        scrollbar_y = ttk.Scrollbar(frame_tabela, orient="vertical")
-        scrollbar_x = ttk.Scrollbar(frame_tabela, orient="horizontal")
-        
-        # Treeview
-        self.tree = ttk.Treeview(
+        # Tabela virtual: só as linhas visíveis são inseridas no Treeview
+        self.tabela = TabelaVirtual(
             frame_tabela,
-            columns=("data_hora", "exame", "equipamento", "status"),
-            show="headings",
-            yscrollcommand=scrollbar_y.set,
-            xscrollcommand=scrollbar_x.set,
+            colunas=[
+                ("data_hora", "Data/Hora", 180, "center"),
+                ("exame", "Exame", 400, "w"),
+                ("equipamento", "Equipamento", 200, "center"),
+                ("status", "Status", 120, "center"),
+            ],
+            fonte=self.fonte,
             style="Historico.Treeview"
         )
-        
-        # Configurar colunas
-        self.tree.heading("data_hora", text="Data/Hora", command=lambda: self._ordenar_coluna("data_hora"))
-        self.tree.heading("exame", text="Exame", command=lambda: self._ordenar_coluna("exame"))
-        self.tree.heading("equipamento", text="Equipamento", command=lambda: self._ordenar_coluna("equipamento"))
-        self.tree.heading("status", text="Status", command=lambda: self._ordenar_coluna("status"))
-        
-        self.tree.column("data_hora", width=180, anchor="center")
-        self.tree.column("exame", width=400, anchor="w")
-        self.tree.column("equipamento", width=200, anchor="center")
-        self.tree.column("status", width=120, anchor="center")
-        
-        # Scrollbars
-        scrollbar_y.config(command=self.tree.yview)
-        scrollbar_x.config(command=self.tree.xview)
-        
-        # Grid
-        self.tree.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
-        scrollbar_y.grid(row=0, column=1, sticky="ns", pady=10)
-        scrollbar_x.grid(row=1, column=0, sticky="ew", padx=10)
+        self.tabela.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        self.tree = self.tabela.tree
         
         # Evento de duplo clique
         self.tree.bind("<Double-1>", self._on_item_double_click)
@@ -361,42 +369,30 @@ class HistoricoAnalises(ctk.CTkToplevel):
         self.btn_detalhes.grid(row=0, column=2, padx=10, pady=10)
         
         # Atualizar estado do botão ao selecionar
-        self.tree.bind("<<TreeviewSelect>>", lambda e: self._atualizar_botao_detalhes())
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._atualizar_botao_detalhes(), add="+")
     
     def _atualizar_tabela(self):
         """Atualiza conteúdo da tabela"""
-        # Limpar tabela
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Adicionar dados filtrados
-        for _, row in self.df_filtrado.iterrows():
-            self.tree.insert("", "end", values=(
-                row['data_hora'],
-                row['exame'],
-                row['equipamento'],
-                row['status']
-            ))
+        self.tabela.atualizar()
         
         # Atualizar labels
+        total_filtrado = self.fonte.total()
         self.label_status.configure(
-            text=f"Exibindo {len(self.df_filtrado)} de {len(self.df_original)} registros"
+            text=f"Exibindo {total_filtrado} de {len(self.df_original)} registros"
         )
         self.label_contador.configure(
-            text=f"📊 {len(self.df_filtrado)} / {len(self.df_original)} registros"
+            text=f"📊 {total_filtrado} / {len(self.df_original)} registros"
         )
     
     def _aplicar_filtros(self):
-        """Aplica filtros ao DataFrame"""
-        df = self.df_original.copy()
+        """Aplica filtros (máscara booleana vetorizada sobre o DataFrame original)"""
+        df = self.df_original
+        mascara = pd.Series(True, index=df.index)
         
         # Filtro de busca por texto
         texto_busca = self.entry_busca.get().strip().lower()
         if texto_busca:
-            df = df[
-                df['exame'].str.lower().str.contains(texto_busca, na=False) |
-                df['equipamento'].str.lower().str.contains(texto_busca, na=False)
-            ]
+            mascara &= self._texto_busca.str.contains(texto_busca, regex=False, na=False)
         
         # Filtro de período
         periodo = self.combo_periodo.get()
@@ -415,26 +411,20 @@ class HistoricoAnalises(ctk.CTkToplevel):
                 data_inicio = None
             
             if data_inicio:
-                # Converter coluna para datetime se ainda não for
-                if df['data_hora'].dtype == 'object':
-                    df['data_hora_dt'] = pd.to_datetime(df['data_hora'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
-                else:
-                    df['data_hora_dt'] = df['data_hora']
-                
-                df = df[df['data_hora_dt'] >= data_inicio]
-                df = df.drop(columns=['data_hora_dt'], errors='ignore')
+                mascara &= self._datas >= data_inicio
         
         # Filtro de equipamento
         equipamento = self.combo_equipamento.get()
         if equipamento != "Todos":
-            df = df[df['equipamento'] == equipamento]
+            mascara &= df['equipamento'] == equipamento
         
         # Filtro de status
         status = self.combo_status.get()
         if status != "Todos":
-            df = df[df['status'] == status]
+            mascara &= df['status'] == status
         
-        self.df_filtrado = df
+        self.fonte.filtrar(mascara.to_numpy())
+        self.tabela.inicio = 0
         self._atualizar_tabela()
     
     def _limpar_filtros(self):
@@ -446,29 +436,12 @@ class HistoricoAnalises(ctk.CTkToplevel):
         self._aplicar_filtros()
     
     def _ordenar_coluna(self, coluna: str):
-        """Ordena tabela por coluna"""
-        # Ordenar DataFrame
-        if coluna in self.df_filtrado.columns:
-            if coluna == "data_hora":
-                # Ordenação especial para data
-                if self.df_filtrado['data_hora'].dtype == 'object':
-                    self.df_filtrado['data_hora_dt'] = pd.to_datetime(
-                        self.df_filtrado['data_hora'], 
-                        format='%d/%m/%Y %H:%M:%S', 
-                        errors='coerce'
-                    )
-                    self.df_filtrado = self.df_filtrado.sort_values('data_hora_dt', ascending=False)
-                    self.df_filtrado = self.df_filtrado.drop(columns=['data_hora_dt'], errors='ignore')
-                else:
-                    self.df_filtrado = self.df_filtrado.sort_values(coluna, ascending=False)
-            else:
-                self.df_filtrado = self.df_filtrado.sort_values(coluna)
-            
-            self._atualizar_tabela()
+        """Ordena tabela por coluna (data/hora pela data convertida)"""
+        self.tabela.ordenar(coluna)
     
     def _atualizar_botao_detalhes(self):
         """Atualiza estado do botão de detalhes"""
-        selecionado = self.tree.selection()
+        selecionado = self.tabela.selecao()
         if selecionado:
             self.btn_detalhes.configure(state="normal")
         else:
@@ -476,11 +449,12 @@ class HistoricoAnalises(ctk.CTkToplevel):
     
     def _abrir_detalhes(self):
         """Abre visualizador de detalhes do item selecionado"""
-        selecionado = self.tree.selection()
+        selecionado = self.tree.selection() or self.tabela.selecao()
         if not selecionado:
             return
         
-        valores = self.tree.item(selecionado[0])['values']
+        registro = self.fonte.registro(selecionado[0])
+        valores = [registro['data_hora'], registro['exame'], registro['equipamento'], str(registro['status'])]
         
         try:
             from .visualizador_exame import VisualizadorExame, criar_dados_exame_exemplo
@@ -13,10 +13,15 @@ Funcionalidades:
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 import pandas as pd
+from bisect import bisect_left, insort
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from itertools import count, islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import json
 import os
 
+from utils.gui_utils import FonteDadosConsulta, LinhaTabela, TabelaVirtual
+
 
 # Importar estilos do módulo
 try:
@@ -68,9 +73,12 @@ class CategoriaAlerta:
 class Alerta:
     """Classe para representar um alerta"""
     
+    _sequencia = count()
+    
     def __init__(self, tipo: str, categoria: str, mensagem: str, 
                  exame: str = '', equipamento: str = '', detalhes: str = ''):
-        self.id = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        # Sufixo sequencial: alertas criados no mesmo microssegundo têm ids distintos
+        self.id = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{next(Alerta._sequencia)}"
         self.tipo = tipo
         self.categoria = categoria
         self.mensagem = mensagem
@@ -78,8 +86,35 @@ class Alerta:
         self.equipamento = equipamento
         self.detalhes = detalhes
         self.data_hora = datetime.now()
-        self.lido = False
-        self.resolvido = False
+        self._armazem: Optional['ArmazemAlertas'] = None
+        self._seq: Optional[int] = None
+        self._lido = False
+        self._resolvido = False
+    
+    @property
+    def lido(self) -> bool:
+        return self._lido
+    
+    @lido.setter
+    def lido(self, valor: bool):
+        self._alterar_estado('lido', bool(valor))
+    
+    @property
+    def resolvido(self) -> bool:
+        return self._resolvido
+    
+    @resolvido.setter
+    def resolvido(self, valor: bool):
+        self._alterar_estado('resolvido', bool(valor))
+    
+    def _alterar_estado(self, campo: str, valor: bool):
+        """Altera lido/resolvido e avisa o armazém (índices e persistência)"""
+        antigo = getattr(self, f'_{campo}')
+        if antigo == valor:
+            return
+        setattr(self, f'_{campo}', valor)
+        if self._armazem is not None:
+            self._armazem._estado_alterado(self, campo, antigo)
     
     def marcar_lido(self):
         """Marca alerta como lido"""
@@ -105,6 +140,26 @@ class Alerta:
             'resolvido': self.resolvido
         }
     
+    @classmethod
+    def from_dict(cls, dados: Dict) -> 'Alerta':
+        """Recria alerta a partir de `to_dict()`"""
+        alerta = cls(
+            dados.get('tipo', TipoAlerta.INFO),
+            dados.get('categoria', CategoriaAlerta.SISTEMA),
+            dados.get('mensagem', ''),
+            exame=dados.get('exame', ''),
+            equipamento=dados.get('equipamento', ''),
+            detalhes=dados.get('detalhes', ''),
+        )
+        alerta.id = str(dados.get('id') or alerta.id)
+        try:
+            alerta.data_hora = datetime.strptime(dados['data_hora'], '%Y-%m-%d %H:%M:%S')
+        except (KeyError, TypeError, ValueError):
+            pass
+        alerta._lido = bool(dados.get('lido', False))
+        alerta._resolvido = bool(dados.get('resolvido', False))
+        return alerta
+    
     def get_cor(self) -> str:
         """Retorna cor baseada no tipo"""
         cores_tipo = {
@@ -128,14 +183,240 @@ class Alerta:
         return icones_tipo.get(self.tipo, 'ℹ️')
 
 
+CAMPOS_INDICE = ('tipo', 'categoria', 'lido', 'resolvido')
+
+
+class _IndiceOrdenado:
+    """Alertas de um índice, ordenados pela ordem de chegada no armazém"""
+    
+    __slots__ = ('seqs', 'alertas')
+    
+    def __init__(self):
+        self.seqs: List[int] = []
+        self.alertas: Dict[int, Alerta] = {}
+    
+    def __len__(self) -> int:
+        return len(self.seqs)
+    
+    def incluir(self, alerta: Alerta):
+        seq = alerta._seq
+        if seq in self.alertas:
+            return
+        self.alertas[seq] = alerta
+        if not self.seqs or seq > self.seqs[-1]:
+            self.seqs.append(seq)
+        else:
+            insort(self.seqs, seq)
+    
+    def remover(self, alerta: Alerta):
+        seq = alerta._seq
+        if self.alertas.pop(seq, None) is None:
+            return
+        del self.seqs[bisect_left(self.seqs, seq)]
+    
+    def recentes(self, offset: int = 0, limite: Optional[int] = None) -> List[Alerta]:
+        """Fatia do mais recente para o mais antigo"""
+        fim = len(self.seqs) - offset
+        if fim <= 0:
+            return []
+        inicio = 0 if limite is None else max(0, fim - limite)
+        return [self.alertas[seq] for seq in reversed(self.seqs[inicio:fim])]
+    
+    def iterar_recentes(self) -> Iterator[Alerta]:
+        for seq in reversed(self.seqs):
+            yield self.alertas[seq]
+
+
+class ArmazemAlertas:
+    """
+    Armazém de alertas indexado, com contadores e consulta paginada.
+    
+    - Inclusão O(1): os alertas ficam em ordem de chegada e as consultas
+      devolvem do mais recente para o mais antigo.
+    - Um índice por valor de tipo, categoria, lido e resolvido; o tamanho do
+      índice é o contador, atualizado quando o alerta muda de estado.
+    - Consultas com vários filtros percorrem apenas o menor índice envolvido.
+    - Com `arquivo`, cada inclusão/alteração é acrescentada como uma linha
+      JSON (a última linha de cada id vale); `compactar()` reescreve o
+      arquivo apenas com o estado atual.
+    """
+    
+    def __init__(self, arquivo: Optional[str] = None):
+        self.arquivo = arquivo
+        self._seq = count()
+        self._todos = _IndiceOrdenado()
+        self._por_id: Dict[str, Alerta] = {}
+        self._indices: Dict[Tuple[str, Any], _IndiceOrdenado] = {}
+        if arquivo and os.path.exists(arquivo):
+            self._carregar()
+    
+    def __len__(self) -> int:
+        return len(self._todos)
+    
+    def __iter__(self) -> Iterator[Alerta]:
+        return self._todos.iterar_recentes()
+    
+    def obter(self, alerta_id: str) -> Optional[Alerta]:
+        return self._por_id.get(alerta_id)
+    
+    def adicionar(self, alerta: Alerta, persistir: bool = True):
+        """Inclui o alerta (substitui um alerta anterior com o mesmo id)"""
+        if alerta.id in self._por_id:
+            self._desindexar(self._por_id.pop(alerta.id))
+        alerta._armazem = self
+        alerta._seq = next(self._seq)
+        self._por_id[alerta.id] = alerta
+        self._todos.incluir(alerta)
+        for campo in CAMPOS_INDICE:
+            self._indice(campo, getattr(alerta, campo), criar=True).incluir(alerta)
+        if persistir:
+            self._anexar([alerta])
+    
+    def remover_anteriores(self, limite: datetime) -> int:
+        """Remove alertas com data_hora anterior a `limite`; retorna quantos"""
+        removidos = [a for a in self._todos.iterar_recentes() if a.data_hora < limite]
+        if not removidos:
+            return 0
+        mantidos = [a for a in self._todos.iterar_recentes() if a.data_hora >= limite]
+        self._reconstruir(reversed(mantidos))
+        for alerta in removidos:
+            alerta._armazem = None
+        self.compactar()
+        return len(removidos)
+    
+    def consultar(self, offset: int = 0, limite: Optional[int] = None, **filtros) -> List[Alerta]:
+        """
+        Alertas que atendem aos filtros, do mais recente para o mais antigo.
+        
+        Filtros aceitos: tipo, categoria, lido, resolvido (None = ignorar).
+        `offset`/`limite` definem a página.
+        """
+        filtros = self._normalizar_filtros(filtros)
+        base = self._menor_indice(filtros)
+        if base is None:
+            return []
+        if len(filtros) <= 1:
+            return base.recentes(offset, limite)
+        selecionados = (a for a in base.iterar_recentes() if self._atende(a, filtros))
+        fim = None if limite is None else offset + limite
+        return list(islice(selecionados, offset, fim))
+    
+    def contar(self, **filtros) -> int:
+        """Quantidade de alertas que atendem aos filtros"""
+        filtros = self._normalizar_filtros(filtros)
+        base = self._menor_indice(filtros)
+        if base is None:
+            return 0
+        if len(filtros) <= 1:
+            return len(base)
+        return sum(1 for a in base.iterar_recentes() if self._atende(a, filtros))
+    
+    def compactar(self):
+        """Reescreve o arquivo de persistência com o estado atual"""
+        if not self.arquivo:
+            return
+        pasta = os.path.dirname(self.arquivo)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        tmp = f"{self.arquivo}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for alerta in reversed(list(self._todos.iterar_recentes())):
+                f.write(json.dumps(alerta.to_dict(), ensure_ascii=False) + "\n")
+        os.replace(tmp, self.arquivo)
+    
+    def _estado_alterado(self, alerta: Alerta, campo: str, antigo: bool):
+        indice = self._indice(campo, antigo)
+        if indice is not None:
+            indice.remover(alerta)
+        self._indice(campo, getattr(alerta, campo), criar=True).incluir(alerta)
+        self._anexar([alerta])
+    
+    def _indice(self, campo: str, valor: Any, criar: bool = False) -> Optional[_IndiceOrdenado]:
+        chave = (campo, valor)
+        indice = self._indices.get(chave)
+        if indice is None and criar:
+            indice = self._indices[chave] = _IndiceOrdenado()
+        return indice
+    
+    def _desindexar(self, alerta: Alerta):
+        self._todos.remover(alerta)
+        for campo in CAMPOS_INDICE:
+            indice = self._indice(campo, getattr(alerta, campo))
+            if indice is not None:
+                indice.remover(alerta)
+        alerta._armazem = None
+    
+    def _reconstruir(self, alertas):
+        self._seq = count()
+        self._todos = _IndiceOrdenado()
+        self._por_id = {}
+        self._indices = {}
+        for alerta in alertas:
+            self.adicionar(alerta, persistir=False)
+    
+    @staticmethod
+    def _normalizar_filtros(filtros: Dict[str, Any]) -> Dict[str, Any]:
+        invalidos = set(filtros) - set(CAMPOS_INDICE)
+        if invalidos:
+            raise ValueError(f"Filtros desconhecidos: {', '.join(sorted(invalidos))}")
+        return {campo: valor for campo, valor in filtros.items() if valor is not None}
+    
+    def _menor_indice(self, filtros: Dict[str, Any]) -> Optional[_IndiceOrdenado]:
+        if not filtros:
+            return self._todos
+        indices = [self._indice(campo, valor) for campo, valor in filtros.items()]
+        if any(indice is None or not len(indice) for indice in indices):
+            return None
+        return min(indices, key=len)
+    
+    @staticmethod
+    def _atende(alerta: Alerta, filtros: Dict[str, Any]) -> bool:
+        return all(getattr(alerta, campo) == valor for campo, valor in filtros.items())
+    
+    def _anexar(self, alertas: List[Alerta]):
+        if not self.arquivo:
+            return
+        try:
+            pasta = os.path.dirname(self.arquivo)
+            if pasta:
+                os.makedirs(pasta, exist_ok=True)
+            with open(self.arquivo, 'a', encoding='utf-8') as f:
+                for alerta in alertas:
+                    f.write(json.dumps(alerta.to_dict(), ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Erro ao gravar alertas: {e}")
+    
+    def _carregar(self):
+        registros: Dict[str, Dict] = {}
+        try:
+            with open(self.arquivo, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        dados = json.loads(linha)
+                    except ValueError:
+                        continue  # linha truncada (ex.: gravação interrompida)
+                    if isinstance(dados, dict) and dados.get('id'):
+                        registros[str(dados['id'])] = dados
+        except (OSError, UnicodeDecodeError) as e:
+            # Arquivo ilegível não derruba a central de notificações: começa vazio
+            print(f"Erro ao carregar alertas: {e}")
+            return
+        self._reconstruir(Alerta.from_dict(d) for d in registros.values())
+
+
 class GerenciadorAlertas:
     """Gerenciador central de alertas"""
     
-    def __init__(self):
-        self.alertas: List[Alerta] = []
+    def __init__(self, arquivo: Optional[str] = None):
+        self.armazem = ArmazemAlertas(arquivo)
         self.regras_ativas: Dict[str, bool] = self._carregar_regras_padrao()
         self.callbacks: List[callable] = []
     
+    @property
+    def alertas(self) -> List[Alerta]:
+        """Todos os alertas (cópia), do mais recente para o mais antigo"""
+        return list(self.armazem)
+    
     def _carregar_regras_padrao(self) -> Dict[str, bool]:
         """Carrega regras de alerta padrão"""
         return {
@@ -150,7 +431,7 @@ class GerenciadorAlertas:
     
     def adicionar_alerta(self, alerta: Alerta):
         """Adiciona novo alerta"""
-        self.alertas.insert(0, alerta)  # Insere no início (mais recente primeiro)
+        self.armazem.adicionar(alerta)
         self._notificar_callbacks()
     
     def criar_alerta(self, tipo: str, categoria: str, mensagem: str, **kwargs) -> Alerta:
@@ -159,34 +440,50 @@ class GerenciadorAlertas:
         self.adicionar_alerta(alerta)
         return alerta
     
+    def get_alerta(self, alerta_id: str) -> Optional[Alerta]:
+        """Retorna alerta pelo id"""
+        return self.armazem.obter(alerta_id)
+    
     def get_alertas_nao_lidos(self) -> List[Alerta]:
         """Retorna alertas não lidos"""
-        return [a for a in self.alertas if not a.lido]
+        return self.armazem.consultar(lido=False)
     
     def get_alertas_nao_resolvidos(self) -> List[Alerta]:
         """Retorna alertas não resolvidos"""
-        return [a for a in self.alertas if not a.resolvido]
+        return self.armazem.consultar(resolvido=False)
     
     def get_alertas_por_tipo(self, tipo: str) -> List[Alerta]:
         """Retorna alertas de um tipo específico"""
-        return [a for a in self.alertas if a.tipo == tipo]
+        return self.armazem.consultar(tipo=tipo)
     
     def get_alertas_por_categoria(self, categoria: str) -> List[Alerta]:
         """Retorna alertas de uma categoria específica"""
-        return [a for a in self.alertas if a.categoria == categoria]
+        return self.armazem.consultar(categoria=categoria)
+    
+    def consultar_alertas(self, offset: int = 0, limite: Optional[int] = None, **filtros) -> List[Alerta]:
+        """Página de alertas filtrados (ver ArmazemAlertas.consultar)"""
+        return self.armazem.consultar(offset=offset, limite=limite, **filtros)
+    
+    def contar_alertas(self, **filtros) -> int:
+        """Quantidade de alertas filtrados"""
+        return self.armazem.contar(**filtros)
     
     def marcar_todos_lidos(self):
         """Marca todos os alertas como lidos"""
-        for alerta in self.alertas:
+        for alerta in self.armazem.consultar(lido=False):
             alerta.marcar_lido()
         self._notificar_callbacks()
     
     def limpar_alertas_antigos(self, dias: int = 30):
         """Remove alertas mais antigos que X dias"""
         limite = datetime.now() - timedelta(days=dias)
-        self.alertas = [a for a in self.alertas if a.data_hora >= limite]
+        self.armazem.remover_anteriores(limite)
         self._notificar_callbacks()
     
+    def salvar(self):
+        """Compacta o arquivo de persistência (se configurado)"""
+        self.armazem.compactar()
+    
     def registrar_callback(self, callback: callable):
         """Registra callback para notificação de novos alertas"""
         self.callbacks.append(callback)
@@ -201,7 +498,7 @@ class GerenciadorAlertas:
     
     def exportar_alertas(self, filepath: str):
         """Exporta alertas para arquivo CSV"""
-        if not self.alertas:
+        if not len(self.armazem):
             return
         
         df = pd.DataFrame([a.to_dict() for a in self.alertas])
@@ -209,20 +506,28 @@ class GerenciadorAlertas:
     
     def get_estatisticas(self) -> Dict:
         """Retorna estatísticas dos alertas"""
+        contar = self.armazem.contar
         return {
-            'total': len(self.alertas),
-            'nao_lidos': len(self.get_alertas_nao_lidos()),
-            'nao_resolvidos': len(self.get_alertas_nao_resolvidos()),
-            'criticos': len(self.get_alertas_por_tipo(TipoAlerta.CRITICO)),
-            'altos': len(self.get_alertas_por_tipo(TipoAlerta.ALTO)),
-            'medios': len(self.get_alertas_por_tipo(TipoAlerta.MEDIO)),
-            'baixos': len(self.get_alertas_por_tipo(TipoAlerta.BAIXO)),
+            'total': len(self.armazem),
+            'nao_lidos': contar(lido=False),
+            'nao_resolvidos': contar(resolvido=False),
+            'criticos': contar(tipo=TipoAlerta.CRITICO),
+            'altos': contar(tipo=TipoAlerta.ALTO),
+            'medios': contar(tipo=TipoAlerta.MEDIO),
+            'baixos': contar(tipo=TipoAlerta.BAIXO),
         }
 
 
 class CentroNotificacoes(ctk.CTkToplevel):
     """Centro de Notificações - Janela principal de alertas"""
     
+    FILTROS_STATUS = {
+        "Não lidos": {'lido': False},
+        "Não resolvidos": {'resolvido': False},
+        "Lidos": {'lido': True},
+        "Resolvidos": {'resolvido': True},
+    }
+    
     def __init__(self, parent, gerenciador: GerenciadorAlertas):
         super().__init__(parent)
         
@@ -299,7 +604,7 @@ class CentroNotificacoes(ctk.CTkToplevel):
             frame_controles,
             values=["Todos", TipoAlerta.CRITICO, TipoAlerta.ALTO, TipoAlerta.MEDIO, TipoAlerta.BAIXO, TipoAlerta.INFO],
             width=120,
-            command=lambda _: self._atualizar_lista()
+            command=lambda _: self._filtros_alterados()
         )
         self.combo_tipo.set("Todos")
         self.combo_tipo.pack(side="left", padx=5)
@@ -311,7 +616,7 @@ class CentroNotificacoes(ctk.CTkToplevel):
             values=["Todos", CategoriaAlerta.CONTROLE, CategoriaAlerta.REGRA, 
                    CategoriaAlerta.EQUIPAMENTO, CategoriaAlerta.SISTEMA, CategoriaAlerta.QUALIDADE],
             width=140,
-            command=lambda _: self._atualizar_lista()
+            command=lambda _: self._filtros_alterados()
         )
         self.combo_categoria.set("Todos")
         self.combo_categoria.pack(side="left", padx=5)
@@ -322,7 +627,7 @@ class CentroNotificacoes(ctk.CTkToplevel):
             frame_controles,
             values=["Todos", "Não lidos", "Não resolvidos", "Lidos", "Resolvidos"],
             width=130,
-            command=lambda _: self._atualizar_lista()
+            command=lambda _: self._filtros_alterados()
         )
         self.combo_status.set("Não resolvidos")
         self.combo_status.pack(side="left", padx=5)
@@ -375,43 +680,27 @@ class CentroNotificacoes(ctk.CTkToplevel):
             foreground=[('selected', CORES['branco'])]
         )
         
-        # Treeview
-        colunas = ('tipo', 'categoria', 'mensagem', 'exame', 'data_hora', 'status')
-        self.tree = ttk.Treeview(
+        # Tabela virtual: linhas buscadas no armazém conforme a rolagem
+        # (o armazém só ordena do mais recente para o mais antigo)
+        self.tabela = TabelaVirtual(
             frame_lista,
-            columns=colunas,
-            show='tree headings',
+            colunas=[
+                ('tipo', 'Tipo', 80, 'center'),
+                ('categoria', 'Categoria', 110, 'center'),
+                ('mensagem', 'Mensagem', 450, 'w'),
+                ('exame', 'Exame', 250, 'w'),
+                ('data_hora', 'Data/Hora', 150, 'center'),
+                ('status', 'Status', 100, 'center'),
+            ],
+            mostrar_arvore=True,
+            ordenavel=False,
             style="Alertas.Treeview",
             selectmode='extended'
         )
-        
-        # Configurar colunas
+        self.tabela.pack(fill="both", expand=True)
+        self.tree = self.tabela.tree
         self.tree.column('#0', width=50, minwidth=50, anchor='center')
-        self.tree.column('tipo', width=80, minwidth=80, anchor='center')
-        self.tree.column('categoria', width=110, minwidth=110, anchor='center')
-        self.tree.column('mensagem', width=450, minwidth=200, anchor='w')
-        self.tree.column('exame', width=250, minwidth=150, anchor='w')
-        self.tree.column('data_hora', width=150, minwidth=130, anchor='center')
-        self.tree.column('status', width=100, minwidth=100, anchor='center')
-        
-        # Headers
         self.tree.heading('#0', text='')
-        self.tree.heading('tipo', text='Tipo')
-        self.tree.heading('categoria', text='Categoria')
-        self.tree.heading('mensagem', text='Mensagem')
-        self.tree.heading('exame', text='Exame')
-        self.tree.heading('data_hora', text='Data/Hora')
-        self.tree.heading('status', text='Status')
-        
-        # Scrollbars
-        scrollbar_v = ttk.Scrollbar(frame_lista, orient="vertical", command=self.tree.yview)
-        scrollbar_h = ttk.Scrollbar(frame_lista, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=scrollbar_v.set, xscrollcommand=scrollbar_h.set)
-        
-        # Pack
-        self.tree.pack(side="left", fill="both", expand=True)
-        scrollbar_v.pack(side="right", fill="y")
-        scrollbar_h.pack(side="bottom", fill="x")
         
         # Bind eventos
         self.tree.bind('<Double-Button-1>', self._on_double_click)
@@ -460,59 +749,53 @@ class CentroNotificacoes(ctk.CTkToplevel):
         )
         btn_exportar.pack(side="right", padx=5)
     
-    def _atualizar_lista(self):
-        """Atualiza lista de alertas com filtros aplicados"""
-        # Limpar árvore
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Aplicar filtros
-        alertas_filtrados = self.gerenciador.alertas.copy()
-        
-        # Filtro de tipo
+    def _filtros_ativos(self) -> Dict:
+        """Filtros selecionados nos combos, no formato de consultar_alertas"""
+        filtros = dict(self.FILTROS_STATUS.get(self.combo_status.get(), {}))
         tipo = self.combo_tipo.get()
         if tipo != "Todos":
-            alertas_filtrados = [a for a in alertas_filtrados if a.tipo == tipo]
-        
-        # Filtro de categoria
+            filtros['tipo'] = tipo
         categoria = self.combo_categoria.get()
         if categoria != "Todos":
-            alertas_filtrados = [a for a in alertas_filtrados if a.categoria == categoria]
-        
-        # Filtro de status
-        status = self.combo_status.get()
-        if status == "Não lidos":
-            alertas_filtrados = [a for a in alertas_filtrados if not a.lido]
-        elif status == "Não resolvidos":
-            alertas_filtrados = [a for a in alertas_filtrados if not a.resolvido]
-        elif status == "Lidos":
-            alertas_filtrados = [a for a in alertas_filtrados if a.lido]
-        elif status == "Resolvidos":
-            alertas_filtrados = [a for a in alertas_filtrados if a.resolvido]
-        
-        # Preencher árvore
-        for alerta in alertas_filtrados:
-            status_str = "✓" if alerta.resolvido else ("👁️" if alerta.lido else "📬")
-            
-            self.tree.insert(
-                '',
-                'end',
-                text=alerta.get_icone(),
-                values=(
-                    alerta.tipo,
-                    alerta.categoria,
-                    alerta.mensagem,
-                    alerta.exame or '-',
-                    alerta.data_hora.strftime('%d/%m/%Y %H:%M'),
-                    status_str
-                ),
-                tags=(alerta.id,)
-            )
+            filtros['categoria'] = categoria
+        return filtros
+    
+    def _filtros_alterados(self):
+        """Volta ao topo da lista ao trocar um filtro"""
+        self._atualizar_lista(manter_posicao=False)
+    
+    @staticmethod
+    def _linha_alerta(alerta: Alerta) -> LinhaTabela:
+        status_str = "✓" if alerta.resolvido else ("👁️" if alerta.lido else "📬")
+        return LinhaTabela(
+            alerta.id,
+            (
+                alerta.tipo,
+                alerta.categoria,
+                alerta.mensagem,
+                alerta.exame or '-',
+                alerta.data_hora.strftime('%d/%m/%Y %H:%M'),
+                status_str
+            ),
+            alerta.get_icone(),
+        )
+    
+    def _atualizar_lista(self, manter_posicao: bool = True):
+        """Atualiza lista de alertas com filtros aplicados (apenas as linhas visíveis)"""
+        filtros = self._filtros_ativos()
+        fonte = FonteDadosConsulta(
+            contar=lambda: self.gerenciador.contar_alertas(**filtros),
+            buscar=lambda offset, limite: [
+                self._linha_alerta(a)
+                for a in self.gerenciador.consultar_alertas(offset=offset, limite=limite, **filtros)
+            ],
+        )
+        self.tabela.definir_fonte(fonte, manter_posicao=manter_posicao)
         
         # Atualizar contadores
         stats = self.gerenciador.get_estatisticas()
         self.label_contador.configure(text=f"📬 {stats['nao_lidos']} não lidos | 📋 {stats['total']} total")
-        self.label_exibindo.configure(text=f"Exibindo {len(alertas_filtrados)} de {stats['total']} alertas")
+        self.label_exibindo.configure(text=f"Exibindo {fonte.total()} de {stats['total']} alertas")
     
     def _on_double_click(self, event):
         """Handler para duplo clique"""
@@ -525,12 +808,8 @@ class CentroNotificacoes(ctk.CTkToplevel):
             messagebox.showwarning("Aviso", "Selecione um alerta para ver detalhes.")
             return
         
-        # Pegar primeiro selecionado
-        item = self.tree.item(selecao[0])
-        alerta_id = item['tags'][0]
-        
-        # Buscar alerta
-        alerta = next((a for a in self.gerenciador.alertas if a.id == alerta_id), None)
+        # Pegar primeiro selecionado (iid = id do alerta)
+        alerta = self.gerenciador.get_alerta(selecao[0])
         if not alerta:
             return
         
@@ -545,15 +824,14 @@ class CentroNotificacoes(ctk.CTkToplevel):
     
     def _resolver_selecionados(self):
         """Marca alertas selecionados como resolvidos"""
-        selecao = self.tree.selection()
+        selecao = self.tabela.selecao()
         if not selecao:
             messagebox.showwarning("Aviso", "Selecione alertas para resolver.")
             return
         
-        # Marcar como resolvidos
-        for item in selecao:
-            alerta_id = self.tree.item(item)['tags'][0]
-            alerta = next((a for a in self.gerenciador.alertas if a.id == alerta_id), None)
+        # Marcar como resolvidos (iid = id do alerta)
+        for alerta_id in selecao:
+            alerta = self.gerenciador.get_alerta(alerta_id)
             if alerta:
                 alerta.marcar_resolvido()
         
@@ -568,7 +846,7 @@ class CentroNotificacoes(ctk.CTkToplevel):
     
     def _exportar_alertas(self):
         """Exporta alertas filtrados para CSV"""
-        if not self.gerenciador.alertas:
+        if not self.gerenciador.contar_alertas():
             messagebox.showwarning("Aviso", "Não há alertas para exportar.")
             return
         
@@ -4,7 +4,8 @@ Mantém utilitários globais (_formatar_para_gal) para compatibilidade.
 """
 
 import os
-from datetime import datetime
+import sys
+from pathlib import Path
 
 from services.system_paths import BASE_DIR
 from ui.main_window import criar_aplicacao_principal
@@ -26,168 +27,6 @@ def _formatar_para_gal(df, exam_cfg=None, exame: str | None = None):
     return formatar_para_gal(df, exam_cfg=exam_cfg, exame=exame)
 
 
-def _formatar_para_gal_OLD(df, exam_cfg=None, exame: str | None = None):
-    """Formata o resultado para layout GAL usando metadados do exame (registry)."""
-    import unicodedata
-    import pandas as pd
-    from services.exam_registry import get_exam_cfg
-
-    cfg = exam_cfg or (get_exam_cfg(exame) if exame else get_exam_cfg(""))
-
-    df_in = df.copy()
-    for c in ["Unnamed: 0", "index"]:
-        if c in df_in.columns:
-            df_in = df_in.drop(columns=[c])
-
-    def _strip_accents(txt: str) -> str:
-        return (
-            unicodedata.normalize("NFKD", txt)
-            .encode("ASCII", "ignore")
-            .decode("ASCII")
-        )
-
-    def _norm(col: str) -> str:
-        col2 = str(col).strip()
-        col2 = _strip_accents(col2)
-        return col2.replace(" ", "_").lower()
-
-    colmap = {_norm(c): c for c in df_in.columns}
-
-    def _get(col_names, default=""):
-        for name in col_names:
-            key = _norm(name)
-            if key in colmap:
-                return df_in[colmap[key]]
-        return pd.Series([default] * len(df_in))
-
-    def _map_result(val):
-        if val is None or (isinstance(val, float) and pd.isna(val)):
-            return ""
-        s = str(val).strip().lower()
-        if "inconcl" in s:
-            return "3"
-        if "nao" in s and "detect" in s:
-            return "2"
-        if "detect" in s:
-            return "1"
-        return ""
-
-    df_out = pd.DataFrame()
-    cod_col = _get(["codigo", "amostra"])
-    df_out["codigoAmostra"] = cod_col
-    df_out["codigo"] = cod_col
-    df_out["requisicao"] = ""
-    df_out["paciente"] = ""
-    df_out["exame"] = cfg.nome_exame or "VRSRT"
-    df_out["metodo"] = "RTTR"
-    df_out["registroInterno"] = cod_col
-    df_out["kit"] = str(cfg.kit_codigo or "427")
-    df_out["reteste"] = ""
-    df_out["loteKit"] = ""
-    df_out["dataProcessamentoFim"] = datetime.now().strftime("%d/%m/%Y")
-    df_out["valorReferencia"] = ""
-    df_out["observacao"] = ""
-    df_out["painel"] = cfg.panel_tests_id or "1"
-    df_out["resultado"] = ""
-
-    export_fields = cfg.export_fields or []
-    if not export_fields:
-        export_fields = [
-            "Influenzaa",
-            "influenzab",
-            "coronavirusncov",
-            "adenovirus",
-            "vsincicialresp",
-            "metapneumovirus",
-            "rinovirus",
-        ]
-
-    def _find_result_col(target_norm: str):
-        """
-        Procura coluna de resultado compatível com o analito exportado,
-        usando alias para mapear nomes de painel (influenzaa, adenovirus, etc.)
-        para os alvos internos (INF A, ADV, ...).
-        """
-        # aliases básicos painel -> alvo interno
-        aliases = {
-            "INFLUENZAA": "INF A",
-            "INFLUENZAB": "INF B",
-            "ADENOVIRUS": "ADV",
-            "ADENOVÍRUS": "ADV",
-            "METAPNEUMOVIRUS": "HMPV",
-            "RINOVIRUS": "HRV",
-            "RINOVÍRUS": "HRV",
-            "SARS-COV-2": "SC2",
-            "SARSCOV2": "SC2",
-            "CORONAVIRUSNCOV": "SC2",
-        }
-        # normaliza alvo exportado
-        tnorm_raw = _strip_accents(target_norm).upper().replace("_", " ").replace("-", " ").strip()
-        if tnorm_raw in aliases:
-            tnorm_raw = aliases[tnorm_raw]
-        # aplica normalize_target do exame (mapeia INFA -> INF A, etc.)
-        tnorm = cfg.normalize_target(tnorm_raw).upper()
-
-        def _clean(s: str) -> str:
-            return (
-                _strip_accents(s)
-                .upper()
-                .replace("RESULTADO", "")
-                .replace("_", "")
-                .replace(" ", "")
-            )
-
-        # tenta bater com colunas existentes
-        for k, v in colmap.items():
-            if _clean(k) == _clean(tnorm):
-                return v
-        # tenta prefácio Resultado_<alvo>
-        cand = f"Resultado_{tnorm}"
-        for k, v in colmap.items():
-            if _clean(k) == _clean(cand):
-                return v
-        return None
-
-    def _exportavel(code: str) -> bool:
-        if not code:
-            return False
-        c = code.upper()
-        # Usa lista de controles definida no exam_cfg quando disponível
-        try:
-            controles = cfg.controles or {"cn": [], "cp": []}
-            cn_list = [str(x).upper() for x in (controles.get("cn") or [])]
-            cp_list = [str(x).upper() for x in (controles.get("cp") or [])]
-            # comparar igualdade ou substring para cobrir variações como 'CN', 'CONTROLE N'
-            for v in cn_list:
-                if v and v in c:
-                    return False
-            for v in cp_list:
-                if v and v in c:
-                    return False
-        except Exception:
-            # fallback para checagem simples
-            if "CN" in c or "CP" in c:
-                return False
-        # somente códigos numéricos são exportáveis
-        return c.isdigit()
-
-    export_mask = cod_col.apply(_exportavel)
-    df_out = df_out.loc[export_mask].reset_index(drop=True)
-    df_in = df_in.loc[export_mask].reset_index(drop=True)
-
-    for analito in export_fields:
-        alvo_norm = cfg.normalize_target(analito)
-        res_col = _find_result_col(alvo_norm)
-        if res_col and res_col in df_in.columns:
-            serie_res = df_in[res_col].apply(_map_result)
-        else:
-            serie_res = pd.Series([""] * len(df_in))
-        col_nome = _strip_accents(analito).replace(" ", "").replace("-", "").replace("_", "").lower()
-        df_out[col_nome] = serie_res
-
-    return df_out
-
-
 def gerar_painel_csvs(df_resultados, exam_cfg=None, exame: str | None = None, output_dir: str | None = None):
     """
     DEPRECATED: Use exportacao.gal_formatter.gerar_painel_csvs() diretamente.
@@ -206,6 +45,52 @@ def _notificar_gal_saved(path, parent=None, timeout=5000):
     return notificar_gal_saved(path, parent=parent, timeout=timeout)
 
 
+def _executar_analise_lote(args) -> int:
+    """Executa `main.py analisar` e imprime o resumo. Retorna o código de saída."""
+    from services.batch_analysis import ETAPAS, analisar_lote, localizar_arquivos
+
+    arquivos = localizar_arquivos(args.entradas)
+    if not arquivos:
+        print("Nenhum arquivo de corrida encontrado.")
+        return 2
+
+    registrar_log("Main", f"Análise em lote via CLI: {len(arquivos)} corrida(s)", "INFO")
+    resumo = analisar_lote(
+        arquivos,
+        exame=args.exame,
+        mapas=args.mapas,
+        saida=args.saida,
+        lote=args.lote,
+        usuario=args.usuario,
+        workers=args.workers,
+        historico=None if args.sem_historico else args.historico,
+        gal=not args.sem_gal,
+        perfil=args.perfil,
+        metricas_jsonl=args.metricas,
+    )
+
+    for corrida in resumo["corridas"]:
+        tempos = " ".join(
+            f"{etapa}={corrida['tempos'][etapa]:.2f}s"
+            for etapa in ETAPAS + ("total",)
+            if etapa in corrida["tempos"]
+        )
+        situacao = corrida["status_corrida"] if corrida["status"] == "ok" else f"ERRO ({corrida['erro']})"
+        print(f"{Path(corrida['arquivo']).name}: {situacao} [{tempos}]")
+    etapas = " ".join(f"{etapa}={valor:.2f}s" for etapa, valor in resumo["tempos_etapas"].items())
+    print(
+        f"\n{resumo['sucesso']}/{resumo['total']} corrida(s) analisada(s) em "
+        f"{resumo['tempo_total']:.1f}s [{etapas}]"
+    )
+    if resumo["tempos_etapas_analise"]:
+        etapas_analise = " ".join(
+            f"{etapa}={valor:.2f}s" for etapa, valor in resumo["tempos_etapas_analise"].items()
+        )
+        print(f"Etapas da análise: {etapas_analise}")
+    print(f"Resumo: {Path(resumo['saida']) / 'resumo_lote.csv'}")
+    return 0 if resumo["falhas"] == 0 else 1
+
+
 def main_cli():
     """
     Interface de linha de comando (CLI) para executar módulos específicos.
@@ -217,6 +102,8 @@ def main_cli():
         python main.py alertas      # Abre Sistema de Alertas
         python main.py graficos     # Abre Gráficos
         python main.py visualizador # Abre Visualizador de Placas
+        python main.py analisar --exame "VR1e2 Biomanguinhos 7500" --mapas mapas/ corridas/
+                                    # Analisa corridas em lote (sem interface)
     """
     import argparse
     
@@ -234,8 +121,38 @@ def main_cli():
     subparsers.add_parser('graficos', help='Abrir Gráficos e Estatísticas')
     subparsers.add_parser('visualizador', help='Abrir Visualizador de Placas')
     
+    p_analisar = subparsers.add_parser(
+        'analisar', help='Analisar corridas em lote, sem interface gráfica'
+    )
+    p_analisar.add_argument(
+        'entradas', nargs='+',
+        help='Arquivos, diretórios ou padrões glob (ex.: "corridas/*.xlsx")'
+    )
+    p_analisar.add_argument('--exame', required=True, help='Nome do exame (exames_config.csv)')
+    p_analisar.add_argument(
+        '--mapas',
+        help='Mapa de extração (arquivo) ou diretório com um mapa por corrida (mesmo nome-base)'
+    )
+    p_analisar.add_argument('--saida', help='Diretório de saída (padrão: reports/lote_<data_hora>)')
+    p_analisar.add_argument('--lote', default='', help='Lote/kit das corridas')
+    p_analisar.add_argument('--usuario', default='lote', help='Usuário gravado no histórico')
+    p_analisar.add_argument('--workers', type=int, default=None, help='Número de processos (padrão: CPUs)')
+    p_analisar.add_argument(
+        '--historico', default='logs/historico_analises.csv', help='CSV de histórico de análises'
+    )
+    p_analisar.add_argument('--sem-historico', action='store_true', help='Não gravar no histórico')
+    p_analisar.add_argument('--sem-gal', action='store_true', help='Não gerar CSVs do GAL')
+    p_analisar.add_argument(
+        '--perfil', choices=['cprofile', 'pyinstrument'],
+        help='Grava um perfil de cada corrida na pasta da corrida'
+    )
+    p_analisar.add_argument('--metricas', help='Arquivo JSON lines com os tempos por etapa de cada análise')
+    
     args = parser.parse_args()
     
+    if args.command == 'analisar':
+        sys.exit(_executar_analise_lote(args))
+    
     if args.command == 'dashboard':
         registrar_log("Main", "Iniciando Dashboard via CLI", "INFO")
         from interface.dashboard import Dashboard
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+scripts/compact_history.py
+
+Compacta o histórico append-only (logs/historico_analises.csv):
+funde as colunas registradas no schema lateral (historico_analises.schema.json)
+no cabeçalho físico do CSV, reescrevendo o arquivo uma única vez.
+
+Deve ser executado offline (fora do horário de análises), por exemplo:
+    python scripts/compact_history.py --csv-path logs/historico_analises.csv
+"""
+
+import sys
+from pathlib import Path
+
+# Garante que o diretório raiz está no path
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.history_store import HISTORICO_CSV_PADRAO, HistoricoStore
+from utils.logger import registrar_log
+
+
+def compactar(csv_path: str = HISTORICO_CSV_PADRAO, somente_verificar: bool = False) -> bool:
+    """
+    Compacta o histórico indicado.
+
+    Args:
+        csv_path: Caminho do histórico CSV
+        somente_verificar: Apenas informa se a compactação é necessária
+
+    Returns:
+        True se a operação foi bem-sucedida
+    """
+    store = HistoricoStore(csv_path)
+    if not store.existe():
+        print(f"❌ Arquivo não encontrado: {csv_path}")
+        return False
+
+    pendente = store.precisa_compactar()
+    if somente_verificar:
+        estado = "necessária" if pendente else "desnecessária"
+        print(f"Compactação {estado}: {len(store.colunas())} colunas no schema")
+        return True
+
+    try:
+        resumo = store.compactar()
+    except Exception as e:
+        print(f"❌ Erro na compactação: {e}")
+        registrar_log("Compactação Histórico", f"Erro: {e}", "ERROR")
+        return False
+
+    print(f"✅ Histórico compactado: {resumo['linhas']} linhas, {resumo['colunas']} colunas")
+    if resumo["colunas_incorporadas"]:
+        print(f"   Colunas incorporadas ao cabeçalho: {', '.join(resumo['colunas_incorporadas'])}")
+    registrar_log(
+        "Compactação Histórico",
+        f"{resumo['linhas']} linhas; colunas incorporadas: {resumo['colunas_incorporadas']}",
+        "INFO",
+    )
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Funde o schema lateral no cabeçalho do histórico append-only"
+    )
+    parser.add_argument(
+        "--csv-path",
+        default=HISTORICO_CSV_PADRAO,
+        help="Caminho do arquivo CSV histórico"
+    )
+    parser.add_argument(
+        "--verificar",
+        action="store_true",
+        help="Apenas verifica se há colunas pendentes (não reescreve)"
+    )
+
+    args = parser.parse_args()
+    sys.exit(0 if compactar(args.csv_path, somente_verificar=args.verificar) else 1)
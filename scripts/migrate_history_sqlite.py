@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+scripts/migrate_history_sqlite.py
+
+Migração única do histórico CSV (logs/historico_analises.csv) para o backend
+SQLite indexado (logs/historico_analises.db), e exportação do SQLite de volta
+para CSV no formato legado.
+
+O backend é exclusivo (não há espelhamento entre CSV e banco): depois da
+migração, use o caminho .db como histórico (gerar_historico_csv, get_gal_sync).
+
+Uso:
+    python scripts/migrate_history_sqlite.py
+    python scripts/migrate_history_sqlite.py --exportar reports/historico_export.csv
+"""
+
+import sys
+from pathlib import Path
+
+# Garante que o diretório raiz está no path
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.history_sqlite import HistoricoGALSyncSQLite
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Importa o histórico CSV para SQLite (ou exporta o SQLite para CSV)"
+    )
+    parser.add_argument(
+        "--csv-path",
+        default="logs/historico_analises.csv",
+        help="Caminho do histórico CSV de origem"
+    )
+    parser.add_argument(
+        "--db-path",
+        default="logs/historico_analises.db",
+        help="Caminho do banco SQLite"
+    )
+    parser.add_argument(
+        "--exportar",
+        metavar="DESTINO_CSV",
+        help="Exporta o SQLite para o CSV indicado em vez de importar"
+    )
+    args = parser.parse_args()
+
+    backend = HistoricoGALSyncSQLite(args.db_path)
+    try:
+        if args.exportar:
+            total = backend.exportar_csv(args.exportar)
+            print(f"✅ Exportadas {total} linhas para {args.exportar}")
+        else:
+            total = backend.importar_csv(args.csv_path)
+            print(f"✅ Importadas {total} linhas para {args.db_path}")
+    except Exception as e:
+        print(f"❌ Erro: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+scripts/rebuild_history_rollup.py
+
+Recria os agregados diários do histórico (historico_analises.rollup.csv e
+historico_analises.rollup_corridas.csv) a partir do histórico completo.
+
+Necessário uma única vez em instalações com histórico anterior aos agregados,
+ou para corrigi-los após edições manuais no CSV:
+    python scripts/rebuild_history_rollup.py --csv-path logs/historico_analises.csv
+"""
+
+import sys
+from pathlib import Path
+
+# Garante que o diretório raiz está no path
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from services.history_rollup import RollupStore
+from services.history_store import HISTORICO_CSV_PADRAO, HistoricoStore
+from utils.logger import registrar_log
+
+
+def reconstruir(csv_path: str = HISTORICO_CSV_PADRAO) -> bool:
+    """
+    Recalcula os agregados diários do histórico indicado.
+
+    Returns:
+        True se a operação foi bem-sucedida
+    """
+    if not HistoricoStore(csv_path).existe():
+        print(f"❌ Arquivo não encontrado: {csv_path}")
+        return False
+
+    try:
+        rollup = RollupStore(csv_path).reconstruir()
+    except Exception as e:
+        print(f"❌ Erro ao recriar agregados: {e}")
+        registrar_log("Rollup Histórico", f"Erro: {e}", "ERROR")
+        return False
+
+    print(f"✅ Agregados recriados: {len(rollup.diario)} grupos diários, {len(rollup.corridas)} dias/exames com corridas")
+    registrar_log("Rollup Histórico", f"{len(rollup.diario)} grupos diários recriados", "INFO")
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Recria os agregados diários dos relatórios a partir do histórico"
+    )
+    parser.add_argument(
+        "--csv-path",
+        default=HISTORICO_CSV_PADRAO,
+        help="Caminho do arquivo CSV histórico"
+    )
+
+    args = parser.parse_args()
+    sys.exit(0 if reconstruir(args.csv_path) else 1)
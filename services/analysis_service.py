@@ -44,8 +44,12 @@ from services.system_paths import BASE_DIR
 
 from services.equipment_detector import detectar_equipamento
 
+from services.parse_cache import get_parse_cache
+
 from services.equipment_registry import EquipmentRegistry
 
+from utils.instrumentacao import MedidorEtapas, capturar_perfil, gravar_metricas_jsonl
+
 from utils.io_utils import read_data_with_auto_detection
 
 from utils.logger import registrar_log
@@ -268,23 +272,113 @@ class AnalysisService:
 
 
 
+        # Tempos por etapa (metadados['instrumentacao']); perfil opcional (ANALISE_PERFIL)
+
+        medidor = MedidorEtapas()
+
+        status = "erro"
+
+        perfil = None
+
+        try:
+
+            with capturar_perfil(Path(arquivo_resultados).stem) as perfil:
+
+                analise_resultado = self._analisar_corrida_medida(
+
+                    medidor, exame, arquivo_resultados, arquivo_extracao, lote
+
+                )
+
+            status = "ok"
+
+        finally:
+
+            instrumentacao = medidor.como_dict()
+
+            if perfil is not None and perfil.arquivo:
+
+                instrumentacao["perfil_arquivo"] = perfil.arquivo
+
+            try:
+
+                gravar_metricas_jsonl({
+
+                    "exame": exame,
+
+                    "arquivo": str(arquivo_resultados),
+
+                    "status": status,
+
+                    **instrumentacao,
+
+                })
+
+            except OSError as exc:
+
+                registrar_log("warning", f"[AnalysisService] Falha ao gravar métricas: {exc}")
+
+
+
+        analise_resultado.metadados["instrumentacao"] = instrumentacao
+
+        registrar_log(
+
+            "info",
+
+            "[AnalysisService] Análise concluída com sucesso. "
+
+            f"Total de linhas no df_processado: {len(analise_resultado.df_processado)} "
+
+            f"[{medidor.resumo_texto()}]",
+
+        )
+
+
+
+        return analise_resultado
+
+
+
+    def _analisar_corrida_medida(
+
+        self,
+
+        medidor: MedidorEtapas,
+
+        exame: str,
+
+        arquivo_resultados: Path,
+
+        arquivo_extracao: Optional[Path],
+
+        lote: Optional[str],
+
+    ) -> AnaliseResultado:
+
+        """Etapas de ``analisar_corrida``, cada uma medida em ``medidor``."""
+
         # 1. Carregar dados brutos dos arquivos
 
         # 1.1. Usar extrator específico se tipo de placa foi detectado (Fase 1.5)
 
-        df_resultados = self._carregar_arquivo_resultados_com_extrator(arquivo_resultados)
+        with medidor.etapa("leitura") as etapa:
+
+            df_resultados = self._carregar_arquivo_resultados_com_extrator(arquivo_resultados)
+
+            etapa.linhas = len(df_resultados)
 
         
 
-        df_extracao = (
+        df_extracao = None
 
-            self._carregar_arquivo_extracao(arquivo_extracao)
+        if arquivo_extracao is not None:
 
-            if arquivo_extracao is not None
+            with medidor.etapa("leitura_extracao") as etapa:
 
-            else None
+                df_extracao = self._carregar_arquivo_extracao(arquivo_extracao)
 
-        )
+                etapa.linhas = len(df_extracao)
 
         # Se houver gabarito/arquivo de extração, armazena-o no AppState para integração no motor universal
 
@@ -294,19 +388,25 @@ class AnalysisService:
 
 
 
-        # 2. Chamar o motor universal
+        # 2. Chamar o motor universal (etapas internas aninhadas em "motor")
 
-        resultado_engine = self.engine.processar_exame(
+        with medidor.etapa("motor") as etapa:
 
-            exame=exame,
+            resultado_engine = self.engine.processar_exame(
 
-            df_resultados=df_resultados,
+                exame=exame,
 
-            df_extracao=df_extracao,
+                df_resultados=df_resultados,
 
-            lote=lote,
+                df_extracao=df_extracao,
 
-        )
+                lote=lote,
+
+                medidor=medidor,
+
+            )
+
+            etapa.linhas = len(resultado_engine.df_final)
 
 
 
@@ -358,7 +458,9 @@ class AnalysisService:
 
         # 4. Atualizar AppState com os dados resultantes
 
-        self._atualizar_app_state_com_resultado(analise_resultado)
+        with medidor.etapa("app_state"):
+
+            self._atualizar_app_state_com_resultado(analise_resultado)
 
 
 
@@ -368,18 +470,6 @@ class AnalysisService:
 
 
 
-        registrar_log(
-
-            "info",
-
-            "[AnalysisService] Análise concluída com sucesso. "
-
-            f"Total de linhas no df_processado: {len(analise_resultado.df_processado)}",
-
-        )
-
-
-
         return analise_resultado
 
 
@@ -722,6 +812,20 @@ class AnalysisService:
 
                 
 
+                stats_cache = get_parse_cache().estatisticas()
+
+                registrar_log(
+
+                    "debug",
+
+                    f"[AnalysisService] Cache de leituras: hits={stats_cache['hits']} "
+
+                    f"misses={stats_cache['misses']} entradas={stats_cache['entradas']}",
+
+                )
+
+                
+
                 return df_normalizado
 
                 
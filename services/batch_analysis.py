@@ -0,0 +1,340 @@
+"""
+Batch Analysis - análise headless de várias corridas (`python main.py analisar`).
+
+Cada arquivo de corrida é analisado em um processo separado
+(ProcessPoolExecutor) com `AnalysisService.analisar_corrida`, sem interface
+gráfica. Por corrida são gravados:
+- <saida>/<corrida>/df_final.csv
+- <saida>/<corrida>/gal/  (CSVs por painel, exportacao.gal_formatter.gerar_painel_csvs)
+
+As linhas de histórico são gravadas pelo processo principal (um único
+escritor do CSV de histórico), na ordem em que as corridas terminam.
+Ao final, <saida>/resumo_lote.csv e resumo_lote.json trazem o status e os
+tempos por etapa de cada corrida, incluindo as etapas internas da análise
+(leitura, normalização, gabarito, interpretação, status, regras...) medidas
+por utils.instrumentacao. Com `perfil`, cada corrida grava também um perfil
+(cProfile/pyinstrument) na própria pasta.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from utils.instrumentacao import configuracao_instrumentacao, configurar_instrumentacao
+from utils.logger import descarregar_logs, registrar_log
+
+EXTENSOES_CORRIDA = (".xlsx", ".xls", ".xlsm", ".csv")
+EXTENSOES_MAPA = (".csv", ".xlsx", ".xls")
+ETAPAS = ("analise", "df_final", "gal", "historico")
+
+
+def localizar_arquivos(entradas: Iterable[str]) -> List[Path]:
+    """
+    Expande diretórios e padrões glob em uma lista ordenada de arquivos de corrida.
+
+    Diretórios são varridos (sem recursão) pelas extensões suportadas.
+    """
+    encontrados: Dict[str, Path] = {}
+    for entrada in entradas:
+        path = Path(entrada)
+        if path.is_dir():
+            candidatos = [p for p in path.iterdir() if p.is_file()]
+        elif path.is_file():
+            candidatos = [path]
+        else:
+            candidatos = [Path(p) for p in glob.glob(entrada) if Path(p).is_file()]
+        for p in candidatos:
+            if p.suffix.lower() in EXTENSOES_CORRIDA and not p.name.startswith("~$"):
+                encontrados[str(p.resolve())] = p
+    return [encontrados[k] for k in sorted(encontrados)]
+
+
+def localizar_mapa(arquivo_corrida: Path, mapas: Optional[str]) -> Optional[Path]:
+    """
+    Mapa de extração da corrida.
+
+    `mapas` pode ser um arquivo (mesmo mapa para todas as corridas) ou um
+    diretório, onde é procurado um arquivo com o mesmo nome-base da corrida.
+    """
+    if not mapas:
+        return None
+    path = Path(mapas)
+    if path.is_file():
+        return path
+    if path.is_dir():
+        for ext in EXTENSOES_MAPA:
+            candidato = path / f"{arquivo_corrida.stem}{ext}"
+            if candidato.is_file() and candidato.resolve() != arquivo_corrida.resolve():
+                return candidato
+    return None
+
+
+def _resultado_inicial(tarefa: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "arquivo": tarefa["arquivo"],
+        "mapa": tarefa["mapa"],
+        "status": "erro",
+        "erro": "",
+        "status_corrida": "",
+        "linhas": 0,
+        "df_final_csv": "",
+        "gal_csvs": [],
+        "tempos": {},
+        "etapas_analise": {},
+        "df_final": None,
+    }
+
+
+def _processar_corrida(tarefa: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Analisa uma corrida (executado no processo filho).
+
+    Returns:
+        Dict com status, erro, tempos por etapa, caminhos gerados e o df_final
+        (usado pelo processo principal para gravar o histórico).
+    """
+    from models import AppState
+    from services.analysis_service import AnalysisService
+
+    arquivo = Path(tarefa["arquivo"])
+    mapa = Path(tarefa["mapa"]) if tarefa.get("mapa") else None
+    pasta = Path(tarefa["pasta"])
+    resultado = _resultado_inicial(tarefa)
+    if tarefa.get("instrumentacao"):
+        configurar_instrumentacao(**tarefa["instrumentacao"])
+    inicio = time.perf_counter()
+    etapa = "analise"
+    try:
+        t0 = time.perf_counter()
+        analise = AnalysisService(AppState()).analisar_corrida(
+            exame=tarefa["exame"],
+            arquivo_resultados=arquivo,
+            arquivo_extracao=mapa,
+            lote=tarefa.get("lote"),
+        )
+        resultado["tempos"]["analise"] = time.perf_counter() - t0
+        resultado["etapas_analise"] = _etapas_analise(analise.metadados)
+        df_final = analise.df_processado
+        resultado["status_corrida"] = str((analise.resumo or {}).get("status_corrida", ""))
+        resultado["linhas"] = len(df_final)
+
+        etapa = "df_final"
+        t0 = time.perf_counter()
+        pasta.mkdir(parents=True, exist_ok=True)
+        caminho_df = pasta / "df_final.csv"
+        df_final.to_csv(caminho_df, index=False, encoding="utf-8")
+        resultado["df_final_csv"] = str(caminho_df)
+        resultado["tempos"]["df_final"] = time.perf_counter() - t0
+
+        if tarefa.get("gal", True):
+            etapa = "gal"
+            from exportacao.gal_formatter import gerar_painel_csvs
+
+            t0 = time.perf_counter()
+            paineis = gerar_painel_csvs(df_final, exame=tarefa["exame"], output_dir=str(pasta / "gal"))
+            resultado["gal_csvs"] = [str(p) for p in (paineis or {}).values()]
+            resultado["tempos"]["gal"] = time.perf_counter() - t0
+
+        resultado["df_final"] = df_final
+        resultado["status"] = "ok"
+    except Exception as exc:  # noqa: BLE001
+        resultado["erro"] = f"{etapa}: {exc}"
+        registrar_log("Lote", f"Falha na corrida '{arquivo.name}' ({etapa}): {exc}", "ERROR")
+    resultado["tempos"]["total"] = time.perf_counter() - inicio
+    # o processo filho termina sem os handlers de atexit: grava o log pendente
+    descarregar_logs()
+    return resultado
+
+
+def _etapas_analise(metadados: Dict[str, Any]) -> Dict[str, float]:
+    """Segundos por etapa da análise ({etapa: s}), a partir de metadados['instrumentacao']."""
+    etapas: Dict[str, float] = {}
+    for etapa in (metadados or {}).get("instrumentacao", {}).get("etapas", []):
+        etapas[etapa["nome"]] = etapas.get(etapa["nome"], 0.0) + etapa["wall_ms"] / 1000.0
+    return etapas
+
+
+def _gravar_historico(resultado: Dict[str, Any], tarefa: Dict[str, Any]) -> None:
+    """Grava as linhas de histórico da corrida (mesmo filtro da janela de análise)."""
+    from services.history_report import gerar_historico_csv
+
+    df_final = resultado.get("df_final")
+    if df_final is None or df_final.empty:
+        return
+    col_codigo = "Codigo" if "Codigo" in df_final.columns else "Código"
+    if col_codigo in df_final.columns:
+        df_final = df_final[df_final[col_codigo].notna() & (df_final[col_codigo] != "")]
+    if df_final.empty:
+        return
+    t0 = time.perf_counter()
+    gerar_historico_csv(
+        df_final,
+        exame=tarefa["exame"],
+        usuario=tarefa["usuario"],
+        lote=tarefa.get("lote") or "",
+        arquivo_corrida=Path(resultado["arquivo"]).name,
+        caminho_csv=tarefa["historico"],
+    )
+    duracao = time.perf_counter() - t0
+    resultado["tempos"]["historico"] = duracao
+    resultado["tempos"]["total"] = resultado["tempos"].get("total", 0.0) + duracao
+
+
+def analisar_lote(
+    arquivos: List[Path],
+    exame: str,
+    mapas: Optional[str] = None,
+    saida: Optional[str] = None,
+    lote: Optional[str] = None,
+    usuario: str = "lote",
+    workers: Optional[int] = None,
+    historico: Optional[str] = "logs/historico_analises.csv",
+    gal: bool = True,
+    perfil: Optional[str] = None,
+    metricas_jsonl: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Analisa várias corridas em paralelo e grava os artefatos de cada uma.
+
+    Args:
+        arquivos: Arquivos de corrida (ver `localizar_arquivos`)
+        exame: Nome do exame (exames_config.csv / registry)
+        mapas: Arquivo de mapa de extração ou diretório com um mapa por corrida
+        saida: Diretório de saída (padrão: reports/lote_<timestamp>)
+        lote: Lote/kit informado para todas as corridas
+        usuario: Usuário gravado no histórico
+        workers: Número de processos (padrão: os.cpu_count())
+        historico: CSV de histórico; None para não gravar
+        gal: Gera os CSVs de painel do GAL
+        perfil: "cprofile" ou "pyinstrument" para gravar um perfil por corrida
+        metricas_jsonl: Arquivo JSON lines com as etapas de cada análise
+
+    Returns:
+        Resumo com contagens, tempos totais por etapa e uma entrada por corrida.
+    """
+    if saida is None:
+        saida = os.path.join("reports", f"lote_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    pasta_saida = Path(saida)
+    pasta_saida.mkdir(parents=True, exist_ok=True)
+
+    instrumentacao = configuracao_instrumentacao()
+    if metricas_jsonl:
+        instrumentacao["metricas_jsonl"] = metricas_jsonl
+    if perfil:
+        instrumentacao["perfil"] = perfil
+
+    tarefas = []
+    nomes_usados: Dict[str, int] = {}
+    for arquivo in arquivos:
+        mapa = localizar_mapa(arquivo, mapas)
+        # corridas com o mesmo nome-base (em pastas diferentes) não se sobrescrevem
+        n = nomes_usados[arquivo.stem] = nomes_usados.get(arquivo.stem, 0) + 1
+        nome_pasta = arquivo.stem if n == 1 else f"{arquivo.stem}_{n}"
+        tarefas.append({
+            "arquivo": str(arquivo),
+            "mapa": str(mapa) if mapa else "",
+            "exame": exame,
+            "lote": lote,
+            "usuario": usuario,
+            "pasta": str(pasta_saida / nome_pasta),
+            "historico": historico,
+            "gal": gal,
+            "instrumentacao": {
+                **instrumentacao,
+                "perfil_dir": str(pasta_saida / nome_pasta) if perfil else instrumentacao["perfil_dir"],
+            },
+        })
+    registrar_log("Lote", f"Iniciando análise em lote: {len(tarefas)} corrida(s), exame='{exame}'", "INFO")
+
+    inicio = time.perf_counter()
+    corridas: List[Dict[str, Any]] = []
+    if tarefas:
+        max_workers = max(1, min(workers or os.cpu_count() or 1, len(tarefas)))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futuros = {executor.submit(_processar_corrida, t): t for t in tarefas}
+            for futuro in as_completed(futuros):
+                tarefa = futuros[futuro]
+                try:
+                    resultado = futuro.result()
+                except Exception as exc:  # noqa: BLE001 - processo filho abortou
+                    resultado = _resultado_inicial(tarefa)
+                    resultado["erro"] = f"processo: {exc}"
+                if resultado["status"] == "ok" and historico:
+                    try:
+                        _gravar_historico(resultado, tarefa)
+                    except Exception as exc:  # noqa: BLE001
+                        resultado["status"] = "erro"
+                        resultado["erro"] = f"historico: {exc}"
+                resultado.pop("df_final", None)
+                corridas.append(resultado)
+
+    corridas.sort(key=lambda r: r["arquivo"])
+    resumo = {
+        "exame": exame,
+        "saida": str(pasta_saida),
+        "total": len(corridas),
+        "sucesso": sum(1 for r in corridas if r["status"] == "ok"),
+        "falhas": sum(1 for r in corridas if r["status"] != "ok"),
+        "tempo_total": time.perf_counter() - inicio,
+        "tempos_etapas": {
+            etapa: sum(r["tempos"].get(etapa, 0.0) for r in corridas) for etapa in ETAPAS
+        },
+        "tempos_etapas_analise": _somar_etapas(r["etapas_analise"] for r in corridas),
+        "corridas": corridas,
+    }
+    _salvar_resumo(resumo, pasta_saida)
+    registrar_log(
+        "Lote",
+        f"Análise em lote concluída: {resumo['sucesso']}/{resumo['total']} com sucesso "
+        f"em {resumo['tempo_total']:.1f}s",
+        "INFO",
+    )
+    return resumo
+
+
+def _somar_etapas(por_corrida: Iterable[Dict[str, float]]) -> Dict[str, float]:
+    total: Dict[str, float] = {}
+    for etapas in por_corrida:
+        for etapa, valor in etapas.items():
+            total[etapa] = total.get(etapa, 0.0) + valor
+    return total
+
+
+def _salvar_resumo(resumo: Dict[str, Any], pasta_saida: Path) -> None:
+    linhas = []
+    for r in resumo["corridas"]:
+        linha = {
+            "arquivo": r["arquivo"],
+            "mapa": r["mapa"],
+            "status": r["status"],
+            "status_corrida": r["status_corrida"],
+            "linhas": r["linhas"],
+            "erro": r["erro"],
+            "df_final_csv": r["df_final_csv"],
+        }
+        for etapa in ETAPAS + ("total",):
+            valor = r["tempos"].get(etapa)
+            linha[f"tempo_{etapa}_s"] = round(valor, 4) if valor is not None else None
+        for etapa in resumo["tempos_etapas_analise"]:
+            valor = r["etapas_analise"].get(etapa)
+            linha[f"etapa_{etapa}_s"] = round(valor, 4) if valor is not None else None
+        linhas.append(linha)
+    pd.DataFrame(linhas).to_csv(pasta_saida / "resumo_lote.csv", sep=";", index=False, encoding="utf-8")
+    with open(pasta_saida / "resumo_lote.json", "w", encoding="utf-8") as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2, default=str)
+
+
+__all__ = [
+    'analisar_lote',
+    'localizar_arquivos',
+    'localizar_mapa',
+]
@@ -2718,6 +2718,14 @@ class ExamFormDialog:
 
             versao_protocolo=self.entry_versao.get().strip(),
 
+            # regras de validação não são editadas no formulário: preserva as existentes
+
+            regras_validacao=getattr(self.cfg, "regras_validacao", {}) if self.cfg else {},
+
+            prioridade_status=list(getattr(self.cfg, "prioridade_status", []) or []) if self.cfg else [],
+
+            orientacao_bloco=getattr(self.cfg, "orientacao_bloco", "") if self.cfg else "",
+
         )
 
 
@@ -3837,6 +3845,12 @@ class RegistryExamEditor:
 
             "versao_protocolo": cfg.versao_protocolo,
 
+            "regras_validacao": getattr(cfg, "regras_validacao", {}) or {},
+
+            "prioridade_status": list(getattr(cfg, "prioridade_status", []) or []),
+
+            "orientacao_bloco": getattr(cfg, "orientacao_bloco", "") or "",
+
         }
 
 
@@ -305,6 +305,10 @@ class ConfigService:
 
                 "retry_settings": {"max_retries": 3, "backoff_factor": 0.5},
 
+                "envio_paralelo": {"max_workers": 4, "max_por_host": 4, "requisicoes_por_segundo": 0},
+
+                "metadados": {"ttl_horas": 12, "paginas_paralelas": 4},
+
                 "panel_tests": {
 
                     "1": [
@@ -5,124 +5,407 @@ CSV Lock Manager - Sincronização segura de arquivos CSV em rede local
 Fornece lock baseado em arquivo para evitar corrupção de dados quando
 múltiplos usuários/máquinas acessam o mesmo CSV simultaneamente.
 
+- Escrita (modo "exclusivo"): arquivo <csv>.lock criado de forma atômica
+  (O_CREAT | O_EXCL), funciona em disco local e em compartilhamentos SMB/NFS.
+- Leitura (modo "compartilhado"): cada leitor cria seu próprio
+  <csv>.lock.r.<token>; leitores não esperam uns pelos outros, apenas por
+  um escritor. O escritor, depois de criar o .lock, espera os leitores já
+  registrados terminarem (novos leitores aguardam o .lock sumir).
+- Cada arquivo de lock guarda PID, host e validade (lease) em JSON; o lease
+  é renovado por uma thread enquanto o lock está em uso. Locks com lease
+  vencido ou de processo morto (mesmo host) são removidos por quem espera.
+- Espera com backoff exponencial e jitter.
+
 Uso:
     from services.csv_lock import csv_lock
-    
+
     with csv_lock("logs/historico_analises.csv", timeout=30):
         df = pd.read_csv("logs/historico_analises.csv")
         # ... processa ...
         df.to_csv("logs/historico_analises.csv")
+
+    with csv_lock("logs/historico_analises.csv", modo="compartilhado"):
+        df = pd.read_csv("logs/historico_analises.csv")
 """
 
+import json
+import os
+import random
+import socket
+import threading
 import time
+import uuid
 import logging
 from pathlib import Path
 from contextlib import contextmanager
-from typing import Optional
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
+MODO_EXCLUSIVO = "exclusivo"
+MODO_COMPARTILHADO = "compartilhado"
+LEASE_PADRAO = 60.0
+BACKOFF_MAX = 1.0
+
+_HOST = socket.gethostname()
+
 
 class CsvLockError(Exception):
     """Exceção para erros de lock CSV"""
     pass
 
 
+class FileLock:
+    """
+    Lock entre processos/máquinas para um arquivo, com lease.
+
+    Args:
+        filepath: Caminho do arquivo a proteger
+        modo: "exclusivo" (escrita) ou "compartilhado" (leitura)
+        timeout: Tempo máximo de espera pelo lock (segundos)
+        lock_suffix: Sufixo do arquivo de lock (padrão: .lock)
+        retry_interval: Espera inicial do backoff (segundos)
+        lease: Validade do lock sem renovação (segundos)
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        modo: str = MODO_EXCLUSIVO,
+        timeout: float = 30,
+        lock_suffix: str = ".lock",
+        retry_interval: float = 0.05,
+        lease: float = LEASE_PADRAO,
+    ):
+        if modo not in (MODO_EXCLUSIVO, MODO_COMPARTILHADO):
+            raise ValueError(f"Modo de lock inválido: {modo}")
+        self.filepath = Path(filepath)
+        self.lock_path = self.filepath.with_suffix(lock_suffix)
+        self.modo = modo
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.lease = lease
+        self.token = uuid.uuid4().hex
+        self._meu_arquivo: Optional[Path] = None
+        self._parar_renovacao = threading.Event()
+        self._renovador: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # Aquisição / liberação
+    # ------------------------------------------------------------------
+    def adquirir(self) -> None:
+        filename = self.filepath.name
+        inicio = time.monotonic()
+        tentativa = 0
+        while True:
+            if self.modo == MODO_EXCLUSIVO:
+                adquirido = self._tentar_exclusivo(inicio)
+            else:
+                adquirido = self._tentar_compartilhado()
+            if adquirido:
+                self._iniciar_renovacao()
+                logger.debug(f"✅ Lock {self.modo} adquirido: {filename}")
+                return
+
+            restante = self.timeout - (time.monotonic() - inicio)
+            if restante <= 0:
+                msg = f"Timeout ({self.timeout}s) esperando lock para {filename}"
+                info = ler_conteudo_lock(self.lock_path)
+                if info:
+                    msg += f" (em uso por PID {info.get('pid')} em {info.get('host')})"
+                logger.error(f"❌ {msg}")
+                raise CsvLockError(msg)
+            time.sleep(min(restante, _backoff(self.retry_interval, tentativa)))
+            tentativa += 1
+
+    def liberar(self) -> None:
+        self._parar_renovacao.set()
+        if self._renovador is not None:
+            self._renovador.join(timeout=1)
+            self._renovador = None
+        if self._meu_arquivo is not None:
+            try:
+                self._meu_arquivo.unlink(missing_ok=True)
+                logger.debug(f"🔓 Lock liberado: {self.filepath.name}")
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao liberar lock {self.filepath.name}: {e}")
+            self._meu_arquivo = None
+
+    def __enter__(self) -> "FileLock":
+        self.adquirir()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            logger.error(f"❌ Erro dentro do lock {self.filepath.name}: {exc}")
+        self.liberar()
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+    def _tentar_exclusivo(self, inicio: float) -> bool:
+        if not _criar_arquivo_lock(self.lock_path, self._conteudo()):
+            remover_lock_obsoleto(self.lock_path)
+            return False
+        self._meu_arquivo = self.lock_path
+
+        # Com o .lock criado nenhum leitor novo entra; espera os já registrados
+        tentativa = 0
+        while True:
+            leitores = [p for p in _arquivos_leitores(self.lock_path) if not remover_lock_obsoleto(p)]
+            if not leitores:
+                return True
+            restante = self.timeout - (time.monotonic() - inicio)
+            if restante <= 0:
+                self.liberar()
+                return False
+            time.sleep(min(restante, _backoff(self.retry_interval, tentativa)))
+            tentativa += 1
+
+    def _tentar_compartilhado(self) -> bool:
+        if not self.lock_path.parent.exists():
+            return True  # diretório inexistente: nada a ler e nenhum escritor
+        if self.lock_path.exists():
+            remover_lock_obsoleto(self.lock_path)
+            return False
+        # Registra o leitor antes de conferir o escritor: se os dois correrem
+        # juntos, ao menos um enxerga o outro
+        arquivo = self.lock_path.with_name(f"{self.lock_path.name}.r.{self.token}")
+        if not _criar_arquivo_lock(arquivo, self._conteudo()):
+            return False
+        if self.lock_path.exists():
+            arquivo.unlink(missing_ok=True)
+            return False
+        self._meu_arquivo = arquivo
+        return True
+
+    def _conteudo(self) -> dict:
+        agora = time.time()
+        return {
+            "pid": os.getpid(),
+            "host": _HOST,
+            "modo": self.modo,
+            "token": self.token,
+            "criado_em": agora,
+            "expira_em": agora + self.lease,
+        }
+
+    def _iniciar_renovacao(self) -> None:
+        self._parar_renovacao.clear()
+        self._renovador = threading.Thread(target=self._renovar, name="csv-lock-lease", daemon=True)
+        self._renovador.start()
+
+    def _renovar(self) -> None:
+        intervalo = max(self.lease / 3, 0.1)
+        while not self._parar_renovacao.wait(intervalo):
+            arquivo = self._meu_arquivo
+            if arquivo is None:
+                return
+            conteudo = self._conteudo()
+            atual = ler_conteudo_lock(arquivo)
+            if atual and atual.get("token") != self.token:
+                logger.warning(f"⚠️ Lock {arquivo.name} foi assumido por outro processo")
+                return
+            if atual:
+                conteudo["criado_em"] = atual.get("criado_em", conteudo["criado_em"])
+            try:
+                # "r+" não recria o arquivo se ele acabou de ser liberado
+                with open(arquivo, "r+", encoding="utf-8") as f:
+                    f.write(json.dumps(conteudo))
+                    f.truncate()
+            except OSError:
+                pass
+
+
+def _backoff(base: float, tentativa: int) -> float:
+    """Espera exponencial com jitter (metade fixa + metade aleatória)."""
+    espera = min(BACKOFF_MAX, base * (2 ** min(tentativa, 16)))
+    return espera / 2 + random.uniform(0, espera / 2)
+
+
+def _criar_arquivo_lock(path: Path, conteudo: dict) -> bool:
+    """Cria o arquivo de forma atômica; False se já existe."""
+    try:
+        fd = os.open(str(path), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f)
+    return True
+
+
+def _arquivos_leitores(lock_path: Path) -> List[Path]:
+    return list(lock_path.parent.glob(f"{lock_path.name}.r.*"))
+
+
+def _processo_vivo(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # sem verificação barata no Windows: vale o lease
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return True
+    return True
+
+
+def ler_conteudo_lock(path: Path) -> Optional[dict]:
+    """Conteúdo JSON (pid, host, modo, expira_em) do arquivo de lock, se legível."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            dados = json.load(f)
+        return dados if isinstance(dados, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def lock_obsoleto(path: Path, agora: Optional[float] = None) -> bool:
+    """
+    True se o lock ficou órfão: lease vencido ou processo dono morto (mesmo host).
+
+    Locks sem conteúdo (formato antigo, apenas `touch`) usam o mtime + lease padrão.
+    """
+    agora = time.time() if agora is None else agora
+    dados = ler_conteudo_lock(path)
+    if not dados:
+        try:
+            return agora - path.stat().st_mtime > LEASE_PADRAO
+        except FileNotFoundError:
+            return False
+    if float(dados.get("expira_em", 0)) < agora:
+        return True
+    if dados.get("host") == _HOST:
+        try:
+            return not _processo_vivo(int(dados.get("pid", 0)))
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def remover_lock_obsoleto(path: Path) -> bool:
+    """
+    Remove o lock se estiver obsoleto; True se removeu (ou já não existia).
+
+    O arquivo é renomeado antes de apagar, e o conteúdo conferido, para não
+    remover um lock recém-criado por outro processo na mesma janela.
+    """
+    if not path.exists():
+        return True
+    if not lock_obsoleto(path):
+        return False
+    antes = ler_conteudo_lock(path)
+    lapide = path.with_name(f"{path.name}.obsoleto.{uuid.uuid4().hex}")
+    try:
+        os.rename(path, lapide)
+    except FileNotFoundError:
+        return True
+    except OSError:
+        return False
+    depois = ler_conteudo_lock(lapide)
+    if (antes or {}).get("token") != (depois or {}).get("token"):
+        # outro processo recriou o lock nesse intervalo: devolve
+        try:
+            os.link(lapide, path)
+        except OSError:
+            pass
+        lapide.unlink(missing_ok=True)
+        return False
+    lapide.unlink(missing_ok=True)
+    logger.warning(
+        f"🗑️  Lock órfão removido: {path.name} "
+        f"(PID {(antes or {}).get('pid', '?')} em {(antes or {}).get('host', '?')})"
+    )
+    return True
+
+
 @contextmanager
 def csv_lock(
     filepath: str,
     timeout: int = 30,
     lock_suffix: str = ".lock",
-    retry_interval: float = 0.05
+    retry_interval: float = 0.05,
+    modo: str = MODO_EXCLUSIVO,
+    lease: float = LEASE_PADRAO,
 ):
     """
     Context manager para lock seguro de arquivo CSV em rede local.
-    
-    Usa um arquivo .lock para sincronização entre processos/máquinas.
-    Ideal para ambientes com NFS/SMB (rede local).
-    
+
+    Usa arquivos de lock criados de forma atômica para sincronização entre
+    processos/máquinas. Ideal para ambientes com NFS/SMB (rede local).
+
     Args:
         filepath: Caminho do arquivo CSV a proteger
         timeout: Tempo máximo de espera pelo lock (segundos)
         lock_suffix: Sufixo do arquivo de lock (padrão: .lock)
-        retry_interval: Intervalo entre verificações de lock (segundos)
-    
+        retry_interval: Espera inicial entre tentativas (cresce com backoff)
+        modo: "exclusivo" (escrita, padrão) ou "compartilhado" (leitura)
+        lease: Validade do lock sem renovação (segundos)
+
     Raises:
         CsvLockError: Se não conseguir adquirir lock no tempo limite
-    
+
     Exemplo:
         >>> with csv_lock("logs/historico_analises.csv", timeout=30):
         ...     df = pd.read_csv("logs/historico_analises.csv")
         ...     df["nova_coluna"] = "valor"
         ...     df.to_csv("logs/historico_analises.csv")
-    
+
     """
-    lock_path = Path(filepath).with_suffix(lock_suffix)
-    start_time = time.time()
-    filename = Path(filepath).name
-    
-    # Aguarda lock ficar disponível
-    while lock_path.exists():
-        elapsed = time.time() - start_time
-        if elapsed > timeout:
-            msg = f"Timeout ({timeout}s) esperando lock para {filename}"
-            logger.error(f"❌ {msg}")
-            raise CsvLockError(msg)
-        
-        remaining = timeout - elapsed
-        logger.debug(f"⏳ Esperando lock {filename} ({remaining:.1f}s restantes)...")
-        time.sleep(retry_interval)
-    
-    try:
-        # Adquire lock criando arquivo
-        lock_path.touch()
-        logger.info(f"✅ Lock adquirido: {filename}")
-        yield
-        
-    except Exception as e:
-        logger.error(f"❌ Erro dentro do lock {filename}: {e}")
-        raise
-        
-    finally:
-        # Libera lock removendo arquivo
-        try:
-            lock_path.unlink(missing_ok=True)
-            logger.info(f"🔓 Lock liberado: {filename}")
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao liberar lock {filename}: {e}")
+    lock = FileLock(
+        filepath,
+        modo=modo,
+        timeout=timeout,
+        lock_suffix=lock_suffix,
+        retry_interval=retry_interval,
+        lease=lease,
+    )
+    with lock:
+        yield lock
 
 
 def obter_info_lock(filepath: str, lock_suffix: str = ".lock") -> Optional[dict]:
     """
     Obtém informações sobre lock de um arquivo (para debug).
-    
+
     Args:
         filepath: Caminho do arquivo CSV
         lock_suffix: Sufixo do arquivo de lock
-    
+
     Returns:
         Dict com informações do lock ou None se não existir
-        
+
     Exemplo:
         >>> info = obter_info_lock("logs/historico_analises.csv")
         >>> if info:
         ...     print(f"Bloqueado desde: {info['tempo_espera']}s atrás")
     """
     lock_path = Path(filepath).with_suffix(lock_suffix)
-    
-    if not lock_path.exists():
+    leitores = _arquivos_leitores(lock_path)
+
+    if not lock_path.exists() and not leitores:
         return None
-    
+
     try:
-        stat = lock_path.stat()
-        tempo_atrás = time.time() - stat.st_mtime
-        
-        return {
+        info = {
             "arquivo": str(lock_path),
-            "existe": True,
-            "tempo_espera": f"{tempo_atrás:.1f}s",
-            "modificado_em": stat.st_mtime
+            "existe": lock_path.exists(),
+            "leitores": len(leitores),
         }
+        if lock_path.exists():
+            stat = lock_path.stat()
+            dados = ler_conteudo_lock(lock_path) or {}
+            info.update({
+                "tempo_espera": f"{time.time() - stat.st_mtime:.1f}s",
+                "modificado_em": stat.st_mtime,
+                "pid": dados.get("pid"),
+                "host": dados.get("host"),
+                "expira_em": dados.get("expira_em"),
+                "obsoleto": lock_obsoleto(lock_path),
+            })
+        return info
     except Exception as e:
         logger.error(f"Erro ao verificar lock: {e}")
         return None
@@ -130,40 +413,45 @@ def obter_info_lock(filepath: str, lock_suffix: str = ".lock") -> Optional[dict]
 
 def limpar_locks_antigos(timeout: int = 300) -> int:
     """
-    Remove locks antigos (possivelmente deixados por crash).
-    
-    CUIDADO: Use apenas se NENHUM processo está usando o lock!
-    
+    Remove locks órfãos (deixados por crash) em banco/ e logs/.
+
+    Remove locks com lease vencido ou cujo processo dono morreu; locks no
+    formato antigo (sem conteúdo) são removidos se mais velhos que `timeout`.
+    Normalmente desnecessário: quem espera por um lock já remove os órfãos.
+
     Args:
-        timeout: Considerar lock antigo se > X segundos (padrão: 5 min)
-    
+        timeout: Idade mínima (segundos) para remover locks sem conteúdo (padrão: 5 min)
+
     Returns:
         Número de locks removidos
-        
+
     Exemplo:
         >>> removidos = limpar_locks_antigos(timeout=600)
         >>> print(f"Removidos {removidos} locks antigos")
     """
     banco_dir = Path("banco")
     logs_dir = Path("logs")
-    
+
     removidos = 0
     agora = time.time()
-    
+
     for diretorio in [banco_dir, logs_dir]:
         if not diretorio.exists():
             continue
-        
-        for lock_file in diretorio.glob("*.lock"):
+
+        for lock_file in list(diretorio.glob("*.lock")) + list(diretorio.glob("*.lock.r.*")):
             try:
-                idade = agora - lock_file.stat().st_mtime
-                if idade > timeout:
-                    lock_file.unlink()
-                    logger.warning(f"🗑️  Lock antigo removido: {lock_file.name} ({idade:.0f}s)")
+                if ler_conteudo_lock(lock_file) is None:
+                    idade = agora - lock_file.stat().st_mtime
+                    if idade > timeout:
+                        lock_file.unlink()
+                        logger.warning(f"🗑️  Lock antigo removido: {lock_file.name} ({idade:.0f}s)")
+                        removidos += 1
+                elif remover_lock_obsoleto(lock_file):
                     removidos += 1
             except Exception as e:
                 logger.error(f"Erro removendo lock antigo {lock_file}: {e}")
-    
+
     return removidos
 
 
@@ -11,48 +11,11 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-import pandas as pd
-from openpyxl import load_workbook
+from services.parse_cache import get_parse_cache
+from services.parsed_workbook import ParsedWorkbook, abrir_workbook
 
-
-class XlrdSheetWrapper:
-    """Wrapper para xlrd.sheet para compatibilidade com openpyxl."""
-    
-    def __init__(self, xlrd_sheet, xlrd_book):
-        self.xlrd_sheet = xlrd_sheet
-        self.xlrd_book = xlrd_book
-        self.max_row = xlrd_sheet.nrows
-        self.max_column = xlrd_sheet.ncols
-        self.title = xlrd_sheet.name
-    
-    def cell(self, row, col):
-        """Simula openpyxl cell() - retorna objeto com .value."""
-        # xlrd usa índices 0-based, openpyxl usa 1-based
-        row_idx = row - 1
-        col_idx = col - 1
-        
-        if row_idx < 0 or row_idx >= self.max_row:
-            return _XlrdCellWrapper(None)
-        if col_idx < 0 or col_idx >= self.max_column:
-            return _XlrdCellWrapper(None)
-        
-        try:
-            cell_value = self.xlrd_sheet.cell_value(row_idx, col_idx)
-            return _XlrdCellWrapper(cell_value)
-        except Exception:
-            return _XlrdCellWrapper(None)
-    
-    def close(self):
-        """Compatibilidade - xlrd não precisa close explícito."""
-        if hasattr(self.xlrd_book, 'release_resources'):
-            self.xlrd_book.release_resources()
-
-
-class _XlrdCellWrapper:
-    """Wrapper para célula xlrd."""
-    
-    def __init__(self, value):
-        self.value = value if value != '' else None
+# Incrementar quando a análise de estrutura mudar (invalida o cache de leituras)
+DETECTOR_VERSAO = "1"
 
 
 @dataclass
@@ -84,12 +47,13 @@ class EquipmentDetector:
     def __init__(self):
         self.padroes = obter_padroes_conhecidos()
     
-    def detectar_equipamento(self, caminho_arquivo: str) -> Dict[str, Any]:
+    def detectar_equipamento(self, caminho_arquivo: str, workbook: Optional[ParsedWorkbook] = None) -> Dict[str, Any]:
         """
         Detecta equipamento a partir de arquivo XLSX.
         
         Args:
             caminho_arquivo: Caminho para arquivo XLSX
+            workbook: Planilha já carregada (opcional; por padrão usa abrir_workbook)
             
         Returns:
             Dict com:
@@ -110,9 +74,24 @@ class EquipmentDetector:
         if path.suffix.lower() not in ['.xlsx', '.xls', '.xlsm']:
             raise ValueError(f"Arquivo deve ser XLSX/XLS/XLSM, recebido: {path.suffix}")
         
+        # Cache por conteúdo do arquivo (padrões conhecidos entram na chave)
+        cache = get_parse_cache()
+        chave = None
+        if cache.habilitado:
+            chave = cache.chave(
+                caminho_arquivo,
+                "detector",
+                "EquipmentDetector",
+                DETECTOR_VERSAO,
+                extra=[repr(p) for p in self.padroes],
+            )
+            resultado_cache = cache.obter_json(chave, tipo="detector")
+            if resultado_cache is not None:
+                return resultado_cache
+        
         try:
             # Analisar estrutura do arquivo (todas as abas)
-            estrutura = analisar_estrutura_xlsx(caminho_arquivo)
+            estrutura = analisar_estrutura_xlsx(caminho_arquivo, workbook=workbook)
             
             # Filtrar sheets de extração (devem ser ignoradas)
             if 'sheet_name' in estrutura:
@@ -159,18 +138,21 @@ class EquipmentDetector:
                 }
             }
             
+            if chave is not None:
+                cache.salvar_json(chave, resultado)
             return resultado
             
         except Exception as e:
             raise ValueError(f"Erro ao analisar arquivo XLSX: {str(e)}") from e
 
 
-def analisar_estrutura_xlsx(caminho_arquivo: str) -> Dict[str, Any]:
+def analisar_estrutura_xlsx(caminho_arquivo: str, workbook: Optional[ParsedWorkbook] = None) -> Dict[str, Any]:
     """
     Analisa estrutura de arquivo XLSX para detecção de equipamento.
     
     Args:
         caminho_arquivo: Caminho para arquivo XLSX
+        workbook: Planilha já carregada (evita nova leitura do arquivo)
         
     Returns:
         Dict com estrutura detectada:
@@ -185,35 +167,15 @@ def analisar_estrutura_xlsx(caminho_arquivo: str) -> Dict[str, Any]:
             - coluna_ct: Índice da coluna de CT/Cq
             - amostras_wells: Exemplos de valores da coluna well
     """
-    # Carregar com openpyxl para inspeção detalhada
-    # Garantir leitura UTF-8 sem BOM
-    path = Path(caminho_arquivo)
+    # Leitura única do arquivo (compartilhada com os extratores via cache)
+    if workbook is None:
+        workbook = abrir_workbook(caminho_arquivo)
+    ws = workbook.folha()  # aba ativa (.xls: primeira aba)
+    sheet_name = ws.title
     
-    # Escolher engine apropriado baseado na extensão
-    if path.suffix.lower() == '.xls':
-        # Para .xls, usar xlrd (suporte a formato Excel 97-2003)
-        try:
-            import xlrd
-            
-            # Abrir arquivo .xls com xlrd
-            xls_book = xlrd.open_workbook(caminho_arquivo, on_demand=True)
-            xls_sheet = xls_book.sheet_by_index(0)
-            sheet_name = xls_sheet.name
-            
-            # Criar estrutura compatível com openpyxl
-            # Usar wrapper customizado para xlrd
-            wb = None
-            ws = XlrdSheetWrapper(xls_sheet, xls_book)
-            
-        except ImportError:
-            raise ImportError("Para ler arquivos .xls, instale: pip install xlrd")
-        except Exception as e:
-            raise ValueError(f"Erro ao ler arquivo .xls: {str(e)}")
-    else:
-        # Para .xlsx e .xlsm, usar openpyxl
-        wb = load_workbook(caminho_arquivo, read_only=True, data_only=True)
-        ws = wb.active
-        sheet_name = ws.title if hasattr(ws, 'title') else "Sheet1"
+    def valores_linha(row_idx: int) -> List[str]:
+        """Linha (1-based) como strings; "" para células vazias."""
+        return ["" if v is None else str(v) for v in ws.linha(row_idx)]
     
     estrutura = {
         'sheet_name': sheet_name,  # Nome da aba para filtragem
@@ -235,10 +197,7 @@ def analisar_estrutura_xlsx(caminho_arquivo: str) -> Dict[str, Any]:
     linha_header = None
     
     for row_idx in range(1, min(31, ws.max_row + 1)):
-        row_values = []
-        for col_idx in range(1, ws.max_column + 1):
-            cell = ws.cell(row_idx, col_idx)
-            row_values.append(str(cell.value) if cell.value is not None else "")
+        row_values = valores_linha(row_idx)
         
         # Verificar se linha parece ser header
         # (tem strings não vazias em várias colunas)
@@ -260,10 +219,7 @@ def analisar_estrutura_xlsx(caminho_arquivo: str) -> Dict[str, Any]:
                     # Ler linha seguinte
                     next_row_idx = row_idx + 1
                     if next_row_idx <= ws.max_row:
-                        next_row_values = []
-                        for col_idx in range(1, ws.max_column + 1):
-                            cell = ws.cell(next_row_idx, col_idx)
-                            next_row_values.append(str(cell.value) if cell.value is not None else "")
+                        next_row_values = valores_linha(next_row_idx)
                         
                         next_text = " ".join(next_row_values).lower()
                         if 'c(t)' in next_text:
@@ -285,8 +241,8 @@ def analisar_estrutura_xlsx(caminho_arquivo: str) -> Dict[str, Any]:
     if not headers_encontrados:
         linha_header = 1
         estrutura['headers'] = [
-            str(ws.cell(1, col).value or f"Col{col}")
-            for col in range(1, ws.max_column + 1)
+            str(v or f"Col{col}")
+            for col, v in enumerate(ws.linha(1), start=1)
         ]
     
     # Identificar colunas específicas pelos headers
@@ -317,10 +273,7 @@ def analisar_estrutura_xlsx(caminho_arquivo: str) -> Dict[str, Any]:
     # Procurar linha de início de dados (após header)
     linha_inicio = linha_header + 1
     for row_idx in range(linha_header + 1, min(linha_header + 10, ws.max_row + 1)):
-        row_values = [
-            str(ws.cell(row_idx, col).value or "")
-            for col in range(1, ws.max_column + 1)
-        ]
+        row_values = [str(v or "") for v in ws.linha(row_idx)]
         
         non_empty = [v for v in row_values if v.strip()]
         if len(non_empty) >= 2:
@@ -337,10 +290,9 @@ def analisar_estrutura_xlsx(caminho_arquivo: str) -> Dict[str, Any]:
     
     for row_idx in range(estrutura['linha_inicio_dados'], min(ws.max_row + 1, estrutura['linha_inicio_dados'] + 100)):
         row_has_data = False
-        for col_idx in range(1, ws.max_column + 1):
-            cell_value = ws.cell(row_idx, col_idx).value
+        for col_idx, cell_value in enumerate(ws.linha(row_idx)):
             if cell_value is not None and str(cell_value).strip():
-                colunas_com_dados.add(col_idx - 1)  # 0-based
+                colunas_com_dados.add(col_idx)  # 0-based
                 row_has_data = True
         
         if row_has_data:
@@ -353,7 +305,7 @@ def analisar_estrutura_xlsx(caminho_arquivo: str) -> Dict[str, Any]:
     if estrutura['coluna_well'] is not None:
         amostras = []
         for row_idx in range(estrutura['linha_inicio_dados'], min(ws.max_row + 1, estrutura['linha_inicio_dados'] + 10)):
-            cell_value = ws.cell(row_idx, estrutura['coluna_well'] + 1).value
+            cell_value = ws.valor(row_idx, estrutura['coluna_well'] + 1)
             if cell_value:
                 amostras.append(str(cell_value))
         estrutura['amostras_wells'] = amostras
@@ -362,21 +314,11 @@ def analisar_estrutura_xlsx(caminho_arquivo: str) -> Dict[str, Any]:
     # (metadados geralmente ficam nessas linhas)
     metadados = []
     for row_idx in range(1, min(11, ws.max_row + 1)):
-        row_values = []
-        for col_idx in range(1, ws.max_column + 1):
-            cell_value = ws.cell(row_idx, col_idx).value
-            if cell_value is not None:
-                row_values.append(str(cell_value))
+        row_values = [str(v) for v in ws.linha(row_idx) if v is not None]
         if row_values:
             metadados.append(" ".join(row_values))
     estrutura['conteudo_metadados'] = metadados
     
-    # Fechar workbook (compatível com xlrd e openpyxl)
-    if wb is not None:
-        wb.close()
-    elif hasattr(ws, 'close'):
-        ws.close()
-    
     return estrutura
 
 
@@ -638,10 +580,10 @@ __all__ = [
 ]
 
 
-def detectar_equipamento(caminho_arquivo: str) -> Dict[str, Any]:
+def detectar_equipamento(caminho_arquivo: str, workbook: Optional[ParsedWorkbook] = None) -> Dict[str, Any]:
     """
     Função helper para detectar equipamento.
     Wrapper para EquipmentDetector.detectar_equipamento.
     """
     detector = EquipmentDetector()
-    return detector.detectar_equipamento(caminho_arquivo)
+    return detector.detectar_equipamento(caminho_arquivo, workbook=workbook)
@@ -4,14 +4,28 @@ Extratores específicos para cada tipo de equipamento PCR.
 Normalizam dados de Excel para formato padrão: (bem, amostra, alvo, ct)
 """
 
+import numpy as np
 import pandas as pd
-import openpyxl
-import xlrd
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 import re
 from dataclasses import dataclass
 
+from services.parse_cache import get_parse_cache
+from services.parsed_workbook import ParsedWorkbook, abrir_workbook
+
+# Incrementar quando a saída dos extratores mudar (invalida o cache de leituras)
+EXTRATOR_VERSAO = "1"
+
+# Formatos de well aceitos (mesmos padrões de _validar_formato_well)
+_PADROES_WELL = {
+    'A01': r'[A-H](?:0[1-9]|1[0-2])',
+    'A1': r'[A-H](?:[1-9]|1[0-2])',
+}
+
+# Textos que contam como célula vazia (str() de NaN/None)
+_TEXTOS_VAZIOS = ('NAN', 'NONE', '')
+
 
 @dataclass
 class EquipmentConfig:
@@ -117,52 +131,138 @@ def _normalizar_well(well: str) -> str:
     return well  # Retorna como está se não conseguiu normalizar
 
 
-def _ler_xlsx_generico(caminho: str, linha_inicio: int, max_rows: int = 1000) -> pd.DataFrame:
+# ----------------------------------------------------------------------
+# Versões por coluna (Series inteiras, sem iterrows)
+# ----------------------------------------------------------------------
+
+def _texto_coluna(df: pd.DataFrame, col: Optional[int]) -> pd.Series:
+    """str(valor).strip() da coluna inteira; "" se a coluna não existir."""
+    if col is None or col >= df.shape[1]:
+        return pd.Series("", index=df.index, dtype=object)
+    return df.iloc[:, col].astype(str).str.strip()
+
+
+def _texto_preenchido(texto: pd.Series) -> pd.Series:
+    """Máscara das células com texto (descarta vazio, 'nan' e 'None')."""
+    return ~texto.str.upper().isin(_TEXTOS_VAZIOS)
+
+
+def _wells_validos(wells: pd.Series, formato_esperado: str = 'A01') -> pd.Series:
+    """_validar_formato_well na coluna inteira."""
+    padrao = _PADROES_WELL['A01' if formato_esperado == 'A01' else 'A1']
+    return wells.str.upper().str.fullmatch(padrao).fillna(False).astype(bool)
+
+
+def _normalizar_wells(wells: pd.Series) -> pd.Series:
+    """_normalizar_well para wells já validados no formato A1 (A1 -> A01)."""
+    wells = wells.str.upper()
+    return wells.str[0] + wells.str[1:].str.zfill(2)
+
+
+def _processar_ct_serie(valores: pd.Series) -> np.ndarray:
+    """
+    _processar_ct na coluna inteira: float64, com NaN onde o CT não é
+    determinável ("Undetermined", "N/A", "-", vazio, texto não numérico).
+    Aceita vírgula decimal ("25,5").
+    """
+    if valores.dtype.kind in 'biuf':
+        return valores.to_numpy(dtype=float)
+    numeros = pd.to_numeric(valores, errors='coerce')
+    texto = valores[numeros.isna()]
+    if not texto.empty:
+        texto = texto.astype(str).str.strip().str.replace(',', '.', regex=False)
+        virgula = pd.to_numeric(texto, errors='coerce')
+        numeros.loc[virgula.index] = virgula
+    return numeros.to_numpy(dtype=float)
+
+
+def _coluna_ct(df: pd.DataFrame, col: int) -> np.ndarray:
+    if col >= df.shape[1]:
+        return np.full(len(df), np.nan)
+    return _processar_ct_serie(df.iloc[:, col])
+
+
+def _dataframe_normalizado(bem, amostra, alvo, ct: np.ndarray) -> pd.DataFrame:
+    """
+    DataFrame ['bem', 'amostra', 'alvo', 'ct'] com os mesmos tipos de antes:
+    ct float64 (NaN para não determinado) ou, sem nenhum CT, coluna de None.
+    """
+    if np.isnan(ct).all():
+        ct = np.full(len(ct), None, dtype=object)
+    return pd.DataFrame({
+        'bem': np.asarray(bem, dtype=object),
+        'amostra': np.asarray(amostra, dtype=object),
+        'alvo': np.asarray(alvo, dtype=object),
+        'ct': ct,
+    })
+
+
+def _extrair_por_colunas(
+    df: pd.DataFrame,
+    col_well: int,
+    col_sample: Optional[int],
+    col_target: Optional[int],
+    col_ct: int,
+    formato_well: str,
+) -> pd.DataFrame:
+    """
+    Extração de uma linha por (well, alvo): descarta wells fora do formato e
+    alvos vazios por máscara e converte o CT da coluna inteira.
+    formato_well 'A1' normaliza o well para A01; 'A01' mantém o texto lido.
+    Retorna DataFrame normalizado (vazio se nenhuma linha for válida).
+    """
+    wells = _texto_coluna(df, col_well)
+    alvos = _texto_coluna(df, col_target)
+    validos = (_wells_validos(wells, formato_well) & _texto_preenchido(alvos)).to_numpy()
+
+    wells = wells[validos]
+    if formato_well == 'A1':
+        wells = _normalizar_wells(wells)
+    return _dataframe_normalizado(
+        wells,
+        _texto_coluna(df, col_sample)[validos],
+        alvos[validos],
+        _coluna_ct(df, col_ct)[validos],
+    )
+
+
+def _abrir_workbook(caminho: str, workbook: Optional[ParsedWorkbook] = None) -> ParsedWorkbook:
+    """Retorna a planilha já carregada ou lê o arquivo uma vez (cache compartilhado com o detector)."""
+    if workbook is not None:
+        return workbook
+    if not Path(caminho).exists():
+        raise ExtratorError(f"Arquivo não encontrado: {caminho}")
+    try:
+        return abrir_workbook(caminho)
+    except Exception as e:
+        raise ExtratorError(f"Erro ao ler arquivo '{caminho}': {str(e)}")
+
+
+def _ler_xlsx_generico(
+    caminho: str,
+    linha_inicio: int,
+    max_rows: int = 1000,
+    workbook: Optional[ParsedWorkbook] = None,
+) -> pd.DataFrame:
     """
     Lê arquivo XLSX/XLS de forma genérica.
     linha_inicio: primeira linha de dados (1-indexed)
+    workbook: planilha já carregada (opcional)
     Retorna DataFrame com todas as colunas.
     """
-    caminho_path = Path(caminho)
-    
-    if not caminho_path.exists():
-        raise ExtratorError(f"Arquivo não encontrado: {caminho}")
-    
-    extensao = caminho_path.suffix.lower()
+    wb = _abrir_workbook(caminho, workbook)
     
     try:
-        if extensao == '.xls':
-            # Usar xlrd para .xls
-            wb = xlrd.open_workbook(caminho)
-            ws = wb.sheet_by_index(0)
-            
-            # Ler headers da linha anterior à linha_inicio
-            header_row = linha_inicio - 2 if linha_inicio > 1 else 0
-            headers = [str(ws.cell_value(header_row, col)) for col in range(ws.ncols)]
-            
-            # Ler dados
-            dados = []
-            for row_idx in range(linha_inicio - 1, min(ws.nrows, linha_inicio - 1 + max_rows)):
-                row_data = [ws.cell_value(row_idx, col) for col in range(ws.ncols)]
-                dados.append(row_data)
-            
-            df = pd.DataFrame(dados, columns=headers)
-        else:
-            # Usar openpyxl para .xlsx/.xlsm
-            df = pd.read_excel(
-                caminho,
-                engine='openpyxl',
-                header=linha_inicio - 2 if linha_inicio > 1 else 0,
-                nrows=max_rows
-            )
-        
-        return df
-    
+        # Mesmo resultado de pd.read_excel(header=..., nrows=max_rows) na primeira aba
+        return wb.folha(0).tabela(
+            header=linha_inicio - 2 if linha_inicio > 1 else 0,
+            nrows=max_rows,
+        )
     except Exception as e:
         raise ExtratorError(f"Erro ao ler arquivo '{caminho}': {str(e)}")
 
 
-def extrair_7500(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
+def extrair_7500(caminho: str, config: EquipmentConfig, workbook: Optional[ParsedWorkbook] = None) -> pd.DataFrame:
     """
     Extrator para Applied Biosystems 7500 (formato padrão).
     
@@ -184,7 +284,7 @@ def extrair_7500(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
     col_ct = estrutura['coluna_ct']
     
     # Ler arquivo
-    df = _ler_xlsx_generico(caminho, linha_inicio)
+    df = _ler_xlsx_generico(caminho, linha_inicio, workbook=workbook)
     
     if df.empty:
         raise ExtratorError("Arquivo vazio ou sem dados")
@@ -197,47 +297,16 @@ def extrair_7500(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
     if col_ct >= len(colunas):
         raise ExtratorError(f"Coluna CT (índice {col_ct}) não existe no arquivo")
     
-    # Extrair dados
-    dados_normalizados = []
+    # Extrair dados: wells A1-H12 (normalizados para A01) com alvo preenchido
+    dados_normalizados = _extrair_por_colunas(df, col_well, col_sample, col_target, col_ct, 'A1')
     
-    for idx, row in df.iterrows():
-        well = str(row.iloc[col_well]).strip() if col_well < len(row) else ""
-        sample = str(row.iloc[col_sample]).strip() if col_sample is not None and col_sample < len(row) else ""
-        target = str(row.iloc[col_target]).strip() if col_target is not None and col_target < len(row) else ""
-        ct_raw = row.iloc[col_ct] if col_ct < len(row) else None
-        
-        # Validar well
-        if not well or well.upper() in ('NAN', 'NONE', ''):
-            continue
-        
-        # Validar formato do well (A1-H12)
-        if not _validar_formato_well(well, formato_esperado='A1'):
-            continue
-        
-        # Normalizar well para A01
-        well_norm = _normalizar_well(well)
-        
-        # Processar CT
-        ct_valor = _processar_ct(ct_raw)
-        
-        # Target não pode ser vazio
-        if not target or target.upper() in ('NAN', 'NONE', ''):
-            continue
-        
-        dados_normalizados.append({
-            'bem': well_norm,
-            'amostra': sample,
-            'alvo': target,
-            'ct': ct_valor
-        })
-    
-    if not dados_normalizados:
+    if dados_normalizados.empty:
         raise ExtratorError("Nenhum dado válido encontrado após extração")
     
-    return pd.DataFrame(dados_normalizados)
+    return dados_normalizados
 
 
-def extrair_7500_extended(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
+def extrair_7500_extended(caminho: str, config: EquipmentConfig, workbook: Optional[ParsedWorkbook] = None) -> pd.DataFrame:
     """
     Extrator para Applied Biosystems 7500 Extended (com metadados, usa Cт cirílico).
     
@@ -250,10 +319,10 @@ def extrair_7500_extended(caminho: str, config: EquipmentConfig) -> pd.DataFrame
     Retorna DataFrame normalizado: ['bem', 'amostra', 'alvo', 'ct']
     """
     # Mesma lógica do 7500 padrão, apenas difere na posição das colunas
-    return extrair_7500(caminho, config)
+    return extrair_7500(caminho, config, workbook=workbook)
 
 
-def extrair_cfx96(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
+def extrair_cfx96(caminho: str, config: EquipmentConfig, workbook: Optional[ParsedWorkbook] = None) -> pd.DataFrame:
     """
     Extrator para Bio-Rad CFX96.
     
@@ -278,7 +347,7 @@ def extrair_cfx96(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
     col_ct = estrutura['coluna_ct']
     
     # Ler arquivo
-    df = _ler_xlsx_generico(caminho, linha_inicio)
+    df = _ler_xlsx_generico(caminho, linha_inicio, workbook=workbook)
     
     if df.empty:
         raise ExtratorError("Arquivo vazio ou sem dados")
@@ -298,7 +367,7 @@ def extrair_cfx96(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
     
     # Verificar se Target tem valores válidos (não NaN, não vazio)
     target_serie = df.iloc[:, col_target]
-    target_validos = target_serie.apply(lambda x: pd.notna(x) and str(x).strip().upper() not in ('NAN', 'NONE', ''))
+    target_validos = target_serie.notna() & _texto_preenchido(_texto_coluna(df, col_target))
     target_preenchido = target_validos.sum()
     
     if target_preenchido == 0:
@@ -310,47 +379,19 @@ def extrair_cfx96(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
             "complete manualmente os dados de Target no arquivo."
         )
     
-    # Extrair dados
-    dados_normalizados = []
+    # Extrair dados (CFX96 já usa formato A01)
+    dados_normalizados = _extrair_por_colunas(df, col_well, col_sample, col_target, col_ct, 'A01')
     
-    for idx, row in df.iterrows():
-        well = str(row.iloc[col_well]).strip() if col_well < len(row) else ""
-        sample = str(row.iloc[col_sample]).strip() if col_sample is not None and col_sample < len(row) else ""
-        target = str(row.iloc[col_target]).strip() if col_target < len(row) else ""
-        ct_raw = row.iloc[col_ct] if col_ct < len(row) else None
-        
-        # Validar well
-        if not well or well.upper() in ('NAN', 'NONE', ''):
-            continue
-        
-        # Validar formato do well (A01-H12)
-        if not _validar_formato_well(well, formato_esperado='A01'):
-            continue
-        
-        # Processar CT
-        ct_valor = _processar_ct(ct_raw)
-        
-        # Target não pode ser vazio
-        if not target or target.upper() in ('NAN', 'NONE', ''):
-            continue
-        
-        dados_normalizados.append({
-            'bem': well,  # CFX96 já usa formato A01
-            'amostra': sample,
-            'alvo': target,
-            'ct': ct_valor
-        })
-    
-    if not dados_normalizados:
+    if dados_normalizados.empty:
         raise ExtratorError(
             "CFX96: Nenhum dado válido encontrado após extração. "
             "Verifique se o arquivo possui wells válidos (A01-H12) e alvos preenchidos."
         )
     
-    return pd.DataFrame(dados_normalizados)
+    return dados_normalizados
 
 
-def extrair_cfx96_export(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
+def extrair_cfx96_export(caminho: str, config: EquipmentConfig, workbook: Optional[ParsedWorkbook] = None) -> pd.DataFrame:
     """
     Extrator para Bio-Rad CFX96 Export (formato com C(t) e múltiplos alvos).
     
@@ -373,31 +414,11 @@ def extrair_cfx96_export(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
     col_well = estrutura['coluna_well']
     col_sample = estrutura.get('coluna_sample')
     
-    # Ler arquivo com headers nas duas primeiras linhas
-    caminho_path = Path(caminho)
-    extensao = caminho_path.suffix.lower()
-    
-    # Ler arquivo completo para acessar múltiplos headers
-    if extensao == '.xls':
-        wb = xlrd.open_workbook(str(caminho_path))
-        ws = wb.sheet_by_index(0)
-        
-        # Headers linha 1 e 2 (índices 0 e 1)
-        headers_l1 = [str(ws.cell_value(0, col)) for col in range(ws.ncols)]
-        headers_l2 = [str(ws.cell_value(1, col)) for col in range(ws.ncols)]
-        
-        # Ler dados a partir da linha 3 (índice 2)
-        dados = []
-        for row_idx in range(2, ws.nrows):
-            row_data = [ws.cell_value(row_idx, col) for col in range(ws.ncols)]
-            dados.append(row_data)
-        
-        df = pd.DataFrame(dados)
-    else:
-        df = pd.read_excel(caminho, engine='openpyxl', header=None)
-        headers_l1 = df.iloc[0].tolist()
-        headers_l2 = df.iloc[1].tolist()
-        df = df.iloc[2:].reset_index(drop=True)  # Dados a partir da linha 3
+    # Ler arquivo completo (sem header) para acessar múltiplos headers
+    df = _abrir_workbook(caminho, workbook).folha(0).tabela(header=None)
+    headers_l1 = df.iloc[0].tolist() if len(df) > 0 else []
+    headers_l2 = df.iloc[1].tolist() if len(df) > 1 else []
+    df = df.iloc[2:].reset_index(drop=True)  # Dados a partir da linha 3
     
     if df.empty:
         raise ExtratorError("Arquivo vazio ou sem dados")
@@ -420,41 +441,27 @@ def extrair_cfx96_export(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
     if not pares_alvo_ct:
         raise ExtratorError("Nenhum par (alvo, C(t)) identificado no arquivo CFX96_Export")
     
-    # Extrair dados para cada par
-    dados_normalizados = []
+    # Extrair dados: matriz (linha x par) de CTs; cada CT com valor vira uma entrada
+    wells = _texto_coluna(df, col_well)
+    validos = _wells_validos(wells, 'A01').to_numpy()
+    cts = np.column_stack([_coluna_ct(df, col_ct) for _, col_ct, _ in pares_alvo_ct])
+    cts[~validos] = np.nan
     
-    for idx, row in df.iterrows():
-        well = str(row.iloc[col_well]).strip() if col_well < len(row) else ""
-        sample = str(row.iloc[col_sample]).strip() if col_sample is not None and col_sample < len(row) else ""
-        
-        # Validar well
-        if not well or well.upper() in ('NAN', 'NONE', ''):
-            continue
-        
-        if not _validar_formato_well(well, formato_esperado='A01'):
-            continue
-        
-        # Para cada par (alvo, C(t)), criar uma entrada
-        for col_alvo, col_ct, nome_alvo in pares_alvo_ct:
-            ct_raw = row.iloc[col_ct] if col_ct < len(row) else None
-            ct_valor = _processar_ct(ct_raw)
-            
-            # Apenas adicionar se CT tiver valor (não None)
-            if ct_valor is not None:
-                dados_normalizados.append({
-                    'bem': well,
-                    'amostra': sample,
-                    'alvo': nome_alvo,
-                    'ct': ct_valor
-                })
-    
-    if not dados_normalizados:
+    # np.nonzero percorre linha a linha: mesma ordem (well, alvo) da planilha
+    linhas, pares = np.nonzero(~np.isnan(cts))
+    if len(linhas) == 0:
         raise ExtratorError("Nenhum dado válido encontrado após extração")
     
-    return pd.DataFrame(dados_normalizados)
+    nomes_alvos = np.array([nome for _, _, nome in pares_alvo_ct], dtype=object)
+    return _dataframe_normalizado(
+        wells.to_numpy()[linhas],
+        _texto_coluna(df, col_sample).to_numpy()[linhas],
+        nomes_alvos[pares],
+        cts[linhas, pares],
+    )
 
 
-def extrair_quantstudio(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
+def extrair_quantstudio(caminho: str, config: EquipmentConfig, workbook: Optional[ParsedWorkbook] = None) -> pd.DataFrame:
     """
     Extrator para Thermo Fisher QuantStudio.
     
@@ -480,60 +487,28 @@ def extrair_quantstudio(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
     col_well = 1  # Well Position tem formato A1
     
     # Ler arquivo
-    df = _ler_xlsx_generico(caminho, linha_inicio)
+    df = _ler_xlsx_generico(caminho, linha_inicio, workbook=workbook)
     
     if df.empty:
         raise ExtratorError("Arquivo vazio ou sem dados")
     
-    # Extrair dados
-    dados_normalizados = []
+    # Extrair dados: Well Position A1-H12 (normalizado para A01) com alvo preenchido
+    dados_normalizados = _extrair_por_colunas(df, col_well, col_sample, col_target, col_ct, 'A1')
     
-    for idx, row in df.iterrows():
-        # Usar Well Position (coluna 1) ao invés de Well (coluna 0)
-        well = str(row.iloc[col_well]).strip() if col_well < len(row) else ""
-        sample = str(row.iloc[col_sample]).strip() if col_sample is not None and col_sample < len(row) else ""
-        target = str(row.iloc[col_target]).strip() if col_target is not None and col_target < len(row) else ""
-        ct_raw = row.iloc[col_ct] if col_ct < len(row) else None
-        
-        # Validar well
-        if not well or well.upper() in ('NAN', 'NONE', ''):
-            continue
-        
-        # Validar formato do well (A1-H12 sem zero)
-        if not _validar_formato_well(well, formato_esperado='A1'):
-            continue
-        
-        # Normalizar well para A01
-        well_norm = _normalizar_well(well)
-        
-        # Processar CT
-        ct_valor = _processar_ct(ct_raw)
-        
-        # Target não pode ser vazio
-        if not target or target.upper() in ('NAN', 'NONE', ''):
-            continue
-        
-        dados_normalizados.append({
-            'bem': well_norm,
-            'amostra': sample,
-            'alvo': target,
-            'ct': ct_valor
-        })
-    
-    if not dados_normalizados:
+    if dados_normalizados.empty:
         raise ExtratorError("Nenhum dado válido encontrado após extração")
     
-    return pd.DataFrame(dados_normalizados)
+    return dados_normalizados
 
 
-def extrair_generico(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
+def extrair_generico(caminho: str, config: EquipmentConfig, workbook: Optional[ParsedWorkbook] = None) -> pd.DataFrame:
     """
     Extrator genérico para formatos desconhecidos.
     Tenta extrair dados baseado apenas nas posições de colunas da config.
     
     Retorna DataFrame normalizado: ['bem', 'amostra', 'alvo', 'ct']
     """
-    return extrair_7500(caminho, config)  # Usa lógica padrão
+    return extrair_7500(caminho, config, workbook=workbook)  # Usa lógica padrão
 
 
 # Mapeamento de equipamentos para funções extratoras
@@ -546,13 +521,18 @@ EXTRACTORS_MAP = {
 }
 
 
-def extrair_dados_equipamento(caminho: str, config: EquipmentConfig) -> pd.DataFrame:
+def extrair_dados_equipamento(
+    caminho: str,
+    config: EquipmentConfig,
+    workbook: Optional[ParsedWorkbook] = None,
+) -> pd.DataFrame:
     """
     Função principal para extrair dados de um arquivo baseado na config do equipamento.
     
     Args:
         caminho: Caminho para o arquivo XLSX/XLS
         config: EquipmentConfig com informações do equipamento
+        workbook: Planilha já carregada (ex.: a mesma usada na detecção)
     
     Returns:
         DataFrame normalizado com colunas ['bem', 'amostra', 'alvo', 'ct']
@@ -563,4 +543,32 @@ def extrair_dados_equipamento(caminho: str, config: EquipmentConfig) -> pd.DataF
     # Selecionar extrator baseado no nome do equipamento
     extrator = EXTRACTORS_MAP.get(config.nome, extrair_generico)
     
-    return extrator(caminho, config)
+    # Cache por conteúdo: reabrir o mesmo arquivo não lê o Excel de novo
+    cache = get_parse_cache()
+    chave = _chave_cache(cache, caminho, config, extrator.__name__)
+    if chave is not None:
+        df_cache = cache.obter_dataframe(chave, tipo="extrator")
+        if df_cache is not None:
+            return df_cache
+    
+    df = extrator(caminho, config, workbook=workbook)
+    
+    if chave is not None:
+        cache.salvar_dataframe(chave, df)
+    return df
+
+
+def _chave_cache(cache, caminho: str, config: EquipmentConfig, nome_extrator: str) -> Optional[str]:
+    """Chave do cache (hash do arquivo + extrator + mapa de colunas) ou None se indisponível."""
+    if not cache.habilitado or not Path(caminho).is_file():
+        return None
+    try:
+        return cache.chave(
+            caminho,
+            "extrator",
+            nome_extrator,
+            EXTRATOR_VERSAO,
+            extra={"equipamento": config.nome, "estrutura": config.xlsx_estrutura},
+        )
+    except OSError:
+        return None
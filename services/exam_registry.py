@@ -150,6 +150,16 @@ class ExamConfig:
 
     versao_protocolo: str = ""
 
+    regras_validacao: Dict[str, Any] = field(default_factory=dict)
+
+    # Consolidação por bloco (pares/trios): ordem de prioridade do status e
+
+    # orientação do bloco na placa ("horizontal" | "vertical"; vazio = horizontal)
+
+    prioridade_status: List[str] = field(default_factory=list)
+
+    orientacao_bloco: str = ""
+
 
 
     def normalize_target(self, name: str) -> str:
@@ -432,6 +442,12 @@ class ExamRegistry:
 
                 versao_protocolo=data.get("versao_protocolo", ""),
 
+                regras_validacao=data.get("regras_validacao", {}) or {},
+
+                prioridade_status=[str(v) for v in (data.get("prioridade_status") or [])],
+
+                orientacao_bloco=str(data.get("orientacao_bloco", "") or "").strip().lower(),
+
             )
 
             exams[key] = cfg
@@ -486,6 +502,12 @@ class ExamRegistry:
 
             versao_protocolo=pick(override.versao_protocolo, base.versao_protocolo),
 
+            regras_validacao=pick(override.regras_validacao, base.regras_validacao),
+
+            prioridade_status=pick(override.prioridade_status, base.prioridade_status),
+
+            orientacao_bloco=pick(override.orientacao_bloco, base.orientacao_bloco),
+
         )
 
 
@@ -4,12 +4,18 @@ Avalia expressões matemáticas e lógicas com segurança.
 """
 
 import ast
+import math
 import re
 import logging
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Union
+from functools import lru_cache, reduce
+from types import CodeType
+from typing import Any, Dict, List, Mapping, Optional, Union
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 # ============================================================================
@@ -329,6 +335,240 @@ def validar_formula(expressao: str) -> FormulaValidationResult:
         )
 
 
+# ============================================================================
+# FÓRMULAS COMPILADAS
+# ============================================================================
+
+# Contexto global do eval: __builtins__={} remove TODAS funções builtin
+# (print, open, __import__, etc); apenas funções matemáticas seguras
+CONTEXTO_SEGURO = {
+    '__builtins__': {},
+    'abs': abs,
+    'min': min,
+    'max': max,
+    'round': round,
+}
+
+# Funções lógicas do modo vetorizado (nomes inacessíveis a fórmulas do
+# usuário: a validação proíbe chamadas de função)
+CONTEXTO_VETORIZADO = {
+    **CONTEXTO_SEGURO,
+    '__e': lambda *valores: reduce(np.logical_and, valores),
+    '__ou': lambda *valores: reduce(np.logical_or, valores),
+    '__nao': np.logical_not,
+}
+
+_PADRAO_NOME = re.compile(r'\b[a-zA-Z_][a-zA-Z0-9_]*\b')
+
+
+@dataclass(frozen=True)
+class FormulaCompilada:
+    """
+    Fórmula validada e compilada uma única vez.
+
+    As variáveis são passadas como namespace do eval (sem substituição
+    textual). `codigo_vetorizado` é a mesma fórmula com and/or/not e
+    comparações encadeadas trocados por operações elemento a elemento.
+    """
+    expressao: str
+    validacao: FormulaValidationResult
+    codigo: Optional[CodeType] = None
+    codigo_vetorizado: Optional[CodeType] = None
+
+    @property
+    def valida(self) -> bool:
+        return self.validacao.valida
+
+    @property
+    def variaveis(self) -> List[str]:
+        return self.validacao.variaveis_encontradas
+
+    def variaveis_faltando(self, variaveis: Mapping[str, Any]) -> List[str]:
+        return [v for v in self.variaveis if v not in variaveis]
+
+    def avaliar(self, variaveis: Mapping[str, Any]) -> Any:
+        """
+        Avalia a fórmula com um dict de valores escalares.
+
+        Raises:
+            ValueError: fórmula inválida ou valor NaN/infinito em variável usada
+            NameError, ZeroDivisionError, TypeError: erros do eval
+        """
+        if self.codigo is None:
+            raise ValueError(f"Validação falhou: {self.validacao.mensagem}")
+        namespace = {nome: _valor_escalar(valor) for nome, valor in variaveis.items()}
+        for nome in self.variaveis:
+            valor = namespace.get(nome)
+            if isinstance(valor, float) and not math.isfinite(valor):
+                raise ValueError(f"{nome} = {valor}")
+        return eval(self.codigo, CONTEXTO_SEGURO, namespace)
+
+    def avaliar_vetorizado(self, colunas: Mapping[str, Any]) -> Union[np.ndarray, pd.Series]:
+        """
+        Avalia a fórmula sobre colunas inteiras (uma linha por amostra).
+
+        Args:
+            colunas: DataFrame ou dict variável -> Series/ndarray/lista
+                (ou escalar, aplicado a todas as linhas)
+
+        Returns:
+            Series (com o índice da primeira Series recebida) ou ndarray.
+            Comparações com NaN resultam em False e divisões por zero em
+            inf/NaN; use `mascara_valida` para identificar essas linhas.
+
+        Raises:
+            ValueError: fórmula inválida ou variáveis não fornecidas
+        """
+        if self.codigo_vetorizado is None:
+            raise ValueError(f"Validação falhou: {self.validacao.mensagem}")
+        colunas = _colunas_dict(colunas)
+        faltando = self.variaveis_faltando(colunas)
+        if faltando:
+            raise ValueError(f"Variáveis não fornecidas: {', '.join(faltando)}")
+
+        indice = next((c.index for c in colunas.values() if isinstance(c, pd.Series)), None)
+        namespace = {nome: _como_array(valor) for nome, valor in colunas.items()}
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            resultado = eval(self.codigo_vetorizado, CONTEXTO_VETORIZADO, namespace)
+
+        tamanho = _tamanho_linhas(namespace.values())
+        resultado = np.asarray(resultado)
+        if tamanho is not None and resultado.ndim == 0:
+            resultado = np.full(tamanho, resultado.item())
+        if indice is not None:
+            return pd.Series(resultado, index=indice)
+        return resultado
+
+    def mascara_valida(self, colunas: Mapping[str, Any]) -> np.ndarray:
+        """
+        Linhas em que todas as variáveis usadas têm valor (não nulo e finito).
+
+        Equivale às linhas em que `avaliar_formula` (escalar) não falharia
+        por valor ausente/NaN.
+        """
+        colunas = _colunas_dict(colunas)
+        arrays = [_como_array(colunas[v]) for v in self.variaveis if v in colunas]
+        tamanho = _tamanho_linhas(arrays)
+        mascara = np.ones(1 if tamanho is None else tamanho, dtype=bool)
+        for arr in arrays:
+            arr = np.asarray(arr)
+            if arr.dtype.kind in 'fc':
+                mascara &= np.isfinite(arr)
+            else:
+                mascara &= ~pd.isna(arr)
+        return mascara
+
+
+class _TransformadorVetorizado(ast.NodeTransformer):
+    """Troca and/or/not e comparações encadeadas por funções elemento a elemento."""
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.AST:
+        self.generic_visit(node)
+        funcao = '__e' if isinstance(node.op, ast.And) else '__ou'
+        return ast.Call(func=ast.Name(id=funcao, ctx=ast.Load()), args=node.values, keywords=[])
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.Call(func=ast.Name(id='__nao', ctx=ast.Load()), args=[node.operand], keywords=[])
+        return node
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:
+        self.generic_visit(node)
+        if len(node.ops) == 1:
+            return node
+        termos = [node.left] + node.comparators
+        pares = [
+            ast.Compare(left=termos[i], ops=[op], comparators=[termos[i + 1]])
+            for i, op in enumerate(node.ops)
+        ]
+        return ast.Call(func=ast.Name(id='__e', ctx=ast.Load()), args=pares, keywords=[])
+
+
+def _valor_escalar(valor: Any) -> Any:
+    """Escalares NumPy viram tipos Python (resultado bool continua `bool`)."""
+    if isinstance(valor, np.generic):
+        return valor.item()
+    return valor
+
+
+def _colunas_dict(colunas: Any) -> Mapping[str, Any]:
+    if isinstance(colunas, pd.DataFrame):
+        return {nome: colunas[nome] for nome in colunas.columns}
+    return colunas
+
+
+def _como_array(valor: Any) -> Any:
+    if isinstance(valor, pd.Series):
+        valor = valor.to_numpy()
+    elif isinstance(valor, (list, tuple)):
+        valor = np.asarray(valor)
+    if isinstance(valor, np.ndarray) and valor.dtype == object:
+        # colunas numéricas com None/pd.NA (ex.: CT ausente) -> float com NaN
+        try:
+            valor = valor.astype(float)
+        except (TypeError, ValueError):
+            pass
+    return valor
+
+
+def _tamanho_linhas(valores) -> Optional[int]:
+    for valor in valores:
+        if isinstance(valor, np.ndarray) and valor.ndim > 0:
+            return len(valor)
+    return None
+
+
+def _literal(valor: Any) -> str:
+    if valor is None:
+        return "None"
+    if isinstance(valor, str):
+        return f"'{valor}'"
+    return str(valor)
+
+
+def _expandir(expressao: str, variaveis: Mapping[str, Any]) -> str:
+    """Mesmo texto de `substituir_variaveis`, em uma única passada."""
+    return _PADRAO_NOME.sub(
+        lambda m: _literal(variaveis[m.group(0)]) if m.group(0) in variaveis else m.group(0),
+        expressao,
+    )
+
+
+@lru_cache(maxsize=512)
+def compilar_formula(expressao: str) -> FormulaCompilada:
+    """
+    Valida e compila a fórmula uma única vez (LRU por expressão).
+
+    Fórmulas inválidas também ficam em cache, com `codigo=None` e a
+    mensagem em `validacao.mensagem`.
+
+    Example:
+        >>> f = compilar_formula("(CT_DEN1 + CT_DEN2) / 2 < 33")
+        >>> f.avaliar({"CT_DEN1": 15.5, "CT_DEN2": 18.2})
+        True
+    """
+    validacao = validar_formula(expressao)
+    if not validacao.valida:
+        return FormulaCompilada(expressao=expressao, validacao=validacao)
+
+    tree = ast.parse(expressao, mode='eval')
+    codigo = compile(tree, '<formula>', 'eval')
+    arvore_vetorizada = ast.fix_missing_locations(_TransformadorVetorizado().visit(tree))
+    codigo_vetorizado = compile(arvore_vetorizada, '<formula_vetorizada>', 'eval')
+    return FormulaCompilada(
+        expressao=expressao,
+        validacao=validacao,
+        codigo=codigo,
+        codigo_vetorizado=codigo_vetorizado,
+    )
+
+
+def limpar_cache_formulas() -> None:
+    """Esvazia o cache de fórmulas compiladas."""
+    compilar_formula.cache_clear()
+
+
 # ============================================================================
 # AVALIAÇÃO DE FÓRMULA
 # ============================================================================
@@ -342,11 +582,11 @@ def avaliar_formula(
     Avalia uma fórmula com segurança.
     
     Processo:
-    1. Valida fórmula
+    1. Obtém a fórmula validada/compilada (cache por expressão)
     2. Verifica variáveis disponíveis
-    3. Substitui variáveis por valores
-    4. Avalia com eval() controlado (sem __builtins__)
-    5. Retorna resultado
+    3. Avalia o código compilado com as variáveis como namespace
+       (eval controlado, sem __builtins__)
+    4. Retorna resultado
     
     Args:
         expressao: Fórmula (ex: "(CT_DEN1 + CT_DEN2) / 2 < 33")
@@ -365,19 +605,19 @@ def avaliar_formula(
     """
     inicio = datetime.now()
     
-    # 1. Validar fórmula primeiro
-    validacao = validar_formula(expressao)
-    if not validacao.valida:
+    # 1. Validar/compilar fórmula (uma vez por expressão)
+    compilada = compilar_formula(expressao)
+    if not compilada.valida:
         return FormulaEvaluationResult(
             sucesso=False,
             resultado=None,
-            mensagem_erro=f"Validação falhou: {validacao.mensagem}",
+            mensagem_erro=f"Validação falhou: {compilada.validacao.mensagem}",
             tempo_execucao_ms=(datetime.now() - inicio).total_seconds() * 1000
         )
     
     # 2. Verificar variáveis disponíveis
-    variaveis_necessarias = validacao.variaveis_encontradas
-    variaveis_faltando = [v for v in variaveis_necessarias if v not in variaveis]
+    variaveis_necessarias = compilada.variaveis
+    variaveis_faltando = compilada.variaveis_faltando(variaveis)
     
     if variaveis_faltando:
         return FormulaEvaluationResult(
@@ -388,36 +628,15 @@ def avaliar_formula(
             variaveis_usadas=variaveis
         )
     
-    # 3. Substituir variáveis
-    try:
-        expressao_expandida = substituir_variaveis(expressao, variaveis)
-        logger.debug(f"Fórmula expandida: {expressao} → {expressao_expandida}")
-    except Exception as e:
-        return FormulaEvaluationResult(
-            sucesso=False,
-            resultado=None,
-            mensagem_erro=formatar_erro(e, "substituição de variáveis"),
-            tempo_execucao_ms=(datetime.now() - inicio).total_seconds() * 1000,
-            variaveis_usadas=variaveis
-        )
-    
-    # 4. Preparar contexto seguro
-    # __builtins__={} remove TODAS funções builtin (print, open, __import__, etc)
-    contexto_seguro = {
-        '__builtins__': {},
-        # Adicionar apenas funções matemáticas seguras se necessário
-        'abs': abs,
-        'min': min,
-        'max': max,
-        'round': round,
-    }
+    # 3. Expressão expandida (apenas informativa; a avaliação usa namespace)
+    expressao_expandida = _expandir(expressao, variaveis)
     
-    # 5. Avaliar com eval() controlado
+    # 4. Avaliar código compilado
     try:
         # TODO: Implementar timeout real (threading ou signal)
         # Por enquanto, confiar que fórmulas simples são rápidas
         
-        resultado = eval(expressao_expandida, contexto_seguro, {})
+        resultado = compilada.avaliar(variaveis)
         
         tempo_ms = (datetime.now() - inicio).total_seconds() * 1000
         
@@ -442,7 +661,7 @@ def avaliar_formula(
             expressao_expandida=expressao_expandida
         )
     
-    except NameError as e:
+    except (NameError, ValueError) as e:
         return FormulaEvaluationResult(
             sucesso=False,
             resultado=None,
@@ -464,6 +683,29 @@ def avaliar_formula(
         )
 
 
+def avaliar_formula_vetorizada(
+    expressao: str,
+    colunas: Mapping[str, Any],
+) -> Union[np.ndarray, pd.Series]:
+    """
+    Avalia uma fórmula sobre todas as amostras de uma vez.
+    
+    Args:
+        expressao: Fórmula (ex: "CT_DEN1 < 30 and CT_RP < 35")
+        colunas: Dict variável -> coluna (Series/ndarray) ou escalar
+        
+    Returns:
+        Resultado por linha (Series se alguma coluna for Series)
+        
+    Raises:
+        ValueError: fórmula inválida ou variáveis não fornecidas
+        
+    Example:
+        >>> avaliar_formula_vetorizada("CT_DEN1 < 30", {"CT_DEN1": df["CT_DEN1"]})
+    """
+    return compilar_formula(expressao).avaliar_vetorizado(colunas)
+
+
 # ============================================================================
 # FUNÇÕES DE CONVENIÊNCIA
 # ============================================================================
@@ -22,13 +22,15 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 if str(BASE_DIR) not in sys.path:
     sys.path.insert(0, str(BASE_DIR))
 
+from services.history_store import HistoricoStore
+
 from utils.logger import registrar_log
 
 
 class HistoricoGALSync:
     """
     Gerenciador de sincronização entre análises e envio GAL.
-    Atualiza histórico CSV com status de envio.
+    Atualiza histórico CSV com status de envio (leitura/escrita via HistoricoStore).
     """
     
     def __init__(self, csv_path: str = "logs/historico_analises.csv"):
@@ -39,6 +41,7 @@ class HistoricoGALSync:
             csv_path: Caminho do arquivo histórico
         """
         self.csv_path = Path(csv_path)
+        self.store = HistoricoStore(csv_path)
         self._valida_arquivo()
     
     def _valida_arquivo(self) -> None:
@@ -47,7 +50,7 @@ class HistoricoGALSync:
             raise FileNotFoundError(f"Arquivo não encontrado: {self.csv_path}")
         
         try:
-            df = pd.read_csv(self.csv_path, sep=";", encoding="utf-8", nrows=1)
+            colunas = self.store.colunas()
             
             campos_obrigatorios = [
                 "id_registro",
@@ -59,7 +62,7 @@ class HistoricoGALSync:
                 "atualizado_em"
             ]
             
-            campos_faltando = [c for c in campos_obrigatorios if c not in df.columns]
+            campos_faltando = [c for c in campos_obrigatorios if c not in colunas]
             if campos_faltando:
                 raise ValueError(
                     f"Campos faltando no CSV: {campos_faltando}. "
@@ -145,34 +148,29 @@ class HistoricoGALSync:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         try:
-            # 1. Lê o CSV completo
-            df = pd.read_csv(self.csv_path, sep=";", encoding="utf-8")
-            
-            registros_atualizados = 0
             registros_nao_encontrados = []
             
-            # 2. Para cada ID fornecido
-            for id_reg in id_registros:
-                mask = df["id_registro"] == id_reg
-                
-                if not mask.any():
-                    registros_nao_encontrados.append(id_reg)
-                    continue
-                
-                # 3. Atualiza campos de envio
-                df.loc[mask, "status_gal"] = status_gal
-                df.loc[mask, "data_hora_envio"] = timestamp
-                df.loc[mask, "usuario_envio"] = usuario_envio
-                df.loc[mask, "sucesso_envio"] = sucesso
-                df.loc[mask, "detalhes_envio"] = detalhes
-                df.loc[mask, "atualizado_em"] = timestamp
-                
-                registros_atualizados += 1
+            def marcar_envio(df: pd.DataFrame) -> None:
+                # Para cada ID fornecido, atualiza os campos de envio
+                for id_reg in id_registros:
+                    mask = df["id_registro"] == id_reg
+                    
+                    if not mask.any():
+                        registros_nao_encontrados.append(id_reg)
+                        continue
+                    
+                    df.loc[mask, "status_gal"] = status_gal
+                    df.loc[mask, "data_hora_envio"] = timestamp
+                    df.loc[mask, "usuario_envio"] = usuario_envio
+                    df.loc[mask, "sucesso_envio"] = sucesso
+                    df.loc[mask, "detalhes_envio"] = detalhes
+                    df.loc[mask, "atualizado_em"] = timestamp
             
-            # 4. Escreve de volta (sobrescreve)
-            df.to_csv(self.csv_path, sep=";", index=False, encoding="utf-8")
+            # Leitura, atualização e regravação sob o mesmo lock exclusivo
+            self.store.atualizar(marcar_envio)
+            registros_atualizados = len(id_registros) - len(registros_nao_encontrados)
             
-            # 5. Prepara resposta
+            # Prepara resposta
             resultado = {
                 "sucesso": True,
                 "registros_atualizados": registros_atualizados,
@@ -222,7 +220,7 @@ class HistoricoGALSync:
         """
         
         try:
-            df = pd.read_csv(self.csv_path, sep=";", encoding="utf-8")
+            df = self.store.ler()
             
             # Filtra por status
             mask = df["status_gal"] == "não enviado"
@@ -255,7 +253,7 @@ class HistoricoGALSync:
         """
         
         try:
-            df = pd.read_csv(self.csv_path, sep=";", encoding="utf-8")
+            df = self.store.ler()
             
             mask = df["id_registro"] == id_registro
             if not mask.any():
@@ -284,7 +282,7 @@ class HistoricoGALSync:
         """
         
         try:
-            df = pd.read_csv(self.csv_path, sep=";", encoding="utf-8")
+            df = self.store.ler()
             
             df_filtro = df[df["id_registro"].isin(ids)]
             
@@ -334,11 +332,38 @@ class HistoricoGALSync:
 _sync = None
 
 
+# Extensões que selecionam o backend SQLite (services/history_sqlite.py)
+EXTENSOES_SQLITE = (".db", ".sqlite", ".sqlite3")
+
+
+def usa_sqlite(caminho: str) -> bool:
+    """
+    True se o histórico indicado é um banco SQLite (.db/.sqlite).
+
+    O backend é exclusivo: um histórico em SQLite não é espelhado no CSV (nem o
+    contrário), então gravação de corridas e status do GAL decidem por aqui.
+    """
+    return Path(caminho).suffix.lower() in EXTENSOES_SQLITE
+
+
+def criar_gal_sync(csv_path: str = "logs/historico_analises.csv") -> HistoricoGALSync:
+    """Sincronizador do backend do caminho (SQLite indexado ou CSV), sem cache."""
+    if usa_sqlite(csv_path):
+        from services.history_sqlite import HistoricoGALSyncSQLite
+
+        return HistoricoGALSyncSQLite(csv_path)
+    return HistoricoGALSync(csv_path)
+
+
 def get_gal_sync(csv_path: str = "logs/historico_analises.csv") -> HistoricoGALSync:
-    """Factory para obter instância do sincronizador (singleton)."""
+    """
+    Factory para obter instância do sincronizador (singleton).
+
+    Caminhos .db/.sqlite usam o backend SQLite indexado (mesma interface).
+    """
     global _sync
     if _sync is None:
-        _sync = HistoricoGALSync(csv_path)
+        _sync = criar_gal_sync(csv_path)
     return _sync
 
 
@@ -1,5 +1,3 @@
-import os
-
 import uuid
 
 from datetime import datetime
@@ -12,6 +10,11 @@ import pandas as pd
 
 from services.exam_registry import get_exam_cfg
 
+from services.history_gal_sync import criar_gal_sync, usa_sqlite
+from services.history_rollup import RollupStore
+
+from services.history_store import HistoricoStore
+
 def _map_result(val: any) -> str:
 
     """Converte resultado textual em código padronizado "1" (Detectado), "2" (Não Detectado), "3" (Inconclusivo).
@@ -446,50 +449,23 @@ def gerar_historico_csv(
 
     df_hist = pd.DataFrame(linhas)
 
-    os.makedirs(os.path.dirname(caminho_csv), exist_ok=True)
-
-    colunas_ordenadas = list(df_hist.columns)
-
-    # âœ… NOVO: Se arquivo existe, verifica se precisa adicionar colunas faltantes
-    csv_path_obj = Path(caminho_csv)
-
-    if csv_path_obj.exists():
-
-        df_existente = pd.read_csv(csv_path_obj, sep=";", encoding="utf-8")
-
-        # Colunas que devem estar sempre presentes (mantém ordem definida pelo df_hist)
-        colunas_esperadas = list(df_hist.columns)
-        colunas_existentes = set(df_existente.columns)
-
-        # Se faltam colunas no CSV (ex: primeira vez com novo exame)
-        if colunas_existentes != set(colunas_esperadas):
-            # Adiciona colunas faltantes no histórico anterior
-            for col in colunas_esperadas:
-                if col not in df_existente.columns:
-                    df_existente[col] = None
-
-        # Reordena: primeiro as esperadas, depois eventuais extras já existentes
-        colunas_ordenadas = list(
-            dict.fromkeys(colunas_esperadas + [c for c in df_existente.columns if c not in colunas_esperadas])
-        )
-        df_existente = df_existente.reindex(columns=colunas_ordenadas)
-
-        # Escreve de novo
-        df_existente.to_csv(
-            csv_path_obj,
-            sep=";",
-            index=False,
-            encoding="utf-8"
-        )
-
-    # Garante que df_hist siga a mesma ordem de colunas ao anexar
-    df_hist = df_hist.reindex(columns=colunas_ordenadas, fill_value=None)
+    if usa_sqlite(caminho_csv):
+        # Histórico em SQLite (mesmo switch de get_gal_sync): o banco é o único destino
+        criar_gal_sync(caminho_csv).anexar(df_hist)
+    else:
+        # Append-only: colunas novas vão para o schema lateral, sem reescrever o histórico
+        # (ver services/history_store.py; o cabeçalho é fundido por scripts/compact_history.py)
+        HistoricoStore(caminho_csv).anexar(df_hist)
 
-    # Escreve novas linhas
+    # Agregados diários dos relatórios (services/history_rollup.py); o histórico é a
+    # fonte de verdade, então falhas aqui não invalidam o salvamento da corrida
+    try:
+        RollupStore(caminho_csv).acumular(df_hist, equipamento=getattr(cfg, "equipamento", "") or "")
+    except Exception as e:
+        from utils.logger import registrar_log
+        registrar_log("History Rollup", f"Falha ao atualizar agregados diários: {e}", "WARNING")
 
-    header = not csv_path_obj.exists()
 
-    df_hist.to_csv(caminho_csv, sep=";", index=False, mode="a", header=header, encoding="utf-8")
 
 def atualizar_status_gal(
 
@@ -563,63 +539,69 @@ def atualizar_status_gal(
 
 
 
-        df = pd.read_csv(csv_path_obj, sep=";", encoding="utf-8")
+        novo_status = "enviado" if sucesso else "falha no envio"
 
+        if usa_sqlite(csv_path):
 
+            # Histórico em SQLite (mesmo switch de get_gal_sync): UPDATE no banco, sem CSV
 
-        registros_atualizados = 0
+            return criar_gal_sync(csv_path)._atualizar_registros(
 
-        registros_nao_encontrados = []
+                id_registros, novo_status, sucesso, usuario_envio, detalhes
+
+            )
 
 
 
-        # 2. Para cada ID fornecido
+        store = HistoricoStore(csv_path)
 
-        for id_reg in id_registros:
+        registros_nao_encontrados = []
 
-            mask = df["id_registro"] == id_reg
 
 
+        def marcar_envio(df: pd.DataFrame) -> None:
 
-            if not mask.any():
+            # 2. Para cada ID fornecido
 
-                registros_nao_encontrados.append(id_reg)
+            for id_reg in id_registros:
 
-                continue
+                mask = df["id_registro"] == id_reg
 
 
 
-            # 3. Atualiza campos de envio (com conversão de dtype)
+                if not mask.any():
 
-            novo_status = "enviado" if sucesso else "falha no envio"
+                    registros_nao_encontrados.append(id_reg)
 
-            df.loc[mask, "status_gal"] = novo_status
+                    continue
 
-            df.loc[mask, "data_hora_envio"] = timestamp
 
-            df.loc[mask, "usuario_envio"] = usuario_envio
 
-            df.loc[mask, "sucesso_envio"] = str(sucesso)  # âœ… Converte para string
+                # 3. Atualiza campos de envio (com conversão de dtype)
 
-            df.loc[mask, "detalhes_envio"] = detalhes
+                df.loc[mask, "status_gal"] = novo_status
 
-            df.loc[mask, "atualizado_em"] = timestamp
+                df.loc[mask, "data_hora_envio"] = timestamp
 
+                df.loc[mask, "usuario_envio"] = usuario_envio
 
+                df.loc[mask, "sucesso_envio"] = str(sucesso)  # âœ… Converte para string
 
-            registros_atualizados += 1
+                df.loc[mask, "detalhes_envio"] = detalhes
 
+                df.loc[mask, "atualizado_em"] = timestamp
 
 
-        # 4. Escreve de volta (sobrescreve)
 
-        df.to_csv(csv_path_obj, sep=";", index=False, encoding="utf-8")
+        # 4. Lê, atualiza e regrava sob o mesmo lock exclusivo
 
+        store.atualizar(marcar_envio)
 
+        registros_atualizados = len(id_registros) - len(registros_nao_encontrados)
 
-        # 5. Resposta
 
-        novo_status = "enviado" if sucesso else "falha no envio"
+
+        # 5. Resposta
 
         resultado = {
 
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+services/history_rollup.py
+
+Agregados diários (rollup) do histórico de análises para os relatórios de
+qualidade e produtividade (analise/relatorios_qualidade_gerenciais.py).
+
+Cada corrida salva por `gerar_historico_csv` é somada a dois arquivos laterais
+do histórico, mantidos de forma incremental:
+
+- historico_analises.rollup.csv: por (data, exame, equipamento, tipo_amostra,
+  tipo_controle, resultado) -> n, n_invalidos, n_inconclusivos, n_retestes e
+  soma / soma dos quadrados / mínimo / máximo do Ct dos controles;
+- historico_analises.rollup_corridas.csv: por (data, exame, equipamento) ->
+  número de corridas com amostras.
+
+Os relatórios por semana/mês/ano agregam esses dias em vez de reler o histórico
+inteiro. Como cada corrida tem um único data_hora_analise, somar corridas por
+dia dá a contagem exata de corridas distintas no período.
+
+Em instalações antigas (histórico sem rollup), a primeira corrida salva
+reconstrói os agregados a partir do histórico inteiro. Para recriá-los à mão:
+    RollupStore("logs/historico_analises.csv").reconstruir()
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from services.csv_lock import csv_lock
+from services.history_gal_sync import usa_sqlite
+from services.history_store import HISTORICO_CSV_PADRAO, SEP, ENCODING, HistoricoStore
+
+CHAVES_ROLLUP = ["data", "exame", "equipamento", "tipo_amostra", "tipo_controle", "resultado"]
+SOMAS_ROLLUP = ["n", "n_invalidos", "n_inconclusivos", "n_retestes", "ct_n", "ct_soma", "ct_soma_quadrados"]
+COLUNAS_ROLLUP = CHAVES_ROLLUP + SOMAS_ROLLUP + ["ct_min", "ct_max"]
+_INTEIROS_ROLLUP = ["n", "n_invalidos", "n_inconclusivos", "n_retestes", "ct_n"]
+
+CHAVES_CORRIDAS = ["data", "exame", "equipamento"]
+COLUNAS_CORRIDAS = CHAVES_CORRIDAS + ["n_corridas"]
+
+# Colunas da visão por linha produzida por `classificar_historico`
+COLUNAS_CLASSIFICADAS = [
+    "id_corrida", "data_hora", "exame", "equipamento",
+    "tipo_amostra", "tipo_controle", "resultado", "ct", "reteste",
+]
+
+_VERDADEIROS = ["1", "true", "sim", "yes", "y", "t"]
+
+
+def _texto(df: pd.DataFrame, coluna: str) -> pd.Series:
+    if coluna not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    return df[coluna].fillna("").astype(str).str.strip()
+
+
+def _colunas_alvo(df: pd.DataFrame, sufixo: str) -> list:
+    """Colunas "<ALVO> - R" / "<ALVO> - CT" dos alvos (RPs são controle interno e ficam de fora)."""
+    return [
+        c for c in df.columns
+        if str(c).endswith(sufixo) and not str(c).upper().startswith("RP")
+    ]
+
+
+def classificar_historico(df_hist: pd.DataFrame, equipamento: Optional[str] = None) -> pd.DataFrame:
+    """
+    Converte linhas do histórico (formato de `gerar_historico_csv`) numa visão por
+    linha com as colunas usadas pelos relatórios (COLUNAS_CLASSIFICADAS).
+
+    - tipo_amostra: "controle" para códigos não numéricos ou com CN/CP (mesma
+      regra do status "não enviável"), senão "amostra";
+    - resultado: "invalido" (status da corrida), "inconclusivo" (algum alvo 3),
+      "positivo" (algum alvo 1), "negativo" (alvos 2) ou "";
+    - ct: primeiro Ct numérico dos alvos, na ordem das colunas.
+
+    Args:
+        df_hist: Linhas do histórico
+        equipamento: Equipamento de todas as linhas; se None, usa a coluna
+            "equipamento" ou o equipamento cadastrado para o exame.
+    """
+    if df_hist is None or df_hist.empty:
+        return pd.DataFrame(columns=COLUNAS_CLASSIFICADAS)
+
+    exame = _texto(df_hist, "exame")
+    if equipamento is not None:
+        equip = pd.Series(str(equipamento), index=df_hist.index, dtype=object)
+    elif "equipamento" in df_hist.columns and df_hist["equipamento"].notna().any():
+        equip = _texto(df_hist, "equipamento")
+    else:
+        equip = exame.map({nome: _equipamento_do_exame(nome) for nome in exame.unique()})
+
+    codigo = _texto(df_hist, "codigo").str.lower()
+    controle = ~codigo.str.isdigit() | codigo.str.contains("cn", regex=False) | codigo.str.contains("cp", regex=False)
+    tipo_controle = np.select(
+        [codigo.str.contains("cp", regex=False), codigo.str.contains("cn", regex=False)],
+        ["controle positivo", "controle negativo"],
+        default="controle",
+    )
+
+    codigos = pd.DataFrame(
+        {c: df_hist[c].astype(str).str.extract(r"-\s*([123])\s*$", expand=False) for c in _colunas_alvo(df_hist, " - R")},
+        index=df_hist.index,
+    )
+    status = _texto(df_hist, "status_corrida").str.lower()
+    resultado = np.select(
+        [
+            status.str.contains(r"inv[aá]lid", regex=True),
+            codigos.eq("3").any(axis=1),
+            codigos.eq("1").any(axis=1),
+            codigos.eq("2").any(axis=1),
+        ],
+        ["invalido", "inconclusivo", "positivo", "negativo"],
+        default="",
+    )
+
+    cts = pd.DataFrame(
+        {
+            c: pd.to_numeric(df_hist[c].astype(str).str.replace(",", ".", regex=False), errors="coerce")
+            for c in _colunas_alvo(df_hist, " - CT")
+        },
+        index=df_hist.index,
+    )
+    ct = cts.bfill(axis=1).iloc[:, 0] if not cts.empty else pd.Series(np.nan, index=df_hist.index)
+
+    data_hora = _texto(df_hist, "data_hora_analise")
+    id_corrida = data_hora + "|" + _texto(df_hist, "arquivo_corrida") + "|" + exame
+
+    return pd.DataFrame({
+        "id_corrida": id_corrida,
+        "data_hora": pd.to_datetime(data_hora, errors="coerce"),
+        "exame": exame,
+        "equipamento": equip,
+        "tipo_amostra": np.where(controle, "controle", "amostra"),
+        "tipo_controle": np.where(controle, tipo_controle, ""),
+        "resultado": resultado,
+        "ct": ct.astype(float),
+        "reteste": _texto(df_hist, "reteste").str.lower().isin(_VERDADEIROS),
+    }, index=df_hist.index)
+
+
+def _equipamento_do_exame(exame: str) -> str:
+    from services.exam_registry import get_exam_cfg
+
+    try:
+        return str(getattr(get_exam_cfg(exame), "equipamento", "") or "")
+    except Exception:
+        return ""
+
+
+@dataclass
+class RollupDiario:
+    """Agregados diários: `diario` (COLUNAS_ROLLUP) e `corridas` (COLUNAS_CORRIDAS)."""
+
+    diario: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=COLUNAS_ROLLUP))
+    corridas: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=COLUNAS_CORRIDAS))
+
+    @classmethod
+    def de_classificado(cls, df: pd.DataFrame) -> "RollupDiario":
+        """Agrega a visão de `classificar_historico` por dia."""
+        df = df.loc[df["data_hora"].notna()] if not df.empty else df
+        if df.empty:
+            return cls()
+
+        eh_controle = df["tipo_amostra"].eq("controle")
+        ct = df["ct"].where(eh_controle)
+        base = pd.DataFrame({
+            "data": df["data_hora"].dt.strftime("%Y-%m-%d"),
+            "exame": df["exame"],
+            "equipamento": df["equipamento"],
+            "tipo_amostra": df["tipo_amostra"],
+            "tipo_controle": df["tipo_controle"],
+            "resultado": df["resultado"],
+            "n": 1,
+            "n_invalidos": df["resultado"].eq("invalido").astype(int),
+            "n_inconclusivos": df["resultado"].eq("inconclusivo").astype(int),
+            "n_retestes": df["reteste"].astype(int),
+            "ct_n": ct.notna().astype(int),
+            "ct_soma": ct.fillna(0.0),
+            "ct_soma_quadrados": (ct ** 2).fillna(0.0),
+            "ct_min": ct,
+            "ct_max": ct,
+            "id_corrida": df["id_corrida"],
+        })
+        diario = _somar(base, CHAVES_ROLLUP)
+
+        corridas = (
+            base.loc[~eh_controle].groupby(CHAVES_CORRIDAS, sort=True)["id_corrida"].nunique()
+            .rename("n_corridas").reset_index()
+        )
+        return cls(diario, corridas.reindex(columns=COLUNAS_CORRIDAS))
+
+    @classmethod
+    def de_historico(cls, df_hist: pd.DataFrame, equipamento: Optional[str] = None) -> "RollupDiario":
+        """Atalho para `de_classificado(classificar_historico(df_hist, equipamento))`."""
+        return cls.de_classificado(classificar_historico(df_hist, equipamento))
+
+    def mesclar(self, outro: "RollupDiario") -> "RollupDiario":
+        """Soma dois rollups (dias/grupos coincidentes são acumulados)."""
+        if self.vazio:
+            return outro
+        if outro.vazio:
+            return self
+        diario = _somar(pd.concat([self.diario, outro.diario], ignore_index=True), CHAVES_ROLLUP)
+        corridas = pd.concat([self.corridas, outro.corridas], ignore_index=True)
+        corridas = (
+            corridas.astype({"n_corridas": int}).groupby(CHAVES_CORRIDAS, sort=True, dropna=False)["n_corridas"]
+            .sum().reset_index()
+        )
+        return RollupDiario(diario, corridas.reindex(columns=COLUNAS_CORRIDAS))
+
+    @property
+    def vazio(self) -> bool:
+        return self.diario.empty and self.corridas.empty
+
+
+def _somar(df: pd.DataFrame, chaves: list) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame(columns=COLUNAS_ROLLUP)
+    df = df.astype({c: float for c in ("ct_soma", "ct_soma_quadrados", "ct_min", "ct_max")})
+    for coluna in chaves:
+        df[coluna] = df[coluna].fillna("").astype(str)
+    agregacoes = {c: "sum" for c in SOMAS_ROLLUP}
+    agregacoes.update(ct_min="min", ct_max="max")
+    out = df.groupby(chaves, sort=True).agg(agregacoes).reset_index()
+    return out.astype({c: int for c in _INTEIROS_ROLLUP}).reindex(columns=COLUNAS_ROLLUP)
+
+
+class RollupStore:
+    """
+    Arquivos de rollup ao lado do histórico CSV.
+
+    Uso:
+        store = RollupStore("logs/historico_analises.csv")
+        store.acumular(df_linhas_da_corrida, equipamento="ABI 7500")
+        rollup = store.ler()
+    """
+
+    def __init__(self, historico_csv: str = HISTORICO_CSV_PADRAO, lock_timeout: int = 30):
+        self.historico_csv = Path(historico_csv)
+        self.diario_path = self.historico_csv.with_name(f"{self.historico_csv.stem}.rollup.csv")
+        self.corridas_path = self.historico_csv.with_name(f"{self.historico_csv.stem}.rollup_corridas.csv")
+        self.lock_timeout = lock_timeout
+
+    def existe(self) -> bool:
+        return self.diario_path.exists()
+
+    def ler(self) -> RollupDiario:
+        with csv_lock(str(self.diario_path), timeout=self.lock_timeout, modo="compartilhado"):
+            return self._ler_sem_lock()
+
+    def _ler_sem_lock(self) -> RollupDiario:
+        rollup = RollupDiario()
+        if self.diario_path.exists():
+            rollup.diario = _ler_csv(self.diario_path, CHAVES_ROLLUP, COLUNAS_ROLLUP)
+        if self.corridas_path.exists():
+            rollup.corridas = _ler_csv(self.corridas_path, CHAVES_CORRIDAS, COLUNAS_CORRIDAS)
+        return rollup
+
+    def acumular(self, df_hist: pd.DataFrame, equipamento: Optional[str] = None) -> RollupDiario:
+        """
+        Soma as linhas de histórico recém-gravadas aos agregados.
+
+        Reescreve apenas os arquivos de rollup (dias × grupos), nunca o histórico.
+        Na primeira vez (sem rollup) com um histórico que já tem outras linhas,
+        como numa instalação anterior aos agregados, reconstrói a partir do
+        histórico inteiro em vez de começar só com as linhas recebidas.
+
+        Returns:
+            O rollup incremental das linhas recebidas.
+        """
+        novo = RollupDiario.de_historico(df_hist, equipamento)
+        if novo.vazio:
+            return novo
+        self.diario_path.parent.mkdir(parents=True, exist_ok=True)
+        with csv_lock(str(self.diario_path), timeout=self.lock_timeout):
+            if not self.existe() and len(self._ler_historico(usecols=["data_hora_analise"])) > len(df_hist):
+                self._reconstruir_sem_lock()
+            else:
+                self._gravar(self._ler_sem_lock().mesclar(novo))
+        return novo
+
+    def reconstruir(self) -> RollupDiario:
+        """Recalcula os agregados a partir do histórico completo."""
+        self.diario_path.parent.mkdir(parents=True, exist_ok=True)
+        with csv_lock(str(self.diario_path), timeout=self.lock_timeout):
+            return self._reconstruir_sem_lock()
+
+    def _reconstruir_sem_lock(self) -> RollupDiario:
+        rollup = RollupDiario.de_historico(self._ler_historico())
+        self._gravar(rollup)
+        return rollup
+
+    def _ler_historico(self, usecols: Optional[list] = None) -> pd.DataFrame:
+        """Histórico como texto, pelo mesmo backend de gerar_historico_csv (CSV ou SQLite)."""
+        if usa_sqlite(str(self.historico_csv)):
+            from services.history_sqlite import HistoricoGALSyncSQLite
+
+            if not self.historico_csv.exists():
+                return pd.DataFrame(columns=usecols or [])
+            df = HistoricoGALSyncSQLite(str(self.historico_csv)).ler(usecols=usecols)
+            return df.astype(object).where(df.notna(), "").astype(str)
+        return HistoricoStore(str(self.historico_csv)).ler(usecols=usecols, dtype=str, keep_default_na=False)
+
+    def _gravar(self, rollup: RollupDiario) -> None:
+        for df, destino in ((rollup.diario, self.diario_path), (rollup.corridas, self.corridas_path)):
+            temp = destino.with_suffix(destino.suffix + ".tmp")
+            df.to_csv(temp, sep=SEP, index=False, encoding=ENCODING)
+            temp.replace(destino)
+
+
+def _ler_csv(caminho: Path, chaves: list, colunas: list) -> pd.DataFrame:
+    df = pd.read_csv(
+        caminho, sep=SEP, encoding=ENCODING,
+        dtype={c: str for c in chaves}, keep_default_na=False, na_values={c: [""] for c in colunas if c not in chaves},
+    )
+    return df.reindex(columns=colunas)
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+services/history_sqlite.py
+
+Backend SQLite embarcado para o histórico de análises / status GAL.
+
+Implementa a mesma interface de `HistoricoGALSync` (services/history_gal_sync.py),
+mas com índices em id_registro, status_gal, exame e data_hora_analise:
+- consultas por ID, por status e por lote não leem o histórico inteiro;
+- atualizações de status GAL alteram apenas as linhas afetadas (UPDATE indexado).
+
+Colunas dinâmicas de alvos ("SC2 - R", "SC2 - CT", ...) são criadas sob demanda
+com ALTER TABLE, de modo que a exportação CSV preserva o formato do histórico.
+
+Migração única a partir do CSV: `importar_csv()` (ou scripts/migrate_history_sqlite.py).
+O backend é escolhido pela extensão do caminho do histórico (.db/.sqlite, ver
+`history_gal_sync.usa_sqlite`) e é exclusivo: depois de migrar, aponte o
+histórico para o .db, e corridas novas e status do GAL passam a ir só para o banco.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from services.history_store import HistoricoStore
+from utils.logger import registrar_log
+
+TABELA = "historico"
+
+COLUNAS_BASE = [
+    "id_registro",
+    "data_hora_analise",
+    "usuario_analise",
+    "exame",
+    "lote",
+    "arquivo_corrida",
+    "poco",
+    "amostra",
+    "codigo",
+    "status_corrida",
+    "status_gal",
+    "mensagem_gal",
+    "data_hora_envio",
+    "usuario_envio",
+    "sucesso_envio",
+    "detalhes_envio",
+    "criado_em",
+    "atualizado_em",
+]
+
+INDICES = {
+    "idx_historico_id_registro": ("id_registro", True),
+    "idx_historico_status_gal": ("status_gal", False),
+    "idx_historico_exame": ("exame", False),
+    "idx_historico_data_hora_analise": ("data_hora_analise", False),
+}
+
+# Limite conservador de parâmetros por instrução (SQLITE_MAX_VARIABLE_NUMBER antigo = 999)
+_LOTE_PARAMS = 500
+
+
+def _q(nome: str) -> str:
+    """Cita um identificador SQL (nomes como 'SC2 - CT' têm espaços e hífens)."""
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+def _valor_sql(val: Any) -> Any:
+    if val is None:
+        return None
+    try:
+        if pd.isna(val):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if isinstance(val, bool):
+        return str(val)
+    if isinstance(val, (int, float, str)):
+        return val
+    return str(val)
+
+
+def _em_lotes(valores: List[Any], tamanho: int = _LOTE_PARAMS) -> Iterator[List[Any]]:
+    for i in range(0, len(valores), tamanho):
+        yield valores[i : i + tamanho]
+
+
+class HistoricoGALSyncSQLite:
+    """
+    Gerenciador de sincronização GAL com histórico em SQLite.
+
+    Mesma interface pública de `HistoricoGALSync`.
+    """
+
+    def __init__(self, db_path: str = "logs/historico_analises.db", timeout: float = 30.0):
+        """
+        Inicializa o banco (cria tabela e índices se necessário).
+
+        Args:
+            db_path: Caminho do arquivo SQLite
+            timeout: Espera máxima (s) por locks do SQLite
+        """
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._criar_schema()
+
+    # ------------------------------------------------------------------
+    # Infraestrutura
+    # ------------------------------------------------------------------
+    @contextmanager
+    def _conexao(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.db_path), timeout=self.timeout)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _criar_schema(self) -> None:
+        colunas_sql = ", ".join(f"{_q(c)} TEXT" for c in COLUNAS_BASE)
+        with self._conexao() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {TABELA} ({colunas_sql})")
+            for nome, (coluna, unico) in INDICES.items():
+                unique = "UNIQUE " if unico else ""
+                conn.execute(f"CREATE {unique}INDEX IF NOT EXISTS {nome} ON {TABELA} ({_q(coluna)})")
+
+    def colunas(self) -> List[str]:
+        with self._conexao() as conn:
+            return [row[1] for row in conn.execute(f"PRAGMA table_info({TABELA})")]
+
+    def _garantir_colunas(self, conn: sqlite3.Connection, colunas: Iterable[str]) -> None:
+        existentes = {row[1] for row in conn.execute(f"PRAGMA table_info({TABELA})")}
+        for col in colunas:
+            if col not in existentes:
+                conn.execute(f"ALTER TABLE {TABELA} ADD COLUMN {_q(col)} TEXT")
+                existentes.add(col)
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+    def anexar(self, df_linhas: pd.DataFrame) -> int:
+        """
+        Insere linhas do histórico (mesmo formato gerado por gerar_historico_csv).
+
+        Registros com id_registro já existente são ignorados, o que torna a
+        importação idempotente.
+
+        Returns:
+            Quantidade de linhas efetivamente inseridas.
+        """
+        if df_linhas is None or df_linhas.empty:
+            return 0
+        colunas = [str(c) for c in df_linhas.columns]
+        placeholders = ", ".join("?" for _ in colunas)
+        sql = (
+            f"INSERT OR IGNORE INTO {TABELA} ({', '.join(_q(c) for c in colunas)}) "
+            f"VALUES ({placeholders})"
+        )
+        linhas = [tuple(_valor_sql(v) for v in row) for row in df_linhas.itertuples(index=False, name=None)]
+        with self._conexao() as conn:
+            self._garantir_colunas(conn, colunas)
+            antes = conn.total_changes
+            conn.executemany(sql, linhas)
+            return conn.total_changes - antes
+
+    def marcar_enviado(
+        self,
+        id_registros: List[str],
+        usuario_envio: str,
+        detalhes: str = "Enviado com sucesso para GAL"
+    ) -> Dict[str, Any]:
+        """Marca registros como enviados com sucesso."""
+        return self._atualizar_registros(
+            id_registros=id_registros,
+            status_gal="enviado",
+            sucesso=True,
+            usuario_envio=usuario_envio,
+            detalhes=detalhes
+        )
+
+    def marcar_falha_envio(
+        self,
+        id_registros: List[str],
+        usuario_envio: str,
+        erro: str
+    ) -> Dict[str, Any]:
+        """Marca registros como falha no envio."""
+        return self._atualizar_registros(
+            id_registros=id_registros,
+            status_gal="falha no envio",
+            sucesso=False,
+            usuario_envio=usuario_envio,
+            detalhes=f"Erro: {erro}"
+        )
+
+    def reabrir_para_envio(self, id_registros: List[str]) -> Dict[str, Any]:
+        """Reabre registros que falharam, para tentar enviar novamente."""
+        return self._atualizar_registros(
+            id_registros=id_registros,
+            status_gal="não enviado",
+            sucesso=None,
+            usuario_envio="",
+            detalhes="Reabertura para retentativa"
+        )
+
+    def _atualizar_registros(
+        self,
+        id_registros: List[str],
+        status_gal: str,
+        sucesso: Optional[bool],
+        usuario_envio: str,
+        detalhes: str
+    ) -> Dict[str, Any]:
+        """Atualiza apenas as linhas dos IDs informados (UPDATE via índice de id_registro)."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ids = list(dict.fromkeys(str(i) for i in id_registros))
+        try:
+            encontrados: set = set()
+            with self._conexao() as conn:
+                for lote in _em_lotes(ids):
+                    marcadores = ", ".join("?" for _ in lote)
+                    encontrados.update(
+                        row[0]
+                        for row in conn.execute(
+                            f"SELECT id_registro FROM {TABELA} WHERE id_registro IN ({marcadores})", lote
+                        )
+                    )
+                    conn.execute(
+                        f"UPDATE {TABELA} SET status_gal = ?, data_hora_envio = ?, usuario_envio = ?, "
+                        f"sucesso_envio = ?, detalhes_envio = ?, atualizado_em = ? "
+                        f"WHERE id_registro IN ({marcadores})",
+                        [status_gal, timestamp, usuario_envio, _valor_sql(sucesso), detalhes, timestamp, *lote],
+                    )
+
+            registros_nao_encontrados = [i for i in ids if i not in encontrados]
+            resultado = {
+                "sucesso": True,
+                "registros_atualizados": len(encontrados),
+                "registros_nao_encontrados": registros_nao_encontrados,
+                "timestamp": timestamp,
+                "status": status_gal,
+                "usuario": usuario_envio
+            }
+
+            mensagem = (
+                f"Atualizado histórico (SQLite): {len(encontrados)} registros com status "
+                f"'{status_gal}', enviados por {usuario_envio}"
+            )
+            if registros_nao_encontrados:
+                mensagem += f" ({len(registros_nao_encontrados)} não encontrados)"
+            registrar_log("Histórico GAL Sync", mensagem, "INFO")
+            return resultado
+
+        except Exception as e:
+            registrar_log("Histórico GAL Sync", f"Erro ao atualizar registros: {e}", "ERROR")
+            return {
+                "sucesso": False,
+                "erro": str(e),
+                "registros_atualizados": 0,
+                "registros_nao_encontrados": id_registros
+            }
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def obter_nao_enviados(self, exame: Optional[str] = None, limite: int = 100) -> pd.DataFrame:
+        """Obtém registros que ainda não foram enviados para GAL (índice de status_gal)."""
+        try:
+            sql = f"SELECT * FROM {TABELA} WHERE status_gal = ?"
+            params: List[Any] = ["não enviado"]
+            if exame:
+                sql += " AND exame = ?"
+                params.append(exame)
+            sql += " ORDER BY rowid LIMIT ?"
+            params.append(int(limite))
+            with self._conexao() as conn:
+                return pd.read_sql_query(sql, conn, params=params)
+        except Exception as e:
+            registrar_log("Histórico GAL Sync", f"Erro ao obter não enviados: {e}", "ERROR")
+            return pd.DataFrame()
+
+    def obter_por_id(self, id_registro: str) -> Optional[Dict[str, Any]]:
+        """Obtém detalhes de um registro pelo ID (busca indexada)."""
+        try:
+            with self._conexao() as conn:
+                conn.row_factory = sqlite3.Row
+                row = conn.execute(
+                    f"SELECT * FROM {TABELA} WHERE id_registro = ?", (str(id_registro),)
+                ).fetchone()
+            return dict(row) if row is not None else None
+        except Exception as e:
+            registrar_log("Histórico GAL Sync", f"Erro ao obter registro {id_registro}: {e}", "ERROR")
+            return None
+
+    def obter_status_lote(self, ids: List[str]) -> Dict[str, Any]:
+        """Obtém resumo de status para múltiplos registros."""
+        try:
+            registros: List[Dict[str, Any]] = []
+            with self._conexao() as conn:
+                conn.row_factory = sqlite3.Row
+                for lote in _em_lotes([str(i) for i in ids]):
+                    marcadores = ", ".join("?" for _ in lote)
+                    registros.extend(
+                        dict(row)
+                        for row in conn.execute(
+                            f"SELECT id_registro, status_gal, codigo, amostra FROM {TABELA} "
+                            f"WHERE id_registro IN ({marcadores})",
+                            lote,
+                        )
+                    )
+            contagem = {"não enviado": 0, "não enviável": 0, "enviado": 0, "falha no envio": 0}
+            for reg in registros:
+                if reg["status_gal"] in contagem:
+                    contagem[reg["status_gal"]] += 1
+            return {"total": len(registros), **contagem, "registros": registros}
+        except Exception as e:
+            registrar_log("Histórico GAL Sync", f"Erro ao obter status do lote: {e}", "ERROR")
+            return {"total": 0, "erro": str(e)}
+
+    def ler(self, usecols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Lê o histórico (ou um subconjunto de colunas) como DataFrame."""
+        colunas = self.colunas()
+        selecionadas = colunas if usecols is None else [c for c in usecols if c in colunas]
+        if not selecionadas:
+            return pd.DataFrame()
+        sql = f"SELECT {', '.join(_q(c) for c in selecionadas)} FROM {TABELA} ORDER BY rowid"
+        with self._conexao() as conn:
+            return pd.read_sql_query(sql, conn)
+
+    # ------------------------------------------------------------------
+    # Migração / exportação
+    # ------------------------------------------------------------------
+    def importar_csv(self, csv_path: str = "logs/historico_analises.csv", chunksize: int = 50_000) -> int:
+        """
+        Importa (uma única vez) o histórico CSV existente.
+
+        Lê via HistoricoStore para respeitar o schema lateral do histórico append-only.
+        Reexecutar é seguro: IDs já importados são ignorados.
+
+        Returns:
+            Quantidade de linhas inseridas.
+        """
+        store = HistoricoStore(csv_path)
+        if not store.existe():
+            raise FileNotFoundError(f"Arquivo não encontrado: {csv_path}")
+        df = store.ler(dtype=str, keep_default_na=False)
+        df = df.replace({"": None})
+        inseridas = 0
+        for inicio in range(0, len(df), chunksize):
+            inseridas += self.anexar(df.iloc[inicio : inicio + chunksize])
+        registrar_log(
+            "Histórico GAL Sync",
+            f"Importadas {inseridas} de {len(df)} linhas de {csv_path} para {self.db_path}",
+            "INFO",
+        )
+        return inseridas
+
+    def exportar_csv(self, destino: str) -> int:
+        """
+        Exporta o histórico no formato do CSV legado (sep=';', utf-8).
+
+        Returns:
+            Quantidade de linhas exportadas.
+        """
+        df = self.ler()
+        Path(destino).parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(destino, sep=";", index=False, encoding="utf-8")
+        return len(df)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+services/history_store.py
+
+Armazenamento append-only do histórico de análises (logs/historico_analises.csv).
+
+O CSV nunca é reescrito para salvar uma corrida:
+- novas linhas são anexadas ao final do arquivo (custo constante);
+- colunas novas (ex.: alvos de um exame novo) são registradas num arquivo
+  lateral de schema (historico_analises.schema.json) e as linhas passam a ser
+  gravadas com a largura do schema completo;
+- o cabeçalho físico do CSV só é atualizado na compactação
+  (scripts/compact_history.py), que funde o schema offline.
+
+Leitores devem usar `HistoricoStore.ler()`, que aplica o schema completo.
+Quem ler o CSV diretamente (pd.read_csv, Excel) precisa compactá-lo antes,
+senão as colunas que ainda só existem no schema lateral ficam de fora.
+
+Atualizações de linhas existentes (ex.: status do GAL) usam
+`HistoricoStore.atualizar()`, que lê, altera e regrava sob o mesmo lock.
+"""
+
+import csv
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from services.csv_lock import csv_lock
+
+HISTORICO_CSV_PADRAO = "logs/historico_analises.csv"
+SEP = ";"
+ENCODING = "utf-8"
+
+
+class HistoricoStore:
+    """
+    Backend de armazenamento do histórico em CSV com schema lateral.
+
+    Uso:
+        store = HistoricoStore("logs/historico_analises.csv")
+        store.anexar(df_novas_linhas)
+        df = store.ler(usecols=["exame", "data_hora_analise"])
+        store.atualizar(lambda df: df.assign(status_gal="enviado"))
+        store.compactar()
+    """
+
+    def __init__(self, csv_path: str = HISTORICO_CSV_PADRAO, lock_timeout: int = 30):
+        self.csv_path = Path(csv_path)
+        self.schema_path = self.csv_path.with_name(f"{self.csv_path.stem}.schema.json")
+        self.lock_timeout = lock_timeout
+
+    # ------------------------------------------------------------------
+    # Schema
+    # ------------------------------------------------------------------
+    def existe(self) -> bool:
+        return self.csv_path.exists() and self.csv_path.stat().st_size > 0
+
+    def _ler_cabecalho(self) -> List[str]:
+        """Lê apenas a primeira linha do CSV (cabeçalho físico)."""
+        if not self.existe():
+            return []
+        with open(self.csv_path, "r", encoding=ENCODING, newline="") as f:
+            linha = f.readline()
+        if not linha.strip():
+            return []
+        return next(csv.reader([linha.rstrip("\r\n")], delimiter=SEP))
+
+    def _ler_schema_lateral(self) -> Dict[str, Any]:
+        if not self.schema_path.exists():
+            return {}
+        try:
+            with open(self.schema_path, "r", encoding=ENCODING) as f:
+                return json.load(f) or {}
+        except Exception:
+            return {}
+
+    def _salvar_schema_lateral(self, colunas: List[str], colunas_cabecalho: int) -> None:
+        dados = {
+            "versao": 1,
+            "colunas": list(colunas),
+            "colunas_cabecalho": int(colunas_cabecalho),
+            "atualizado_em": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        tmp = self.schema_path.with_name(self.schema_path.name + ".tmp")
+        with open(tmp, "w", encoding=ENCODING) as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.schema_path)
+
+    def colunas(self) -> List[str]:
+        """
+        Schema completo: cabeçalho físico + colunas registradas no arquivo lateral.
+
+        Se o arquivo lateral estiver desatualizado (ex.: CSV reescrito por outra
+        ferramenta), o cabeçalho físico prevalece e as colunas extras do lateral
+        são mantidas ao final.
+        """
+        cabecalho = self._ler_cabecalho()
+        lateral = self._ler_schema_lateral().get("colunas") or []
+        return cabecalho + [c for c in lateral if c not in cabecalho]
+
+    def precisa_compactar(self) -> bool:
+        """True se há colunas no schema que ainda não estão no cabeçalho físico."""
+        return len(self.colunas()) > len(self._ler_cabecalho())
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+    def _garantir_quebra_final(self) -> None:
+        """Evita colar a próxima linha na última caso o arquivo não termine em newline."""
+        with open(self.csv_path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) not in (b"\n", b"\r"):
+                f.write(os.linesep.encode())
+
+    def anexar(self, df_linhas: pd.DataFrame) -> int:
+        """
+        Anexa linhas ao histórico sem reescrever o arquivo.
+
+        Colunas inéditas são acrescentadas ao schema lateral; as linhas são
+        gravadas na ordem do schema completo.
+
+        Returns:
+            Quantidade de linhas anexadas.
+        """
+        if df_linhas is None or df_linhas.empty:
+            return 0
+        self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with csv_lock(str(self.csv_path), timeout=self.lock_timeout):
+            if not self.existe():
+                colunas = list(df_linhas.columns)
+                df_linhas.reindex(columns=colunas).to_csv(
+                    self.csv_path, sep=SEP, index=False, encoding=ENCODING
+                )
+                self._salvar_schema_lateral(colunas, len(colunas))
+                return len(df_linhas)
+
+            cabecalho = self._ler_cabecalho()
+            colunas = self.colunas()
+            novas = [c for c in df_linhas.columns if c not in colunas]
+            if novas:
+                colunas = colunas + novas
+            if novas or not self.schema_path.exists():
+                self._salvar_schema_lateral(colunas, len(cabecalho))
+
+            self._garantir_quebra_final()
+            df_linhas.reindex(columns=colunas).to_csv(
+                self.csv_path, sep=SEP, index=False, header=False, mode="a", encoding=ENCODING
+            )
+        return len(df_linhas)
+
+    def reescrever(self, df: pd.DataFrame) -> None:
+        """Regrava o histórico inteiro (com cabeçalho completo) de forma atômica."""
+        self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+        with csv_lock(str(self.csv_path), timeout=self.lock_timeout):
+            self._reescrever_sem_lock(df)
+
+    def atualizar(self, fn: Callable[[pd.DataFrame], Optional[pd.DataFrame]]) -> pd.DataFrame:
+        """
+        Lê, transforma e regrava o histórico sob um único lock exclusivo, para
+        que linhas anexadas por outra estação no meio não se percam.
+
+        Args:
+            fn: Recebe o histórico completo e o altera no lugar (retorno None)
+                ou retorna o DataFrame a gravar.
+
+        Returns:
+            DataFrame gravado.
+        """
+        self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+        with csv_lock(str(self.csv_path), timeout=self.lock_timeout):
+            df = self._ler_sem_lock()
+            resultado = fn(df)
+            if resultado is not None:
+                df = resultado
+            self._reescrever_sem_lock(df)
+        return df
+
+    def _reescrever_sem_lock(self, df: pd.DataFrame) -> None:
+        tmp = self.csv_path.with_name(self.csv_path.name + ".tmp")
+        df.to_csv(tmp, sep=SEP, index=False, encoding=ENCODING)
+        os.replace(tmp, self.csv_path)
+        self._salvar_schema_lateral(list(df.columns), len(df.columns))
+
+    def compactar(self) -> Dict[str, Any]:
+        """
+        Funde o schema lateral no cabeçalho físico (operação offline).
+
+        Returns:
+            Dict com linhas, total de colunas e colunas incorporadas ao cabeçalho.
+        """
+        if not self.existe():
+            return {"linhas": 0, "colunas": 0, "colunas_incorporadas": []}
+        with csv_lock(str(self.csv_path), timeout=self.lock_timeout):
+            cabecalho = self._ler_cabecalho()
+            df = self._ler_sem_lock()
+            incorporadas = [c for c in df.columns if c not in cabecalho]
+            self._reescrever_sem_lock(df)
+        return {
+            "linhas": len(df),
+            "colunas": len(df.columns),
+            "colunas_incorporadas": incorporadas,
+        }
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+    def ler(self, usecols: Optional[Iterable[str]] = None, **kwargs: Any) -> pd.DataFrame:
+        """
+        Lê o histórico aplicando o schema completo.
+
+        Args:
+            usecols: Subconjunto de colunas desejadas (ignora as inexistentes).
+            **kwargs: Repassados a `pd.read_csv` (ex.: dtype, low_memory).
+        """
+        with csv_lock(str(self.csv_path), timeout=self.lock_timeout, modo="compartilhado"):
+            return self._ler_sem_lock(usecols=usecols, **kwargs)
+
+    def _ler_sem_lock(self, usecols: Optional[Iterable[str]] = None, **kwargs: Any) -> pd.DataFrame:
+        colunas = self.colunas()
+        if not colunas:
+            return pd.DataFrame(columns=list(usecols) if usecols else [])
+
+        selecionadas = None
+        if usecols is not None:
+            selecionadas = [c for c in usecols if c in colunas]
+
+        df = pd.read_csv(
+            self.csv_path,
+            sep=SEP,
+            encoding=ENCODING,
+            header=None,
+            skiprows=1,
+            names=colunas,
+            usecols=selecionadas,
+            **kwargs,
+        )
+        if selecionadas is not None:
+            df = df.reindex(columns=selecionadas)
+        return df
+
+
+def compactar_historico(csv_path: str = HISTORICO_CSV_PADRAO) -> Dict[str, Any]:
+    """Atalho para `HistoricoStore(csv_path).compactar()`."""
+    return HistoricoStore(csv_path).compactar()
@@ -0,0 +1,270 @@
+"""
+Parse Cache - cache em disco das leituras de arquivos de corrida.
+
+Reabrir o mesmo arquivo (ajuste de mapa de extração, troca de exame) não
+precisa ler o Excel de novo: o resultado normalizado dos extratores e a
+detecção de equipamento ficam gravados em disco, indexados pelo SHA-256 do
+conteúdo do arquivo + nome/versão do extrator (e a config usada).
+
+- DataFrames: Parquet quando `pyarrow` está instalado; caso contrário pickle
+  do pandas (mantém dtypes e blocos por coluna, sem dependência extra).
+- Detecções (dict): JSON.
+- Tamanho limitado (`max_bytes`) com remoção LRU pelo horário de último uso
+  (mtime do arquivo de cache, atualizado a cada acerto).
+- Contadores de acertos/faltas por tipo em `estatisticas()`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+CACHE_DIR_PADRAO = "logs/cache_corridas"
+MAX_BYTES_PADRAO = 256 * 1024 * 1024  # 256 MB
+
+_USA_PARQUET = importlib.util.find_spec("pyarrow") is not None
+EXT_DATAFRAME = ".parquet" if _USA_PARQUET else ".pkl"
+EXT_JSON = ".json"
+
+
+class ParseCache:
+    """
+    Cache de leituras de arquivos de corrida, chaveado pelo conteúdo.
+
+    Uso:
+        cache = get_parse_cache()
+        chave = cache.chave(caminho, "extrator", config.nome, EXTRATOR_VERSAO, config.xlsx_estrutura)
+        df = cache.obter_dataframe(chave)
+        if df is None:
+            df = extrair(...)
+            cache.salvar_dataframe(chave, df)
+    """
+
+    def __init__(self, diretorio: str = CACHE_DIR_PADRAO, max_bytes: int = MAX_BYTES_PADRAO, habilitado: bool = True):
+        self.diretorio = Path(diretorio)
+        self.max_bytes = int(max_bytes)
+        self.habilitado = habilitado
+        self._lock = threading.Lock()
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._contadores: Dict[str, Dict[str, int]] = {}
+
+    # ------------------------------------------------------------------
+    # Chaves
+    # ------------------------------------------------------------------
+    def hash_arquivo(self, caminho: str) -> str:
+        """SHA-256 do conteúdo (memorizado por caminho/mtime/tamanho no processo)."""
+        path = Path(caminho).resolve()
+        st = path.stat()
+        ident = (str(path), st.st_mtime_ns, st.st_size)
+        with self._lock:
+            digest = self._hashes.get(ident)
+        if digest is not None:
+            return digest
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(bloco)
+        digest = h.hexdigest()
+        with self._lock:
+            self._hashes[ident] = digest
+        return digest
+
+    def chave(self, caminho: str, tipo: str, nome: str, versao: str, extra: Any = None) -> str:
+        """
+        Chave do cache: hash do arquivo + tipo (extrator/detector) + nome/versão.
+
+        `extra` (ex.: xlsx_estrutura do equipamento) entra na chave para que
+        um mapa de extração alterado não reutilize o resultado antigo.
+        """
+        partes = [self.hash_arquivo(caminho), tipo, nome, versao]
+        if extra is not None:
+            partes.append(json.dumps(extra, sort_keys=True, ensure_ascii=False, default=str))
+        return hashlib.sha256("|".join(partes).encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Leitura/escrita
+    # ------------------------------------------------------------------
+    def obter_dataframe(self, chave: str, tipo: str = "extrator") -> Optional[pd.DataFrame]:
+        path = self._caminho_entrada(chave, EXT_DATAFRAME)
+        if path is None:
+            return None
+        try:
+            df = pd.read_parquet(path) if _USA_PARQUET else pd.read_pickle(path)
+        except Exception:
+            self._remover(path)
+            df = None
+        return self._registrar(tipo, path, df)
+
+    def salvar_dataframe(self, chave: str, df: pd.DataFrame) -> None:
+        if not self.habilitado:
+            return
+        if _USA_PARQUET:
+            self._gravar(chave, EXT_DATAFRAME, lambda tmp: df.to_parquet(tmp, index=True))
+        else:
+            self._gravar(chave, EXT_DATAFRAME, lambda tmp: df.to_pickle(tmp))
+
+    def obter_json(self, chave: str, tipo: str = "detector") -> Optional[Any]:
+        path = self._caminho_entrada(chave, EXT_JSON)
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+        except Exception:
+            self._remover(path)
+            dados = None
+        return self._registrar(tipo, path, dados)
+
+    def salvar_json(self, chave: str, dados: Any) -> None:
+        if not self.habilitado:
+            return
+
+        def escrever(tmp: Path) -> None:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(dados, f, ensure_ascii=False)
+
+        self._gravar(chave, EXT_JSON, escrever)
+
+    def registrar_falta(self, tipo: str) -> None:
+        """Conta uma falta quando o cache não pôde ser consultado (ex.: arquivo ausente)."""
+        self._contar(tipo, "misses")
+
+    # ------------------------------------------------------------------
+    # Manutenção
+    # ------------------------------------------------------------------
+    def estatisticas(self) -> Dict[str, Any]:
+        """Acertos/faltas por tipo e uso atual do diretório."""
+        with self._lock:
+            por_tipo = {t: dict(c) for t, c in self._contadores.items()}
+        hits = sum(c.get("hits", 0) for c in por_tipo.values())
+        misses = sum(c.get("misses", 0) for c in por_tipo.values())
+        entradas = self._entradas()
+        return {
+            "hits": hits,
+            "misses": misses,
+            "taxa_acerto": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "por_tipo": por_tipo,
+            "entradas": len(entradas),
+            "bytes": sum(tamanho for _, tamanho, _ in entradas),
+            "max_bytes": self.max_bytes,
+        }
+
+    def zerar_contadores(self) -> None:
+        with self._lock:
+            self._contadores.clear()
+
+    def limpar(self) -> int:
+        """Remove todas as entradas; retorna quantas foram removidas."""
+        entradas = self._entradas()
+        for path, _, _ in entradas:
+            self._remover(path)
+        return len(entradas)
+
+    def _evictar(self) -> None:
+        """Remove as entradas menos usadas até caber em `max_bytes`."""
+        entradas = self._entradas()
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        if total <= self.max_bytes:
+            return
+        for path, tamanho, _ in sorted(entradas, key=lambda e: e[2]):
+            self._remover(path)
+            total -= tamanho
+            if total <= self.max_bytes:
+                break
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+    def _caminho_entrada(self, chave: str, ext: str) -> Optional[Path]:
+        if not self.habilitado:
+            return None
+        return self.diretorio / f"{chave}{ext}"
+
+    def _registrar(self, tipo: str, path: Path, valor: Any) -> Any:
+        if valor is None:
+            self._contar(tipo, "misses")
+            return None
+        self._contar(tipo, "hits")
+        try:
+            os.utime(path, None)  # marca uso recente (LRU)
+        except OSError:
+            pass
+        return valor
+
+    def _contar(self, tipo: str, campo: str) -> None:
+        with self._lock:
+            contador = self._contadores.setdefault(tipo, {"hits": 0, "misses": 0})
+            contador[campo] += 1
+
+    def _gravar(self, chave: str, ext: str, escrever) -> None:
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            destino = self.diretorio / f"{chave}{ext}"
+            tmp = destino.with_name(f"{destino.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                escrever(tmp)
+                os.replace(tmp, destino)
+            finally:
+                if tmp.exists():
+                    self._remover(tmp)
+            self._evictar()
+        except Exception:
+            # Cache é só otimização: falha de escrita não interrompe a análise
+            pass
+
+    def _entradas(self):
+        """Lista (caminho, tamanho, mtime) das entradas do cache."""
+        if not self.diretorio.exists():
+            return []
+        entradas = []
+        for path in self.diretorio.iterdir():
+            if path.suffix not in (EXT_DATAFRAME, EXT_JSON):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entradas.append((path, st.st_size, st.st_mtime_ns))
+        return entradas
+
+    @staticmethod
+    def _remover(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+# Instância global (singleton)
+_cache_instance: Optional[ParseCache] = None
+
+
+def get_parse_cache() -> ParseCache:
+    """Obtém instância global do cache de leituras."""
+    global _cache_instance
+    if _cache_instance is None:
+        _cache_instance = ParseCache()
+    return _cache_instance
+
+
+def set_parse_cache(cache: Optional[ParseCache]) -> None:
+    """Substitui a instância global (None recria a padrão no próximo uso)."""
+    global _cache_instance
+    _cache_instance = cache
+
+
+# API pública
+__all__ = [
+    'ParseCache',
+    'get_parse_cache',
+    'set_parse_cache',
+    'CACHE_DIR_PADRAO',
+]
@@ -0,0 +1,302 @@
+"""
+Parsed Workbook - leitura única de planilhas de corrida.
+
+Carrega cada aba do arquivo XLSX/XLSM/XLS uma única vez em arrays por coluna.
+A detecção de equipamento (equipment_detector) e os extratores
+(equipment_extractors) consomem o mesmo objeto, em vez de reabrirem o
+arquivo com openpyxl/xlrd e depois novamente com pd.read_excel.
+
+`ParsedSheet.tabela(header, nrows)` reproduz o resultado de
+`pd.read_excel(..., header=header, nrows=nrows)` a partir da grade em memória
+(mesma conversão de células do leitor openpyxl do pandas + TextParser).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+EXTENSOES_SUPORTADAS = ('.xlsx', '.xlsm', '.xls')
+
+
+class _Celula:
+    """Célula mínima compatível com openpyxl (`.value`)."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class ParsedSheet:
+    """
+    Aba carregada em memória.
+
+    Internamente guarda uma lista de arrays (uma por coluna) com os valores já
+    convertidos; células vazias são "" (mesma convenção do pandas/xlrd).
+    """
+
+    def __init__(self, nome: str, linhas: List[List[Any]]):
+        self.nome = nome
+        self.title = nome  # compat openpyxl
+        self.max_row = len(linhas)
+        self.max_column = max((len(l) for l in linhas), default=0)
+        self.colunas: List[np.ndarray] = []
+        for j in range(self.max_column):
+            col = np.empty(self.max_row, dtype=object)
+            col[:] = [l[j] if j < len(l) else "" for l in linhas]
+            self.colunas.append(col)
+
+    # ------------------------------------------------------------------
+    # Acesso por célula/linha (1-based, como openpyxl)
+    # ------------------------------------------------------------------
+    def valor(self, row: int, col: int) -> Any:
+        """Valor da célula (1-based); None para vazia ou fora dos limites."""
+        if row < 1 or row > self.max_row or col < 1 or col > self.max_column:
+            return None
+        v = self.colunas[col - 1][row - 1]
+        return None if v == "" else v
+
+    def cell(self, row: int, col: int) -> _Celula:
+        """Compatibilidade com `openpyxl.Worksheet.cell(row, col).value`."""
+        return _Celula(self.valor(row, col))
+
+    def linha(self, row: int) -> List[Any]:
+        """Valores de uma linha inteira (1-based); None para células vazias."""
+        if row < 1 or row > self.max_row:
+            return []
+        valores = [col[row - 1] for col in self.colunas]
+        return [None if v == "" else v for v in valores]
+
+    def linhas_brutas(self, inicio: int = 0, fim: Optional[int] = None) -> List[List[Any]]:
+        """Linhas [inicio, fim) (0-based) com "" para vazias, no formato aceito pelo TextParser."""
+        fim = self.max_row if fim is None else min(fim, self.max_row)
+        if inicio >= fim or not self.colunas:
+            return []
+        return np.column_stack([c[inicio:fim] for c in self.colunas]).tolist()
+
+    # ------------------------------------------------------------------
+    # Tabelas (equivalentes a pd.read_excel)
+    # ------------------------------------------------------------------
+    def tabela(self, header: Optional[int] = 0, nrows: Optional[int] = None) -> pd.DataFrame:
+        """
+        DataFrame equivalente a `pd.read_excel(arquivo, sheet_name=aba, header=header, nrows=nrows)`.
+
+        Args:
+            header: Linha (0-based) do cabeçalho; None para sem cabeçalho
+            nrows: Máximo de linhas de dados
+        """
+        if self.max_row == 0:
+            return pd.DataFrame()
+        inicio = 0 if header is None else header
+        if inicio >= self.max_row:
+            return pd.DataFrame()
+        if nrows is None:
+            dados = self.linhas_brutas(inicio)
+        else:
+            # pd.read_excel com nrows lê só as primeiras linhas necessárias e apara
+            # linhas/colunas vazias finais dentro dessa janela
+            necessarias = (1 if header is None else header + 1) + nrows
+            janela = _normalizar_grade([_aparar(l) for l in self.linhas_brutas(0, necessarias)])
+            dados = janela[inicio:]
+        try:
+            parser = TextParser(
+                dados,
+                header=None if header is None else 0,
+                nrows=nrows,
+                skip_blank_lines=False,  # mesmo comportamento de pd.read_excel
+            )
+            try:
+                return parser.read(nrows=nrows)
+            finally:
+                parser.close()
+        except EmptyDataError:
+            return pd.DataFrame()
+
+
+class ParsedWorkbook:
+    """
+    Arquivo de corrida carregado uma única vez (todas as abas).
+
+    Uso:
+        wb = ParsedWorkbook.carregar("corrida.xlsx")
+        ws = wb.folha()           # aba ativa
+        df = wb.folha(0).tabela(header=23, nrows=1000)
+    """
+
+    def __init__(self, caminho: str, folhas: "OrderedDict[str, ParsedSheet]", ativa: Optional[str] = None, engine: str = ""):
+        self.caminho = str(caminho)
+        self.folhas = folhas
+        self.nome_ativa = ativa if ativa in folhas else (next(iter(folhas)) if folhas else None)
+        self.engine = engine
+
+    @property
+    def nomes_folhas(self) -> List[str]:
+        return list(self.folhas.keys())
+
+    def folha(self, chave: Union[int, str, None] = None) -> ParsedSheet:
+        """Retorna aba por índice, nome ou a aba ativa (chave=None)."""
+        if not self.folhas:
+            raise ValueError(f"Planilha sem abas: {self.caminho}")
+        if chave is None:
+            return self.folhas[self.nome_ativa]
+        if isinstance(chave, int):
+            return list(self.folhas.values())[chave]
+        return self.folhas[chave]
+
+    # ------------------------------------------------------------------
+    # Carregamento
+    # ------------------------------------------------------------------
+    @classmethod
+    def carregar(cls, caminho: str) -> "ParsedWorkbook":
+        path = Path(caminho)
+        if not path.exists():
+            raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+        extensao = path.suffix.lower()
+        if extensao not in EXTENSOES_SUPORTADAS:
+            raise ValueError(f"Arquivo deve ser XLSX/XLS/XLSM, recebido: {path.suffix}")
+        if extensao == '.xls':
+            return cls._carregar_xlrd(path)
+        return cls._carregar_openpyxl(path)
+
+    @classmethod
+    def _carregar_openpyxl(cls, path: Path) -> "ParsedWorkbook":
+        from openpyxl import load_workbook
+        from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+        def converter(cell: Any) -> Any:
+            # Mesma conversão de pandas.io.excel._openpyxl.OpenpyxlReader._convert_cell
+            valor = cell.value
+            if valor is None:
+                return ""
+            if cell.data_type == TYPE_ERROR:
+                return np.nan
+            if cell.data_type == TYPE_NUMERIC:
+                inteiro = int(valor)
+                return inteiro if inteiro == valor else float(valor)
+            return valor
+
+        wb = load_workbook(str(path), read_only=True, data_only=True, keep_links=False)
+        try:
+            ativa = wb.active.title if wb.active is not None else None
+            folhas: "OrderedDict[str, ParsedSheet]" = OrderedDict()
+            for ws in wb.worksheets:
+                ws.reset_dimensions()
+                linhas = [_aparar([converter(c) for c in row]) for row in ws.rows]
+                folhas[ws.title] = ParsedSheet(ws.title, _normalizar_grade(linhas))
+        finally:
+            wb.close()
+        return cls(str(path), folhas, ativa=ativa, engine='openpyxl')
+
+    @classmethod
+    def _carregar_xlrd(cls, path: Path) -> "ParsedWorkbook":
+        try:
+            import xlrd
+        except ImportError:
+            raise ImportError("Para ler arquivos .xls, instale: pip install xlrd")
+
+        book = xlrd.open_workbook(str(path), on_demand=True)
+        try:
+            epoch1904 = book.datemode
+
+            def converter(valor: Any, tipo: int) -> Any:
+                # Mesma conversão de pandas.io.excel._xlrd.XlrdReader
+                if tipo == xlrd.XL_CELL_DATE:
+                    try:
+                        return xlrd.xldate.xldate_as_datetime(valor, epoch1904)
+                    except Exception:
+                        return valor
+                if tipo == xlrd.XL_CELL_ERROR:
+                    return np.nan
+                if tipo == xlrd.XL_CELL_BOOLEAN:
+                    return bool(valor)
+                if tipo == xlrd.XL_CELL_NUMBER:
+                    inteiro = int(valor)
+                    return inteiro if inteiro == valor else valor
+                return valor
+
+            folhas: "OrderedDict[str, ParsedSheet]" = OrderedDict()
+            for idx in range(book.nsheets):
+                sh = book.sheet_by_index(idx)
+                linhas = [
+                    [converter(v, t) for v, t in zip(sh.row_values(r), sh.row_types(r))]
+                    for r in range(sh.nrows)
+                ]
+                folhas[sh.name] = ParsedSheet(sh.name, linhas)
+                book.unload_sheet(idx)
+            nomes = list(folhas)
+            ativa = nomes[0] if nomes else None
+        finally:
+            book.release_resources()
+        return cls(str(path), folhas, ativa=ativa, engine='xlrd')
+
+
+def _aparar(linha: List[Any]) -> List[Any]:
+    while linha and linha[-1] == "":
+        linha.pop()
+    return linha
+
+
+def _normalizar_grade(linhas: List[List[Any]]) -> List[List[Any]]:
+    """Remove linhas vazias finais e completa as linhas até a largura máxima."""
+    ultima = -1
+    for i, l in enumerate(linhas):
+        if l:
+            ultima = i
+    linhas = linhas[: ultima + 1]
+    if linhas:
+        largura = max(len(l) for l in linhas)
+        linhas = [l + [""] * (largura - len(l)) for l in linhas]
+    return linhas
+
+
+# ----------------------------------------------------------------------
+# Cache de workbooks (detecção e extração do mesmo arquivo → uma leitura)
+# ----------------------------------------------------------------------
+_CACHE_MAX = 2
+_cache: "OrderedDict[Tuple[str, int, int], ParsedWorkbook]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def abrir_workbook(caminho: str) -> ParsedWorkbook:
+    """
+    Retorna o ParsedWorkbook do arquivo, reutilizando a última leitura se o
+    arquivo não mudou (chave: caminho absoluto, mtime, tamanho).
+    """
+    path = Path(caminho).resolve()
+    if not path.exists():
+        raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+    st = path.stat()
+    chave = (str(path), st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        wb = _cache.get(chave)
+        if wb is not None:
+            _cache.move_to_end(chave)
+            return wb
+    wb = ParsedWorkbook.carregar(str(path))
+    with _cache_lock:
+        _cache[chave] = wb
+        _cache.move_to_end(chave)
+        while len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+    return wb
+
+
+def limpar_cache_workbooks() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+__all__ = [
+    'ParsedSheet',
+    'ParsedWorkbook',
+    'abrir_workbook',
+    'limpar_cache_workbooks',
+]
@@ -0,0 +1,1311 @@
+"""
+Modelo colunar da placa usado pelo mapa interativo (services/plate_viewer.py)
+e pelo mapa em Excel (services/plate_report.py).
+
+Os dados ficam em arrays NumPy em vez de um objeto por poço:
+- por poço: amostra, código, status, controle e grupo (pares/trios/quartetos);
+- por (poço, alvo): CT (float, NaN = sem CT), código do resultado no
+  vocabulário `result_labels` e máscara de presença do alvo.
+
+`PlateModel.wells`, `WellData`, `well.targets` e `well.metadata` são visões
+sobre esses arrays, com a mesma interface do modelo antigo (dataclass por
+poço), de modo que a tela continua lendo e editando um poço de cada vez.
+A geometria da placa (96 = 8x12 ou 384 = 16x24) vem de `PlateGeometry`.
+
+Edições feitas pelas visões marcam o poço como alterado (com as colunas do
+df_final afetadas); `PlateModel.pop_delta()` devolve só essas linhas/colunas
+para a janela de análise atualizar o DataFrame e a tabela sem recarregar tudo.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from collections.abc import Mapping, MutableMapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+# Tenta importar a configuração de exame, se falhar usa None
+try:
+    from services.exam_registry import get_exam_cfg
+except ImportError:
+    get_exam_cfg = None
+
+# ---------------------------------------------------------------------------
+# Status / Cores
+# ---------------------------------------------------------------------------
+
+NEGATIVE = "NEGATIVE"
+POSITIVE = "POSITIVE"
+INCONCLUSIVE = "INCONCLUSIVE"
+INVALID = "INVALID"
+CONTROL_CN = "CONTROL_CN"
+CONTROL_CP = "CONTROL_CP"
+EMPTY = "EMPTY"
+
+STATUS_COLORS = {
+    NEGATIVE: "#d4f4d4",  # verde claro
+    POSITIVE: "#ffb3b3",  # vermelho claro (Det)
+    INCONCLUSIVE: "#b3d9ff",  # FASE 3: azul claro (Inc) - antes #ffcc99
+    INVALID: "#f0f0f0",  # cinza
+    CONTROL_CN: "#b3d9ff",  # azul claro
+    CONTROL_CP: "#b3d9ff",  # azul claro (mesma cor CN)
+    EMPTY: "#ffffff",  # branco
+}
+
+# Códigos armazenados em PlateModel.status_codes / control_codes
+STATUS_CODES = (EMPTY, NEGATIVE, POSITIVE, INCONCLUSIVE, INVALID, CONTROL_CN, CONTROL_CP)
+_STATUS_INDEX = {s: i for i, s in enumerate(STATUS_CODES)}
+CONTROL_TYPES = ("", "CN", "CP")
+
+# Classe de cada texto de resultado para o status do poço (maior vence)
+_CLASSE_VAZIO, _CLASSE_ND, _CLASSE_INC, _CLASSE_POS = 0, 1, 2, 3
+_STATUS_POR_CLASSE = np.array(
+    [_STATUS_INDEX[INVALID], _STATUS_INDEX[NEGATIVE], _STATUS_INDEX[INCONCLUSIVE], _STATUS_INDEX[POSITIVE]],
+    dtype=np.int8,
+)
+
+_CN_HEURISTICA = {"CN", "CONTROLE NEGATIVO", "C-", "NEGATIVO CONTROLE", "NEGATIVO", "CONTROLE N"}
+_CP_HEURISTICA = {"CP", "CONTROLE POSITIVO", "C+", "POSITIVO CONTROLE", "POSITIVO", "CONTROLE P"}
+
+
+# ---------------------------------------------------------------------------
+# Geometria
+# ---------------------------------------------------------------------------
+
+_RE_POCO = re.compile(r"^([A-Za-z])0*(\d+)$")
+
+
+class PlateGeometry:
+    """Linhas x colunas da placa; poço k = linha * cols + coluna (0-based)."""
+
+    __slots__ = ("rows", "cols", "row_labels", "col_labels", "well_ids", "_indices")
+
+    def __init__(self, rows: int, cols: int) -> None:
+        self.rows = rows
+        self.cols = cols
+        self.row_labels = [chr(ord("A") + r) for r in range(rows)]
+        self.col_labels = [str(c) for c in range(1, cols + 1)]
+        self.well_ids = [f"{r}{c:02d}" for r in self.row_labels for c in range(1, cols + 1)]
+        self._indices = {w: k for k, w in enumerate(self.well_ids)}
+
+    @property
+    def n_wells(self) -> int:
+        return self.rows * self.cols
+
+    @classmethod
+    def for_wells(cls, n_wells: int) -> "PlateGeometry":
+        try:
+            return GEOMETRIES[int(n_wells)]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Placa de {n_wells} poços não suportada (use {', '.join(map(str, GEOMETRIES))})")
+
+    def index(self, well_id: str) -> Optional[int]:
+        """Índice do poço ("A1", "A01", "p24"...) ou None se estiver fora da placa."""
+        k = self._indices.get(well_id)
+        if k is not None:
+            return k
+        m = _RE_POCO.match(str(well_id).strip())
+        if not m:
+            return None
+        r = ord(m.group(1).upper()) - ord("A")
+        c = int(m.group(2)) - 1
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            return r * self.cols + c
+        return None
+
+    def position(self, well_id: str) -> Optional[Tuple[int, int]]:
+        """(linha, coluna) 0-based do poço."""
+        k = self.index(well_id)
+        return None if k is None else divmod(k, self.cols)
+
+    def __repr__(self) -> str:
+        return f"PlateGeometry({self.rows}x{self.cols})"
+
+
+GEOMETRIES = {96: PlateGeometry(8, 12), 384: PlateGeometry(16, 24)}
+GEOMETRY_96 = GEOMETRIES[96]
+GEOMETRY_384 = GEOMETRIES[384]
+
+
+def _parse_pocos(pocos: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Linha e coluna (0-based) de cada poço ("A1"/"A01"); -1 quando inválido."""
+    partes = pocos.str.extract(_RE_POCO)
+    letras = partes[0].fillna("@").str.upper().to_numpy(dtype=str)
+    linhas = np.frombuffer(letras.astype("S1"), dtype=np.uint8).astype(np.int64) - ord("A")
+    colunas = pd.to_numeric(partes[1], errors="coerce").fillna(0).to_numpy(dtype=np.int64) - 1
+    invalido = partes[0].isna().to_numpy()
+    linhas[invalido] = -1
+    colunas[invalido] = -1
+    return linhas, colunas
+
+
+def _inferir_geometria(linhas: np.ndarray, colunas: np.ndarray) -> PlateGeometry:
+    """96 poços se todos couberem em 8x12; senão 384."""
+    validos = linhas >= 0
+    if (linhas[validos] >= GEOMETRY_96.rows).any() or (colunas[validos] >= GEOMETRY_96.cols).any():
+        return GEOMETRY_384
+    return GEOMETRY_96
+
+
+# ---------------------------------------------------------------------------
+# Visões por poço
+# ---------------------------------------------------------------------------
+
+
+class TargetResult:
+    """Resultado de um alvo ("Det", "ND", "Inc", "Inv"...) e CT."""
+
+    __slots__ = ("result", "ct")
+
+    def __init__(self, result: str = "", ct: Optional[float] = None) -> None:
+        self.result = result
+        self.ct = ct
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TargetResult):
+            return NotImplemented
+        return (self.result, self.ct) == (other.result, other.ct)
+
+    def __repr__(self) -> str:
+        return f"TargetResult(result={self.result!r}, ct={self.ct!r})"
+
+
+class TargetView(TargetResult):
+    """`well.targets[alvo]`: lê e grava direto nos arrays da placa."""
+
+    __slots__ = ("_model", "_i", "_j")
+
+    def __init__(self, model: "PlateModel", i: int, j: int) -> None:
+        self._model = model
+        self._i = i
+        self._j = j
+
+    @property
+    def result(self) -> str:  # type: ignore[override]
+        return self._model.result_labels[self._model.result_codes[self._i, self._j]]
+
+    @result.setter
+    def result(self, value: str) -> None:
+        self._model.result_codes[self._i, self._j] = self._model._result_code(value)
+        self._model._mark_dirty(self._i, _coluna_resultado(self._model.target_names[self._j]))
+
+    @property
+    def ct(self) -> Optional[float]:  # type: ignore[override]
+        valor = self._model.ct[self._i, self._j]
+        return None if np.isnan(valor) else float(valor)
+
+    @ct.setter
+    def ct(self, value: Optional[float]) -> None:
+        self._model.ct[self._i, self._j] = np.nan if value is None else value
+        self._model._mark_dirty(self._i, _coluna_ct(self._model.target_names[self._j]))
+
+
+class _TargetsView(MutableMapping):
+    """`well.targets`: alvos presentes no poço, na ordem das colunas da placa."""
+
+    __slots__ = ("_model", "_i")
+
+    def __init__(self, model: "PlateModel", i: int) -> None:
+        self._model = model
+        self._i = i
+
+    def _coluna(self, alvo: str) -> int:
+        j = self._model._target_index.get(alvo)
+        if j is None or not self._model.has_target[self._i, j]:
+            raise KeyError(alvo)
+        return j
+
+    def __getitem__(self, alvo: str) -> TargetView:
+        return TargetView(self._model, self._i, self._coluna(alvo))
+
+    def __setitem__(self, alvo: str, tr: TargetResult) -> None:
+        model = self._model
+        j = model._ensure_target(alvo)
+        model.has_target[self._i, j] = True
+        model.result_codes[self._i, j] = model._result_code(tr.result)
+        model.ct[self._i, j] = np.nan if tr.ct is None else tr.ct
+        model._mark_dirty(self._i, _coluna_resultado(alvo), _coluna_ct(alvo))
+
+    def __delitem__(self, alvo: str) -> None:
+        j = self._coluna(alvo)
+        self._model.has_target[self._i, j] = False
+        self._model.result_codes[self._i, j] = 0
+        self._model.ct[self._i, j] = np.nan
+        self._model._mark_dirty(self._i, _coluna_resultado(alvo), _coluna_ct(alvo))
+
+    def __iter__(self) -> Iterator[str]:
+        nomes = self._model.target_names
+        return iter([nomes[j] for j in np.flatnonzero(self._model.has_target[self._i])])
+
+    def __len__(self) -> int:
+        return int(self._model.has_target[self._i].sum())
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class _MetadataView(MutableMapping):
+    """`well.metadata`: "control_type" vem de `control_codes`; demais chaves ficam num dict à parte."""
+
+    __slots__ = ("_model", "_i")
+
+    def __init__(self, model: "PlateModel", i: int) -> None:
+        self._model = model
+        self._i = i
+
+    def _extras(self) -> Dict[str, Any]:
+        return self._model._metadata_extra.get(self._i, {})
+
+    def __getitem__(self, chave: str) -> Any:
+        if chave == "control_type":
+            codigo = self._model.control_codes[self._i]
+            if not codigo:
+                raise KeyError(chave)
+            return CONTROL_TYPES[codigo]
+        return self._extras()[chave]
+
+    def __setitem__(self, chave: str, valor: Any) -> None:
+        if chave == "control_type":
+            if valor not in ("CN", "CP"):
+                raise ValueError(f"control_type deve ser 'CN' ou 'CP', recebido {valor!r}")
+            self._model.control_codes[self._i] = CONTROL_TYPES.index(valor)
+            self._model._mark_dirty(self._i)
+            return
+        self._model._metadata_extra.setdefault(self._i, {})[chave] = valor
+
+    def __delitem__(self, chave: str) -> None:
+        if chave == "control_type":
+            if not self._model.control_codes[self._i]:
+                raise KeyError(chave)
+            self._model.control_codes[self._i] = 0
+            self._model._mark_dirty(self._i)
+            return
+        extras = self._model._metadata_extra.get(self._i)
+        if not extras or chave not in extras:
+            raise KeyError(chave)
+        del extras[chave]
+
+    def __iter__(self) -> Iterator[str]:
+        chaves = ["control_type"] if self._model.control_codes[self._i] else []
+        return iter(chaves + list(self._extras()))
+
+    def __len__(self) -> int:
+        return int(bool(self._model.control_codes[self._i])) + len(self._extras())
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class WellData:
+    """Visão de um poço da placa (mesmos campos do antigo dataclass por poço)."""
+
+    __slots__ = ("_model", "_i")
+
+    def __init__(self, model: "PlateModel", i: int) -> None:
+        self._model = model
+        self._i = i
+
+    @property
+    def well_id(self) -> str:
+        return self._model.geometry.well_ids[self._i]
+
+    @property
+    def row_label(self) -> str:
+        return self.well_id[0]
+
+    @property
+    def col_label(self) -> str:
+        return self.well_id[1:]
+
+    @property
+    def sample_id(self) -> Optional[str]:
+        return self._model.sample_ids[self._i]
+
+    @sample_id.setter
+    def sample_id(self, value: Optional[str]) -> None:
+        if value != self._model.sample_ids[self._i]:
+            self._model.sample_ids[self._i] = value
+            self._model._mark_dirty(self._i, "Amostra")
+
+    @property
+    def code(self) -> Optional[str]:
+        return self._model.codes[self._i]
+
+    @code.setter
+    def code(self, value: Optional[str]) -> None:
+        if value != self._model.codes[self._i]:
+            self._model.codes[self._i] = value
+            self._model._mark_dirty(self._i, "Codigo")
+
+    @property
+    def status(self) -> str:
+        return STATUS_CODES[self._model.status_codes[self._i]]
+
+    @status.setter
+    def status(self, value: str) -> None:
+        self._model.status_codes[self._i] = _STATUS_INDEX[value]
+        self._model._mark_dirty(self._i)
+
+    @property
+    def is_control(self) -> bool:
+        return bool(self._model.is_control[self._i])
+
+    @is_control.setter
+    def is_control(self, value: bool) -> None:
+        self._model.is_control[self._i] = bool(value)
+        self._model._mark_dirty(self._i)
+
+    @property
+    def targets(self) -> _TargetsView:
+        return _TargetsView(self._model, self._i)
+
+    @property
+    def metadata(self) -> _MetadataView:
+        return _MetadataView(self._model, self._i)
+
+    # Campos para grupos de poços
+    @property
+    def group_id(self) -> Optional[str]:
+        g = self._model.group_index[self._i]
+        return self._model._group_ids[g] if g >= 0 else None
+
+    @property
+    def is_grouped(self) -> bool:
+        return bool(self._model.group_index[self._i] >= 0)
+
+    @property
+    def group_size(self) -> int:
+        group_id = self.group_id
+        return len(self._model.group_dict.get(group_id, ())) if group_id else 1
+
+    @property
+    def group_position(self) -> int:
+        return int(self._model.group_position[self._i])
+
+    @property
+    def paired_wells(self) -> List[str]:
+        group_id = self.group_id
+        if not group_id:
+            return []
+        return [w for w in self._model.group_dict.get(group_id, []) if w != self.well_id]
+
+    @property
+    def pair_group_id(self) -> Optional[str]:
+        """ID do grupo de pares (legacy)."""
+        return self.group_id
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, WellData):
+            return NotImplemented
+        return self._model is other._model and self._i == other._i
+
+    def __hash__(self) -> int:
+        return hash((id(self._model), self._i))
+
+    def __repr__(self) -> str:
+        return f"WellData({self.well_id!r}, sample_id={self.sample_id!r}, code={self.code!r}, status={self.status!r})"
+
+
+class _WellsView(Mapping):
+    """`model.wells`: poços ocupados (well_id -> WellData), na ordem de carga."""
+
+    __slots__ = ("_model",)
+
+    def __init__(self, model: "PlateModel") -> None:
+        self._model = model
+
+    def __getitem__(self, well_id: str) -> WellData:
+        k = self._model.geometry.index(well_id)
+        if k is None or not self._model.occupied[k]:
+            raise KeyError(well_id)
+        return WellData(self._model, k)
+
+    def __iter__(self) -> Iterator[str]:
+        ids = self._model.geometry.well_ids
+        return iter([ids[k] for k in self._model._order])
+
+    def __len__(self) -> int:
+        return len(self._model._order)
+
+
+# ---------------------------------------------------------------------------
+# Modelo
+# ---------------------------------------------------------------------------
+
+
+class PlateModel:
+    def __init__(self, geometry: Optional[PlateGeometry] = None) -> None:
+        self.geometry = geometry or GEOMETRY_96
+        n = self.geometry.n_wells
+
+        # por poço
+        self.occupied = np.zeros(n, dtype=bool)
+        self.sample_ids = np.full(n, "", dtype=object)
+        self.codes = np.full(n, "", dtype=object)
+        self.status_codes = np.zeros(n, dtype=np.int8)
+        self.is_control = np.zeros(n, dtype=bool)
+        self.control_codes = np.zeros(n, dtype=np.int8)
+        self.group_index = np.full(n, -1, dtype=np.int32)
+        self.group_position = np.zeros(n, dtype=np.int16)
+
+        # por (poço, alvo)
+        self.target_names: List[str] = []
+        self.ct = np.full((n, 0), np.nan, dtype=np.float64)
+        self.result_codes = np.zeros((n, 0), dtype=np.int16)
+        self.has_target = np.zeros((n, 0), dtype=bool)
+        self.result_labels: List[str] = [""]
+
+        self._target_index: Dict[str, int] = {}
+        self._result_index: Dict[str, int] = {"": 0}
+        self._order: List[int] = []
+        self._group_ids: List[str] = []
+        self._metadata_extra: Dict[int, Dict[str, Any]] = {}
+        # poços editados -> colunas do df_final alteradas (vazio = só status/controle)
+        self._dirty: Dict[int, Set[str]] = {}
+        # poços a redesenhar no mapa (consumido pela tela, independente do delta)
+        self._redraw: Set[int] = set()
+
+        self.wells = _WellsView(self)
+        self.group_dict: Dict[str, List[str]] = {}  # Novo: dicionário de grupos
+        self.pair_groups: Dict[str, List[str]] = {}  # Legado: compatibilidade
+        self.exam_type: str = "96"  # Tipo de exame: 96, 48, 32, 24 testes
+        self.requires_group_frames: bool = False
+        self.group_size: int = 1  # Mantido para compatibilidade
+        self.exam_cfg: Optional[Any] = None
+
+    # ------------------ armazenamento ------------------ #
+
+    def _ensure_target(self, alvo: str) -> int:
+        """Coluna do alvo, criando-a (vazia em todos os poços) se ainda não existir."""
+        j = self._target_index.get(alvo)
+        if j is not None:
+            return j
+        return self._add_targets([alvo])[0]
+
+    def _add_targets(self, alvos: Sequence[str]) -> List[int]:
+        novos = [a for a in dict.fromkeys(alvos) if a not in self._target_index]
+        if novos:
+            n, extra = self.geometry.n_wells, len(novos)
+            self.ct = np.hstack([self.ct, np.full((n, extra), np.nan)])
+            self.result_codes = np.hstack([self.result_codes, np.zeros((n, extra), dtype=np.int16)])
+            self.has_target = np.hstack([self.has_target, np.zeros((n, extra), dtype=bool)])
+            for alvo in novos:
+                self._target_index[alvo] = len(self.target_names)
+                self.target_names.append(alvo)
+        return [self._target_index[a] for a in alvos]
+
+    def _result_code(self, texto: Optional[str]) -> int:
+        texto = texto or ""
+        codigo = self._result_index.get(texto)
+        if codigo is None:
+            codigo = self._result_index[texto] = len(self.result_labels)
+            self.result_labels.append(texto)
+        return codigo
+
+    def _mark_dirty(self, i: int, *colunas: str) -> None:
+        self._dirty.setdefault(int(i), set()).update(colunas)
+        self._redraw.add(int(i))
+
+    def _result_codes_for(self, textos: np.ndarray) -> np.ndarray:
+        """Normaliza (normalize_result) e codifica uma coluna de resultados, por valor distinto."""
+        codigos, unicos = pd.factorize(textos, sort=False)
+        mapa = np.array([self._result_code(normalize_result(str(v))) for v in unicos] + [0], dtype=np.int16)
+        return mapa[codigos]  # código -1 (NA) cai no último item: vazio
+
+    def add_well(self, well_id: str, sample_id: str = "", code: str = "") -> WellData:
+        """Ocupa um poço vazio (ou devolve o existente)."""
+        k = self.geometry.index(well_id)
+        if k is None:
+            raise ValueError(f"Poço '{well_id}' fora da placa {self.geometry}")
+        if not self.occupied[k]:
+            self.occupied[k] = True
+            self._order.append(k)
+            self.sample_ids[k] = sample_id
+            self.codes[k] = code
+            self._mark_dirty(k, "Amostra", "Codigo")
+        return WellData(self, k)
+
+    # ------------------ construção a partir de df ------------------ #
+
+    @classmethod
+    def from_df(
+        cls,
+        df_final: pd.DataFrame,
+        group_size: Optional[int] = None,
+        exame: Optional[str] = None,
+        n_wells: Optional[int] = None,
+    ) -> "PlateModel":
+        """
+        Constrói o modelo de placa a partir dos dados da corrida.
+
+        Sem `n_wells`, a placa é de 96 poços se todos couberem em 8x12, senão 384.
+        """
+        model = cls(PlateGeometry.for_wells(n_wells) if n_wells else None)
+        # se foi passado nome do exame, carregue a configuração correspondente
+        if exame and get_exam_cfg:
+            try:
+                model.exam_cfg = get_exam_cfg(exame)
+            except Exception:
+                model.exam_cfg = None
+
+        # determina tamanho de grupo preferindo valor do registry se não fornecido
+        if group_size is None and getattr(model, "exam_cfg", None) is not None:
+            try:
+                group_size = model.exam_cfg.bloco_size()
+            except Exception:
+                group_size = None
+        model.group_size = group_size or 1
+
+        if df_final is None or df_final.empty:
+            return model
+
+        # Carrega config do registry se exame foi fornecido
+        exam_cfg = model.exam_cfg
+        df_use = df_final
+
+        # Mapeia nomes de colunas para upper/lower
+        cols_upper = {c: str(c).upper() for c in df_use.columns}
+        cols_lower = {str(c).lower(): c for c in df_use.columns}
+
+        # Se não houver coluna de poço estilo df_final, mas houver WELL, converte df_norm -> df_final-like
+        has_poco = any(cu in {"POÇO", "POCO"} for cu in cols_upper.values())
+        has_well = any(cu == "WELL" or cu == "WELL_ID" for cu in cols_upper.values())
+        if not has_poco and has_well:
+            df_use = cls._convert_df_norm(df_use)
+            cols_upper = {c: str(c).upper() for c in df_use.columns}
+            cols_lower = {str(c).lower(): c for c in df_use.columns}
+
+        # ------------------ identificação de colunas básicas ------------------ #
+        poco_col = next((cols_lower[k] for k in ["poço", "poco", "well", "well_id"] if cols_lower.get(k)), None)
+        if poco_col is None:
+            # sem coluna de poço não há como desenhar a placa
+            return model
+        sample_col = next((cols_lower[k] for k in ["amostra", "sample", "samplename", "sample_name"] if cols_lower.get(k)), None)
+        code_col = next((cols_lower[k] for k in ["código", "codigo", "code"] if cols_lower.get(k)), None)
+
+        # Descobre targets a partir das colunas Resultado_*
+        targets: List[str] = []
+        for c in df_use.columns:
+            cu = cols_upper[c]
+            if cu.startswith("RESULTADO_"):
+                alvo = cu.replace("RESULTADO_", "").strip()
+                if alvo and alvo not in targets:
+                    targets.append(alvo)
+            elif cu.endswith(" - R") or cu.endswith("- R"):
+                base = cu.replace(" - R", "").replace("- R", "").strip()
+                if base and base not in targets:
+                    targets.append(base)
+
+        # ------------------ poços (suporta "A01+B01" no mesmo registro) ------------------ #
+        poco_raw = _primeiro_preenchido(
+            [_texto(df_use, c) for c in ("Poco", "POCO", cols_lower.get("poco"), poco_col)]
+        )
+        partes = pd.Series(poco_raw).str.split("+").explode().str.strip()
+        linhas, colunas = _parse_pocos(partes.fillna(""))
+        if n_wells is None:
+            geo = _inferir_geometria(linhas, colunas)
+            if geo is not model.geometry:
+                novo = cls(geo)
+                novo.exam_cfg, novo.group_size = model.exam_cfg, model.group_size
+                model = novo
+        geo = model.geometry
+        valido = (linhas >= 0) & (linhas < geo.rows) & (colunas >= 0) & (colunas < geo.cols)
+        origem = partes.index.to_numpy()[valido]  # linha do df de cada poço
+        pocos = (linhas * geo.cols + colunas)[valido]
+
+        # ------------------ amostra, código e alvos por linha do df ------------------ #
+        sample = _texto(df_use, sample_col)
+        # Detecta código preferindo campos usuais ("C�digo": encoding antigo)
+        code = _primeiro_preenchido(
+            [_texto(df_use, c) for c in (code_col, "Codigo", "CÓDIGO", "C�digo", "CODE")] + [sample]
+        )
+
+        # Primeiro, CTs de RP (RP, RP_1, RP_2, ...); depois, alvos analíticos principais
+        rp_cols = [c for c in df_use.columns if cols_upper[c] == "RP" or cols_upper[c].startswith("RP_")]
+        nomes = [cols_upper[c] for c in rp_cols] + targets
+        n_linhas = len(df_use)
+        ct_linhas = np.full((n_linhas, len(nomes)), np.nan)
+        res_linhas = np.zeros((n_linhas, len(nomes)), dtype=np.int16)
+        for j, c in enumerate(rp_cols):
+            ct_linhas[:, j] = _ct(df_use, c)
+        for j, alvo in enumerate(targets, start=len(rp_cols)):
+            # resultado qualitativo: "Resultado_SC2", "SC2 - R" ou coluna com o nome do alvo
+            res_val = _primeiro_preenchido([_texto(df_use, c) for c in (f"Resultado_{alvo}", f"{alvo} - R", alvo)])
+            res_linhas[:, j] = model._result_codes_for(res_val)
+            ct_col = _find_ct_column(df_use, alvo)
+            if ct_col is not None:
+                ct_linhas[:, j] = _ct(df_use, ct_col)
+
+        if len(pocos):
+            model._preencher(pocos, origem, sample, code, nomes, ct_linhas, res_linhas)
+            model._agrupar(pocos, origem)
+            model._detectar_controles(exam_cfg)
+            model.recompute_all()
+
+        # Define tamanho de bloco: prioritário é group_size, depois config do exame, por fim inferência
+        if group_size:
+            model.group_size = group_size
+        elif exam_cfg:
+            try:
+                model.group_size = exam_cfg.bloco_size()
+            except Exception:
+                model.group_size = cls._infer_group_size(df_use)
+        else:
+            model.group_size = cls._infer_group_size(df_use)
+
+        # Armazena config para uso em _recompute_status
+        model.exam_cfg = exam_cfg
+
+        # Determina tipo de exame e se requer frames de grupo
+        model._determine_exam_type()
+        model._determine_group_frame_requirement()
+
+        return model
+
+    def _preencher(
+        self,
+        pocos: np.ndarray,
+        origem: np.ndarray,
+        sample: np.ndarray,
+        code: np.ndarray,
+        nomes: List[str],
+        ct_linhas: np.ndarray,
+        res_linhas: np.ndarray,
+    ) -> None:
+        """
+        Carrega os poços a partir das linhas do df (pocos[k] veio da linha origem[k]).
+
+        Com várias linhas para o mesmo poço, vale o resultado da primeira; amostra,
+        código e CT ficam com o primeiro valor preenchido.
+        """
+        self._order = pd.unique(pocos).tolist()
+        self.occupied[self._order] = True
+
+        primeira = ~pd.Series(pocos).duplicated().to_numpy()
+        for valores, destino in ((sample, self.sample_ids), (code, self.codes)):
+            por_poco = pd.Series(valores[origem], index=pocos)
+            por_poco = por_poco[por_poco != ""]
+            por_poco = por_poco[~por_poco.index.duplicated()]
+            destino[por_poco.index.to_numpy()] = por_poco.to_numpy()
+
+        colunas = self._add_targets(nomes)
+        self.has_target[np.ix_(self._order, colunas)] = True
+        self.result_codes[np.ix_(pocos[primeira], colunas)] = res_linhas[origem[primeira]]
+        ct = pd.DataFrame(ct_linhas[origem], index=pocos).groupby(level=0, sort=False).first()
+        self.ct[np.ix_(ct.index.to_numpy(), colunas)] = ct.to_numpy(dtype=np.float64)
+
+    def _agrupar(self, pocos: np.ndarray, origem: np.ndarray) -> None:
+        """Grupos (pares/trios/quartetos): poços vindos da mesma linha do df."""
+        tamanhos = pd.Series(origem).map(pd.Series(origem).value_counts()).to_numpy()
+        if not (tamanhos > 1).any():
+            return
+        ids = self.geometry.well_ids
+        pos = pd.Series(origem).groupby(origem).cumcount().to_numpy()
+        for _, membros in pd.Series(pocos[tamanhos > 1]).groupby(origem[tamanhos > 1], sort=False):
+            membros = membros.to_numpy()
+            wells = [ids[k] for k in membros]
+            group_id = "+".join(sorted(wells))
+            if group_id not in self.group_dict:
+                self.group_dict[group_id] = []
+                self._group_ids.append(group_id)
+            lista = self.group_dict[group_id]
+            lista.extend(w for w in wells if w not in lista)
+            # Mantém compatibilidade com sistema legado
+            self.pair_groups.setdefault(group_id, []).extend(wells)
+            self.group_index[membros] = self._group_ids.index(group_id)
+        grupo = tamanhos > 1
+        self.group_position[pocos[grupo]] = pos[grupo]
+
+    def _detectar_controles(self, exam_cfg: Optional[Any] = None) -> None:
+        """Versão vetorizada de `_detect_control` para os poços ocupados."""
+        idx = np.asarray(self._order)
+        valores = [
+            pd.Series(arr[idx], dtype=object).fillna("").astype(str).str.upper().to_numpy()
+            for arr in (self.sample_ids, self.codes)
+        ]
+        listas = [(_CN_HEURISTICA, _CP_HEURISTICA)]
+        try:
+            if exam_cfg and getattr(exam_cfg, "controles", None):
+                cn_list = {str(x).upper() for x in (exam_cfg.controles.get("cn") or [])}
+                cp_list = {str(x).upper() for x in (exam_cfg.controles.get("cp") or [])}
+                listas.insert(0, (cn_list, cp_list))
+        except Exception:
+            pass
+        # mesma prioridade de _detect_control: listas do exame antes da heurística,
+        # amostra antes do código, CN antes de CP
+        regras = []
+        for cn, cp in listas:
+            for vals in valores:
+                regras += [(vals, cn, 1), (vals, cp, 2)]
+        tipo = np.zeros(len(idx), dtype=np.int8)
+        for vals, conjunto, codigo in reversed(regras):  # a mais prioritária grava por último
+            tipo[(vals != "") & np.isin(vals, list(conjunto))] = codigo
+        self.control_codes[idx] = tipo
+        self.is_control[idx] = tipo > 0
+
+    @staticmethod
+    def _convert_df_norm(df_norm: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converte df_norm (linha por poço/target) em um df_final-like por poço,
+        criando colunas Resultado_<ALVO> e CT_<ALVO>.
+        """
+        # normaliza nomes esperados (aliases)
+        # Remove parênteses dos nomes de colunas para normalização (C(t) -> ct)
+        cols = {c.lower().replace("(", "").replace(")", ""): c for c in df_norm.columns}
+        well_col = cols.get("well", cols.get("well_id", cols.get("poco", cols.get("poço", ""))))
+        sample_col = cols.get("samplename", cols.get("sample_name", cols.get("amostra", cols.get("sample", ""))))
+        code_col = cols.get("codigo", cols.get("code", sample_col))
+        target_col = cols.get("target", cols.get("target name", cols.get("target_name", "")))
+        ct_col = cols.get("ct", cols.get("ct_value", cols.get("ct_media", cols.get("ct mean", ""))))
+        res_col = cols.get("resultado", cols.get("resultado_final", cols.get("result", "resultado")))
+
+        poco = _texto(df_norm, well_col)
+        valido = poco != ""
+        if not valido.any():
+            return pd.DataFrame()
+        sample = _texto(df_norm, sample_col)
+        res = _texto(df_norm, res_col)
+        codigos, unicos = pd.factorize(res)
+        flat = pd.DataFrame({
+            "Poco": poco,
+            "Amostra": sample,
+            "Codigo": _texto(df_norm, code_col) if code_col in df_norm.columns else sample,
+            "alvo": _texto(df_norm, target_col),
+            "res": np.array([normalize_result(v) for v in unicos], dtype=object)[codigos],
+            "ct": _ct(df_norm, ct_col) if ct_col in df_norm.columns else np.nan,
+        })[valido]
+
+        # agrega por poço mantendo primeiro valor não vazio para amostra/código e por alvo
+        def _primeiro(valores: pd.Series, vazio: pd.Series) -> pd.Series:
+            return valores[~vazio].groupby(flat["Poco"][~vazio]).first()
+
+        saida = pd.DataFrame(index=pd.Index(sorted(flat["Poco"].unique()), name="Poco"))
+        saida["Amostra"] = _primeiro(flat["Amostra"], flat["Amostra"] == "")
+        saida["Codigo"] = _primeiro(flat["Codigo"], flat["Codigo"] == "")
+        for alvo, bloco in flat.groupby("alvo", sort=False):
+            saida[f"Resultado_{alvo}"] = bloco["res"][bloco["res"] != ""].groupby(bloco["Poco"]).first()
+            saida[f"CT_{alvo}"] = bloco["ct"].groupby(bloco["Poco"]).first()
+        return saida.astype(object).where(saida.notna(), "").reset_index()
+
+    @staticmethod
+    def _infer_group_size(df: pd.DataFrame) -> int:
+        # Buscar coluna Poco ou POCO corretamente
+        poco_col = df.get("Poco")
+        if poco_col is None:
+            poco_col = df.get("POCO")
+
+        if poco_col is None:
+            return 1
+
+        sizes = [str(v).count("+") + 1 for v in poco_col.fillna("") if v]
+        if not sizes:
+            return 1
+        # pega o tamanho mais frequente (empate: o menor)
+        contagem = Counter(sizes)
+        maior = max(contagem.values())
+        return min(t for t, n in contagem.items() if n == maior)
+
+    @staticmethod
+    def _detect_control(sample: Optional[str], code: Optional[str], exam_cfg: Optional[Any] = None) -> Optional[str]:
+        """
+        Detecta se a amostra/código representa um controle.
+        Primeiro tenta usar `exam_cfg.controles` (se fornecido), senão faz heurística por nomes comuns.
+        Retorna 'CN' ou 'CP' ou None.
+        """
+        vals = []
+        if sample:
+            vals.append(str(sample).upper())
+        if code:
+            vals.append(str(code).upper())
+
+        # se a config do exame fornece listas de controles, compare contra elas
+        try:
+            if exam_cfg and getattr(exam_cfg, "controles", None):
+                cn_list = [str(x).upper() for x in (exam_cfg.controles.get("cn") or [])]
+                cp_list = [str(x).upper() for x in (exam_cfg.controles.get("cp") or [])]
+                for v in vals:
+                    if v in cn_list:
+                        return "CN"
+                    if v in cp_list:
+                        return "CP"
+        except Exception:
+            pass
+
+        # Fallback heuristics
+        for v in vals:
+            if v in _CN_HEURISTICA:
+                return "CN"
+            if v in _CP_HEURISTICA:
+                return "CP"
+        return None
+
+    # ------------------ status ------------------ #
+
+    def _status_for(self, idx: np.ndarray) -> np.ndarray:
+        """
+        Status dos poços `idx` baseado APENAS nos resultados textuais dos alvos (exceto RP):
+        Det/Pos > Inc > ND > inválido; controles ficam CONTROL_CN/CONTROL_CP.
+        """
+        classes = np.zeros(len(self.result_labels), dtype=np.int8)
+        for k, texto in enumerate(self.result_labels):
+            u = texto.upper()
+            if "DET" in u or "POS" in u:
+                classes[k] = _CLASSE_POS
+            elif "INC" in u:
+                classes[k] = _CLASSE_INC
+            elif "ND" in u:
+                classes[k] = _CLASSE_ND
+        analiticos = np.array([not a.upper().startswith("RP") for a in self.target_names], dtype=bool)
+        codigos = self.result_codes[np.ix_(idx, analiticos)] if analiticos.any() else np.zeros((len(idx), 0), dtype=np.int16)
+        presentes = self.has_target[np.ix_(idx, analiticos)] if analiticos.any() else np.zeros((len(idx), 0), dtype=bool)
+        melhor = np.where(presentes, classes[codigos], _CLASSE_VAZIO).max(axis=1, initial=_CLASSE_VAZIO)
+        status = _STATUS_POR_CLASSE[melhor]
+        controle = self.is_control[idx]
+        cn = self.control_codes[idx] == CONTROL_TYPES.index("CN")
+        status[controle] = np.where(cn[controle], _STATUS_INDEX[CONTROL_CN], _STATUS_INDEX[CONTROL_CP])
+        return status
+
+    def _group_members(self, idx: np.ndarray) -> np.ndarray:
+        """Os poços `idx` e os demais poços dos grupos a que pertencem."""
+        grupos = np.unique(self.group_index[idx])
+        grupos = grupos[grupos >= 0]
+        if not len(grupos):
+            return idx
+        return np.union1d(idx, np.flatnonzero(np.isin(self.group_index, grupos)))
+
+    def _update_status(self, idx: np.ndarray) -> None:
+        novo = self._status_for(idx)
+        for k in idx[novo != self.status_codes[idx]]:
+            self._mark_dirty(k)
+        self.status_codes[idx] = novo
+
+    def _recompute_status(self, well: WellData) -> None:
+        """Determina o status do poço (e dos demais poços do seu grupo) pelos resultados textuais dos alvos."""
+        self._update_status(self._group_members(np.array([well._i])))
+
+    def recompute_dirty(self) -> None:
+        """Recalcula o status só dos poços alterados e dos grupos a que pertencem."""
+        if self._dirty:
+            self._update_status(self._group_members(np.fromiter(self._dirty, dtype=np.int64)))
+
+    def recompute_all(self) -> None:
+        idx = np.flatnonzero(self.occupied)
+        self.status_codes[idx] = self._status_for(idx)
+
+    # ------------------ alterações ------------------ #
+
+    @property
+    def dirty_wells(self) -> List[str]:
+        """Poços alterados desde a carga ou o último `pop_delta`."""
+        return [self.geometry.well_ids[k] for k in sorted(self._dirty)]
+
+    @property
+    def dirty_groups(self) -> Set[str]:
+        grupos = {self.group_index[k] for k in self._dirty}
+        return {self._group_ids[g] for g in grupos if g >= 0}
+
+    def pop_redraw_wells(self) -> List[str]:
+        """Poços alterados desde a última chamada (para redesenhar só esses)."""
+        redraw, self._redraw = self._redraw, set()
+        return [self.geometry.well_ids[k] for k in sorted(redraw)]
+
+    def pop_delta(self) -> "PlateDelta":
+        """
+        Linhas do df_final (formato de `to_dataframe`) afetadas pelas edições,
+        só com a coluna Poco e as colunas alteradas; limpa o registro de alterações.
+        """
+        alteracoes, self._dirty = self._dirty, {}
+        colunas = sorted(set().union(*alteracoes.values())) if alteracoes else []
+        geo = self.geometry
+        representantes: Dict[str, int] = {}
+        for k in sorted(k for k, cols in alteracoes.items() if cols):
+            group_id = WellData(self, k).group_id
+            if group_id:
+                # a linha do grupo usa o primeiro poço (ver to_dataframe)
+                representantes.setdefault(group_id, geo.index(self.group_dict[group_id][0]))
+            elif self.occupied[k]:
+                representantes.setdefault(geo.well_ids[k], k)
+        if representantes:
+            linhas = self._frame(np.array(list(representantes.values())), list(representantes))
+            linhas = linhas.reindex(columns=["Poco"] + colunas)
+        else:
+            linhas = pd.DataFrame(columns=["Poco"] + colunas)
+        return PlateDelta(rows=linhas, columns=colunas, wells=[geo.well_ids[k] for k in sorted(alteracoes)])
+
+    # utilidades
+    def get_well(self, well_id: str) -> Optional[WellData]:
+        return self.wells.get(well_id)
+
+    def get_group(self, well_id: str) -> List[str]:
+        """Retorna lista de poços no mesmo grupo (exceto o próprio well_id)"""
+        w = self.get_well(well_id)
+        if not w:
+            return []
+        # Suporta ambos os sistemas: novo (group_id) e legado (pair_group_id)
+        if w.group_id:
+            return [x for x in self.group_dict.get(w.group_id, []) if x != well_id]
+        elif w.pair_group_id:
+            return [x for x in self.pair_groups.get(w.pair_group_id, []) if x != well_id]
+        return []
+
+    def get_group_wells_including_self(self, well_id: str) -> List[str]:
+        """Retorna todos os poços do grupo incluindo o próprio well_id"""
+        w = self.get_well(well_id)
+        if not w:
+            return []
+        if w.group_id:
+            return self.group_dict.get(w.group_id, [])
+        elif w.pair_group_id:
+            return self.pair_groups.get(w.pair_group_id, [])
+        return [well_id]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Converte o PlateModel de volta para um DataFrame no formato df_final AGRUPADO.
+
+        CRÍTICO: Para exames de 48/32/24 testes, cada linha representa um GRUPO de poços
+        (ex: "A01+A02" ao invés de linhas separadas para A01 e A02), com os dados do
+        primeiro poço do grupo.
+
+        Retorna DataFrame com colunas: Poco, Amostra, Codigo, Resultado_<ALVO>, CT_<ALVO>...
+        Usa 'Poco' (não 'Poço') para compatibilidade com sistema.
+        """
+        geo = self.geometry
+        representantes: List[int] = []
+        rotulos: List[str] = []
+
+        # Processar grupos primeiro (para exames de 48/32/24 testes)
+        grupos_ok = set()
+        for group_id, well_ids in self.group_dict.items():
+            k = geo.index(well_ids[0]) if well_ids else None
+            if k is None or not self.occupied[k]:
+                continue
+            representantes.append(k)
+            rotulos.append(group_id)
+            grupos_ok.add(self._group_ids.index(group_id))
+
+        # Poços individuais (não agrupados), pulando poços vazios
+        ordem = np.asarray(self._order, dtype=np.int64)
+        if len(ordem):
+            fora_de_grupo = ~np.isin(self.group_index[ordem], list(grupos_ok))
+            vazio = (self.status_codes[ordem] == _STATUS_INDEX[EMPTY]) & ~self.sample_ids[ordem].astype(bool)
+            individuais = ordem[fora_de_grupo & ~vazio]
+            representantes.extend(individuais.tolist())
+            rotulos.extend(geo.well_ids[k] for k in individuais)
+
+        if not representantes:
+            return pd.DataFrame()
+        return self._frame(np.asarray(representantes), rotulos)
+
+    def _frame(self, sel: np.ndarray, rotulos: List[str]) -> pd.DataFrame:
+        """Linhas df_final dos poços `sel` (Poco = `rotulos`)."""
+        dados: Dict[str, Any] = {
+            "Poco": rotulos,
+            "Amostra": [v or "" for v in self.sample_ids[sel]],
+            "Codigo": [v or "" for v in self.codes[sel]],
+        }
+        textos = np.array(self.result_labels, dtype=object)
+        for j, alvo in enumerate(self.target_names):
+            presente = self.has_target[sel, j]
+            if not presente.any():
+                continue
+            ct = self.ct[sel, j].astype(object)
+            ct[np.isnan(self.ct[sel, j])] = ""
+            dados[_coluna_resultado(alvo)] = np.where(presente, textos[self.result_codes[sel, j]], np.nan)
+            dados[_coluna_ct(alvo)] = np.where(presente, ct, np.nan)
+        return pd.DataFrame(dados)
+
+    def cell_texts(self) -> np.ndarray:
+        """
+        Texto de cada poço no mapa em Excel: código (ou amostra) e uma linha
+        "ALVO: CT" por alvo (3 casas; "--" sem CT), alvos analíticos antes de RP.
+        Poços vazios ficam com "".
+        """
+        rotulo = np.where(self.codes.astype(bool), self.codes, self.sample_ids)
+        textos = np.array([str(v or "") for v in rotulo], dtype=object)
+        ordem = sorted(range(len(self.target_names)), key=lambda j: (self.target_names[j].upper().startswith("RP"), j))
+        for j in ordem:
+            ct = self.ct[:, j]
+            ct_txt = np.where(np.isnan(ct), "--", np.char.mod("%.3f", ct)).astype(object)
+            linha = "\n" + self.target_names[j] + ": " + ct_txt
+            textos = np.where(self.has_target[:, j], textos + linha, textos)
+        textos[~self.occupied] = ""
+        return textos
+
+    def _determine_exam_type(self) -> None:
+        """Determina o tipo de exame (96, 48, 32, 24 testes) baseado nos tamanhos de grupo"""
+        if not self.group_dict:
+            self.exam_type = "96"
+            return
+
+        group_sizes = {}
+        for wells in self.group_dict.values():
+            size = len(wells)
+            group_sizes[size] = group_sizes.get(size, 0) + 1
+
+        if not group_sizes:
+            self.exam_type = "96"
+            return
+
+        # Encontrar tamanho mais comum corretamente
+        most_common_size = max(group_sizes.items(), key=lambda x: x[1])[0]
+
+        if most_common_size == 2:
+            self.exam_type = "48"
+        elif most_common_size == 3:
+            self.exam_type = "32"
+        elif most_common_size == 4:
+            self.exam_type = "24"
+        else:
+            self.exam_type = "96"
+
+    def _determine_group_frame_requirement(self) -> None:
+        """Determina se é necessário criar frames de grupo com contorno"""
+        self.requires_group_frames = self.exam_type in ["48", "32", "24"]
+
+
+@dataclass
+class PlateDelta:
+    """Alterações do mapa no formato df_final: `rows` tem Poco + `columns`."""
+
+    rows: pd.DataFrame
+    columns: List[str] = field(default_factory=list)
+    wells: List[str] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return self.rows.empty
+
+    def apply_to(self, df: pd.DataFrame, key: str = "Poco") -> Optional[pd.Index]:
+        """
+        Grava as linhas do delta em `df` (no lugar), casando pela coluna `key`.
+
+        Returns:
+            Rótulos do índice de `df` das linhas alteradas, ou None se o delta
+            não couber em `df` (sem a chave, coluna nova, poço ausente ou
+            repetido) - nesse caso `df` não é modificado. "A1" no df casa com
+            "A01" no delta.
+        """
+        if self.empty:
+            return df.index[:0]
+        if key not in df.columns or any(c not in df.columns for c in self.columns):
+            return None
+        chaves = pd.Index(df[key].map(_chave_poco))
+        if not chaves.is_unique:
+            return None
+        pos = chaves.get_indexer(self.rows["Poco"].astype(str))
+        if (pos < 0).any():
+            return None
+        for col in self.columns:
+            valores = self.rows[col].replace("", np.nan)
+            numeros = pd.to_numeric(valores, errors="coerce")
+            destino = df[col].dtype
+            if numeros.notna().sum() == valores.notna().sum() and pd.api.types.is_float_dtype(destino):
+                valores = numeros  # CTs: "" vira NaN na coluna numérica
+            else:
+                valores = self.rows[col]
+                if destino != object:
+                    df[col] = df[col].astype(object)
+            df.iloc[pos, df.columns.get_loc(col)] = valores.to_numpy()
+        return df.index[pos]
+
+
+def _chave_poco(valor: Any) -> str:
+    """Poco do df_final no formato do PlateModel: "A1+A2" -> "A01+A02" (poços ordenados)."""
+    partes = [p.strip() for p in str(valor).split("+") if p.strip()]
+    normalizados = []
+    for parte in partes:
+        m = _RE_POCO.match(parte)
+        normalizados.append(f"{m.group(1).upper()}{int(m.group(2)):02d}" if m else parte)
+    return "+".join(sorted(normalizados)) if len(normalizados) > 1 else "".join(normalizados)
+
+
+def _coluna_resultado(alvo: str) -> str:
+    return f"Resultado_{alvo.strip()}"
+
+
+def _coluna_ct(alvo: str) -> str:
+    return f"CT_{alvo.strip()}"
+
+
+# ---------------------------------------------------------------------------
+# Auxiliares de leitura do df
+# ---------------------------------------------------------------------------
+
+
+def _texto(df: pd.DataFrame, col: Any) -> np.ndarray:
+    """Coluna como texto sem espaços nas pontas ("" para coluna ausente ou NA)."""
+    if col is None or col == "" or col not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    serie = df[col]
+    if isinstance(serie, pd.DataFrame):  # nomes de coluna repetidos
+        serie = serie.iloc[:, 0]
+    valores = serie.to_numpy(dtype=object)
+    vazio = pd.isna(valores)
+    return np.array(["" if na else str(v).strip() for v, na in zip(valores, vazio)], dtype=object)
+
+
+def _primeiro_preenchido(colunas: List[np.ndarray]) -> np.ndarray:
+    """Primeiro valor não vazio, linha a linha, na ordem das colunas."""
+    resultado = colunas[0]
+    for coluna in colunas[1:]:
+        resultado = np.where(resultado != "", resultado, coluna)
+    return resultado
+
+
+def _ct(df: pd.DataFrame, col: Any) -> np.ndarray:
+    """CTs da coluna como float (aceita vírgula decimal); inválidos viram NaN."""
+    serie = df[col]
+    if isinstance(serie, pd.DataFrame):
+        serie = serie.iloc[:, 0]
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    texto = pd.Series(_texto(df, col)).str.replace(",", ".", regex=False)
+    return pd.to_numeric(texto, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _norm_key(txt: str) -> str:
+    # Remove parênteses antes de filtrar (para suportar C(t))
+    txt_clean = str(txt).replace("(", "").replace(")", "")
+    return "".join(ch for ch in txt_clean.upper() if ch.isalnum())
+
+
+def _find_ct_column(df: pd.DataFrame, alvo: str) -> Optional[Any]:
+    """Procura coluna de CT compatível com o alvo ("SC2 - CT", "CT_SC2", "SC2"...)."""
+    target_key = _norm_key(alvo)
+    for c in df.columns:
+        cu = str(c).upper()
+        # ignora colunas de resultado
+        if cu.startswith("RESULTADO_") or cu.endswith(" - R") or cu.endswith("- R"):
+            continue
+        base = cu
+        if " - CT" in base:
+            base = base.split(" - CT")[0]
+        if base.startswith("CT_"):
+            base = base[3:]
+        if _norm_key(base) == target_key:
+            return c
+    return None
+
+
+def normalize_result(value: str) -> str:
+    """Normaliza textos de resultado do CSV (ex: 'SC2 - 1', 'HMPV - 2')."""
+    if not value:
+        return ""
+
+    txt = value.strip().upper()
+
+    # Formato específico do CSV: "ALVO - NÚMERO" (ex: "SC2 - 1", "HMPV - 2")
+    if " - " in txt:
+        # Extrair o número após o hífen
+        parts = txt.split(" - ")
+        if len(parts) >= 2:
+            num = parts[-1].strip()
+            # Mapear números para resultados
+            if num == "1":
+                return "Det"      # Detectado
+            elif num == "2":
+                return "ND"       # Não Detectado
+            else:
+                return "Inc"      # Inconclusivo para outros números
+
+    # Fallback para outras formatações
+    # IMPORTANTE: Verificar termos mais específicos primeiro para evitar matches incorretos
+    if any(k in txt for k in ["INC", "3"]):
+        return "Inc"
+    if any(k in txt for k in ["NAO DETECTADO", "NÃO DETECTADO", "NAO DETECTAVEL", "NÃO DETECTÁVEL"]):
+        return "ND"
+    if any(k in txt for k in ["DETECTADO", "DETECTAVEL", "DETECTÁVEL", "POSITIVO", "REAGENTE", "1"]):
+        return "Det"
+    if any(k in txt for k in ["NAO", "NÃO", "NEGATIVO", "ND", "2"]):
+        return "ND"
+
+    return txt
+
+
+# ---------------------------------------------------------------------------
+# Exportação Excel
+# ---------------------------------------------------------------------------
+
+
+def exportar_placa_excel(
+    placa: Union[PlateModel, pd.DataFrame],
+    caminho: str,
+    exame: Optional[str] = None,
+) -> str:
+    """
+    Grava o mapa da placa em Excel (aba "Placa"): números das colunas na
+    linha 1, letras das linhas na coluna A e, em cada poço, o texto de
+    `PlateModel.cell_texts` com a cor do status (as mesmas do mapa na tela).
+
+    Aceita o PlateModel ou o df_final (convertido com `PlateModel.from_df`).
+    """
+    from openpyxl import Workbook
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    if isinstance(placa, pd.DataFrame):
+        placa = PlateModel.from_df(placa, exame=exame)
+    geo = placa.geometry
+    textos = placa.cell_texts()
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Placa"
+    negrito = Font(bold=True)
+    centro = Alignment(horizontal="center", vertical="center")
+    for c, rotulo in enumerate(geo.col_labels, start=2):
+        ws.cell(row=1, column=c, value=int(rotulo)).font = negrito
+    for r, rotulo in enumerate(geo.row_labels, start=2):
+        celula = ws.cell(row=r, column=1, value=rotulo)
+        celula.font = negrito
+        celula.alignment = centro
+        ws.row_dimensions[r].height = 22
+
+    cores = {
+        codigo: PatternFill("solid", fgColor=STATUS_COLORS[status].lstrip("#").upper())
+        for codigo, status in enumerate(STATUS_CODES)
+    }
+    fonte = Font(size=9)
+    quebra = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    for k in np.flatnonzero(placa.occupied):
+        r, c = divmod(int(k), geo.cols)
+        celula = ws.cell(row=r + 2, column=c + 2, value=textos[k])
+        celula.fill = cores[int(placa.status_codes[k])]
+        celula.font = fonte
+        celula.alignment = quebra
+
+    ws.column_dimensions["A"].width = 4
+    for c in range(2, geo.cols + 2):
+        ws.column_dimensions[ws.cell(row=1, column=c).column_letter].width = 14
+
+    Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+    wb.save(caminho)
+    return caminho
+
+
+__all__ = [
+    "CONTROL_CN",
+    "CONTROL_CP",
+    "EMPTY",
+    "GEOMETRIES",
+    "GEOMETRY_96",
+    "GEOMETRY_384",
+    "INCONCLUSIVE",
+    "INVALID",
+    "NEGATIVE",
+    "POSITIVE",
+    "STATUS_COLORS",
+    "PlateGeometry",
+    "PlateDelta",
+    "PlateModel",
+    "TargetResult",
+    "TargetView",
+    "WellData",
+    "exportar_placa_excel",
+    "normalize_result",
+]
@@ -7,42 +7,37 @@ mas sem ler CSV e sem exportar XLS automaticamente.
 from __future__ import annotations
 
 import math
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 import customtkinter as ctk
 import pandas as pd
 import tkinter as tk
 from tkinter import ttk
 
-# Tenta importar a configuração de exame, se falhar usa None
-try:
-    from services.exam_registry import get_exam_cfg
-except ImportError:
-    get_exam_cfg = None
+# O modelo (colunar, 96 ou 384 poços) fica em services/plate_model; os nomes
+# continuam importáveis daqui.
+from services.plate_model import (
+    CONTROL_CN,
+    CONTROL_CP,
+    EMPTY,
+    GEOMETRY_96,
+    INCONCLUSIVE,
+    INVALID,
+    NEGATIVE,
+    POSITIVE,
+    STATUS_COLORS,
+    PlateGeometry,
+    PlateModel,
+    TargetResult,
+    WellData,
+    exportar_placa_excel,
+    normalize_result,
+)
 
 # ---------------------------------------------------------------------------
 # Aparência / Cores
 # ---------------------------------------------------------------------------
 
-NEGATIVE = "NEGATIVE"
-POSITIVE = "POSITIVE"
-INCONCLUSIVE = "INCONCLUSIVE"
-INVALID = "INVALID"
-CONTROL_CN = "CONTROL_CN"
-CONTROL_CP = "CONTROL_CP"
-EMPTY = "EMPTY"
-
-STATUS_COLORS = {
-    NEGATIVE: "#d4f4d4",  # verde claro
-    POSITIVE: "#ffb3b3",  # vermelho claro (Det)
-    INCONCLUSIVE: "#b3d9ff",  # FASE 3: azul claro (Inc) - antes #ffcc99
-    INVALID: "#f0f0f0",  # cinza
-    CONTROL_CN: "#b3d9ff",  # azul claro
-    CONTROL_CP: "#b3d9ff",  # azul claro (mesma cor CN)
-    EMPTY: "#ffffff",  # branco
-}
-
 # Cores para diferentes tamanhos de grupos (exames de 48, 32, 24 testes)
 # Cores atualizadas conforme o prompt
 GROUP_COLORS = {
@@ -51,701 +46,18 @@ GROUP_COLORS = {
     4: "#f39c12",  # Laranja para quartetos (24 testes)
 }
 
-ROW_LABELS = ["A", "B", "C", "D", "E", "F", "G", "H"]
-COL_LABELS = [str(i) for i in range(1, 13)]
-
-# ---------------------------------------------------------------------------
-# Modelos
-# ---------------------------------------------------------------------------
-
-
-@dataclass
-class TargetResult:
-    result: str = ""  # "Det", "ND", "Inc", "Inv"...
-    ct: Optional[float] = None
-
-
-@dataclass
-class WellData:
-    row_label: str
-    col_label: str
-    well_id: str
-    sample_id: Optional[str] = None
-    code: Optional[str] = None
-    status: str = EMPTY
-    is_control: bool = False
-    targets: Dict[str, TargetResult] = field(default_factory=dict)
-    metadata: Dict[str, Any] = field(default_factory=dict)
-    # Campos para grupos de poços
-    paired_wells: List[str] = field(default_factory=list)
-    is_grouped: bool = False
-    group_id: Optional[str] = None
-    group_size: int = 1
-    group_position: int = 0
-    # ✅ Bug #15: Adicionar atributo dinâmico usado em linhas 378, 574-586
-    pair_group_id: Optional[str] = None  # ID do grupo de pares (legacy)
-
-
-class PlateModel:
-    def __init__(self) -> None:
-        self.wells: Dict[str, WellData] = {}
-        self.group_dict: Dict[str, List[str]] = {}  # Novo: dicionário de grupos
-        self.pair_groups: Dict[str, List[str]] = {}  # Legado: compatibilidade
-        self.exam_type: str = "96"  # Tipo de exame: 96, 48, 32, 24 testes
-        self.requires_group_frames: bool = False
-        self.group_size: int = 1  # Mantido para compatibilidade
-        self.exam_cfg: Optional[Any] = None
-
-    # ------------------ construção a partir de df ------------------ #
-    
-    @classmethod
-    def from_df(
-        cls,
-        df_final: pd.DataFrame,
-        group_size: Optional[int] = None,
-        exame: Optional[str] = None,
-    ) -> "PlateModel":
-        """
-        Constrói o modelo de placa a partir dos dados da corrida.
-        """
-        model = cls()
-        # se foi passado nome do exame, carregue a configuração correspondente
-        if exame and get_exam_cfg:
-            try:
-                model.exam_cfg = get_exam_cfg(exame)
-            except Exception:
-                model.exam_cfg = None
-
-        # determina tamanho de grupo preferindo valor do registry se não fornecido
-        if group_size is None and getattr(model, "exam_cfg", None) is not None:
-            try:
-                group_size = model.exam_cfg.bloco_size()
-            except Exception:
-                group_size = None
-        model.group_size = group_size or 1
-        
-        if df_final is None or df_final.empty:
-            return model
-        
-        # Carrega config do registry se exame foi fornecido
-        exam_cfg = model.exam_cfg
-
-        df_use = df_final.copy()
-
-        # Mapeia nomes de colunas para upper/lower
-        cols_upper = {c: str(c).upper() for c in df_use.columns}
-        cols_lower = {str(c).lower(): c for c in df_use.columns}
-
-        # Se não houver coluna de poço estilo df_final, mas houver WELL, converte df_norm -> df_final-like
-        has_poco = any(cu in {"POÇO", "POCO"} for cu in cols_upper.values())
-        has_well = any(cu == "WELL" or cu == "WELL_ID" for cu in cols_upper.values())
-        if not has_poco and has_well:
-            df_use = cls._convert_df_norm(df_use)
-            cols_upper = {c: str(c).upper() for c in df_use.columns}
-            cols_lower = {str(c).lower(): c for c in df_use.columns}
-
-        # ------------------ identificação de colunas básicas ------------------ #
-        # Poço / Poco
-        poco_col = None
-        for key in ["poço", "poco", "well", "well_id"]:
-            c = cols_lower.get(key)
-            if c:
-                poco_col = c
-                break
-        if poco_col is None:
-            # sem coluna de poço não há como desenhar a placa
-            return model
-
-        # Amostra
-        sample_col = None
-        for key in ["amostra", "sample", "samplename", "sample_name"]:
-            c = cols_lower.get(key)
-            if c:
-                sample_col = c
-                break
-
-        # Código
-        code_col = None
-        for key in ["código", "codigo", "code"]:
-            c = cols_lower.get(key)
-            if c:
-                code_col = c
-                break
-
-        # Descobre targets a partir das colunas Resultado_*
-        targets: List[str] = []
-        for c in df_use.columns:
-            cu = cols_upper[c]
-            if cu.startswith("RESULTADO_"):
-                alvo = cu.replace("RESULTADO_", "").strip()
-                if alvo and alvo not in targets:
-                    targets.append(alvo)
-            elif cu.endswith(" - R") or cu.endswith("- R"):
-                base = cu.replace(" - R", "").replace("- R", "").strip()
-                if base and base not in targets:
-                    targets.append(base)
-        
-        # Função de normalização para matching alvo vs coluna de CT
-        def _norm_key(txt: str) -> str:
-            # Remove parênteses antes de filtrar (para suportar C(t))
-            txt_clean = str(txt).replace("(", "").replace(")", "")
-            return "".join(ch for ch in txt_clean.upper() if ch.isalnum())
-
-        def _find_ct_column_for_target(alvo: str) -> Optional[str]:
-            """
-            Procura coluna de CT compatível com o alvo.
-            """
-            target_key = _norm_key(alvo)
-            for c in df_use.columns:
-                cu = str(c).upper()
-                # ignora colunas de resultado
-                if cu.startswith("RESULTADO_") or cu.endswith(" - R") or cu.endswith("- R"):
-                    continue
-                base = cu
-                if " - CT" in base:
-                    base = base.split(" - CT")[0]
-                if base.startswith("CT_"):
-                    base = base[3:]
-                col_key = _norm_key(base)
-                if col_key == target_key:
-                    return c
-            return None
-
-        # Deduz tamanho de agrupamento se não vier
-        model.group_size = group_size or cls._infer_group_size(df_use)
-
-        # ------------------ construção dos poços ------------------ #
-        for idx, row in df_use.iterrows():
-            poco_raw = str(
-                row.get("Poco", "")
-                or row.get("POCO", "")
-                or row.get(cols_lower.get("poco", ""), "")
-                or row.get(poco_col, "")
-            ).strip()
-            if not poco_raw:
-                continue
-
-            # suporta múltiplos poços no mesmo registro (ex.: "A01+B01")
-            pocos = [p.strip() for p in poco_raw.split("+") if p.strip()]
-            if not pocos:
-                continue
-
-            sample = None
-            if sample_col:
-                sample = str(row.get(sample_col, "")).strip() or None
-
-            # Detecta código preferindo campos usuais
-            code = None
-            code_candidates = []
-            if code_col:
-                code_candidates.append(row.get(code_col, ""))
-            code_candidates.extend(
-                [
-                    row.get("Codigo", ""),
-                    row.get("CÓDIGO", ""),
-                    row.get("C�digo", ""),  # encoding antigo
-                    row.get("CODE", ""),
-                    sample,
-                ]
-            )
-            for cval in code_candidates:
-                s = str(cval).strip()
-                if s:
-                    code = s
-                    break
-            if code is None:
-                code = sample
-
-            # Resultados por alvo e CT
-            target_data: Dict[str, TargetResult] = {}
-
-            # Primeiro, CTs de RP (RP, RP_1, RP_2, ...)
-            for c in df_use.columns:
-                cu = cols_upper[c]
-                if cu == "RP" or cu.startswith("RP_"):
-                    try:
-                        ct_val = row.get(c, None)
-                        if ct_val is not None and str(ct_val).strip() != "":
-                            ct_val = float(str(ct_val).replace(",", "."))
-                        else:
-                            ct_val = None
-                    except Exception:
-                        ct_val = None
-                    target_data[cu] = TargetResult("", ct_val)
-
-            # Depois, alvos analíticos principais
-            for alvo in targets:
-                # resultado qualitativo - tentar múltiplos formatos
-                res_val = ""
-                
-                # Formato 1: "Resultado_SC2"
-                res_col = f"Resultado_{alvo}"
-                if res_col in row:
-                    res_val = row.get(res_col, "")
-                
-                # Formato 2: "SC2 - R"
-                if not res_val:
-                    alt_col = f"{alvo} - R"
-                    if alt_col in row:
-                        res_val = row.get(alt_col, "")
-                
-                # Formato 3: Coluna com nome do alvo contendo resultado completo
-                if not res_val:
-                    if alvo in row:
-                        res_val = row.get(alvo, "")
-                
-                norm_res = normalize_result(str(res_val))
-
-                # CT associado
-                ct_col = _find_ct_column_for_target(alvo)
-                ct_val = None
-                if ct_col is not None and ct_col in row:
-                    try:
-                        raw_ct = row.get(ct_col, None)
-                        if raw_ct is not None and str(raw_ct).strip() != "":
-                            ct_val = float(str(raw_ct).replace(",", "."))
-                    except Exception:
-                        ct_val = None
-
-                target_data[alvo] = TargetResult(norm_res, ct_val)
-
-            # Preenche wells (poços) e grupos
-            normalized_pocos = []
-            for poco in pocos:
-                if len(poco) < 2:
-                    continue
-                row_label = poco[0].upper()
-                col_label = poco[1:]
-                try:
-                    col_idx = int(col_label)
-                    normalized_well = f"{row_label}{col_idx:02d}"
-                    normalized_pocos.append(normalized_well)
-                except Exception:
-                    continue
-            
-            for idx_poco, well_id in enumerate(normalized_pocos):
-                row_label = well_id[0]
-                col_label = well_id[1:]
-
-                if well_id not in model.wells:
-                    wd = WellData(
-                        row_label=row_label,
-                        col_label=col_label,
-                        well_id=well_id,
-                        sample_id=sample or "",
-                        code=code or "",
-                        status=EMPTY,
-                        is_control=False,
-                        targets={},
-                        metadata={},
-                        paired_wells=[],
-                        is_grouped=False,
-                        group_id=None,
-                        group_size=1,
-                        group_position=0,
-                    )
-                    model.wells[well_id] = wd
-                else:
-                    wd = model.wells[well_id]
-                    # Atualiza sample_id e code se ainda não tiverem sido definidos
-                    if not wd.sample_id and sample:
-                        wd.sample_id = sample
-                    if not wd.code and code:
-                        wd.code = code
-
-                # merges targets (caso haja múltiplas linhas para o mesmo poço)
-                for alvo, tr in target_data.items():
-                    if alvo in wd.targets:
-                        # mantém primeiro resultado, apenas atualiza CT se ainda não houver
-                        if wd.targets[alvo].ct is None and tr.ct is not None:
-                            wd.targets[alvo].ct = tr.ct
-                    else:
-                        wd.targets[alvo] = tr
-
-                # grupos (pares/trios/quartetos) - sistema completo
-                if len(normalized_pocos) > 1:
-                    sorted_pocos = sorted(normalized_pocos)
-                    group_id = "+".join(sorted_pocos)
-                    wd.is_grouped = True
-                    wd.group_id = group_id
-                    wd.group_size = len(normalized_pocos)
-                    wd.group_position = idx_poco
-                    wd.paired_wells = [p for p in normalized_pocos if p != well_id]
-                    # Adiciona ao group_dict
-                    if group_id not in model.group_dict:
-                        model.group_dict[group_id] = []
-                    if well_id not in model.group_dict[group_id]:
-                        model.group_dict[group_id].append(well_id)
-                    # Mantém compatibilidade com sistema legado
-                    wd.pair_group_id = group_id
-                    model.pair_groups.setdefault(group_id, []).append(well_id)
-
-                # Detecta controles usando cfg do exame quando disponível
-                try:
-                    ctrl = PlateModel._detect_control(wd.sample_id, wd.code, exam_cfg)
-                    if ctrl:
-                        wd.is_control = True
-                        wd.metadata["control_type"] = ctrl
-                    else:
-                        wd.is_control = False
-                        wd.metadata.pop("control_type", None)
-                except Exception:
-                    wd.is_control = False
-
-                model._recompute_status(wd)
-                model.wells[well_id] = wd
-
-        # Define tamanho de bloco: prioritário é group_size, depois config do exame, por fim inferência
-        if group_size:
-            model.group_size = group_size
-        elif exam_cfg:
-            try:
-                model.group_size = exam_cfg.bloco_size()
-            except Exception:
-                model.group_size = cls._infer_group_size(df_use)
-        else:
-            model.group_size = cls._infer_group_size(df_use)
-        
-        # Armazena config para uso em _recompute_status
-        model.exam_cfg = exam_cfg
-        
-        # Determina tipo de exame e se requer frames de grupo
-        model._determine_exam_type()
-        model._determine_group_frame_requirement()
-        
-        return model
-    @staticmethod
-    def _convert_df_norm(df_norm: pd.DataFrame) -> pd.DataFrame:
-        """
-        Converte df_norm (linha por poço/target) em um df_final-like por poço,
-        criando colunas Resultado_<ALVO> e CT_<ALVO>.
-        """
-        # normaliza nomes esperados (aliases)
-        # Remove parênteses dos nomes de colunas para normalização (C(t) -> ct)
-        cols = {c.lower().replace("(", "").replace(")", ""): c for c in df_norm.columns}
-        well_col = cols.get("well", cols.get("well_id", cols.get("poco", cols.get("poço", ""))))
-        sample_col = cols.get("samplename", cols.get("sample_name", cols.get("amostra", cols.get("sample", ""))))
-        code_col = cols.get("codigo", cols.get("code", sample_col))
-        target_col = cols.get("target", cols.get("target name", cols.get("target_name", "")))
-        ct_col = cols.get("ct", cols.get("ct_value", cols.get("ct_media", cols.get("ct mean", ""))))
-        res_col = cols.get("resultado", cols.get("resultado_final", cols.get("result", "resultado")))
-
-        records = []
-        for _, r in df_norm.iterrows():
-            w = str(r.get(well_col, "")).strip()
-            if not w:
-                continue
-            sample = str(r.get(sample_col, "")).strip()
-            code = str(r.get(code_col, sample)).strip()
-            alvo = str(r.get(target_col, "")).strip()
-            ct_val = r.get(ct_col, None)
-            try:
-                ct_val = float(str(ct_val).replace(",", "."))
-            except Exception:
-                ct_val = None
-            res_val = r.get(res_col, "")
-            records.append(
-                {
-                    "Poco": w,
-                    "Amostra": sample,
-                    "Codigo": code,
-                    f"Resultado_{alvo}": normalize_result(res_val),
-                    f"CT_{alvo}": ct_val,
-                }
-            )
-        if not records:
-            return pd.DataFrame()
-        df_flat = pd.DataFrame(records)
-        # agrega por poço mantendo primeiro valor para amostra/código e combinando colunas
-        def _agg(series):
-            # pega primeiro não vazio
-            for v in series:
-                if pd.notna(v) and str(v).strip():
-                    return v
-            return ""
-
-        group_cols = [c for c in df_flat.columns if c.startswith("Resultado_") or c.startswith("CT_")]
-        df_grouped = (
-            df_flat.groupby("Poco")
-            .agg({**{"Amostra": _agg, "Codigo": _agg}, **{c: _agg for c in group_cols}})
-            .reset_index()
-        )
-        return df_grouped
-
-    @staticmethod
-    def _infer_group_size(df: pd.DataFrame) -> int:
-        sizes = []
-        # Buscar coluna Poco ou POCO corretamente
-        poco_col = df.get("Poco")
-        if poco_col is None:
-            poco_col = df.get("POCO")
-        
-        if poco_col is None:
-            return 1
-            
-        for v in poco_col.fillna(""):
-            if v:
-                sizes.append(len(str(v).split("+")))
-        if not sizes:
-            return 1
-        # pega o tamanho mais frequente
-        return max(set(sizes), key=sizes.count)
-
-    @staticmethod
-    def _detect_control(sample: Optional[str], code: Optional[str], exam_cfg: Optional[Any] = None) -> Optional[str]:
-        """
-        Detecta se a amostra/código representa um controle.
-        Primeiro tenta usar `exam_cfg.controles` (se fornecido), senão faz heurística por nomes comuns.
-        Retorna 'CN' ou 'CP' ou None.
-        """
-        vals = []
-        if sample:
-            vals.append(str(sample).upper())
-        if code:
-            vals.append(str(code).upper())
-
-        # se a config do exame fornece listas de controles, compare contra elas
-        try:
-            if exam_cfg and getattr(exam_cfg, "controles", None):
-                cn_list = [str(x).upper() for x in (exam_cfg.controles.get("cn") or [])]
-                cp_list = [str(x).upper() for x in (exam_cfg.controles.get("cp") or [])]
-                for v in vals:
-                    if v in cn_list:
-                        return "CN"
-                    if v in cp_list:
-                        return "CP"
-        except Exception:
-            pass
-
-        # Fallback heuristics
-        for v in vals:
-            if v in {"CN", "CONTROLE NEGATIVO", "C-", "NEGATIVO CONTROLE", "NEGATIVO", "CONTROLE N"}:
-                return "CN"
-            if v in {"CP", "CONTROLE POSITIVO", "C+", "POSITIVO CONTROLE", "POSITIVO", "CONTROLE P"}:
-                return "CP"
-        return None
-
-    def _recompute_status(self, well: WellData) -> None:
-        """Determina o status do poço baseado APENAS nos resultados textuais dos alvos."""
-        if well.is_control:
-            ctype = well.metadata.get("control_type", "")
-            well.status = CONTROL_CN if ctype == "CN" else CONTROL_CP
-            return
-
-        has_pos = False
-        has_inc = False
-        has_nd = False
-        
-        # Analisar cada alvo (exceto RP)
-        for alvo, tr in well.targets.items():
-            if alvo.upper().startswith("RP"):
-                continue
-            
-            # Analisar APENAS resultado textual
-            u = tr.result.upper() if tr.result else ""
-            
-            if "DET" in u or "POS" in u:
-                has_pos = True
-            elif "INC" in u:
-                has_inc = True
-            elif "ND" in u:
-                has_nd = True
-        
-        # Determinar status final
-        if has_pos:
-            well.status = POSITIVE
-        elif has_inc:
-            well.status = INCONCLUSIVE
-        elif has_nd:
-            well.status = NEGATIVE
-        else:
-            well.status = INVALID
-
-    # utilidades
-    def get_well(self, well_id: str) -> Optional[WellData]:
-        return self.wells.get(well_id)
-
-    def get_group(self, well_id: str) -> List[str]:
-        """Retorna lista de poços no mesmo grupo (exceto o próprio well_id)"""
-        w = self.get_well(well_id)
-        if not w:
-            return []
-        # Suporta ambos os sistemas: novo (group_id) e legado (pair_group_id)
-        if w.group_id:
-            return [x for x in self.group_dict.get(w.group_id, []) if x != well_id]
-        elif w.pair_group_id:
-            return [x for x in self.pair_groups.get(w.pair_group_id, []) if x != well_id]
-        return []
-    
-    def get_group_wells_including_self(self, well_id: str) -> List[str]:
-        """Retorna todos os poços do grupo incluindo o próprio well_id"""
-        w = self.get_well(well_id)
-        if not w:
-            return []
-        if w.group_id:
-            return self.group_dict.get(w.group_id, [])
-        elif w.pair_group_id:
-            return self.pair_groups.get(w.pair_group_id, [])
-        return [well_id]
-
-    def recompute_all(self) -> None:
-        for w in self.wells.values():
-            self._recompute_status(w)
-    
-    def to_dataframe(self) -> pd.DataFrame:
-        """
-        Converte o PlateModel de volta para um DataFrame no formato df_final AGRUPADO.
-        
-        CRÍTICO: Para exames de 48/32/24 testes, cada linha representa um GRUPO de poços
-        (ex: "A01+A02" ao invés de linhas separadas para A01 e A02).
-        
-        Retorna DataFrame com colunas: Poco, Amostra, Codigo, Resultado_<ALVO>, CT_<ALVO>...
-        Usa 'Poco' (não 'Poço') para compatibilidade com sistema.
-        """
-        records = []
-        processed_groups = set()
-        
-        # Processar grupos primeiro (para exames de 48/32/24 testes)
-        for group_id, well_ids in self.group_dict.items():
-            if group_id in processed_groups:
-                continue
-            
-            # Pegar primeiro poço do grupo como representante
-            if not well_ids:
-                continue
-            
-            first_well_id = well_ids[0]
-            first_well = self.wells.get(first_well_id)
-            if not first_well:
-                continue
-            
-            # Criar registro para o GRUPO
-            record = {
-                "Poco": group_id,  # "A01+A02" para pares, "A01+A02+A03" para trios
-                "Amostra": first_well.sample_id or "",
-                "Codigo": first_well.code or "",
-            }
-            
-            # Adicionar resultados e CTs de cada alvo
-            # Usar dados do primeiro poço (todos no grupo têm os mesmos resultados)
-            for target_name, target_result in first_well.targets.items():
-                target_clean = target_name.strip()
-                record[f"Resultado_{target_clean}"] = target_result.result or ""
-                
-                if target_result.ct is not None:
-                    record[f"CT_{target_clean}"] = target_result.ct
-                else:
-                    record[f"CT_{target_clean}"] = ""
-            
-            records.append(record)
-            processed_groups.add(group_id)
-        
-        # Processar poços individuais (não agrupados) - para exames de 96 testes
-        for well_id, well in self.wells.items():
-            # Pular se já foi processado como parte de um grupo
-            if well.is_grouped and well.group_id in processed_groups:
-                continue
-            
-            # Pular poços vazios
-            if well.status == EMPTY and not well.sample_id:
-                continue
-            
-            # Criar registro para poço individual
-            record = {
-                "Poco": well_id,
-                "Amostra": well.sample_id or "",
-                "Codigo": well.code or "",
-            }
-            
-            # Adicionar resultados e CTs
-            for target_name, target_result in well.targets.items():
-                target_clean = target_name.strip()
-                record[f"Resultado_{target_clean}"] = target_result.result or ""
-                
-                if target_result.ct is not None:
-                    record[f"CT_{target_clean}"] = target_result.ct
-                else:
-                    record[f"CT_{target_clean}"] = ""
-            
-            records.append(record)
-        
-        if not records:
-            return pd.DataFrame()
-        
-        return pd.DataFrame(records)
-    
-    def _determine_exam_type(self) -> None:
-        """Determina o tipo de exame (96, 48, 32, 24 testes) baseado nos tamanhos de grupo"""
-        if not self.group_dict:
-            self.exam_type = "96"
-            return
-        
-        group_sizes = {}
-        for wells in self.group_dict.values():
-            size = len(wells)
-            group_sizes[size] = group_sizes.get(size, 0) + 1
-        
-        if not group_sizes:
-            self.exam_type = "96"
-            return
-        
-        # Encontrar tamanho mais comum corretamente
-        most_common_size = max(group_sizes.items(), key=lambda x: x[1])[0]
-        
-        if most_common_size == 2:
-            self.exam_type = "48"
-        elif most_common_size == 3:
-            self.exam_type = "32"
-        elif most_common_size == 4:
-            self.exam_type = "24"
-        else:
-            self.exam_type = "96"
-    
-    def _determine_group_frame_requirement(self) -> None:
-        """Determina se é necessário criar frames de grupo com contorno"""
-        self.requires_group_frames = self.exam_type in ["48", "32", "24"]
+# Rótulos da placa de 96 poços (a tela usa plate_model.geometry)
+ROW_LABELS = GEOMETRY_96.row_labels
+COL_LABELS = GEOMETRY_96.col_labels
 
+# Desenho da placa: um CTkButton por poço ou um único tk.Canvas
+RENDERERS = ("buttons", "canvas")
 
 # ---------------------------------------------------------------------------
 # GUI
 # ---------------------------------------------------------------------------
 
 
-def normalize_result(value: str) -> str:
-    """Normaliza textos de resultado do CSV (ex: 'SC2 - 1', 'HMPV - 2')."""
-    if not value:
-        return ""
-    
-    txt = value.strip().upper()
-    
-    # Formato específico do CSV: "ALVO - NÚMERO" (ex: "SC2 - 1", "HMPV - 2")
-    if " - " in txt:
-        # Extrair o número após o hífen
-        parts = txt.split(" - ")
-        if len(parts) >= 2:
-            num = parts[-1].strip()
-            # Mapear números para resultados
-            if num == "1":
-                return "Det"      # Detectado
-            elif num == "2":
-                return "ND"       # Não Detectado
-            else:
-                return "Inc"      # Inconclusivo para outros números
-    
-    # Fallback para outras formatações
-    # IMPORTANTE: Verificar termos mais específicos primeiro para evitar matches incorretos
-    if any(k in txt for k in ["INC", "3"]):
-        return "Inc"
-    if any(k in txt for k in ["NAO DETECTADO", "NÃO DETECTADO", "NAO DETECTAVEL", "NÃO DETECTÁVEL"]):
-        return "ND"
-    if any(k in txt for k in ["DETECTADO", "DETECTAVEL", "DETECTÁVEL", "POSITIVO", "REAGENTE", "1"]):
-        return "Det"
-    if any(k in txt for k in ["NAO", "NÃO", "NEGATIVO", "ND", "2"]):
-        return "ND"
-    
-    return txt
-
-
 class WellButton(ctk.CTkButton):
     def __init__(self, master, well_id: str, text: str, color: str, on_click=None, **kwargs):
         super().__init__(master, **kwargs)
@@ -855,9 +167,168 @@ class GroupFrame(ctk.CTkFrame):
         return (0, 0)
 
 
+def _well_text(well: Optional[WellData]) -> str:
+    """Texto do poço no mapa: código (ou amostra), com prefixo CN:/CP: em controles."""
+    text = ""
+    if well:
+        text = well.code or well.sample_id or ""
+        if text and well.is_control:
+            ctype = well.metadata.get("control_type", "")
+            if ctype:
+                text = f"{ctype}:{text}"
+    return text
+
+
+class CanvasLayout:
+    """Posição dos poços no PlateCanvas (pixels) e o inverso, para o clique."""
+
+    LABEL = 30  # faixa dos rótulos de linha/coluna
+    GAP = 2
+
+    def __init__(self, geometry: PlateGeometry) -> None:
+        self.geometry = geometry
+        if geometry.n_wells <= 96:
+            self.cell_w, self.cell_h, self.font_size, self.max_chars = 90, 50, 10, 10
+        else:
+            self.cell_w, self.cell_h, self.font_size, self.max_chars = 48, 28, 7, 7
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        geo = self.geometry
+        return (
+            self.LABEL + geo.cols * (self.cell_w + self.GAP) + self.GAP,
+            self.LABEL + geo.rows * (self.cell_h + self.GAP) + self.GAP,
+        )
+
+    def cell_box(self, row: int, col: int) -> Tuple[int, int, int, int]:
+        x0 = self.LABEL + col * (self.cell_w + self.GAP) + self.GAP
+        y0 = self.LABEL + row * (self.cell_h + self.GAP) + self.GAP
+        return x0, y0, x0 + self.cell_w, y0 + self.cell_h
+
+    def well_at(self, x: float, y: float) -> Optional[str]:
+        """Poço sob o ponto (x, y) do canvas; None nos rótulos e nos espaços entre poços."""
+        col, dx = divmod(x - self.LABEL - self.GAP, self.cell_w + self.GAP)
+        row, dy = divmod(y - self.LABEL - self.GAP, self.cell_h + self.GAP)
+        if not (0 <= col < self.geometry.cols and 0 <= row < self.geometry.rows):
+            return None
+        if dx > self.cell_w or dy > self.cell_h:
+            return None
+        return self.geometry.well_ids[int(row) * self.geometry.cols + int(col)]
+
+    def truncate(self, text: str) -> str:
+        if len(text) > self.max_chars:
+            return text[:self.max_chars - 2] + ".."
+        return text
+
+
+class PlateCanvas(tk.Canvas):
+    """
+    Placa desenhada num único tk.Canvas: um retângulo e um texto por poço,
+    contornos de grupo e rótulos são itens do canvas. O clique vira poço
+    por aritmética da grade (CanvasLayout.well_at) e as mudanças só
+    reconfiguram os itens dos poços informados, num redesenho em lote
+    (after_idle).
+    """
+
+    def __init__(self, master, plate_model: PlateModel, on_click=None, **kwargs):
+        self.layout = CanvasLayout(plate_model.geometry)
+        width, height = self.layout.size
+        super().__init__(master, width=width, height=height, background="white", highlightthickness=0, **kwargs)
+        self.on_click_callback = on_click
+        self.selected_well_id: Optional[str] = None
+        self.highlight: Set[str] = set()
+        self._rects: Dict[str, int] = {}
+        self._texts: Dict[str, int] = {}
+        self._pending: Set[str] = set()
+        self._after_id = None
+        self.bind("<Button-1>", self._on_click)
+        self.set_model(plate_model)
+
+    def set_model(self, plate_model: PlateModel) -> None:
+        """Cria os itens de todos os poços (carga inicial ou troca de modelo)."""
+        self.plate_model = plate_model
+        plate_model.pop_redraw_wells()
+        self.layout = CanvasLayout(plate_model.geometry)
+        width, height = self.layout.size
+        self.configure(width=width, height=height)
+        self.delete("all")
+        self._rects.clear()
+        self._texts.clear()
+
+        geo, layout = plate_model.geometry, self.layout
+        font_labels = ("Segoe UI", 11, "bold")
+        for c, col in enumerate(geo.col_labels):
+            x0, _, x1, _ = layout.cell_box(0, c)
+            self.create_text((x0 + x1) / 2, layout.LABEL / 2, text=col, font=font_labels)
+        for r, row_lbl in enumerate(geo.row_labels):
+            _, y0, _, y1 = layout.cell_box(r, 0)
+            self.create_text(layout.LABEL / 2, (y0 + y1) / 2, text=row_lbl, font=font_labels)
+
+        font_well = ("Segoe UI", layout.font_size, "bold")
+        for k, well_id in enumerate(geo.well_ids):
+            x0, y0, x1, y1 = layout.cell_box(*divmod(k, geo.cols))
+            self._rects[well_id] = self.create_rectangle(x0, y0, x1, y1, outline="#888888", width=2)
+            self._texts[well_id] = self.create_text((x0 + x1) / 2, (y0 + y1) / 2, font=font_well)
+
+        # Contornos dos grupos (pares/trios/quartetos) por cima dos poços
+        for wells in plate_model.group_dict.values():
+            color = GROUP_COLORS.get(len(wells))
+            positions = [geo.position(w) for w in wells]
+            if not color or None in positions:
+                continue
+            x0, y0, _, _ = layout.cell_box(min(p[0] for p in positions), min(p[1] for p in positions))
+            _, _, x1, y1 = layout.cell_box(max(p[0] for p in positions), max(p[1] for p in positions))
+            self.create_rectangle(x0 - 1, y0 - 1, x1 + 1, y1 + 1, outline=color, width=3)
+
+        for well_id in geo.well_ids:
+            self._draw_well(well_id)
+
+    def schedule_redraw(self, well_ids: Iterable[str]) -> None:
+        """Agenda o redesenho dos poços; chamadas seguidas viram um único lote."""
+        self._pending.update(w for w in well_ids if w in self._rects)
+        if self._pending and self._after_id is None:
+            self._after_id = self.after_idle(self.flush)
+
+    def flush(self) -> None:
+        """Redesenha agora os poços pendentes."""
+        self._after_id = None
+        pending, self._pending = self._pending, set()
+        for well_id in pending:
+            self._draw_well(well_id)
+
+    def _draw_well(self, well_id: str) -> None:
+        well = self.plate_model.get_well(well_id)
+        color = STATUS_COLORS.get(well.status if well else EMPTY, "#ffffff")
+        group_size = well.group_size if well and well.is_grouped else 0
+        # Borda com prioridades: selecionado > destaque de grupo > normal
+        if well_id == self.selected_well_id:
+            outline, width = "#FF0000", 3
+        elif well_id in self.highlight:
+            outline, width = GROUP_COLORS.get(group_size, "#00AA00"), 2
+        else:
+            outline, width = "#888888", 1 if group_size > 1 else 2
+        self.itemconfigure(self._rects[well_id], fill=color, outline=outline, width=width)
+        self.itemconfigure(self._texts[well_id], text=self.layout.truncate(_well_text(well)))
+
+    def _on_click(self, event) -> None:
+        well_id = self.layout.well_at(self.canvasx(event.x), self.canvasy(event.y))
+        if well_id and self.on_click_callback:
+            self.on_click_callback(well_id)
+
+
 class PlateView(ctk.CTkFrame):
-    def __init__(self, master, plate_model: PlateModel, meta: Dict[str, str], on_save_callback=None):
+    def __init__(self, master, plate_model: PlateModel, meta: Dict[str, str], on_save_callback=None, renderer: Optional[str] = None):
+        """
+        renderer: "buttons" (um CTkButton por poço) ou "canvas" (PlateCanvas);
+        por padrão, canvas só para placas de 384 poços.
+        """
         super().__init__(master)
+        if renderer is None:
+            renderer = "canvas" if plate_model.geometry.n_wells > 96 else "buttons"
+        if renderer not in RENDERERS:
+            raise ValueError(f"renderer inválido: '{renderer}' (use {', '.join(RENDERERS)})")
+        self.renderer = renderer
+        self.plate_canvas: Optional[PlateCanvas] = None
         self.plate_model = plate_model
         self.meta = meta or {}
         self.on_save_callback = on_save_callback
@@ -900,10 +371,21 @@ class PlateView(ctk.CTkFrame):
         self.plate_frame = ctk.CTkFrame(plate_container)
         self.plate_frame.grid(row=0, column=0, sticky="nsew")
 
-        # Títulos colunas (1-12)
+        if self.renderer == "canvas":
+            self.plate_canvas = PlateCanvas(self.plate_frame, self.plate_model, on_click=self.on_well_click)
+            self.plate_canvas.grid(row=0, column=0, padx=1, pady=1)
+        else:
+            self._create_plate_widgets()
+
+        self._build_detail_panel()
+
+    def _create_plate_widgets(self):
+        """Rótulos, frames de grupo e botões dos poços (renderer "buttons")."""
+        # Títulos colunas (1-12 ou 1-24)
+        geometry = self.plate_model.geometry
         font_labels = ctk.CTkFont(family="Segoe UI", size=11, weight="bold")
         ctk.CTkLabel(self.plate_frame, text="", width=30, height=30).grid(row=0, column=0, padx=1, pady=1)
-        for j, col in enumerate(COL_LABELS, start=1):
+        for j, col in enumerate(geometry.col_labels, start=1):
             label = ctk.CTkLabel(
                 self.plate_frame, 
                 text=col, 
@@ -913,8 +395,8 @@ class PlateView(ctk.CTkFrame):
             )
             label.grid(row=0, column=j, padx=1, pady=1)
         
-        # Rótulos de linha (A-H)
-        for i, row_lbl in enumerate(ROW_LABELS, start=1):
+        # Rótulos de linha (A-H ou A-P)
+        for i, row_lbl in enumerate(geometry.row_labels, start=1):
             label = ctk.CTkLabel(
                 self.plate_frame,
                 text=row_lbl,
@@ -945,9 +427,9 @@ class PlateView(ctk.CTkFrame):
             color = GROUP_COLORS[group_size]
             
             # Calcular posição mínima e máxima do grupo
-            rows = [ROW_LABELS.index(w[0]) for w in wells]
-            # Remover zeros à esquerda da coluna (A01 -> 1, A12 -> 12)
-            cols = [COL_LABELS.index(str(int(w[1:]))) for w in wells]
+            positions = [self.plate_model.geometry.position(w) for w in wells]
+            rows = [p[0] for p in positions]
+            cols = [p[1] for p in positions]
             min_row = min(rows)
             max_row = max(rows)
             min_col = min(cols)
@@ -980,20 +462,15 @@ class PlateView(ctk.CTkFrame):
 
     def _create_well_buttons(self):
         """Cria todos os botões de poços, usando frames de grupo quando necessário."""
-        for i, row_lbl in enumerate(ROW_LABELS):
-            for j, col_lbl in enumerate(COL_LABELS):
+        geometry = self.plate_model.geometry
+        for i, row_lbl in enumerate(geometry.row_labels):
+            for j, col_lbl in enumerate(geometry.col_labels):
                 # Criar well_id com zero à esquerda (A01, A02, etc)
                 well_id = f"{row_lbl}{int(col_lbl):02d}"
                 well = self.plate_model.get_well(well_id)
                 
                 # Preparar texto do botão
-                text = ""
-                if well:
-                    text = well.code or well.sample_id or ""
-                    if text and well.is_control:
-                        ct_type = well.metadata.get("control_type", "")
-                        if ct_type:
-                            text = f"{ct_type}:{text}"
+                text = _well_text(well)
                 
                 # Determinar cor baseada no status
                 color = STATUS_COLORS.get(well.status if well else EMPTY, "#ffffff")
@@ -1018,6 +495,7 @@ class PlateView(ctk.CTkFrame):
                 btn.grid(padx=1, pady=1, sticky="nsew", **grid_kwargs)
                 self.well_widgets[well_id] = btn
 
+    def _build_detail_panel(self):
         # Painel de Detalhes (Detail Panel)
         self.detail_frame = ctk.CTkFrame(self, width=370)
         self.detail_frame.grid(row=1, column=1, padx=(0, 11), pady=(0, 2), sticky="nsew")
@@ -1163,15 +641,13 @@ class PlateView(ctk.CTkFrame):
             self._fill_details(well)
 
     def render_plate(self):
+        if self.plate_canvas is not None:
+            self._render_canvas()
+            return
+        self.plate_model.pop_redraw_wells()
         for well_id, btn in self.well_widgets.items():
             well = self.plate_model.get_well(well_id)
-            text = ""
-            if well:
-                text = well.code or well.sample_id or ""
-                if text and well.is_control:
-                    ctype = well.metadata.get("control_type", "")
-                    if ctype:
-                        text = f"{ctype}:{text}"
+            text = _well_text(well)
             
             color = self._status_color(well.status if well else EMPTY)
             is_selected = (well_id == self.selected_well_id)
@@ -1186,6 +662,20 @@ class PlateView(ctk.CTkFrame):
             
             btn.update_appearance(text, color, is_selected, is_group_highlight, group_size, group_position)
 
+    def _render_canvas(self):
+        """Redesenha só os poços alterados e os que entram/saem de seleção ou destaque."""
+        canvas = self.plate_canvas
+        if canvas.plate_model is not self.plate_model:
+            canvas.set_model(self.plate_model)
+        highlight = set(self.group_wells_highlight)
+        wells = set(self.plate_model.pop_redraw_wells())
+        wells.update(canvas.highlight ^ highlight)
+        if canvas.selected_well_id != self.selected_well_id:
+            wells.update(w for w in (canvas.selected_well_id, self.selected_well_id) if w)
+        canvas.selected_well_id = self.selected_well_id
+        canvas.highlight = highlight
+        canvas.schedule_redraw(wells)
+
     def _fill_details(self, well: WellData):
         self.lbl_well.configure(text=well.well_id)
         self.lbl_sample.configure(text=well.sample_id or "-")
@@ -1388,8 +878,8 @@ class PlateView(ctk.CTkFrame):
         - Se parent é PlateWindow (legado): destrói Toplevel normalmente
         """
         try:
-            # Recomputar todos os status antes de salvar
-            self.plate_model.recompute_all()
+            # Recomputar status dos poços alterados (e seus grupos) antes de salvar
+            self.plate_model.recompute_dirty()
             
             # Executar callback se fornecido
             if self.on_save_callback:
@@ -1442,7 +932,7 @@ class PlateView(ctk.CTkFrame):
 
 
 class PlateWindow(ctk.CTkToplevel):
-    def __init__(self, root, plate_model: PlateModel, meta: Dict[str, str], on_save_callback=None):
+    def __init__(self, root, plate_model: PlateModel, meta: Dict[str, str], on_save_callback=None, renderer: Optional[str] = None):
         # Importar AfterManagerMixin para gerenciar callbacks
         from utils.after_mixin import AfterManagerMixin
         
@@ -1469,7 +959,7 @@ class PlateWindow(ctk.CTkToplevel):
         self.protocol("WM_DELETE_WINDOW", self._on_close_window)
         
         # Estrutura Geral da Janela: Padding externo: padx=10px, pady=2px
-        view = PlateView(self, plate_model, meta, on_save_callback=on_save_callback)
+        view = PlateView(self, plate_model, meta, on_save_callback=on_save_callback, renderer=renderer)
         view.pack(fill="both", expand=True, padx=10, pady=2)
     
     def dispose(self):
@@ -1516,11 +1006,12 @@ class PlateWindow(ctk.CTkToplevel):
 # ---------------------------------------------------------------------------
 
 
-def abrir_placa_ctk(df_final: pd.DataFrame, meta_extra: Optional[Dict[str, Any]] = None, group_size: Optional[int] = None, parent=None, on_save_callback=None):
+def abrir_placa_ctk(df_final: pd.DataFrame, meta_extra: Optional[Dict[str, Any]] = None, group_size: Optional[int] = None, parent=None, on_save_callback=None, renderer: Optional[str] = None):
     """
     Abre a janela CTk para visualização/edição da placa usando df_final em memória.
     meta_extra pode conter data, extracao/arquivo, exame, usuario.
     on_save_callback: função a ser chamada ao salvar alterações (recebe PlateModel).
+    renderer: "buttons" ou "canvas" (padrão: canvas só para placas de 384 poços).
     
     IMPORTANTE: parent deve sempre ser passado para evitar criação de segundo root CTk.
     """
@@ -1559,7 +1050,7 @@ def abrir_placa_ctk(df_final: pd.DataFrame, meta_extra: Optional[Dict[str, Any]]
         
         print(f"DEBUG abrir_placa_ctk: Criando PlateWindow...")
         # parent já foi validado acima, não pode ser None
-        win = PlateWindow(parent, plate_model, meta, on_save_callback=on_save_callback)
+        win = PlateWindow(parent, plate_model, meta, on_save_callback=on_save_callback, renderer=renderer)
         win.focus_force()
         
         print(f"DEBUG abrir_placa_ctk: PlateWindow criada com sucesso")
@@ -1576,10 +1067,6 @@ def construir_well_results(*args, **kwargs):
     raise NotImplementedError("Função legada não suportada nesta versão.")
 
 
-def exportar_placa_excel(*args, **kwargs):
-    raise NotImplementedError("Exportação Excel desativada nesta versão interativa.")
-
-
 def mostrar_placa_gui(*args, **kwargs):
     # wrapper simples para seguir nomes antigos
     return abrir_placa_ctk(*args, **kwargs)
@@ -3,13 +3,24 @@ Rules Engine - Fase 2.2
 Aplica regras customizadas aos resultados de análise.
 """
 
+import hashlib
+import json
 import logging
+import threading
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
 # Importar Formula Parser
-from services.formula_parser import avaliar_formula, FormulaEvaluationResult
+from services.formula_parser import (
+    avaliar_formula,
+    compilar_formula,
+    FormulaCompilada,
+    FormulaEvaluationResult,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -294,6 +305,80 @@ def aplicar_regra_exclusao_mutua(
     )
 
 
+def formula_threshold(regra: Dict[str, Any]) -> str:
+    """
+    Converte regra de threshold em fórmula.
+    
+    Example:
+        >>> formula_threshold({'variavel': 'CT_RP', 'min': 15, 'max': 35})
+        "15 <= CT_RP <= 35"
+    """
+    variavel = regra.get('variavel', '')
+    minimo = regra.get('min')
+    maximo = regra.get('max')
+    if minimo is not None and maximo is not None:
+        return f"{minimo} <= {variavel} <= {maximo}"
+    if minimo is not None:
+        return f"{variavel} >= {minimo}"
+    if maximo is not None:
+        return f"{variavel} <= {maximo}"
+    return ""
+
+
+def aplicar_regra_threshold(
+    regra: Dict[str, Any],
+    resultados: Dict[str, Any],
+    formula_parser: Any = None
+) -> Validacao:
+    """
+    Valida se um valor está dentro de um range.
+    
+    Args:
+        regra: Dict com 'variavel', 'min' e/ou 'max', 'descricao', 'impacto'
+        resultados: Dict com resultados
+        formula_parser: Módulo parser
+        
+    Returns:
+        Validacao com resultado ("nao_aplicavel" se a variável não tem valor)
+    """
+    variavel = regra.get('variavel', '')
+    descricao = regra.get('descricao', f"Threshold: {variavel}")
+    impacto = regra.get('impacto', 'medio')
+    formula = formula_threshold(regra)
+    
+    variaveis = _preparar_variaveis_formulas(resultados)
+    if formula and variavel not in variaveis:
+        return Validacao(
+            regra_id=f"thr_{hash(descricao)}",
+            regra_nome=descricao,
+            resultado="nao_aplicavel",
+            detalhes=f"{variavel} sem valor",
+            impacto=impacto
+        )
+    
+    if formula_parser:
+        resultado = formula_parser.avaliar_formula(formula, variaveis)
+    else:
+        resultado = avaliar_formula(formula, variaveis)
+    
+    if not resultado.sucesso:
+        return Validacao(
+            regra_id=f"thr_{hash(descricao)}",
+            regra_nome=descricao,
+            resultado="falhou",
+            detalhes=f"Erro: {resultado.mensagem_erro}",
+            impacto=impacto
+        )
+    
+    return Validacao(
+        regra_id=f"thr_{hash(descricao)}",
+        regra_nome=descricao,
+        resultado="passou" if bool(resultado.resultado) else "falhou",
+        detalhes=f"{formula} ({variavel}={variaveis.get(variavel)})",
+        impacto=impacto
+    )
+
+
 # ============================================================================
 # APLICADOR PRINCIPAL
 # ============================================================================
@@ -343,6 +428,11 @@ def aplicar_regras(
             validacao = aplicar_regra_condicional(condicao, resultados_dict, formula_parser)
             validacoes.append(validacao)
         
+        # 3b. Aplicar thresholds
+        for threshold in regras_dict.get('thresholds', []):
+            validacao = aplicar_regra_threshold(threshold, resultados_dict, formula_parser)
+            validacoes.append(validacao)
+        
         # 4. Aplicar sequência
         sequencia = regras_dict.get('sequencia')
         if sequencia:
@@ -511,6 +601,318 @@ def _preparar_variaveis_formulas(resultados: Dict[str, Any]) -> Dict[str, Any]:
     return variaveis
 
 
+# ============================================================================
+# REGRAS COMPILADAS (POR AMOSTRA)
+# ============================================================================
+
+RESULTADOS_POSITIVOS = ('Detectado', 'Positivo')
+
+
+@dataclass
+class _RegraCompilada:
+    """Regra pronta para avaliação vetorizada (uma linha por amostra)"""
+    tipo: str
+    nome: str
+    impacto: str
+    formulas: List[FormulaCompilada] = field(default_factory=list)
+    parametros: Dict[str, Any] = field(default_factory=dict)
+
+
+class CompiledRuleSet:
+    """
+    Conjunto de regras de um exame, compilado uma única vez.
+    
+    Fórmulas, condicionais e thresholds são validados/compilados na
+    construção; `aplicar(df_final)` avalia todas as regras sobre todas as
+    amostras em uma passada vetorizada e devolve:
+    - matriz por amostra (uma coluna por regra; "passou", "falhou",
+      "nao_aplicavel"), com o mesmo índice do df_final
+    - RulesResult da corrida (uma Validacao por regra, agregando as amostras)
+    
+    Variáveis por amostra (a partir das colunas do df_final):
+    - CT_{ALVO}: coluna de CT do alvo; CT_RP_1 / CT_RP_2
+    - resultado_{ALVO}: coluna Resultado_{ALVO}
+    - status_corrida: coluna Status_Corrida
+    
+    Valores ausentes seguem a avaliação escalar (`aplicar_regras`): fórmula
+    → "falhou", IF de condicional → "nao_aplicavel", threshold →
+    "nao_aplicavel".
+    """
+    
+    def __init__(self, regras_dict: Dict[str, Any]):
+        self.regras_dict = regras_dict or {}
+        self.regras: List[_RegraCompilada] = []
+        self._compilar()
+    
+    def _compilar(self) -> None:
+        regras = self.regras_dict
+        
+        for nome, valor in regras.items():
+            if isinstance(valor, bool):
+                self.regras.append(_RegraCompilada(
+                    tipo='booleana',
+                    nome=nome,
+                    impacto='alto' if nome == 'requer_dois_alvos' else 'medio',
+                    parametros={'valor': valor},
+                ))
+        
+        for formula in regras.get('formulas', []):
+            self.regras.append(_RegraCompilada(
+                tipo='formula',
+                nome=f"Fórmula: {formula}",
+                impacto='alto',
+                formulas=[compilar_formula(formula)],
+            ))
+        
+        for condicao in regras.get('condicoes', []):
+            self.regras.append(_RegraCompilada(
+                tipo='condicional',
+                nome=condicao.get('descricao', 'Regra condicional'),
+                impacto=condicao.get('impacto', 'medio'),
+                formulas=[compilar_formula(condicao.get('if', '')), compilar_formula(condicao.get('then', ''))],
+            ))
+        
+        for threshold in regras.get('thresholds', []):
+            variavel = threshold.get('variavel', '')
+            self.regras.append(_RegraCompilada(
+                tipo='threshold',
+                nome=threshold.get('descricao', f"Threshold: {variavel}"),
+                impacto=threshold.get('impacto', 'medio'),
+                formulas=[compilar_formula(formula_threshold(threshold))],
+                parametros={'variavel': variavel},
+            ))
+        
+        sequencia = regras.get('sequencia')
+        if sequencia:
+            self.regras.append(_RegraCompilada(
+                tipo='sequencia',
+                nome=sequencia.get('descricao', 'Alvos obrigatórios'),
+                impacto='alto',
+                parametros={'alvos': list(sequencia.get('alvos_obrigatorios', []))},
+            ))
+        
+        exclusao = regras.get('exclusao_mutua')
+        if exclusao:
+            self.regras.append(_RegraCompilada(
+                tipo='exclusao_mutua',
+                nome=exclusao.get('descricao', 'Exclusão mútua'),
+                impacto='alto',
+                parametros={'alvos': list(exclusao.get('alvos', []))},
+            ))
+        
+        invalidas = [
+            f.expressao for r in self.regras for f in r.formulas if not f.valida
+        ]
+        if invalidas:
+            logger.warning(f"Regras com fórmula inválida: {invalidas}")
+    
+    # ------------------------------------------------------------------
+    # Variáveis por amostra
+    # ------------------------------------------------------------------
+    @staticmethod
+    def variaveis_por_amostra(df_final: pd.DataFrame) -> Dict[str, Any]:
+        """Colunas do df_final como variáveis de fórmula (um valor por amostra)."""
+        variaveis: Dict[str, Any] = {}
+        for coluna in df_final.columns:
+            if not str(coluna).startswith('Resultado_'):
+                continue
+            alvo = str(coluna)[len('Resultado_'):]
+            variaveis[f"resultado_{alvo}"] = _coluna_texto(df_final[coluna])
+            col_ct = alvo.upper()
+            if col_ct in df_final.columns:
+                variaveis[f"CT_{alvo}"] = pd.to_numeric(df_final[col_ct], errors='coerce').to_numpy(dtype=float)
+        for col_rp in ('RP_1', 'RP_2'):
+            if col_rp in df_final.columns:
+                variaveis[f"CT_{col_rp}"] = pd.to_numeric(df_final[col_rp], errors='coerce').to_numpy(dtype=float)
+        if 'Status_Corrida' in df_final.columns:
+            variaveis['status_corrida'] = _coluna_texto(df_final['Status_Corrida'])
+        return variaveis
+    
+    # ------------------------------------------------------------------
+    # Aplicação
+    # ------------------------------------------------------------------
+    def aplicar(self, df_final: pd.DataFrame) -> Tuple[pd.DataFrame, RulesResult]:
+        """
+        Aplica todas as regras a todas as amostras do df_final.
+        
+        Returns:
+            (matriz por amostra, RulesResult da corrida)
+        """
+        inicio = datetime.now()
+        n = len(df_final)
+        variaveis = self.variaveis_por_amostra(df_final)
+        positivos = {
+            nome[len('resultado_'):]: pd.Series(valores).isin(RESULTADOS_POSITIVOS).to_numpy()
+            for nome, valores in variaveis.items() if nome.startswith('resultado_')
+        }
+        
+        colunas: Dict[str, np.ndarray] = {}
+        for regra in self.regras:
+            nome = regra.nome
+            sufixo = 2
+            while nome in colunas:
+                nome = f"{regra.nome} ({sufixo})"
+                sufixo += 1
+            colunas[nome] = self._avaliar_regra(regra, variaveis, positivos, n)
+        matriz = pd.DataFrame(colunas, index=df_final.index)
+        
+        amostras = df_final['Amostra'] if 'Amostra' in df_final.columns else pd.Series(df_final.index, index=df_final.index)
+        validacoes = [
+            _validacao_agregada(regra, matriz[nome], amostras)
+            for regra, nome in zip(self.regras, matriz.columns)
+        ]
+        erros, avisos = gerar_mensagens(validacoes)
+        tempo_ms = (datetime.now() - inicio).total_seconds() * 1000
+        
+        logger.info(f"Regras aplicadas por amostra: {len(self.regras)} regras x {n} amostras ({tempo_ms:.2f}ms)")
+        
+        return matriz, RulesResult(
+            status=determinar_status_geral(validacoes),
+            validacoes=validacoes,
+            mensagens_erro=erros,
+            mensagens_aviso=avisos,
+            detalhes=gerar_detalhes_resumo(validacoes),
+            tempo_execucao_ms=tempo_ms
+        )
+    
+    def _avaliar_regra(
+        self,
+        regra: _RegraCompilada,
+        variaveis: Dict[str, Any],
+        positivos: Dict[str, np.ndarray],
+        n: int
+    ) -> np.ndarray:
+        if regra.tipo == 'booleana':
+            if regra.nome == 'requer_dois_alvos':
+                contagem = sum((p.astype(int) for p in positivos.values()), np.zeros(n, dtype=int))
+                passou = (contagem >= 2) == regra.parametros['valor']
+            else:
+                passou = np.full(n, regra.parametros['valor'])
+            return _status(passou)
+        
+        if regra.tipo == 'formula':
+            passou, valida = _avaliar_compilada(regra.formulas[0], variaveis, n)
+            return _status(passou & valida)
+        
+        if regra.tipo == 'condicional':
+            cond_if, valida_if = _avaliar_compilada(regra.formulas[0], variaveis, n)
+            cond_then, valida_then = _avaliar_compilada(regra.formulas[1], variaveis, n)
+            aplicavel = cond_if & valida_if
+            return np.where(aplicavel, _status(cond_then & valida_then), "nao_aplicavel").astype(object)
+        
+        if regra.tipo == 'threshold':
+            passou, valida = _avaliar_compilada(regra.formulas[0], variaveis, n)
+            if regra.formulas[0].valida:
+                return np.where(valida, _status(passou), "nao_aplicavel").astype(object)
+            return _status(np.zeros(n, dtype=bool))
+        
+        if regra.tipo == 'sequencia':
+            passou = np.ones(n, dtype=bool)
+            for alvo in regra.parametros['alvos']:
+                valores = variaveis.get(f"resultado_{alvo}")
+                passou &= ~pd.isna(valores) if valores is not None else False
+            return _status(passou)
+        
+        if regra.tipo == 'exclusao_mutua':
+            contagem = np.zeros(n, dtype=int)
+            for alvo in regra.parametros['alvos']:
+                if alvo in positivos:
+                    contagem += positivos[alvo]
+            return _status(contagem <= 1)
+        
+        return np.full(n, "nao_aplicavel", dtype=object)
+
+
+def _coluna_texto(serie: pd.Series) -> np.ndarray:
+    """Coluna de texto com None para vazio/ausente."""
+    texto = serie.astype(str).str.strip()
+    valores = texto.to_numpy(dtype=object)
+    valores[(serie.isna() | (texto == '')).to_numpy()] = None
+    return valores
+
+
+def _avaliar_compilada(
+    compilada: FormulaCompilada,
+    variaveis: Dict[str, Any],
+    n: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(resultado booleano, linhas avaliáveis) da fórmula para todas as amostras."""
+    if not compilada.valida or compilada.variaveis_faltando(variaveis):
+        falso = np.zeros(n, dtype=bool)
+        return falso, falso
+    with np.errstate(invalid='ignore'):
+        resultado = np.asarray(compilada.avaliar_vetorizado(variaveis))
+    if resultado.ndim == 0:
+        resultado = np.full(n, resultado.item())
+    valida = np.broadcast_to(compilada.mascara_valida(variaveis), (n,))
+    return resultado.astype(bool), valida
+
+
+def _status(passou: np.ndarray) -> np.ndarray:
+    return np.where(passou, "passou", "falhou").astype(object)
+
+
+def _validacao_agregada(regra: _RegraCompilada, coluna: pd.Series, amostras: pd.Series) -> Validacao:
+    """Validacao da corrida: falhou se alguma amostra falhou."""
+    falhas = coluna == "falhou"
+    n_passou = int((coluna == "passou").sum())
+    n_falhou = int(falhas.sum())
+    n_na = len(coluna) - n_passou - n_falhou
+    
+    if n_falhou:
+        exemplos = [str(a) for a in amostras[falhas].head(5)]
+        resultado = "falhou"
+        detalhes = f"{n_falhou} de {len(coluna)} amostra(s) falharam: {', '.join(exemplos)}"
+    elif n_passou:
+        resultado = "passou"
+        detalhes = f"{n_passou} amostra(s) passaram, {n_na} não aplicável"
+    else:
+        resultado = "nao_aplicavel"
+        detalhes = "Regra não aplicável a nenhuma amostra"
+    
+    return Validacao(
+        regra_id=f"{regra.tipo}_{hash(regra.nome)}",
+        regra_nome=regra.nome,
+        resultado=resultado,
+        detalhes=detalhes,
+        impacto=regra.impacto
+    )
+
+
+# Cache por exame: (assinatura das regras, conjunto compilado)
+_conjuntos_cache: Dict[str, Tuple[str, CompiledRuleSet]] = {}
+_conjuntos_lock = threading.Lock()
+
+
+def _assinatura_regras(regras_dict: Dict[str, Any]) -> str:
+    texto = json.dumps(regras_dict, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def obter_conjunto_regras(exame: str, regras_dict: Dict[str, Any]) -> CompiledRuleSet:
+    """
+    CompiledRuleSet do exame, reutilizado enquanto as regras não mudam.
+    
+    A assinatura (hash do JSON das regras) faz parte do cache: alterar
+    `regras_validacao` do exame recompila o conjunto no próximo uso.
+    """
+    assinatura = _assinatura_regras(regras_dict)
+    with _conjuntos_lock:
+        entrada = _conjuntos_cache.get(exame)
+        if entrada is not None and entrada[0] == assinatura:
+            return entrada[1]
+    conjunto = CompiledRuleSet(regras_dict)
+    with _conjuntos_lock:
+        _conjuntos_cache[exame] = (assinatura, conjunto)
+    return conjunto
+
+
+def limpar_cache_regras() -> None:
+    """Esvazia o cache de conjuntos de regras compilados."""
+    with _conjuntos_lock:
+        _conjuntos_cache.clear()
+
+
 # ============================================================================
 # EXEMPLO DE USO
 # ============================================================================
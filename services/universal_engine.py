@@ -10,6 +10,8 @@ from typing import Any, Dict, List, Optional, Tuple
 
 
 
+import numpy as np
+
 import pandas as pd
 
 
@@ -30,8 +32,10 @@ from services.exam_registry import get_exam_cfg
 
 from services.formula_parser import avaliar_formula, validar_formula
 
-from services.rules_engine import aplicar_regras, RulesResult
+from services.rules_engine import RulesResult, obter_conjunto_regras
 
+from utils.instrumentacao import MedidorEtapas
+from utils.io_utils import detectar_cabecalho_excel, localizar_linha_cabecalho
 from utils.logger import registrar_log
 
 # ================================================================
@@ -245,23 +249,23 @@ def _try_reheader(df_raw: pd.DataFrame, required: List[str]) -> pd.DataFrame:
 
         return df_raw
 
-    for idx, row in df_raw.iterrows():
+    linhas = df_raw.to_numpy(dtype=object)
 
-        vals = ["" if pd.isna(v) else str(v).strip() for v in row.tolist()]
+    idx = localizar_linha_cabecalho(linhas, need, normalizar=_normalize_col_key, exato=True)
 
-        vals_norm = [_normalize_col_key(v) for v in vals]
+    if idx is None:
 
-        if all(n in vals_norm for n in need):
+        return df_raw
 
-            cols = [v if v else f"col_{i}" for i, v in enumerate(vals)]
+    vals = ["" if pd.isna(v) else str(v).strip() for v in linhas[idx]]
 
-            data = df_raw.iloc[idx + 1 :].copy()
+    cols = [v if v else f"col_{i}" for i, v in enumerate(vals)]
 
-            data.columns = cols
+    data = df_raw.iloc[idx + 1 :].copy()
 
-            return data
+    data.columns = cols
 
-    return df_raw
+    return data
 
 
 
@@ -487,17 +491,6 @@ def _ler_e_normalizar_arquivo(contexto: AnaliseContexto) -> pd.DataFrame:
 
     caminho = contexto.caminho_arquivo_corrida
 
-    if tipo == "csv":
-        df_raw = pd.read_csv(caminho, encoding="utf-8")
-    elif tipo in ("xlsx", "xls"):
-        df_raw = pd.read_excel(caminho)
-
-    else:
-
-        raise ValueError("tipo_arquivo inválido ou não definido.")
-
-
-
     col_p = (contexto.config_equip.get("coluna_poco") or "").strip()
 
     col_a = (contexto.config_equip.get("coluna_amostra") or "").strip()
@@ -506,6 +499,24 @@ def _ler_e_normalizar_arquivo(contexto: AnaliseContexto) -> pd.DataFrame:
 
     col_ct = (contexto.config_equip.get("coluna_ct") or "").strip()
 
+    if tipo == "csv":
+        df_raw = pd.read_csv(caminho, encoding="utf-8")
+    elif tipo in ("xlsx", "xls"):
+        # Cabeçalho procurado só nas primeiras linhas; a planilha é lida inteira uma vez
+        cabecalho = detectar_cabecalho_excel(
+            caminho, [col_p, col_a, col_t, col_ct], normalizar=_normalize_col_key, exato=True
+        )
+        if cabecalho.linha > 0:
+            # Valores como lidos (object), iguais aos do re-cabeçalho em _try_reheader:
+            # amostras numéricas não viram float por causa de células vazias
+            df_raw = pd.read_excel(caminho, header=cabecalho.linha, dtype=object)
+        else:
+            df_raw = pd.read_excel(caminho)
+
+    else:
+
+        raise ValueError("tipo_arquivo inválido ou não definido.")
+
 
 
     df_raw = _try_reheader(df_raw, [col_p, col_a, col_t, col_ct])
@@ -599,159 +610,131 @@ def _integrar_com_gabarito_extracao(df_norm: pd.DataFrame, contexto: AnaliseCont
 
 
 def _aplicar_regras_ct_e_interpretacao(
-
     df_norm: pd.DataFrame, contexto: AnaliseContexto
-
 ) -> pd.DataFrame:
+    """
+    Interpreta a matriz de CT (amostra x alvo) em colunas Resultado_<ALVO>.
 
+    Usa o kernel vetorizado `_interpretar_matriz_ct`; `_interpretar_com_rp`
+    permanece como implementação de referência (escalar) para os testes de paridade.
+    """
     # Preferir faixas definidas no ExamRegistry; fallback para config_regras legado
-
+    cfg = contexto.config_regras or {}
     exame_nome = None
-
     try:
-
         exame_nome = (contexto.config_equip or {}).get("exame")
-
     except Exception:
-
         exame_nome = None
 
-
-
     try:
-
         exam_cfg = get_exam_cfg(exame_nome or "")
-
     except Exception:
-
         exam_cfg = None
 
-
-
     if exam_cfg and getattr(exam_cfg, "faixas_ct", None):
-
         faixas = exam_cfg.faixas_ct or {}
-
         ct_detect_max = float(faixas.get("detect_max", faixas.get("detectMax", 40.0)))
-
         ct_inconc_min = float(faixas.get("inconc_min", faixas.get("inconcMin", 40.01)))
-
         ct_inconc_max = float(faixas.get("inconc_max", faixas.get("inconcMax", 45.0)))
-
         ct_rp_min = float(faixas.get("rp_min", faixas.get("rpMin", 15.0)))
-
         ct_rp_max = float(faixas.get("rp_max", faixas.get("rpMax", 35.0)))
-
     else:
-
-        cfg = contexto.config_regras or {}
-
         def as_float(key: str, default: float) -> float:
-
             try:
-
-                return float((cfg.get(key) or "").replace(",", "."))
-
+                return float(str(cfg.get(key) or "").replace(",", "."))
             except Exception:
-
                 return default
 
-
-
         ct_detect_max = as_float("CT_DETECTAVEL_MAX", 40.0)
-
         ct_inconc_min = as_float("CT_INCONCLUSIVO_MIN", 40.01)
-
         ct_inconc_max = as_float("CT_INCONCLUSIVO_MAX", 45.0)
-
         ct_rp_min = as_float("CT_RP_MIN", 15.0)
-
         ct_rp_max = as_float("CT_RP_MAX", 35.0)
 
-
-
     alvos = [a.strip() for a in (cfg.get("alvos") or "").split(";") if a.strip()]
-
     alvos_sem_rp = [a for a in alvos if a.upper() not in ("RP", "RP_1", "RP_2")]
-
     df_sid = _ensure_sample_id(df_norm)
+    target_upper = df_sid["target_name"].astype(str).str.upper()
 
+    rp_por_amostra = _medias_rp_por_amostra(df_sid[target_upper.isin(["RP", "RP_1", "RP_2"])])
 
-
-    df_rp = df_sid[df_sid["target_name"].astype(str).str.upper().isin(["RP", "RP_1", "RP_2"])]
-
-    rp_por_amostra: Dict[str, float] = {}
-
-    for amostra, sub in df_rp.groupby("sample_id"):
-
-        vals = [v for v in sub["ct"].tolist() if v is not None]
-
-        if vals:
-
-            rp_por_amostra[amostra] = float(sum(vals) / len(vals))
-
-
-
-    df_targets = df_sid[
-
-        df_sid["target_name"].astype(str).str.upper().isin([t.upper() for t in alvos_sem_rp])
-
-    ].copy()
-
+    df_targets = df_sid[target_upper.isin([t.upper() for t in alvos_sem_rp])].copy()
     if df_targets.empty:
-
         return pd.DataFrame(columns=["sample_name"])
-
-    df_targets["target_upper"] = df_targets["target_name"].astype(str).str.upper()
-
-
+    df_targets["target_upper"] = target_upper[df_targets.index]
 
     pivot_ct = df_targets.pivot_table(index="sample_id", columns="target_upper", values="ct", aggfunc="first")
+    sample_name_map = df_targets.groupby("sample_id")["sample_name"].first()
+
+    ct_matrix = pivot_ct.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    ct_rp = rp_por_amostra.reindex(pivot_ct.index).to_numpy(dtype=float)
+    resultados = _interpretar_matriz_ct(
+        ct_matrix,
+        ct_rp,
+        ct_detect_max=ct_detect_max,
+        ct_inconc_min=ct_inconc_min,
+        ct_inconc_max=ct_inconc_max,
+        ct_rp_min=ct_rp_min,
+        ct_rp_max=ct_rp_max,
+    )
 
-    sample_name_map = df_targets.groupby("sample_id")["sample_name"].first().to_dict()
-
-
-
-    linhas: List[Dict[str, Any]] = []
-
-    for sample_id, row in pivot_ct.iterrows():
-
-        linha: Dict[str, Any] = {"sample_id": sample_id, "sample_name": sample_name_map.get(sample_id, sample_id)}
-
-        ct_rp = rp_por_amostra.get(sample_id)
-
-        for target_upper in row.index:
-
-            ct_val = row[target_upper]
-
-            col_res = f"Resultado_{target_upper.replace(' ', '')}"
-
-            linha[col_res] = _interpretar_com_rp(
-
-                ct_rp=ct_rp,
-
-                ct_alvo=ct_val,
-
-                ct_detect_min=0.0,
-
-                ct_detect_max=ct_detect_max,
-
-                ct_inconc_min=ct_inconc_min,
-
-                ct_inconc_max=ct_inconc_max,
-
-                ct_rp_min=ct_rp_min,
-
-                ct_rp_max=ct_rp_max,
+    colunas: Dict[str, Any] = {
+        "sample_id": pivot_ct.index.to_numpy(),
+        "sample_name": sample_name_map.reindex(pivot_ct.index).to_numpy(),
+    }
+    for j, alvo in enumerate(pivot_ct.columns):
+        colunas[f"Resultado_{str(alvo).replace(' ', '')}"] = resultados[:, j]
+    return pd.DataFrame(colunas)
 
-            )
 
-        linhas.append(linha)
+def _medias_rp_por_amostra(df_rp: pd.DataFrame) -> pd.Series:
+    """
+    Média de CT do RP por sample_id.
 
-    return pd.DataFrame(linhas)
+    Qualquer CT ausente (NaN) do RP torna a média NaN, o que leva a amostra a
+    'Invalido' -- mesmo comportamento do laço original sobre `sub["ct"]`.
+    """
+    if df_rp.empty:
+        return pd.Series(dtype=float)
+    ct = pd.to_numeric(df_rp["ct"], errors="coerce")
+    grupos = df_rp["sample_id"]
+    media = ct.groupby(grupos).mean()
+    com_ausente = ct.isna().groupby(grupos).any()
+    return media.mask(com_ausente)
+
+
+def _interpretar_matriz_ct(
+    ct_matrix: np.ndarray,
+    ct_rp: np.ndarray,
+    ct_detect_max: float,
+    ct_inconc_min: float,
+    ct_inconc_max: float,
+    ct_rp_min: float,
+    ct_rp_max: float,
+) -> np.ndarray:
+    """
+    Kernel vetorizado equivalente a `_interpretar_com_rp` aplicado célula a célula.
 
+    ct_matrix: matriz (amostras x alvos) de CT em float (NaN = ausente).
+    ct_rp: vetor (amostras,) com a média do RP por amostra (NaN = ausente).
+    Retorna matriz de strings com Detectado / Inconclusivo / Nao Detectado / Invalido.
+    """
+    ct = np.asarray(ct_matrix, dtype=float)
+    if ct.ndim == 1:
+        ct = ct.reshape(-1, 1)
+    rp = np.asarray(ct_rp, dtype=float).reshape(-1, 1)
 
+    with np.errstate(invalid="ignore"):
+        rp_valido = (rp >= ct_rp_min) & (rp <= ct_rp_max)
+        detectado = ct <= ct_detect_max
+        inconclusivo = (ct >= ct_inconc_min) & (ct <= ct_inconc_max)
 
+    rp_valido = np.broadcast_to(rp_valido, ct.shape)
+    return np.select(
+        [~rp_valido, detectado, inconclusivo],
+        ["Invalido", "Detectado", "Inconclusivo"],
+        default="Nao Detectado",
+    ).astype(object)
 
 
 def _interpretar_com_rp(
@@ -1178,7 +1161,12 @@ def _determinar_status_corrida(
 
     if bloco_tam > 1 and "Poco" in df_final.columns:
 
-        df_final = _consolidar_por_bloco(df_final, bloco_tam)
+        df_final = _consolidar_por_bloco(
+            df_final,
+            bloco_tam,
+            prioridades=getattr(exam_cfg, "prioridade_status", None),
+            orientacao=getattr(exam_cfg, "orientacao_bloco", "horizontal") or "horizontal",
+        )
 
 
 
@@ -1214,88 +1202,106 @@ TARGETS_POCO1 = ["HMPV", "INF A", "INF B", "SC2"]
 
 
 
-def _consolidar_por_bloco(df_final: pd.DataFrame, bloco_tam: int) -> pd.DataFrame:
+PRIORIDADE_STATUS_PADRAO = ["Invalida", "Detectado", "Inconclusivo", "Nao Detectado", ""]
 
-    """
+GEOMETRIAS_PLACA = {96: (8, 12), 384: (16, 24)}
 
-    Ajusta a cor/resultado por bloco horizontal (par/trio) para mapas/saídas finais.
+_RE_POCO = r"^\s*([A-Pa-p])\s*0*(\d{1,2})"
 
-    Prioridade: Invalida > Detectado > Inconclusivo > Nao Detectado > "".
-
-    O resultado do bloco é replicado nos poços do bloco.
 
+def _parse_pocos(pocos: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
     """
+    Converte a coluna Poco em arrays (linha 0-based, coluna 1-based); -1 se inválido.
 
-    if df_final.empty or bloco_tam <= 1:
-
-        return df_final
-
-    if "Poco" not in df_final.columns or "Status_Corrida" not in df_final.columns:
-
-        return df_final
-
-
-
-    def _parse_poco(p: str):
-
-        if not p:
+    Aceita "A1", "A01" e grupos "A1+A2" (usa o primeiro poço).
+    """
+    partes = pocos.astype(str).str.extract(_RE_POCO)
+    linhas = partes[0].str.upper().map(lambda x: ord(x) - ord("A") if isinstance(x, str) else -1)
+    colunas = pd.to_numeric(partes[1], errors="coerce").fillna(-1)
+    return linhas.to_numpy(dtype=int), colunas.to_numpy(dtype=int)
 
-            return None, None
 
-        row = p[0].upper()
+def _geometria_placa(linhas: np.ndarray, colunas: np.ndarray, n_pocos: Optional[int] = None) -> Tuple[int, int]:
+    """(linhas, colunas) da placa; sem `n_pocos`, 384 se algum poço estiver fora da placa de 96."""
+    if n_pocos in GEOMETRIAS_PLACA:
+        return GEOMETRIAS_PLACA[n_pocos]
+    n_lin96, n_col96 = GEOMETRIAS_PLACA[96]
+    if (linhas >= n_lin96).any() or (colunas > n_col96).any():
+        return GEOMETRIAS_PLACA[384]
+    return GEOMETRIAS_PLACA[96]
 
-        try:
 
-            col = int(p[1:])
+def _rank_prioridade(valores: pd.Series, prioridades: List[str]) -> pd.Series:
+    """
+    Posição de cada valor na lista de prioridades (menor = vence).
 
-        except Exception:
+    Entradas não vazias casam por prefixo ("Invalida (CN Detectado)" → "Invalida");
+    valores fora da lista ficam depois dos listados, e vazio/NA por último.
+    """
+    nao_listado = len(prioridades)
+    ranks: Dict[Any, int] = {}
+    for valor in pd.unique(valores):
+        texto = "" if pd.isna(valor) else str(valor)
+        rank = nao_listado + (1 if texto == "" else 0)
+        for i, p in enumerate(prioridades):
+            if texto == p or (p and texto.startswith(p)):
+                rank = i
+                break
+        ranks[valor] = rank
+    return valores.map(ranks).fillna(nao_listado + 1).astype(int)
 
-            return row, None
 
-        return row, col
+def _consolidar_por_bloco(
+    df_final: pd.DataFrame,
+    bloco_tam: int,
+    prioridades: Optional[List[str]] = None,
+    orientacao: str = "horizontal",
+    n_pocos: Optional[int] = None,
+    colunas: Tuple[str, ...] = ("Status_Corrida",),
+) -> pd.DataFrame:
+    """
+    Replica em todos os poços de cada bloco (par/trio) o status de maior prioridade.
 
+    O Poco é convertido uma vez em (linha, coluna); o bloco é
+    (linha, (coluna-1) // bloco_tam) na horizontal ou
+    ((linha // bloco_tam), coluna) na vertical, em placas de 96 ou 384 poços.
+    Prioridade padrão: Invalida > Detectado > Inconclusivo > Nao Detectado > "".
+    Poços fora da placa ou sem Poco válido não são alterados.
+    """
+    if df_final.empty or bloco_tam <= 1:
+        return df_final
+    if "Poco" not in df_final.columns:
+        return df_final
+    colunas = [c for c in colunas if c in df_final.columns]
+    if not colunas:
+        return df_final
 
+    prioridades = list(prioridades) if prioridades else PRIORIDADE_STATUS_PADRAO
+    linhas, cols = _parse_pocos(df_final["Poco"])
+    n_linhas, n_colunas = _geometria_placa(linhas, cols, n_pocos)
+    valido = (linhas >= 0) & (linhas < n_linhas) & (cols >= 1) & (cols <= n_colunas)
+    if not valido.any():
+        return df_final
 
-    prioridade = ["Invalida", "Detectado", "Inconclusivo", "Nao Detectado", ""]
+    if orientacao == "vertical":
+        bloco = (linhas // bloco_tam) * n_colunas + (cols - 1)
+    else:
+        blocos_por_linha = -(-n_colunas // bloco_tam)
+        bloco = linhas * blocos_por_linha + (cols - 1) // bloco_tam
 
     df_out = df_final.copy()
-
-    for _, row in df_final.iterrows():
-
-        row_letter, colnum = _parse_poco(str(row.get("Poco", "")))
-
-        if row_letter is None or colnum is None:
-
-            continue
-
-        start = (colnum // bloco_tam) * bloco_tam
-
-        block_cols = [start + i for i in range(bloco_tam)]
-
-        wells_block = [f"{row_letter}{c}" for c in block_cols]
-
-        subs = df_final[df_final["Poco"].isin(wells_block)]
-
-        status_set = [str(s) for s in subs["Status_Corrida"].unique()]
-
-        status_block = ""
-
-        for s in prioridade:
-
-            if s in status_set:
-
-                status_block = s
-
-                break
-
-        df_out.loc[df_out["Poco"].isin(wells_block), "Status_Corrida"] = status_block
-
+    indice_valido = df_out.index[valido]
+    bloco_valido = pd.Series(bloco[valido], index=indice_valido)
+    for coluna in colunas:
+        valores = df_out.loc[indice_valido, coluna]
+        rank = _rank_prioridade(valores, prioridades)
+        # primeira linha de menor rank de cada bloco representa o bloco
+        representante = rank.groupby(bloco_valido).idxmin()
+        valor_bloco = df_out.loc[representante.to_numpy(), coluna].set_axis(representante.index)
+        df_out.loc[indice_valido, coluna] = bloco_valido.map(valor_bloco).to_numpy()
     return df_out
 
 
-
-
-
 def _legacy_extract_table(df_raw: pd.DataFrame) -> pd.DataFrame:
 
     required = {"samplename", "targetname"}
@@ -1689,74 +1695,6 @@ def _legacy_montar_df(
 # =====================================================================
 
 
-def _preparar_dados_para_regras(df_final: pd.DataFrame, meta: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Prepara dados do resultado da análise para aplicação de regras.
-    
-    Args:
-        df_final: DataFrame com resultados finais
-        meta: Dict com metadados
-        
-    Returns:
-        Dict estruturado com alvos e controles
-    """
-    resultados = {
-        'alvos': {},
-        'controles': {},
-        'metadados': meta
-    }
-    
-    try:
-        # Processar cada linha do DataFrame
-        for _, row in df_final.iterrows():
-            tipo_alvo = str(row.get('Alvo', '')).strip()
-            ct_valor = row.get('Ct', None)
-            resultado = str(row.get('Resultado', '')).strip()
-            
-            # Tentar converter CT para float
-            try:
-                if ct_valor is not None and str(ct_valor).strip():
-                    ct_float = float(ct_valor)
-                else:
-                    ct_float = None
-            except (ValueError, TypeError):
-                ct_float = None
-            
-            # Classificar como alvo ou controle
-            tipo_lower = tipo_alvo.lower()
-            is_controle = any(palavra in tipo_lower for palavra in ['controle', 'control', 'ic', 'pc', 'nc'])
-            
-            dados_alvo = {
-                'ct': ct_float,
-                'resultado': resultado,
-                'tipo': tipo_alvo
-            }
-            
-            if is_controle:
-                resultados['controles'][tipo_alvo] = {
-                    'ct': ct_float,
-                    'status': resultado,
-                    'tipo': tipo_alvo
-                }
-            else:
-                resultados['alvos'][tipo_alvo] = dados_alvo
-        
-        registrar_log(
-            "UniversalEngine",
-            f"Dados preparados: {len(resultados['alvos'])} alvos, {len(resultados['controles'])} controles",
-            "INFO"
-        )
-        
-    except Exception as e:
-        registrar_log(
-            "UniversalEngine",
-            f"Erro preparando dados para regras: {e}",
-            "ERROR"
-        )
-    
-    return resultados
-
-
 def _obter_regras_exame(exame: str, cfg: Any) -> Optional[Dict[str, Any]]:
     """
     Obtém regras configuradas para um exame.
@@ -1826,8 +1764,14 @@ class UniversalEngine:
 
         lote: Optional[str] = None,
 
+        medidor: Optional[MedidorEtapas] = None,
+
     ):
 
+        # etapas medidas no medidor do chamador (AnalysisService) ou num próprio
+
+        medidor = medidor if medidor is not None else MedidorEtapas()
+
         # metadados via registry (fallback se não existir JSON/YAML)
 
         cfg = get_exam_cfg(exame)
@@ -1942,9 +1886,15 @@ class UniversalEngine:
 
 
 
-            df_gabarito = _obter_gabarito(df_extracao, self.app_state)
+            with medidor.etapa("gabarito"):
 
-            df_table = _legacy_extract_table(df_resultados)
+                df_gabarito = _obter_gabarito(df_extracao, self.app_state)
+
+            with medidor.etapa("normalizacao") as etapa:
+
+                df_table = _legacy_extract_table(df_resultados)
+
+                etapa.linhas = len(df_table)
 
             expected_cols = [
 
@@ -2058,9 +2008,13 @@ class UniversalEngine:
 
 
 
-            df_final, status_corrida = _legacy_montar_df(df_proc, df_filtered, df_gabarito)
+            with medidor.etapa("interpretacao") as etapa:
+
+                df_final, status_corrida = _legacy_montar_df(df_proc, df_filtered, df_gabarito)
 
-            meta = {"status_corrida": status_corrida, "exame": exame}
+                etapa.linhas = len(df_final)
+
+            meta = {"status_corrida": status_corrida, "exame": exame, "instrumentacao": medidor.como_dict()}
 
             resumo = {"status_corrida": status_corrida, "lote": lote or ""}
 
@@ -2082,13 +2036,15 @@ class UniversalEngine:
 
 
 
-        config_exame = carregar_exames_metadata().get(exame, {})
+        with medidor.etapa("configuracao"):
+
+            config_exame = carregar_exames_metadata().get(exame, {})
 
-        config_equip = carregar_equipamentos_metadata().get(config_exame.get("equipamento", ""), {})
+            config_equip = carregar_equipamentos_metadata().get(config_exame.get("equipamento", ""), {})
 
-        config_placa = carregar_placas_metadata().get(config_exame.get("tipo_placa", ""), {})
+            config_placa = carregar_placas_metadata().get(config_exame.get("tipo_placa", ""), {})
 
-        config_regras = carregar_regras_analise_metadata().get(exame, {})
+            config_regras = carregar_regras_analise_metadata().get(exame, {})
 
         if not config_equip:
 
@@ -2134,17 +2090,21 @@ class UniversalEngine:
 
 
 
-        df_norm = _normalizar_resultados_em_memoria(df_resultados, config_equip)
+        with medidor.etapa("normalizacao") as etapa:
 
-        try:
+            df_norm = _normalizar_resultados_em_memoria(df_resultados, config_equip)
 
-            df_norm = df_norm.copy()
+            try:
 
-            df_norm["target_name"] = df_norm["target_name"].apply(cfg.normalize_target)
+                df_norm = df_norm.copy()
 
-        except Exception:
+                df_norm["target_name"] = df_norm["target_name"].apply(cfg.normalize_target)
 
-            pass
+            except Exception:
+
+                pass
+
+            etapa.linhas = len(df_norm)
 
         ctx = AnaliseContexto(
 
@@ -2176,11 +2136,23 @@ class UniversalEngine:
 
             pass
 
-        df_norm = _integrar_com_gabarito_extracao(df_norm, ctx)
+        with medidor.etapa("gabarito") as etapa:
 
-        df_interpretado = _aplicar_regras_ct_e_interpretacao(df_norm, ctx)
+            df_norm = _integrar_com_gabarito_extracao(df_norm, ctx)
 
-        df_final, meta = _determinar_status_corrida(df_interpretado, ctx, df_norm=df_norm)
+            etapa.linhas = len(df_norm)
+
+        with medidor.etapa("interpretacao") as etapa:
+
+            df_interpretado = _aplicar_regras_ct_e_interpretacao(df_norm, ctx)
+
+            etapa.linhas = len(df_interpretado)
+
+        with medidor.etapa("status_corrida") as etapa:
+
+            df_final, meta = _determinar_status_corrida(df_interpretado, ctx, df_norm=df_norm)
+
+            etapa.linhas = len(df_final)
 
         # anexa informaçÕ§es de agrupamento/bloco derivadas do exam_cfg
 
@@ -2208,17 +2180,18 @@ class UniversalEngine:
         # INTEGRAÇÃO FASE 2: Aplicar Rules Engine
         # ================================================================
         regras_resultado = None
+        regras_por_amostra = None
         try:
-            # Obter regras configuradas para o exame
-            regras_dict = _obter_regras_exame(exame, cfg)
+            with medidor.etapa("regras", linhas=len(df_final)):
+                # Obter regras configuradas para o exame
+                regras_dict = _obter_regras_exame(exame, cfg)
+
+                if regras_dict:
+                    # Aplicar regras (compiladas uma vez por exame) a todas as amostras
+                    conjunto_regras = obter_conjunto_regras(exame, regras_dict)
+                    regras_por_amostra, regras_resultado = conjunto_regras.aplicar(df_final)
             
             if regras_dict:
-                # Preparar dados para aplicação de regras
-                dados_regras = _preparar_dados_para_regras(df_final, meta)
-                
-                # Aplicar regras
-                regras_resultado = aplicar_regras(regras_dict, dados_regras)
-                
                 # Adicionar resultado das regras aos metadados
                 meta["regras_status"] = regras_resultado.status
                 meta["regras_validacoes"] = len(regras_resultado.validacoes)
@@ -2251,11 +2224,14 @@ class UniversalEngine:
         
         # ================================================================
 
+        meta["instrumentacao"] = medidor.como_dict()
+
         return SimpleNamespace(
             df_final=df_final, 
             resumo=resumo, 
             metadados=meta,
-            regras_resultado=regras_resultado
+            regras_resultado=regras_resultado,
+            regras_por_amostra=regras_por_amostra
         )
 
 
@@ -2328,5 +2304,13 @@ def _inferir_bloco(cfg: Any) -> int:
 
         return 3
 
+    # esquemas genéricos "N->M" (ex.: 384->192)
+    bloco_size = getattr(cfg, "bloco_size", None)
+    if callable(bloco_size):
+        try:
+            return int(bloco_size())
+        except Exception:
+            pass
+
     return 1
 
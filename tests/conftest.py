@@ -1,6 +1,8 @@
 import sys
 import pathlib
 
+import pytest
+
 # Garante que o diretório do projeto esteja no PYTHONPATH para imports relativos (analise, services, etc.).
 PROJECT_ROOT = pathlib.Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
@@ -12,3 +14,13 @@ def pytest_configure(config):
         "markers",
         "gui: testes que exercitam componentes de interface gráfica (Tkinter/CustomTkinter).",
     )
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _parse_cache_isolado(tmp_path_factory):
+    """Cache de leituras de corrida em diretório temporário (não grava em logs/)."""
+    from services.parse_cache import ParseCache, set_parse_cache
+
+    set_parse_cache(ParseCache(str(tmp_path_factory.mktemp("parse_cache"))))
+    yield
+    set_parse_cache(None)
@@ -0,0 +1,134 @@
+"""Armazém indexado de alertas (interface.sistema_alertas.ArmazemAlertas)."""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("customtkinter")
+
+from interface.sistema_alertas import (  # noqa: E402
+    Alerta,
+    ArmazemAlertas,
+    CategoriaAlerta,
+    GerenciadorAlertas,
+    TipoAlerta,
+)
+
+TIPOS = [TipoAlerta.CRITICO, TipoAlerta.ALTO, TipoAlerta.MEDIO, TipoAlerta.BAIXO, TipoAlerta.INFO]
+CATEGORIAS = [CategoriaAlerta.CONTROLE, CategoriaAlerta.REGRA, CategoriaAlerta.EQUIPAMENTO,
+              CategoriaAlerta.SISTEMA, CategoriaAlerta.QUALIDADE]
+
+
+def _popular(gerenciador, n, seed=3):
+    rng = random.Random(seed)
+    alertas = []
+    for i in range(n):
+        alerta = Alerta(rng.choice(TIPOS), rng.choice(CATEGORIAS), f"Alerta {i}")
+        gerenciador.adicionar_alerta(alerta)
+        alertas.append(alerta)
+    for alerta in rng.sample(alertas, n // 3):
+        alerta.marcar_lido()
+    for alerta in rng.sample(alertas, n // 5):
+        alerta.marcar_resolvido()
+    return alertas
+
+
+def _filtrar(alertas, **filtros):
+    """Referência: varredura completa, mais recente primeiro."""
+    return [a for a in reversed(alertas)
+            if all(getattr(a, c) == v for c, v in filtros.items() if v is not None)]
+
+
+def test_ids_unicos_em_rajada():
+    ids = {Alerta(TipoAlerta.INFO, CategoriaAlerta.SISTEMA, "x").id for _ in range(2000)}
+    assert len(ids) == 2000
+
+
+@pytest.mark.parametrize("filtros", [
+    {},
+    {"lido": False},
+    {"resolvido": True},
+    {"tipo": TipoAlerta.CRITICO},
+    {"categoria": CategoriaAlerta.REGRA, "lido": True},
+    {"tipo": TipoAlerta.MEDIO, "categoria": CategoriaAlerta.CONTROLE, "resolvido": False},
+])
+def test_consulta_e_contagem_iguais_a_varredura(filtros):
+    gerenciador = GerenciadorAlertas()
+    alertas = _popular(gerenciador, 500)
+    esperado = _filtrar(alertas, **filtros)
+
+    assert gerenciador.contar_alertas(**filtros) == len(esperado)
+    assert gerenciador.consultar_alertas(**filtros) == esperado
+    assert gerenciador.consultar_alertas(offset=20, limite=15, **filtros) == esperado[20:35]
+
+
+def test_estatisticas_acompanham_mudancas_de_estado():
+    gerenciador = GerenciadorAlertas()
+    alertas = _popular(gerenciador, 300)
+
+    stats = gerenciador.get_estatisticas()
+    assert stats["total"] == 300
+    assert stats["nao_lidos"] == sum(not a.lido for a in alertas)
+    assert stats["nao_resolvidos"] == sum(not a.resolvido for a in alertas)
+    assert stats["criticos"] == sum(a.tipo == TipoAlerta.CRITICO for a in alertas)
+
+    gerenciador.marcar_todos_lidos()
+    assert gerenciador.get_estatisticas()["nao_lidos"] == 0
+    alertas[0].lido = False
+    assert gerenciador.get_alertas_nao_lidos() == [alertas[0]]
+
+
+def test_alertas_mais_recente_primeiro_e_busca_por_id():
+    gerenciador = GerenciadorAlertas()
+    alertas = _popular(gerenciador, 10)
+
+    assert gerenciador.alertas == list(reversed(alertas))
+    assert gerenciador.get_alerta(alertas[4].id) is alertas[4]
+    assert gerenciador.get_alerta("inexistente") is None
+
+
+def test_filtro_desconhecido():
+    with pytest.raises(ValueError):
+        ArmazemAlertas().consultar(exame="X")
+
+
+def test_limpar_alertas_antigos():
+    gerenciador = GerenciadorAlertas()
+    alertas = _popular(gerenciador, 20)
+    for alerta in alertas[:5]:
+        alerta.data_hora = datetime.now() - timedelta(days=40)
+
+    gerenciador.limpar_alertas_antigos(dias=30)
+
+    assert gerenciador.alertas == list(reversed(alertas[5:]))
+    assert gerenciador.contar_alertas(lido=False) == sum(not a.lido for a in alertas[5:])
+
+
+def test_persistencia_reabre_com_mesmo_estado(tmp_path):
+    arquivo = tmp_path / "alertas.jsonl"
+    gerenciador = GerenciadorAlertas(arquivo=str(arquivo))
+    alertas = _popular(gerenciador, 50)
+
+    reaberto = GerenciadorAlertas(arquivo=str(arquivo))
+    assert [a.to_dict() for a in reaberto.alertas] == [a.to_dict() for a in reversed(alertas)]
+    assert reaberto.get_estatisticas() == gerenciador.get_estatisticas()
+
+    linhas_antes = len(arquivo.read_text(encoding="utf-8").splitlines())
+    gerenciador.salvar()
+    assert len(arquivo.read_text(encoding="utf-8").splitlines()) == 50 < linhas_antes
+
+    reaberto.get_alerta(alertas[0].id).marcar_resolvido()
+    assert GerenciadorAlertas(arquivo=str(arquivo)).get_alerta(alertas[0].id).resolvido
+
+
+def test_arquivo_ilegivel_comeca_vazio(tmp_path):
+    latin1 = tmp_path / "alertas.jsonl"
+    latin1.write_bytes('{"id": "1", "mensagem": "Não"}\n'.encode("latin-1"))
+    diretorio = tmp_path / "pasta.jsonl"
+    diretorio.mkdir()  # open() falha com OSError
+
+    for arquivo in (latin1, diretorio):
+        gerenciador = GerenciadorAlertas(arquivo=str(arquivo))
+        assert gerenciador.alertas == []
+        assert gerenciador.contar_alertas() == 0
@@ -0,0 +1,131 @@
+"""Testes da análise em lote headless (services/batch_analysis.py)."""
+
+import json
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from services.batch_analysis import analisar_lote, localizar_arquivos, localizar_mapa
+
+EXAME = "VR1e2 Biomanguinhos 7500"
+COLUNAS_7500 = [
+    "Well", "Sample Name", "Target Name", "Task", "Reporter", "Quencher", "Cт", "Cт Mean",
+    "Cт SD", "Quantity", "Quantity Mean", "Quantity SD", "Automatic Ct Threshold",
+    "Ct Threshold", "Automatic Baseline", "Baseline Start", "Baseline End", "Comments",
+    "HIGHSD", "EXPFAIL",
+]
+POCOS = ["A1", "A2", "A3", "B1", "B2", "B3"]
+
+
+def _corrida_7500(caminho):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Results"
+    for _ in range(7):
+        ws.append(["Block Type", "96-Well Block"])
+    ws.append([])
+    ws.append(COLUNAS_7500)
+    for poco in POCOS:
+        for alvo, ct in [("SC2", 25.0), ("INF A", "Undetermined"), ("RP", 22.0)]:
+            ws.append([poco, poco, alvo, "UNKNOWN", "FAM", "NFQ", ct] + [""] * 13)
+    wb.save(caminho)
+    return caminho
+
+
+def _mapa(caminho):
+    pd.DataFrame(
+        {"Poço": POCOS, "Amostra": [f"AM{i}" for i in range(6)], "Código": [f"10{i}" for i in range(6)]}
+    ).to_csv(caminho, index=False)
+    return caminho
+
+
+@pytest.fixture
+def pastas(tmp_path):
+    corridas = tmp_path / "corridas"
+    mapas = tmp_path / "mapas"
+    corridas.mkdir()
+    mapas.mkdir()
+    return corridas, mapas
+
+
+def test_localizar_arquivos_e_mapas(pastas):
+    corridas, mapas = pastas
+    _corrida_7500(corridas / "run1.xlsx")
+    _corrida_7500(corridas / "run2.xlsx")
+    (corridas / "~$run1.xlsx").write_bytes(b"")
+    (corridas / "notas.txt").write_text("x")
+    _mapa(mapas / "run1.csv")
+
+    por_diretorio = localizar_arquivos([str(corridas)])
+    por_glob = localizar_arquivos([str(corridas / "run*.xlsx"), str(corridas / "run1.xlsx")])
+
+    assert [p.name for p in por_diretorio] == ["run1.xlsx", "run2.xlsx"]
+    assert [p.name for p in por_glob] == ["run1.xlsx", "run2.xlsx"]
+    assert localizar_mapa(corridas / "run1.xlsx", str(mapas)).name == "run1.csv"
+    assert localizar_mapa(corridas / "run2.xlsx", str(mapas)) is None
+    assert localizar_mapa(corridas / "run2.xlsx", str(mapas / "run1.csv")).name == "run1.csv"
+
+
+def test_analisar_lote_grava_artefatos_e_resumo(pastas, tmp_path):
+    corridas, mapas = pastas
+    for nome in ("run1", "run2"):
+        _corrida_7500(corridas / f"{nome}.xlsx")
+        _mapa(mapas / f"{nome}.csv")
+    Workbook().save(corridas / "vazia.xlsx")
+    historico = tmp_path / "historico.csv"
+
+    resumo = analisar_lote(
+        localizar_arquivos([str(corridas)]),
+        exame=EXAME,
+        mapas=str(mapas),
+        saida=str(tmp_path / "saida"),
+        lote="L1",
+        workers=2,
+        historico=str(historico),
+    )
+
+    assert (resumo["total"], resumo["sucesso"], resumo["falhas"]) == (3, 2, 1)
+    por_nome = {r["arquivo"].split("/")[-1]: r for r in resumo["corridas"]}
+    assert por_nome["vazia.xlsx"]["status"] == "erro"
+    for nome in ("run1", "run2"):
+        corrida = por_nome[f"{nome}.xlsx"]
+        assert corrida["status"] == "ok"
+        assert corrida["status_corrida"] == "Valida"
+        assert set(corrida["tempos"]) == {"analise", "df_final", "gal", "historico", "total"}
+        assert {"leitura", "leitura_extracao", "motor", "normalizacao", "interpretacao"} <= set(corrida["etapas_analise"])
+        assert len(pd.read_csv(corrida["df_final_csv"])) == 6
+        assert corrida["gal_csvs"]
+
+    df_hist = pd.read_csv(historico, sep=";")
+    assert len(df_hist) == 12
+    assert set(df_hist["arquivo_corrida"]) == {"run1.xlsx", "run2.xlsx"}
+    assert set(df_hist["lote"].astype(str)) == {"L1"}
+
+    resumo_csv = pd.read_csv(tmp_path / "saida" / "resumo_lote.csv", sep=";")
+    assert len(resumo_csv) == 3
+    assert "tempo_analise_s" in resumo_csv.columns
+    assert "etapa_interpretacao_s" in resumo_csv.columns
+    with open(tmp_path / "saida" / "resumo_lote.json", encoding="utf-8") as f:
+        assert json.load(f)["sucesso"] == 2
+
+
+def test_analisar_lote_sem_historico_nem_gal(pastas, tmp_path):
+    corridas, mapas = pastas
+    _corrida_7500(corridas / "run1.xlsx")
+
+    resumo = analisar_lote(
+        [corridas / "run1.xlsx"],
+        exame=EXAME,
+        mapas=str(_mapa(mapas / "unico.csv")),
+        saida=str(tmp_path / "saida"),
+        workers=1,
+        historico=None,
+        gal=False,
+    )
+
+    corrida = resumo["corridas"][0]
+    assert corrida["status"] == "ok"
+    assert corrida["gal_csvs"] == []
+    assert "historico" not in corrida["tempos"]
+    assert not (tmp_path / "saida" / "run1" / "gal").exists()
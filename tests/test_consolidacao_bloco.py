@@ -0,0 +1,137 @@
+"""Consolidação do Status_Corrida por bloco (pares/trios) em placas de 96/384 poços."""
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.universal_engine import (
+    PRIORIDADE_STATUS_PADRAO,
+    _consolidar_por_bloco,
+    _inferir_bloco,
+)
+
+STATUS = ["Invalida (CN Detectado)", "Detectado", "Inconclusivo", "Nao Detectado", "", "Outro"]
+
+
+def _pocos(n_linhas, n_colunas, zero_pad=True):
+    fmt = "{}{:02d}" if zero_pad else "{}{}"
+    return [fmt.format(chr(ord("A") + l), c) for l in range(n_linhas) for c in range(1, n_colunas + 1)]
+
+
+def _referencia(df, bloco_tam, prioridades, orientacao):
+    """Implementação ingênua (laço por poço) usada como referência."""
+    def rank(valor):
+        texto = "" if pd.isna(valor) else str(valor)
+        for i, p in enumerate(prioridades):
+            if texto == p or (p and texto.startswith(p)):
+                return i
+        return len(prioridades) + (1 if texto == "" else 0)
+
+    blocos = {}
+    for idx, row in df.iterrows():
+        linha = ord(row["Poco"][0]) - ord("A")
+        col = int(row["Poco"][1:])
+        chave = (linha, (col - 1) // bloco_tam) if orientacao == "horizontal" else (linha // bloco_tam, col)
+        atual = blocos.get(chave)
+        if atual is None or rank(row["Status_Corrida"]) < rank(atual):
+            blocos[chave] = row["Status_Corrida"]
+    out = df.copy()
+    for idx, row in df.iterrows():
+        linha = ord(row["Poco"][0]) - ord("A")
+        col = int(row["Poco"][1:])
+        chave = (linha, (col - 1) // bloco_tam) if orientacao == "horizontal" else (linha // bloco_tam, col)
+        out.at[idx, "Status_Corrida"] = blocos[chave]
+    return out
+
+
+@pytest.mark.parametrize("n_linhas,n_colunas", [(8, 12), (16, 24)])
+@pytest.mark.parametrize("orientacao", ["horizontal", "vertical"])
+@pytest.mark.parametrize("bloco_tam", [2, 3])
+def test_paridade_com_referencia(n_linhas, n_colunas, orientacao, bloco_tam):
+    rng = np.random.default_rng(7)
+    pocos = _pocos(n_linhas, n_colunas)
+    df = pd.DataFrame({
+        "Poco": pocos,
+        "Status_Corrida": rng.choice(STATUS, size=len(pocos)),
+    }).sample(frac=1.0, random_state=1)
+
+    obtido = _consolidar_por_bloco(df, bloco_tam, orientacao=orientacao)
+    esperado = _referencia(df, bloco_tam, PRIORIDADE_STATUS_PADRAO, orientacao)
+
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+
+def test_pares_horizontais_alinhados_a_coluna_1():
+    df = pd.DataFrame({
+        "Poco": ["A01", "A02", "A03", "A04"],
+        "Status_Corrida": ["Nao Detectado", "Detectado", "Nao Detectado", "Inconclusivo"],
+    })
+
+    out = _consolidar_por_bloco(df, 2)
+
+    assert out["Status_Corrida"].tolist() == ["Detectado", "Detectado", "Inconclusivo", "Inconclusivo"]
+
+
+def test_pocos_sem_zero_e_grupos():
+    df = pd.DataFrame({
+        "Poco": ["B1", "b2", "C1+C2", "??"],
+        "Status_Corrida": ["Invalida", "Detectado", "Detectado", "Nao Detectado"],
+    })
+
+    out = _consolidar_por_bloco(df, 2)
+
+    assert out["Status_Corrida"].tolist() == ["Invalida", "Invalida", "Detectado", "Nao Detectado"]
+
+
+def test_prioridade_configuravel_e_valores_nao_listados_preservados():
+    df = pd.DataFrame({
+        "Poco": ["A01", "A02", "B01", "B02"],
+        "Status_Corrida": ["Detectado", "Nao Detectado", "Outro", ""],
+    })
+
+    out = _consolidar_por_bloco(df, 2, prioridades=["Nao Detectado", "Detectado"])
+
+    assert out["Status_Corrida"].tolist() == ["Nao Detectado", "Nao Detectado", "Outro", "Outro"]
+    assert df["Status_Corrida"].tolist()[0] == "Detectado"  # entrada não é alterada
+
+
+def test_placa_384_inferida_pelos_pocos():
+    df = pd.DataFrame({
+        "Poco": ["A13", "A14", "P23", "P24"],
+        "Status_Corrida": ["Detectado", "Nao Detectado", "Nao Detectado", "Invalida"],
+    })
+
+    out = _consolidar_por_bloco(df, 2)
+
+    assert out["Status_Corrida"].tolist() == ["Detectado", "Detectado", "Invalida", "Invalida"]
+
+
+def test_inferir_bloco_esquema_generico():
+    from services.exam_registry import ExamConfig
+
+    def cfg(esquema):
+        return SimpleNamespace(
+            esquema_agrupamento=esquema,
+            bloco_size=lambda: ExamConfig.bloco_size(SimpleNamespace(esquema_agrupamento=esquema)),
+        )
+
+    assert _inferir_bloco(cfg("96->48")) == 2
+    assert _inferir_bloco(cfg("96->36")) == 3
+    assert _inferir_bloco(cfg("384->192")) == 2
+    assert _inferir_bloco(cfg("384->96")) == 4
+    assert _inferir_bloco(cfg("96->96")) == 1
+
+
+def test_placa_384_em_tempo_linear():
+    pocos = _pocos(16, 24)
+    df = pd.DataFrame({
+        "Poco": pocos * 20,
+        "Status_Corrida": np.random.default_rng(0).choice(STATUS, size=len(pocos) * 20),
+    })
+
+    inicio = time.perf_counter()
+    _consolidar_por_bloco(df, 3)
+    assert time.perf_counter() - inicio < 1.0
@@ -0,0 +1,135 @@
+"""Testes do lock entre processos (services.csv_lock)."""
+
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from services import csv_lock as csv_lock_mod
+from services.csv_lock import (
+    CsvLockError,
+    FileLock,
+    csv_lock,
+    limpar_locks_antigos,
+    lock_obsoleto,
+    obter_info_lock,
+)
+
+
+def _incrementar(caminho: str, vezes: int) -> None:
+    contador = caminho + ".txt"
+    for _ in range(vezes):
+        with csv_lock(caminho, timeout=30, retry_interval=0.001):
+            with open(contador, "r", encoding="utf-8") as f:
+                valor = int(f.read() or 0)
+            with open(contador, "w", encoding="utf-8") as f:
+                f.write(str(valor + 1))
+
+
+def test_exclusivo_entre_processos(tmp_path):
+    caminho = str(tmp_path / "historico.csv")
+    (tmp_path / "historico.csv.txt").write_text("0", encoding="utf-8")
+
+    ctx = multiprocessing.get_context("fork" if os.name != "nt" else "spawn")
+    processos = [ctx.Process(target=_incrementar, args=(caminho, 40)) for _ in range(4)]
+    for p in processos:
+        p.start()
+    for p in processos:
+        p.join(60)
+
+    assert all(p.exitcode == 0 for p in processos)
+    assert (tmp_path / "historico.csv.txt").read_text(encoding="utf-8") == "160"
+    assert obter_info_lock(caminho) is None
+
+
+def test_leitores_compartilham_e_bloqueiam_escritor(tmp_path):
+    caminho = str(tmp_path / "historico.csv")
+
+    with csv_lock(caminho, modo="compartilhado", timeout=1):
+        with csv_lock(caminho, modo="compartilhado", timeout=0.2):
+            assert obter_info_lock(caminho)["leitores"] == 2
+        with pytest.raises(CsvLockError):
+            with csv_lock(caminho, timeout=0.3):
+                pass
+        # escritor que desistiu não deixa o .lock para trás
+        assert not (tmp_path / "historico.lock").exists()
+
+    with csv_lock(caminho, timeout=0.5):
+        with pytest.raises(CsvLockError):
+            with csv_lock(caminho, modo="compartilhado", timeout=0.2):
+                pass
+
+
+def test_conteudo_do_lock(tmp_path):
+    caminho = str(tmp_path / "historico.csv")
+    with csv_lock(caminho, lease=30):
+        info = obter_info_lock(caminho)
+        dados = json.loads((tmp_path / "historico.lock").read_text(encoding="utf-8"))
+
+    assert info["pid"] == os.getpid()
+    assert info["obsoleto"] is False
+    assert dados["modo"] == "exclusivo"
+    assert dados["expira_em"] > time.time()
+
+
+def test_lease_renovado_enquanto_em_uso(tmp_path):
+    caminho = str(tmp_path / "historico.csv")
+    with csv_lock(caminho, lease=0.3):
+        time.sleep(0.6)
+        assert not lock_obsoleto(tmp_path / "historico.lock")
+
+
+@pytest.mark.parametrize("conteudo", [
+    {"pid": os.getpid(), "host": "outra-maquina", "expira_em": time.time() - 5},
+    {"pid": 2 ** 22 + 12345, "host": csv_lock_mod._HOST, "expira_em": time.time() + 600},
+])
+def test_lock_orfao_e_recuperado(tmp_path, conteudo):
+    caminho = str(tmp_path / "historico.csv")
+    (tmp_path / "historico.lock").write_text(json.dumps(conteudo), encoding="utf-8")
+    if conteudo["host"] == csv_lock_mod._HOST and os.name == "nt":
+        pytest.skip("verificação de PID indisponível no Windows")
+
+    inicio = time.monotonic()
+    with csv_lock(caminho, timeout=2):
+        pass
+
+    assert time.monotonic() - inicio < 1
+    assert not list(tmp_path.iterdir())
+
+
+def test_lock_de_outra_maquina_valido_bloqueia(tmp_path):
+    caminho = str(tmp_path / "historico.csv")
+    conteudo = {"pid": 1, "host": "outra-maquina", "expira_em": time.time() + 600}
+    (tmp_path / "historico.lock").write_text(json.dumps(conteudo), encoding="utf-8")
+
+    with pytest.raises(CsvLockError, match="outra-maquina"):
+        with csv_lock(caminho, timeout=0.3):
+            pass
+
+
+def test_limpar_locks_antigos(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logs").mkdir()
+    vencido = {"pid": 1, "host": "outra-maquina", "expira_em": time.time() - 1}
+    valido = {"pid": 1, "host": "outra-maquina", "expira_em": time.time() + 600}
+    (tmp_path / "logs" / "a.lock").write_text(json.dumps(vencido), encoding="utf-8")
+    (tmp_path / "logs" / "b.lock").write_text(json.dumps(valido), encoding="utf-8")
+    (tmp_path / "logs" / "b.lock.r.x").write_text(json.dumps(vencido), encoding="utf-8")
+    (tmp_path / "logs" / "c.lock").touch()
+
+    assert limpar_locks_antigos(timeout=300) == 2
+    assert sorted(p.name for p in (tmp_path / "logs").iterdir()) == ["b.lock", "c.lock"]
+
+
+def test_backoff_exponencial_com_jitter():
+    esperas = [csv_lock_mod._backoff(0.05, t) for t in range(10)]
+    assert 0.025 <= esperas[0] <= 0.05
+    assert 0.05 <= esperas[1] <= 0.1
+    assert all(csv_lock_mod.BACKOFF_MAX / 2 <= e <= csv_lock_mod.BACKOFF_MAX for e in esperas[6:])
+
+
+def test_modo_invalido(tmp_path):
+    with pytest.raises(ValueError):
+        FileLock(str(tmp_path / "x.csv"), modo="qualquer")
@@ -0,0 +1,51 @@
+"""Carga do histórico do dashboard fora da thread do Tk (interface.dashboard)."""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("customtkinter")
+
+from interface.dashboard import (  # noqa: E402
+    COLUNAS_DASHBOARD,
+    agregar_historico,
+    carregar_dados_dashboard,
+)
+from services.history_store import HistoricoStore  # noqa: E402
+
+
+def _historico(tmp_path):
+    caminho = tmp_path / "historico_analises.csv"
+    HistoricoStore(str(caminho)).anexar(pd.DataFrame({
+        "id_registro": ["a", "b", "c", "d"],
+        "data_hora_analise": ["2025-03-01 08:00:00", "2025-03-01 09:30:00", "2025-03-02 10:00:00", "2025-03-03 17:45:00"],
+        "exame": ["VR1e2", "VR1e2", "ZDC", "ZDC"],
+        "status_corrida": ["Valida", "Invalida", "Aviso", "Valida"],
+        "SC2 - R": ["Detectado", "", "", ""],  # coluna de alvo não usada pelo dashboard
+    }))
+    return caminho
+
+
+def test_carga_le_so_colunas_do_dashboard(tmp_path):
+    dados = carregar_dados_dashboard(str(_historico(tmp_path)))
+
+    assert dados.origem == "real"
+    assert set(dados.df_historico.columns) <= set(COLUNAS_DASHBOARD)
+    assert pd.api.types.is_datetime64_any_dtype(dados.df_historico["data_hora"])
+    assert dados.df_historico["equipamento"].tolist() == ["VR1e2", "VR1e2", "ZDC", "ZDC"]
+    assert dados.cards == {"total": "4", "validas": "2", "alertas": "2", "ultima": "17:45"}
+    assert dados.por_dia["count"].tolist() == [2, 1, 1]
+
+
+def test_sem_arquivo_usa_exemplo(tmp_path):
+    dados = carregar_dados_dashboard(str(tmp_path / "nao_existe.csv"))
+
+    assert dados.origem == "exemplo"
+    assert dados.cards["total"] == "30"
+    assert dados.erro == ""
+
+
+def test_agregar_sem_datas_validas():
+    dados = agregar_historico(pd.DataFrame({"exame": ["X"], "status_corrida": ["Valida"]}))
+
+    assert dados.cards["ultima"] == "--:--"
+    assert dados.por_dia.empty
@@ -0,0 +1,148 @@
+"""Envio paralelo ao GAL (exportacao.envio_gal.EnvioParaleloGAL) contra um GAL local simulado."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+import simplejson as json
+
+envio_gal = pytest.importorskip("exportacao.envio_gal")
+
+LATENCIA = 0.02
+
+
+class _GalSimulado(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        servidor = self.server
+        corpo = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+        exame = json.loads(parse_qs(corpo)["exame"][0])
+        codigo = exame["registroInterno"]
+
+        with servidor.lock:
+            servidor.ativos += 1
+            servidor.max_ativos = max(servidor.max_ativos, servidor.ativos)
+            servidor.cookies.add(self.headers.get("Cookie", ""))
+            servidor.tentativas[codigo] = servidor.tentativas.get(codigo, 0) + 1
+            tentativa = servidor.tentativas[codigo]
+        time.sleep(LATENCIA)
+        with servidor.lock:
+            servidor.ativos -= 1
+
+        status, resposta = 200, {"success": True}
+        if codigo in servidor.instaveis and tentativa == 1:
+            status, resposta = 503, {"success": False, "message": "indisponível"}
+        elif codigo in servidor.recusados:
+            resposta = {"success": False, "errorMsg": "campo inválido"}
+        dados = json.dumps(resposta).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gal():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), _GalSimulado)
+    servidor.lock = threading.Lock()
+    servidor.ativos = servidor.max_ativos = 0
+    servidor.cookies, servidor.tentativas = set(), {}
+    servidor.instaveis, servidor.recusados = set(), set()
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+class _DriverFalso:
+    def get_cookies(self):
+        return [{"name": "JSESSIONID", "value": "abc123", "domain": "127.0.0.1", "path": "/"}]
+
+    def execute_script(self, _script):
+        return "Mozilla/5.0 (teste)"
+
+
+def _servico(gal):
+    servico = envio_gal.GalService(lambda *_args: None)
+    servico.base_url = f"http://127.0.0.1:{gal.server_address[1]}"
+    servico.endpoints = {"submit": "/bmh/entrada-resultados/gravar/"}
+    servico.panel_tests = {"1": ["influenzaa"]}
+    return servico
+
+
+def _payloads(n):
+    return [
+        {"registroInterno": f"{1000 + i}", "paciente": f"P{i}", "painel": 1, "resultados": {"influenzaa": 2}}
+        for i in range(n)
+    ]
+
+
+def _sem_espera(f):
+    return envio_gal.retry_with_backoff(retries=3, backoff_in_seconds=0)(f)
+
+
+def test_resultados_na_ordem_com_retentativa_e_recusa(gal):
+    gal.instaveis = {"1003", "1010"}
+    gal.recusados = {"1005"}
+    servico = _servico(gal)
+    payloads = _payloads(24)
+    progresso = []
+
+    envio = envio_gal.EnvioParaleloGAL(
+        servico, envio_gal.criar_sessao_autenticada(_DriverFalso()),
+        max_workers=6, politica_retentativa=_sem_espera,
+    )
+    resultados = envio.enviar(payloads, progresso=lambda feitos, total: progresso.append((feitos, total)))
+
+    assert [r["codigoAmostra"] for r in resultados] == [p["registroInterno"] for p in payloads]
+    status = {r["codigoAmostra"]: r["status"] for r in resultados}
+    assert status.pop("1005") == "erro"
+    assert set(status.values()) == {"sucesso"}
+    assert gal.tentativas["1003"] == gal.tentativas["1010"] == 2
+    assert resultados[5]["campos_invalidos"][0]["campo"] == "influenzaa"
+    assert sorted(progresso) == [(i, 24) for i in range(1, 25)]
+    assert gal.cookies == {"JSESSIONID=abc123"}
+
+
+def test_concorrencia_por_host_respeitada(gal):
+    envio = envio_gal.EnvioParaleloGAL(
+        _servico(gal), envio_gal.criar_sessao_autenticada(_DriverFalso()),
+        max_workers=8, max_por_host=3,
+    )
+    envio.enviar(_payloads(30))
+
+    assert 1 < gal.max_ativos <= 3
+
+
+def test_limite_de_taxa():
+    limitador = envio_gal.LimitadorTaxa(por_segundo=50)
+    inicio = time.perf_counter()
+    for _ in range(11):
+        limitador.aguardar()
+    assert time.perf_counter() - inicio >= 0.19
+
+
+def test_envio_paralelo_mais_rapido_que_sequencial(gal):
+    servico = _servico(gal)
+    sessao = envio_gal.criar_sessao_autenticada(_DriverFalso())
+    payloads = _payloads(40)
+
+    inicio = time.perf_counter()
+    sequencial = [servico.enviar_amostra(sessao, p) for p in payloads]
+    tempo_sequencial = time.perf_counter() - inicio
+
+    envio = envio_gal.EnvioParaleloGAL(servico, sessao, max_workers=8, max_por_host=8)
+    inicio = time.perf_counter()
+    paralelo = envio.enviar(payloads)
+    tempo_paralelo = time.perf_counter() - inicio
+
+    assert paralelo == sequencial
+    assert tempo_paralelo * 3 < tempo_sequencial
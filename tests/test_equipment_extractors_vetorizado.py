@@ -0,0 +1,183 @@
+"""Extratores por coluna (services.equipment_extractors) contra a extração linha a linha anterior."""
+
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import equipment_extractors as ee
+from services.equipment_extractors import (
+    EquipmentConfig,
+    ExtratorError,
+    _normalizar_well,
+    _processar_ct,
+    _validar_formato_well,
+)
+from services.equipment_registry import get_registry
+from services.parsed_workbook import ParsedSheet, ParsedWorkbook, abrir_workbook
+
+RAIZ = Path(__file__).resolve().parents[1]
+EXTRATORES = ["7500", "7500_Extended", "CFX96", "CFX96_Export", "QuantStudio"]
+
+
+# ----------------------------------------------------------------------
+# Referência: laços com iterrows da implementação anterior
+# ----------------------------------------------------------------------
+
+def _vazio(texto):
+    return not texto or texto.upper() in ("NAN", "NONE", "")
+
+
+def _linhas_referencia(df, col_well, col_sample, col_target, col_ct, formato):
+    dados = []
+    for _, row in df.iterrows():
+        well = str(row.iloc[col_well]).strip() if col_well < len(row) else ""
+        sample = str(row.iloc[col_sample]).strip() if col_sample is not None and col_sample < len(row) else ""
+        target = str(row.iloc[col_target]).strip() if col_target is not None and col_target < len(row) else ""
+        ct_raw = row.iloc[col_ct] if col_ct < len(row) else None
+        if _vazio(well) or not _validar_formato_well(well, formato_esperado=formato):
+            continue
+        if _vazio(target):
+            continue
+        bem = _normalizar_well(well) if formato == "A1" else well
+        dados.append({"bem": bem, "amostra": sample, "alvo": target, "ct": _processar_ct(ct_raw)})
+    return dados
+
+
+def _referencia(nome, wb, config):
+    """Saída (DataFrame) ou mensagem de erro da extração linha a linha."""
+    e = config.xlsx_estrutura
+    col_ct = e["coluna_ct"]
+    if nome == "CFX96_Export":
+        df = wb.folha(0).tabela(header=None)
+        h1 = df.iloc[0].tolist() if len(df) > 0 else []
+        h2 = df.iloc[1].tolist() if len(df) > 1 else []
+        df = df.iloc[2:].reset_index(drop=True)
+        if df.empty:
+            return "Arquivo vazio ou sem dados"
+        pares = []
+        for i in range(len(h2) - 1):
+            if str(h2[i + 1]).strip().upper() in ("C(T)", "CT", "CQ"):
+                alvo = str(h2[i]).strip() if str(h2[i]).strip() not in ("", "nan") else str(h1[i]).strip()
+                if alvo and alvo != "nan":
+                    pares.append((i + 1, alvo))
+        if not pares:
+            return "Nenhum par (alvo, C(t)) identificado no arquivo CFX96_Export"
+        dados = []
+        for _, row in df.iterrows():
+            well = str(row.iloc[e["coluna_well"]]).strip() if e["coluna_well"] < len(row) else ""
+            col_s = e.get("coluna_sample")
+            sample = str(row.iloc[col_s]).strip() if col_s is not None and col_s < len(row) else ""
+            if _vazio(well) or not _validar_formato_well(well, formato_esperado="A01"):
+                continue
+            for col, alvo in pares:
+                ct = _processar_ct(row.iloc[col] if col < len(row) else None)
+                if ct is not None:
+                    dados.append({"bem": well, "amostra": sample, "alvo": alvo, "ct": ct})
+        return pd.DataFrame(dados) if dados else "Nenhum dado válido encontrado após extração"
+
+    inicio = e["linha_inicio"]
+    df = wb.folha(0).tabela(header=inicio - 2 if inicio > 1 else 0, nrows=1000)
+    if df.empty:
+        return "Arquivo vazio ou sem dados"
+    col_well = 1 if nome == "QuantStudio" else e["coluna_well"]
+    if nome in ("7500", "7500_Extended"):
+        if col_well >= len(df.columns):
+            return f"Coluna well (índice {col_well}) não existe no arquivo"
+        if col_ct >= len(df.columns):
+            return f"Coluna CT (índice {col_ct}) não existe no arquivo"
+    formato = "A01" if nome == "CFX96" else "A1"
+    dados = _linhas_referencia(df, col_well, e.get("coluna_sample"), e.get("coluna_target"), col_ct, formato)
+    return pd.DataFrame(dados) if dados else None
+
+
+def _comparar(nome, wb, config):
+    esperado = _referencia(nome, wb, config)
+    try:
+        obtido = ee.EXTRACTORS_MAP[nome]("arquivo.xlsx", config, workbook=wb)
+    except ExtratorError as erro:
+        assert not isinstance(esperado, pd.DataFrame), f"{nome}: {erro}"
+        if isinstance(esperado, str):
+            assert str(erro).startswith(esperado.split(":")[0])
+        return None
+    assert isinstance(esperado, pd.DataFrame), f"{nome}: esperado erro '{esperado}'"
+    pd.testing.assert_frame_equal(obtido, esperado)
+    return obtido
+
+
+def _config(nome, **estrutura):
+    return EquipmentConfig(nome=nome, xlsx_estrutura=estrutura)
+
+
+# ----------------------------------------------------------------------
+# Planilhas de exemplo do repositório
+# ----------------------------------------------------------------------
+
+@pytest.mark.parametrize("arquivo", ["exemploseegene.xlsx", "placa_teste.xlsx",
+                                     "tests/mock_qpcr_results.xlsx", "tests/mock_qpcr_controls.xlsx"])
+@pytest.mark.parametrize("nome", EXTRATORES)
+def test_paridade_configs_do_registry(arquivo, nome):
+    wb = abrir_workbook(str(RAIZ / arquivo))
+    _comparar(nome, wb, get_registry().get(nome))
+
+
+def test_paridade_seegene_com_colunas_da_planilha():
+    wb = abrir_workbook(str(RAIZ / "exemploseegene.xlsx"))
+
+    export = _comparar("CFX96_Export", wb, _config("CFX96_Export", linha_inicio=3, coluna_well=2, coluna_sample=3, coluna_ct=6))
+    assert len(export) > 0 and export["ct"].dtype == np.float64
+    assert set(export["alvo"]) <= {"E gene", "RdRP/S gene", "N gene", "IC"}
+    assert export.iloc[0].to_dict() == {"bem": "A01", "amostra": "827640119226", "alvo": "IC", "ct": 31.15}
+
+    # Uma coluna de alvo com "-" e a coluna C(t) do IC
+    linhas = _config("CFX96", linha_inicio=3, coluna_well=2, coluna_sample=3, coluna_target=5, coluna_ct=12)
+    cfx = _comparar("CFX96", wb, linhas)
+    assert len(cfx) == 96 and cfx["ct"].isna().sum() == 12
+    # Formato A1: só A10-H12 passam na validação do well
+    abi = _comparar("7500", wb, _config("7500", **linhas.xlsx_estrutura))
+    assert abi["bem"].tolist()[:2] == ["A10", "B10"] and len(abi) == 24
+
+
+def test_paridade_casos_de_borda():
+    linhas = [
+        ["Well", "Well Position", "x", "Sample", "Target", "Cq"],
+        [1, "A1", "", "S1", "N1", 25.5],
+        [2, " a2 ", "", "S2", "N1", "Undetermined"],
+        [3, "A3", "", "S3", "N1", "31,25"],
+        [4, "A13", "", "S4", "N1", 20],
+        [5, "I1", "", "S5", "N1", 20],
+        [6, "B1", "", "", "", 20],
+        [7, "B2", "", 123, "nan", 20],
+        [8, "B3", "", 456, "RP", " 28.1 "],
+        [9, "", "", "S9", "RP", 1],
+        [10, "H12", "", "S10", "RP", "N/A"],
+        [11, "C01", "", "S11", "RP", "-"],
+        [12, "C1", "", "S12", "RP", ""],
+    ]
+    wb = ParsedWorkbook("borda.xlsx", OrderedDict(Results=ParsedSheet("Results", linhas)))
+
+    for nome in ("7500", "QuantStudio"):
+        df = _comparar(nome, wb, _config(nome, linha_inicio=2, coluna_well=1, coluna_sample=3, coluna_target=4, coluna_ct=5))
+        assert df["bem"].tolist() == ["A01", "A02", "A03", "B03", "H12", "C01"]
+        assert df["amostra"].tolist()[3] == "456"
+        np.testing.assert_array_equal(df["ct"], [25.5, np.nan, 31.25, 28.1, np.nan, np.nan])
+
+    _comparar("CFX96", wb, _config("CFX96", linha_inicio=2, coluna_well=1, coluna_sample=3, coluna_target=4, coluna_ct=5))
+
+
+def test_sem_ct_mantem_coluna_de_none():
+    linhas = [["Well", "Sample", "Target", "Cq"], ["A1", "S1", "N1", "Undetermined"], ["A2", "S2", "N1", ""]]
+    wb = ParsedWorkbook("nd.xlsx", OrderedDict(Results=ParsedSheet("Results", linhas)))
+
+    df = _comparar("7500", wb, _config("7500", linha_inicio=2, coluna_well=0, coluna_sample=1, coluna_target=2, coluna_ct=3))
+    assert df["ct"].tolist() == [None, None]
+
+
+def test_processar_ct_serie_igual_ao_escalar():
+    valores = pd.Series([25.5, "25,5", " 30.1 ", "Undetermined", "No Amp", "N/A", "-", "", None,
+                         np.nan, 3, True, "abc", "1.234,5", pd.Timestamp("2021-01-01")], dtype=object)
+    esperado = [_processar_ct(v) for v in valores]
+    obtido = ee._processar_ct_serie(valores)
+    assert [None if np.isnan(v) else v for v in obtido] == esperado
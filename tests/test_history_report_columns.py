@@ -4,6 +4,7 @@ from types import SimpleNamespace
 import pandas as pd
 
 import services.history_report as hr
+from services.history_store import HistoricoStore
 
 
 def test_gerar_historico_csv_adds_missing_columns_without_set_indexer(monkeypatch):
@@ -47,7 +48,8 @@ def test_gerar_historico_csv_adds_missing_columns_without_set_indexer(monkeypatc
             caminho_csv=csv_path,
         )
 
-        result = pd.read_csv(csv_path, sep=";")
+        # Histórico é append-only: colunas novas vivem no schema lateral até a compactação
+        result = HistoricoStore(csv_path).ler()
         # Colunas essenciais esperadas
         expected_cols = {
             "id_registro",
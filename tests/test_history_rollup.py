@@ -0,0 +1,188 @@
+"""Agregados diários do histórico (services.history_rollup) e relatórios sobre eles."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import services.history_report as hr
+from analise.relatorios_qualidade_gerenciais import (
+    ProducaoColumnConfig,
+    QualidadeColumnConfig,
+    gerar_relatorio_indicadores_qualidade_periodo,
+    gerar_relatorio_indicadores_qualidade_rollup,
+    gerar_relatorio_positividade_exame_periodo,
+    gerar_relatorio_positividade_exame_rollup,
+    gerar_relatorio_producao_periodo,
+    gerar_relatorio_producao_rollup,
+    gerar_relatorio_produtividade_equipamento,
+    gerar_relatorio_produtividade_equipamento_rollup,
+)
+from services.history_rollup import RollupDiario, RollupStore, classificar_historico
+from services.history_store import HistoricoStore
+
+COLS_QUALIDADE = QualidadeColumnConfig(
+    run_id="id_corrida", exam="exame", equipment="equipamento", sample_type="tipo_amostra",
+    control_type="tipo_controle", result="resultado", ct="ct", retest_flag="reteste",
+)
+COLS_PRODUCAO = ProducaoColumnConfig(
+    run_id="id_corrida", run_datetime="data_hora", exam="exame", equipment="equipamento",
+    sample_type="tipo_amostra",
+)
+
+
+def _corrida(rng, inicio, exame, equipamento, n_amostras=20):
+    """Linhas de uma corrida no formato de gerar_historico_csv (+ equipamento)."""
+    quando = inicio + pd.Timedelta(minutes=int(rng.integers(0, 400 * 24 * 60)))
+    codigos = [str(c) for c in rng.integers(1000, 9999, n_amostras)] + ["CN", "CP", "CP2"]
+    n = len(codigos)
+    cts = rng.normal(28, 2, n).round(3)
+    return pd.DataFrame({
+        "data_hora_analise": quando.strftime("%Y-%m-%d %H:%M:%S"),
+        "exame": exame,
+        "equipamento": equipamento,
+        "arquivo_corrida": f"placa_{rng.integers(1e9)}.xlsx",
+        "codigo": codigos,
+        "status_corrida": rng.choice(["Valida", "Invalida"], p=[0.9, 0.1]) if rng.random() < 0.3 else "Valida",
+        "SC2 - R": [f"SC2 - {c}" for c in rng.choice(["1", "2", "3", ""], n, p=[0.2, 0.6, 0.1, 0.1])],
+        "SC2 - CT": [f"{v:.3f}".replace(".", ",") if rng.random() < 0.8 else "" for v in cts],
+        "RP - CT": "25,000",
+        "reteste": rng.choice(["", "sim"], n, p=[0.9, 0.1]),
+    })
+
+
+@pytest.fixture
+def historico():
+    rng = np.random.default_rng(11)
+    inicio = pd.Timestamp("2024-01-01")
+    corridas = [
+        _corrida(rng, inicio, exame, equip)
+        for exame, equip in [("VR1e2", "ABI 7500"), ("ZDC", "ABI 7500"), ("VR1e2", "QuantStudio")] * 25
+    ]
+    return pd.concat(corridas, ignore_index=True)
+
+
+def _comparar(obtido, esperado):
+    pd.testing.assert_frame_equal(
+        obtido.reset_index(drop=True), esperado.reset_index(drop=True),
+        check_dtype=False, check_exact=False, rtol=1e-9, atol=1e-9,
+    )
+
+
+def test_classificacao_do_historico():
+    df = pd.DataFrame({
+        "data_hora_analise": ["2024-05-01 10:00:00"] * 4,
+        "exame": "VR1e2",
+        "codigo": ["123", "CN", "CP", "456"],
+        "status_corrida": ["Valida", "Valida", "Valida", "Inválida"],
+        "SC2 - R": ["SC2 - 2", "SC2 - 2", "SC2 - 1", "SC2 - 1"],
+        "HMPV - R": ["HMPV - 3", "", "", ""],
+        "SC2 - CT": ["", "", "20,100", "31,5"],
+        "HMPV - CT": ["33,000", "", "22,000", ""],
+        "RP_1 - CT": ["18,000"] * 4,
+    })
+
+    out = classificar_historico(df, equipamento="ABI 7500")
+
+    assert out["tipo_amostra"].tolist() == ["amostra", "controle", "controle", "amostra"]
+    assert out["tipo_controle"].tolist() == ["", "controle negativo", "controle positivo", ""]
+    assert out["resultado"].tolist() == ["inconclusivo", "negativo", "positivo", "invalido"]
+    assert out["ct"].tolist()[2:] == [20.1, 31.5]
+    assert out["ct"].tolist()[0] == 33.0
+    assert np.isnan(out["ct"].iloc[1])
+    assert (out["equipamento"] == "ABI 7500").all()
+
+
+@pytest.mark.parametrize("frequencia", ["W", "M", "Y"])
+def test_relatorios_de_qualidade_iguais_ao_historico_bruto(historico, frequencia):
+    bruto = classificar_historico(historico)
+    rollup = RollupDiario.de_historico(historico)
+    inicio, fim = pd.Timestamp("2024-02-01"), pd.Timestamp("2024-12-31")
+
+    _comparar(
+        gerar_relatorio_indicadores_qualidade_rollup(rollup.diario, inicio, fim, frequencia),
+        gerar_relatorio_indicadores_qualidade_periodo(bruto, COLS_QUALIDADE, inicio, fim + pd.Timedelta("1D") - pd.Timedelta("1ns"), frequencia),
+    )
+    _comparar(
+        gerar_relatorio_positividade_exame_rollup(rollup.diario, frequencia=frequencia),
+        gerar_relatorio_positividade_exame_periodo(bruto, COLS_QUALIDADE, frequencia=frequencia),
+    )
+
+
+@pytest.mark.parametrize("frequencia", ["D", "W", "M", "Y"])
+def test_relatorios_de_producao_iguais_ao_historico_bruto(historico, frequencia):
+    bruto = classificar_historico(historico)
+    rollup = RollupDiario.de_historico(historico)
+
+    _comparar(
+        gerar_relatorio_producao_rollup(rollup.diario, rollup.corridas, frequencia=frequencia),
+        gerar_relatorio_producao_periodo(bruto, COLS_PRODUCAO, frequencia=frequencia),
+    )
+    _comparar(
+        gerar_relatorio_produtividade_equipamento_rollup(rollup.diario, rollup.corridas, frequencia=frequencia),
+        gerar_relatorio_produtividade_equipamento(bruto, COLS_PRODUCAO, frequencia=frequencia),
+    )
+
+
+def test_acumulo_incremental_igual_a_reconstrucao(tmp_path, historico):
+    caminho = str(tmp_path / "historico_analises.csv")
+    store = RollupStore(caminho)
+    for _, corrida in historico.groupby(["data_hora_analise", "arquivo_corrida"], sort=False):
+        HistoricoStore(caminho).anexar(corrida)
+        store.acumular(corrida)
+
+    incremental = store.ler()
+    reconstruido = store.reconstruir()
+    completo = RollupDiario.de_historico(historico)
+
+    for rollup in (incremental, reconstruido):
+        _comparar(rollup.diario, completo.diario)
+        _comparar(rollup.corridas, completo.corridas)
+    assert len(incremental.diario) < len(historico)
+
+
+def test_primeiro_acumulo_em_historico_antigo_reconstroi(tmp_path, historico):
+    caminho = str(tmp_path / "historico_analises.csv")
+    corridas = [c for _, c in historico.groupby(["data_hora_analise", "arquivo_corrida"], sort=False)]
+    for corrida in corridas[:-1]:
+        HistoricoStore(caminho).anexar(corrida)  # instalação anterior aos agregados
+    store = RollupStore(caminho)
+    assert not store.existe()
+
+    HistoricoStore(caminho).anexar(corridas[-1])
+    store.acumular(corridas[-1])
+
+    completo = RollupDiario.de_historico(historico)
+    _comparar(store.ler().diario, completo.diario)
+    _comparar(store.ler().corridas, completo.corridas)
+
+    # Com o rollup criado, as corridas seguintes voltam a ser só somadas
+    nova = corridas[0].assign(arquivo_corrida="nova.xlsx")
+    HistoricoStore(caminho).anexar(nova)
+    store.acumular(nova)
+    assert store.ler().corridas["n_corridas"].sum() == completo.corridas["n_corridas"].sum() + 1
+
+
+def test_gerar_historico_csv_atualiza_rollup(tmp_path, monkeypatch):
+    fake_cfg = SimpleNamespace(alvos=["SC2"], rps=[], equipamento="ABI 7500", normalize_target=lambda x: x)
+    monkeypatch.setattr(hr, "get_exam_cfg", lambda nome: fake_cfg)
+    caminho = str(tmp_path / "hist.csv")
+    df_final = pd.DataFrame({
+        "Codigo": ["123", "456", "CP"],
+        "Poco": ["A1", "A2", "A3"],
+        "Status_Corrida": "Valida",
+        "Resultado_SC2": ["Detectado", "Nao Detectado", "Detectado"],
+        "SC2 - CT": [30.0, None, 21.5],
+    })
+
+    hr.gerar_historico_csv(df_final, exame="VR1e2", usuario="tester", arquivo_corrida="run.xlsx", caminho_csv=caminho)
+    hr.gerar_historico_csv(df_final, exame="VR1e2", usuario="tester", arquivo_corrida="run2.xlsx", caminho_csv=caminho)
+
+    rollup = RollupStore(caminho).ler()
+    assert rollup.corridas["n_corridas"].sum() == 2
+    assert (rollup.diario["equipamento"] == "ABI 7500").all()
+    por_resultado = rollup.diario.groupby(["tipo_amostra", "resultado"])["n"].sum().to_dict()
+    assert por_resultado == {("amostra", "negativo"): 2, ("amostra", "positivo"): 2, ("controle", "positivo"): 2}
+    controle = rollup.diario[rollup.diario["tipo_amostra"] == "controle"].iloc[0]
+    assert (controle["ct_n"], controle["ct_soma"], controle["ct_min"]) == (2, 43.0, 21.5)
@@ -0,0 +1,148 @@
+"""Testes do backend SQLite do histórico (services/history_sqlite.py)."""
+
+import sqlite3
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from services.history_gal_sync import criar_gal_sync
+from services.history_sqlite import HistoricoGALSyncSQLite
+from services.history_store import HistoricoStore
+
+
+def _historico(n=6):
+    linhas = []
+    for i in range(n):
+        linhas.append(
+            {
+                "id_registro": f"id-{i}",
+                "data_hora_analise": f"2025-12-0{1 + i % 3} 10:00:00",
+                "exame": "VR1" if i % 2 == 0 else "VR2",
+                "codigo": str(1000 + i),
+                "amostra": f"AM{i}",
+                "status_gal": "não enviado" if i < 4 else "não enviável",
+                "SC2 - R": "SC2 - 1",
+                "SC2 - CT": "20,100",
+            }
+        )
+    return pd.DataFrame(linhas)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    db = HistoricoGALSyncSQLite(str(tmp_path / "hist.db"))
+    db.anexar(_historico())
+    return db
+
+
+def test_indices_criados(backend):
+    with sqlite3.connect(str(backend.db_path)) as conn:
+        indices = [row[1] for row in conn.execute("PRAGMA index_list(historico)")]
+        colunas_idx = {
+            conn.execute(f"PRAGMA index_info({nome})").fetchone()[2] for nome in indices
+        }
+    assert {"id_registro", "status_gal", "exame", "data_hora_analise"} <= colunas_idx
+
+
+def test_busca_por_id_usa_indice(backend):
+    with sqlite3.connect(str(backend.db_path)) as conn:
+        plano = " ".join(
+            str(r[-1]) for r in conn.execute("EXPLAIN QUERY PLAN SELECT * FROM historico WHERE id_registro = ?", ("id-1",))
+        )
+    assert "idx_historico_id_registro" in plano
+    assert backend.obter_por_id("id-1")["amostra"] == "AM1"
+    assert backend.obter_por_id("inexistente") is None
+
+
+def test_marcar_enviado_atualiza_somente_ids(backend):
+    resultado = backend.marcar_enviado(["id-0", "id-2", "nao-existe"], usuario_envio="tester")
+
+    assert resultado["sucesso"] is True
+    assert resultado["registros_atualizados"] == 2
+    assert resultado["registros_nao_encontrados"] == ["nao-existe"]
+    assert backend.obter_por_id("id-0")["status_gal"] == "enviado"
+    assert backend.obter_por_id("id-0")["sucesso_envio"] == "True"
+    assert backend.obter_por_id("id-1")["status_gal"] == "não enviado"
+
+
+def test_obter_nao_enviados_e_status_lote(backend):
+    backend.marcar_falha_envio(["id-1"], usuario_envio="tester", erro="timeout")
+
+    nao_enviados = backend.obter_nao_enviados(exame="VR1")
+    assert list(nao_enviados["id_registro"]) == ["id-0", "id-2"]
+
+    resumo = backend.obter_status_lote(["id-0", "id-1", "id-4"])
+    assert resumo["total"] == 3
+    assert resumo["não enviado"] == 1
+    assert resumo["falha no envio"] == 1
+    assert resumo["não enviável"] == 1
+
+    backend.reabrir_para_envio(["id-1"])
+    assert backend.obter_por_id("id-1")["status_gal"] == "não enviado"
+
+
+def test_importar_csv_idempotente_e_exportar(tmp_path):
+    csv_path = tmp_path / "hist.csv"
+    HistoricoStore(str(csv_path)).anexar(_historico(4))
+    HistoricoStore(str(csv_path)).anexar(_historico(5).tail(1).assign(**{"FLU - CT": "31,000"}))
+
+    backend = HistoricoGALSyncSQLite(str(tmp_path / "hist.db"))
+    assert backend.importar_csv(str(csv_path)) == 5
+    assert backend.importar_csv(str(csv_path)) == 0
+    assert "FLU - CT" in backend.colunas()
+
+    destino = tmp_path / "export.csv"
+    assert backend.exportar_csv(str(destino)) == 5
+    df = pd.read_csv(destino, sep=";", dtype=str)
+    assert list(df["id_registro"]) == [f"id-{i}" for i in range(5)]
+    assert df.loc[4, "FLU - CT"] == "31,000"
+
+
+def _analise(monkeypatch, caminho, arquivo_corrida="run.xlsx"):
+    import services.history_report as hr
+
+    fake_cfg = SimpleNamespace(alvos=["SC2"], rps=[], equipamento="ABI 7500", normalize_target=lambda x: x)
+    monkeypatch.setattr(hr, "get_exam_cfg", lambda nome: fake_cfg)
+    df_final = pd.DataFrame({
+        "Codigo": ["123", "456"],
+        "Poco": ["A1", "A2"],
+        "Status_Corrida": "Valida",
+        "Resultado_SC2": ["Detectado", "Nao Detectado"],
+        "SC2 - CT": [30.0, None],
+    })
+    hr.gerar_historico_csv(df_final, exame="VR1e2", usuario="tester", arquivo_corrida=arquivo_corrida, caminho_csv=str(caminho))
+
+
+def test_sqlite_migrado_e_o_unico_backend(tmp_path, monkeypatch):
+    import services.history_report as hr
+
+    csv_path, db_path = tmp_path / "hist.csv", tmp_path / "hist.db"
+    _analise(monkeypatch, csv_path, "antes.xlsx")
+    db = HistoricoGALSyncSQLite(str(db_path))
+    assert db.importar_csv(str(csv_path)) == 2
+    csv_migrado = csv_path.read_bytes()
+
+    _analise(monkeypatch, db_path, "depois.xlsx")
+    ids = db.ler()["id_registro"].tolist()
+    resultado = hr.atualizar_status_gal(str(db_path), ids[:1], sucesso=True, usuario_envio="tester")
+    criar_gal_sync(str(db_path)).marcar_falha_envio(ids[1:2], "tester", "timeout")
+
+    assert (resultado["sucesso"], resultado["registros_atualizados"]) == (True, 1)
+    df_db = db.ler()
+    assert df_db["arquivo_corrida"].tolist() == ["antes.xlsx"] * 2 + ["depois.xlsx"] * 2
+    assert df_db["status_gal"].tolist() == ["enviado", "falha no envio", "não enviado", "não enviado"]
+    assert csv_path.read_bytes() == csv_migrado  # nada é espelhado no CSV
+
+    # E o caminho CSV não toca o banco
+    _analise(monkeypatch, csv_path, "csv.xlsx")
+    assert len(db.ler()) == 4
+
+
+def test_analise_com_caminho_db_grava_so_no_sqlite(tmp_path, monkeypatch):
+    db_path = tmp_path / "hist.db"
+    _analise(monkeypatch, db_path)
+
+    df_db = HistoricoGALSyncSQLite(str(db_path)).ler()
+    assert df_db["codigo"].tolist() == ["123", "456"]
+    assert not (tmp_path / "hist.csv").exists()
@@ -0,0 +1,104 @@
+"""Testes do armazenamento append-only do histórico (services/history_store.py)."""
+
+import threading
+import time
+
+import pandas as pd
+
+from services.history_store import HistoricoStore
+
+
+def _linhas(n, inicio=0, **extras):
+    return pd.DataFrame(
+        [{"id_registro": f"id{i}", "exame": "VR1", "status_gal": "não enviado", **extras} for i in range(inicio, inicio + n)]
+    )
+
+
+def test_primeiro_anexo_cria_arquivo_com_cabecalho(tmp_path):
+    store = HistoricoStore(str(tmp_path / "hist.csv"))
+    assert store.anexar(_linhas(3)) == 3
+
+    df = store.ler()
+    assert list(df.columns) == ["id_registro", "exame", "status_gal"]
+    assert len(df) == 3
+    assert not store.precisa_compactar()
+
+
+def test_coluna_nova_nao_reescreve_linhas_existentes(tmp_path):
+    csv_path = tmp_path / "hist.csv"
+    store = HistoricoStore(str(csv_path))
+    store.anexar(_linhas(2))
+    conteudo_antes = csv_path.read_bytes()
+
+    store.anexar(_linhas(1, inicio=2, **{"SC2 - R": "SC2 - 1"}))
+
+    # Prefixo do arquivo intacto (inclusive o cabeçalho): apenas append
+    assert csv_path.read_bytes().startswith(conteudo_antes)
+    assert store.precisa_compactar()
+    df = store.ler()
+    assert list(df.columns) == ["id_registro", "exame", "status_gal", "SC2 - R"]
+    assert df["SC2 - R"].isna().sum() == 2
+    assert df.loc[2, "SC2 - R"] == "SC2 - 1"
+
+
+def test_csv_legivel_sem_o_store_apos_compactar(tmp_path):
+    csv_path = tmp_path / "hist.csv"
+    store = HistoricoStore(str(csv_path))
+    store.anexar(_linhas(2))
+    store.anexar(_linhas(1, inicio=2, **{"SC2 - R": "SC2 - 1"}))
+    store.anexar(_linhas(1, inicio=3, **{"FLU - CT": "30,100"}))
+    df_store = store.ler()
+
+    store.compactar()
+
+    df_bruto = pd.read_csv(csv_path, sep=";")
+    pd.testing.assert_frame_equal(df_bruto, df_store)
+    assert df_bruto["id_registro"].tolist() == ["id0", "id1", "id2", "id3"]
+
+
+def test_atualizar_nao_perde_linhas_anexadas_durante_a_escrita(tmp_path):
+    store = HistoricoStore(str(tmp_path / "hist.csv"))
+    store.anexar(_linhas(2))
+    outra_estacao = threading.Thread(target=lambda: HistoricoStore(str(tmp_path / "hist.csv")).anexar(_linhas(1, inicio=2)))
+
+    def marcar(df):
+        outra_estacao.start()  # tenta anexar com o histórico já lido
+        time.sleep(0.2)
+        df.loc[df["id_registro"] == "id0", "status_gal"] = "enviado"
+
+    store.atualizar(marcar)
+    outra_estacao.join(timeout=10)
+
+    df = store.ler()
+    assert df["id_registro"].tolist() == ["id0", "id1", "id2"]
+    assert df["status_gal"].tolist() == ["enviado", "não enviado", "não enviado"]
+
+
+def test_compactar_funde_schema_no_cabecalho(tmp_path):
+    csv_path = tmp_path / "hist.csv"
+    store = HistoricoStore(str(csv_path))
+    store.anexar(_linhas(2))
+    store.anexar(_linhas(1, inicio=2, **{"FLU - CT": "30,100"}))
+
+    resumo = store.compactar()
+
+    assert resumo["colunas_incorporadas"] == ["FLU - CT"]
+    assert not store.precisa_compactar()
+    df_bruto = pd.read_csv(csv_path, sep=";")
+    assert "FLU - CT" in df_bruto.columns
+    assert len(df_bruto) == 3
+
+
+def test_ler_usecols_ignora_colunas_inexistentes(tmp_path):
+    store = HistoricoStore(str(tmp_path / "hist.csv"))
+    store.anexar(_linhas(2))
+
+    df = store.ler(usecols=["exame", "nao_existe"])
+
+    assert list(df.columns) == ["exame"]
+    assert len(df) == 2
+
+
+def test_ler_historico_inexistente_retorna_vazio(tmp_path):
+    store = HistoricoStore(str(tmp_path / "nao_existe.csv"))
+    assert store.ler().empty
@@ -0,0 +1,105 @@
+"""Tempos por etapa da análise (utils.instrumentacao e AnalysisService.analisar_corrida)."""
+
+import json
+import pstats
+import time
+from pathlib import Path
+
+import pytest
+
+from utils import instrumentacao
+from utils.instrumentacao import MedidorEtapas, capturar_perfil, gravar_metricas_jsonl
+
+
+def test_etapas_aninhadas_e_totais():
+    medidor = MedidorEtapas(memoria=False)
+    with medidor.etapa("leitura") as etapa:
+        time.sleep(0.02)
+        etapa.linhas = 10
+    with medidor.etapa("motor"):
+        with medidor.etapa("interpretacao", linhas=5):
+            sum(range(200_000))
+
+    dados = medidor.como_dict()
+
+    assert [(e["nome"], e.get("pai")) for e in dados["etapas"]] == [
+        ("leitura", None), ("interpretacao", "motor"), ("motor", None)
+    ]
+    leitura, interpretacao, motor = dados["etapas"]
+    assert leitura["linhas"] == 10 and interpretacao["linhas"] == 5
+    assert leitura["wall_ms"] >= 20 and leitura["cpu_ms"] < leitura["wall_ms"]
+    assert motor["wall_ms"] >= interpretacao["wall_ms"] > 0
+    assert dados["total_ms"] == pytest.approx(leitura["wall_ms"] + motor["wall_ms"], abs=0.01)
+    assert "pico_memoria_kb" not in leitura
+
+
+def test_etapa_com_erro_fica_registrada():
+    medidor = MedidorEtapas(memoria=False)
+    with pytest.raises(ValueError):
+        with medidor.etapa("regras"):
+            raise ValueError("regra inválida")
+
+    assert medidor.etapas[0].erro == "ValueError: regra inválida"
+
+
+def test_pico_de_memoria_por_etapa():
+    medidor = MedidorEtapas(memoria=True)
+    with medidor.etapa("motor"):
+        grande = bytearray(8 * 1024 * 1024)
+        del grande
+        with medidor.etapa("pequena"):
+            pequeno = bytearray(64 * 1024)
+            del pequeno
+
+    pequena, motor = medidor.etapas
+    assert 60 <= pequena.pico_memoria_kb < 1024
+    # o pico da etapa externa sobrevive ao reset feito pela interna
+    assert motor.pico_memoria_kb >= 8 * 1024
+
+
+def test_metricas_jsonl(tmp_path):
+    caminho = tmp_path / "metricas" / "etapas.jsonl"
+    gravar_metricas_jsonl({"exame": "VR1e2", "total_ms": 1.5}, str(caminho))
+    gravar_metricas_jsonl({"exame": "ZDC", "total_ms": 2.0}, str(caminho))
+
+    linhas = [json.loads(l) for l in caminho.read_text(encoding="utf-8").splitlines()]
+    assert [l["exame"] for l in linhas] == ["VR1e2", "ZDC"]
+    assert "data_hora" in linhas[0]
+
+
+def test_sem_destino_nao_grava(monkeypatch):
+    monkeypatch.setitem(instrumentacao._config, "metricas_jsonl", "")
+    assert gravar_metricas_jsonl({"exame": "VR1e2"}) is None
+
+
+def test_perfil_cprofile(tmp_path):
+    with capturar_perfil("corrida 1/A", modo="cprofile", diretorio=str(tmp_path)) as perfil:
+        sorted(range(10_000), key=lambda x: -x)
+
+    assert perfil.arquivo.endswith(".prof") and "corrida_1_A" in perfil.arquivo
+    assert pstats.Stats(perfil.arquivo).total_calls > 0
+
+
+def test_perfil_de_arquivo_com_ponto_no_nome_nao_sobrescreve(tmp_path):
+    arquivos = []
+    for _ in range(2):
+        with capturar_perfil("placa_2024.10.18", modo="cprofile", diretorio=str(tmp_path)) as perfil:
+            pass
+        arquivos.append(perfil.arquivo)
+
+    assert len(set(arquivos)) == 2 and all(Path(a).exists() for a in arquivos)
+    assert all(Path(a).name.startswith("placa_2024.10.18_") and a.endswith(".prof") for a in arquivos)
+
+
+def test_perfil_desligado_por_padrao(tmp_path, monkeypatch):
+    monkeypatch.setitem(instrumentacao._config, "perfil", "")
+    with capturar_perfil("corrida", diretorio=str(tmp_path)) as perfil:
+        pass
+
+    assert perfil.arquivo is None
+    assert not any(tmp_path.iterdir())
+
+
+def test_modo_de_perfil_invalido():
+    with pytest.raises(ValueError):
+        instrumentacao.configurar_instrumentacao(perfil="gprof")
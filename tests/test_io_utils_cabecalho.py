@@ -0,0 +1,110 @@
+"""Detecção do cabeçalho lendo só as primeiras linhas da planilha (utils.io_utils)."""
+
+import pandas as pd
+import pytest
+
+from services.universal_engine import AnaliseContexto, _ler_e_normalizar_arquivo, _try_reheader
+from utils.io_utils import (
+    detectar_cabecalho_excel,
+    detectar_linha_cabecalho,
+    localizar_linha_cabecalho,
+    read_data_with_auto_detection,
+)
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _planilha(caminho, n_meta=8, aba="Results", n_dados=5):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = aba
+    for i in range(n_meta):
+        ws.append([f"Meta {i}", f"valor {i}"])
+    ws.append(["Well", "Sample Name", "Target Name", "Cq"])
+    for i in range(n_dados):
+        ws.append([f"A{i + 1}", 42121000 + i if i != 2 else None, "N1", "Undetermined" if i == 1 else 20.5 + i])
+    wb.save(caminho)
+    return str(caminho)
+
+
+@pytest.fixture
+def contar_read_excel(monkeypatch):
+    chamadas = []
+    original = pd.read_excel
+
+    def contando(*args, **kwargs):
+        chamadas.append(kwargs)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_excel", contando)
+    return chamadas
+
+
+def test_localizar_linha_cabecalho():
+    linhas = [["Experiment", None], ["Well", "Sample Name", "Target Name"], ["A1", "S1", "N1"]]
+    assert localizar_linha_cabecalho(linhas, ["well", "sample", "target"]) == 1
+    assert localizar_linha_cabecalho(linhas, ["Well", "Sample"], exato=True) is None
+    assert localizar_linha_cabecalho(linhas, ["Well", "Sample Name"], exato=True) == 1
+    assert localizar_linha_cabecalho(linhas, []) is None
+
+
+def test_detecta_cabecalho_e_devolve_previa(tmp_path):
+    caminho = _planilha(tmp_path / "corrida.xlsx")
+
+    cab = detectar_cabecalho_excel(caminho, sheet_name="Results", max_linhas=20)
+    assert (cab.linha, cab.encontrado) == (8, True)
+    assert len(cab.previa) == 14 and cab.previa[8][0] == "Well"
+
+    curta = detectar_cabecalho_excel(caminho, sheet_name="Results", max_linhas=5)
+    assert (curta.linha, curta.encontrado, len(curta.previa)) == (0, False, 5)
+
+    sem_aba = detectar_cabecalho_excel(caminho, sheet_name="Outra")
+    assert (sem_aba.linha, sem_aba.encontrado, sem_aba.previa) == (0, False, [])
+
+
+def test_read_data_faz_uma_leitura_completa(tmp_path, contar_read_excel):
+    caminho = _planilha(tmp_path / "corrida.xlsx")
+
+    assert detectar_linha_cabecalho(caminho) == 8
+    assert contar_read_excel == []
+
+    df = read_data_with_auto_detection(caminho)
+    assert len(contar_read_excel) == 1 and contar_read_excel[0]["skiprows"] == 8
+    assert list(df.columns) == ["Well", "Sample", "Target", "CT"]
+    assert df["Well"].tolist() == ["A1", "A2", "A3", "A4", "A5"]
+
+
+def test_sem_aba_results_retorna_none(tmp_path):
+    caminho = _planilha(tmp_path / "corrida.xlsx", aba="Dados")
+    assert detectar_linha_cabecalho(caminho) == 0
+    assert read_data_with_auto_detection(caminho) is None
+
+
+def test_universal_engine_le_a_planilha_uma_vez(tmp_path, contar_read_excel):
+    caminho = _planilha(tmp_path / "corrida.xlsx", aba="Plan1")
+    contexto = AnaliseContexto(
+        app_state=None, exame="", config_exame={}, config_placa={}, config_regras={},
+        config_equip={"tipo_arquivo": "xlsx", "coluna_poco": "Well", "coluna_amostra": "Sample Name",
+                      "coluna_alvo": "Target Name", "coluna_ct": "Cq"},
+        caminho_arquivo_corrida=caminho,
+    )
+
+    df = _ler_e_normalizar_arquivo(contexto)
+
+    assert len(contar_read_excel) == 1 and contar_read_excel[0]["header"] == 8
+    assert df["well"].tolist() == ["A1", "A2", "A3", "A4", "A5"]
+    assert df["sample_name"].tolist()[:2] == [42121000, 42121001]  # sem virar float
+    assert df["ct"].iloc[0] == 20.5 and pd.isna(df["ct"].iloc[1])
+
+
+def test_try_reheader_no_dataframe_lido():
+    df_raw = pd.DataFrame({
+        "Experiment": ["Operador", None, "Well", "A1"],
+        "x": ["Fulano", None, "Sample Name", "S1"],
+        "y": [None, None, "Target Name", "N1"],
+        "z": [None, None, None, 30.1],
+    })
+    out = _try_reheader(df_raw, ["Well", "Sample Name", "Target Name"])
+    assert list(out.columns) == ["Well", "Sample Name", "Target Name", "col_3"]
+    assert out["Well"].tolist() == ["A1"]
+    assert _try_reheader(out, ["Well"]) is out
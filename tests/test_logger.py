@@ -0,0 +1,77 @@
+"""Testes do logger em buffer (utils.logger.registrar_log)."""
+
+import csv
+import socket
+
+import pytest
+
+from utils import logger
+
+
+@pytest.fixture
+def log_tmp(tmp_path, monkeypatch):
+    logger.descarregar_logs()
+    caminho = tmp_path / "logs" / "sistema.log"
+    monkeypatch.setattr(logger, "LOG_FILE_PATH", str(caminho))
+    monkeypatch.setattr(logger, "_nivel_minimo", logger.NIVEIS_LOG["DEBUG"])
+    yield caminho
+    logger.descarregar_logs()
+
+
+def _linhas(caminho):
+    with open(caminho, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f, delimiter=";"))
+
+
+def test_formato_csv_inalterado(log_tmp):
+    logger.registrar_log("Análise", "detalhe; com separador", "info")
+    logger.descarregar_logs()
+
+    (linha,) = _linhas(log_tmp)
+    utilizador, host = logger._escritor.identificacao()
+    assert len(linha) == 6
+    assert linha[1:] == [utilizador, host, "Análise", "detalhe; com separador", "INFO"]
+    assert log_tmp.read_bytes().endswith(b"\r\n")
+
+
+def test_registos_ficam_em_buffer_ate_descarregar(log_tmp, monkeypatch):
+    monkeypatch.setattr(logger._escritor, "max_registros", 10_000)
+    monkeypatch.setattr(logger._escritor, "intervalo", 3600)
+    logger._escritor._acordar.set()  # reinicia a espera da thread com o novo intervalo
+
+    for i in range(50):
+        logger.registrar_log("Lote", f"linha {i}", "INFO")
+
+    logger.descarregar_logs()
+    linhas = _linhas(log_tmp)
+    assert [l[4] for l in linhas] == [f"linha {i}" for i in range(50)]
+
+
+def test_nivel_minimo_descarta_debug(log_tmp):
+    logger.definir_nivel_log("INFO")
+
+    assert not logger.log_habilitado("DEBUG")
+    assert logger.log_habilitado("warning")
+    logger.registrar_log("Motor", "ignorado", "DEBUG")
+    logger.registrar_log("Motor", "gravado", "WARNING")
+    logger.descarregar_logs()
+
+    assert [l[4] for l in _linhas(log_tmp)] == ["gravado"]
+
+
+def test_host_resolvido_uma_vez(log_tmp, monkeypatch):
+    chamadas = []
+
+    def resolver(nome):
+        chamadas.append(nome)
+        return "10.0.0.1"
+
+    monkeypatch.setattr(socket, "gethostbyname", resolver)
+    monkeypatch.setattr(logger._escritor, "_host", None)
+
+    for _ in range(20):
+        logger.registrar_log("Motor", "x", "INFO")
+    logger.descarregar_logs()
+
+    assert len(chamadas) == 1
+    assert {l[2] for l in _linhas(log_tmp)} == {"10.0.0.1"}
@@ -0,0 +1,117 @@
+"""Testes do cache de leituras de arquivos de corrida (services/parse_cache.py)."""
+
+import os
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from services import parse_cache as parse_cache_mod
+from services.equipment_detector import EquipmentDetector
+from services.equipment_extractors import extrair_dados_equipamento
+from services.equipment_registry import get_registry
+from services.parse_cache import ParseCache
+from services.parsed_workbook import ParsedWorkbook, limpar_cache_workbooks
+
+
+def _planilha_7500(caminho, ct_a1=21.5):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Instrument Type", "7500 Real-Time PCR System"])
+    ws.append([])
+    ws.append([])
+    ws.append(["Well", "Sample Name", "Target Name", "Cq"])
+    ws.append(["A1", "AM001", "SC2", ct_a1])
+    ws.append(["A1", "AM001", "RP", 25])
+    ws.append(["B1", "AM002", "SC2", "Undetermined"])
+    wb.save(caminho)
+    return str(caminho)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(parse_cache_mod, "_cache_instance", cache)
+    limpar_cache_workbooks()
+    leituras = []
+    original = ParsedWorkbook.carregar.__func__
+
+    def carregar_contando(cls, arquivo):
+        leituras.append(arquivo)
+        return original(cls, arquivo)
+
+    monkeypatch.setattr(ParsedWorkbook, "carregar", classmethod(carregar_contando))
+    cache.leituras = leituras
+    return cache
+
+
+def test_extracao_repetida_nao_le_excel(cache, tmp_path):
+    caminho = _planilha_7500(tmp_path / "run.xlsx")
+    config = get_registry().get("7500")
+
+    primeiro = extrair_dados_equipamento(caminho, config)
+    limpar_cache_workbooks()
+    segundo = extrair_dados_equipamento(caminho, config)
+
+    pd.testing.assert_frame_equal(primeiro, segundo)
+    assert len(cache.leituras) == 1
+    stats = cache.estatisticas()
+    assert stats["por_tipo"]["extrator"] == {"hits": 1, "misses": 1}
+    assert stats["entradas"] == 1
+
+
+def test_chave_depende_do_conteudo_e_do_mapa(cache, tmp_path):
+    caminho = _planilha_7500(tmp_path / "run.xlsx")
+    config = get_registry().get("7500")
+    extrair_dados_equipamento(caminho, config)
+
+    _planilha_7500(tmp_path / "run.xlsx", ct_a1=30.0)
+    df = extrair_dados_equipamento(caminho, config)
+    assert df.loc[0, "ct"] == 30.0
+
+    outro = get_registry().get("7500_Extended")
+    assert cache.chave(caminho, "extrator", "x", "1", outro.xlsx_estrutura) != cache.chave(
+        caminho, "extrator", "x", "1", config.xlsx_estrutura
+    )
+    assert cache.estatisticas()["por_tipo"]["extrator"] == {"hits": 0, "misses": 2}
+
+
+def test_deteccao_repetida_usa_cache(cache, tmp_path):
+    caminho = _planilha_7500(tmp_path / "run.xlsx")
+    detector = EquipmentDetector()
+
+    primeiro = detector.detectar_equipamento(caminho)
+    limpar_cache_workbooks()
+    segundo = detector.detectar_equipamento(caminho)
+
+    assert primeiro == segundo
+    assert len(cache.leituras) == 1
+    assert cache.estatisticas()["por_tipo"]["detector"] == {"hits": 1, "misses": 1}
+
+
+def test_evicao_lru_respeita_limite(tmp_path):
+    df = pd.DataFrame({"bem": ["A01"] * 50, "ct": [20.0] * 50})
+    medida = ParseCache(str(tmp_path / "medida"))
+    medida.salvar_dataframe("x", df)
+    cache = ParseCache(str(tmp_path / "cache"), max_bytes=medida.estatisticas()["bytes"] * 2)
+
+    cache.salvar_dataframe("antiga", df)
+    cache.salvar_dataframe("recente", df)
+    os.utime(tmp_path / "cache" / f"antiga{parse_cache_mod.EXT_DATAFRAME}", ns=(1, 1))
+    assert cache.obter_dataframe("antiga") is not None  # uso recente: "recente" vira a mais antiga
+    cache.salvar_dataframe("nova", df)
+
+    assert cache.obter_dataframe("recente") is None
+    assert cache.obter_dataframe("antiga") is not None
+    assert cache.obter_dataframe("nova") is not None
+    assert cache.estatisticas()["bytes"] <= cache.max_bytes
+
+
+def test_entrada_corrompida_conta_como_falta(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    cache.salvar_json("det", {"equipamento": "7500"})
+    (tmp_path / "cache" / "det.json").write_text("{corrompido", encoding="utf-8")
+
+    assert cache.obter_json("det") is None
+    assert not (tmp_path / "cache" / "det.json").exists()
+    assert cache.estatisticas()["misses"] == 1
@@ -0,0 +1,133 @@
+"""Testes do ParsedWorkbook (leitura única compartilhada por detector e extratores)."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from services import parsed_workbook
+from services.equipment_detector import analisar_estrutura_xlsx
+from services.equipment_extractors import ExtratorError, extrair_dados_equipamento
+from services.equipment_registry import get_registry
+from services.parsed_workbook import ParsedWorkbook, abrir_workbook, limpar_cache_workbooks
+
+RAIZ = Path(__file__).resolve().parent.parent
+ARQUIVOS = [
+    RAIZ / "exemploseegene.xlsx",
+    RAIZ / "placa_teste.xlsx",
+    RAIZ / "tests" / "mock_qpcr_results.xlsx",
+    RAIZ / "tests" / "mock_qpcr_nao_detectado.xlsx",
+]
+
+
+def _planilha_7500(caminho: Path) -> Path:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Results"
+    ws.append(["Block Type", "96-Well Block"])
+    ws.append(["Instrument Type", "7500 Real-Time PCR System"])
+    ws.append([])
+    ws.append(["Well", "Sample Name", "Target Name", "Cq"])
+    ws.append(["A1", "AM001", "SC2", 21.5])
+    ws.append(["A1", "AM001", "RP", 25])
+    ws.append(["B1", "AM002", "SC2", "Undetermined"])
+    ws.append(["B1", "AM002", "RP", 26.25])
+    wb.save(caminho)
+    return caminho
+
+
+@pytest.fixture(autouse=True)
+def _cache_limpo():
+    limpar_cache_workbooks()
+    yield
+    limpar_cache_workbooks()
+
+
+@pytest.mark.parametrize("arquivo", [a for a in ARQUIVOS if a.exists()], ids=lambda p: p.name)
+@pytest.mark.parametrize("header,nrows", [(None, None), (0, None), (1, 1000), (2, 5), (None, 5), (23, 1000)])
+def test_tabela_paridade_com_read_excel(arquivo, header, nrows):
+    ws = ParsedWorkbook.carregar(str(arquivo)).folha(0)
+    if header is not None and header >= ws.max_row:
+        pytest.skip("cabeçalho além do fim da planilha")
+
+    esperado = pd.read_excel(arquivo, header=header, nrows=nrows)
+    obtido = ws.tabela(header=header, nrows=nrows)
+
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+
+def test_acesso_por_celula_e_linha(tmp_path):
+    ws = ParsedWorkbook.carregar(str(_planilha_7500(tmp_path / "run.xlsx"))).folha()
+
+    assert ws.title == "Results"
+    assert ws.max_row == 8
+    assert ws.valor(4, 4) == "Cq"
+    assert ws.cell(6, 4).value == 25
+    assert ws.valor(3, 1) is None
+    assert ws.linha(5) == ["A1", "AM001", "SC2", 21.5]
+    assert ws.valor(99, 1) is None
+
+
+def test_xls_segue_semantica_do_read_excel(tmp_path):
+    xlwt = pytest.importorskip("xlwt")
+    caminho = tmp_path / "run.xls"
+    book = xlwt.Workbook()
+    sheet = book.add_sheet("Plan1")
+    for r, linha in enumerate([["Well", "Cq"], ["A1", 20.0], ["A2", 31.5]]):
+        for c, valor in enumerate(linha):
+            sheet.write(r, c, valor)
+    book.save(str(caminho))
+
+    ws = ParsedWorkbook.carregar(str(caminho)).folha()
+
+    pd.testing.assert_frame_equal(ws.tabela(header=0), pd.read_excel(caminho, header=0))
+    assert ws.valor(2, 2) == 20
+
+
+def test_abrir_workbook_reutiliza_leitura(tmp_path, monkeypatch):
+    caminho = _planilha_7500(tmp_path / "run.xlsx")
+    leituras = []
+    original = ParsedWorkbook.carregar.__func__
+
+    def carregar_contando(cls, arquivo):
+        leituras.append(arquivo)
+        return original(cls, arquivo)
+
+    monkeypatch.setattr(ParsedWorkbook, "carregar", classmethod(carregar_contando))
+
+    estrutura = analisar_estrutura_xlsx(str(caminho))
+    df = extrair_dados_equipamento(str(caminho), get_registry().get("7500"))
+
+    assert len(leituras) == 1
+    assert estrutura["coluna_well"] == 0
+    assert estrutura["linha_inicio_dados"] == 5
+    assert df["bem"].tolist() == ["A01", "A01", "B01", "B01"]
+    assert df["ct"].isna().tolist() == [False, False, True, False]
+
+
+def test_abrir_workbook_recarrega_quando_arquivo_muda(tmp_path):
+    caminho = _planilha_7500(tmp_path / "run.xlsx")
+    primeiro = abrir_workbook(str(caminho))
+    assert abrir_workbook(str(caminho)) is primeiro
+
+    wb = Workbook()
+    wb.active.append(["Well", "Sample Name", "Target Name", "Cq", "Extra"])
+    wb.save(caminho)
+
+    segundo = abrir_workbook(str(caminho))
+    assert segundo is not primeiro
+    assert segundo.folha().max_column == 5
+    assert len(parsed_workbook._cache) <= parsed_workbook._CACHE_MAX
+
+
+def test_extrator_aceita_workbook_carregado(tmp_path):
+    caminho = _planilha_7500(tmp_path / "run.xlsx")
+    wb = ParsedWorkbook.carregar(str(caminho))
+    caminho.unlink()
+
+    df = extrair_dados_equipamento(str(caminho), get_registry().get("7500"), workbook=wb)
+
+    assert len(df) == 4
+    with pytest.raises(ExtratorError):
+        extrair_dados_equipamento(str(caminho), get_registry().get("7500"))
@@ -49,13 +49,20 @@ class BenchmarkPerformance:
         print("="*70)
         
         tempos = []
+        tempos_prontos = []
         for i in range(num_execucoes):
             print(f"  Execução {i+1}/{num_execucoes}...", end=" ")
             
+            inicio = time.perf_counter()
             tempo_ms, dashboard = self.medir_tempo(Dashboard)
             tempos.append(tempo_ms)
             
-            print(f"{tempo_ms:.2f}ms")
+            # Carga do histórico em segundo plano: tempo até cards, gráfico e tabela prontos
+            dashboard.aguardar_carga()
+            tempo_pronto_ms = (time.perf_counter() - inicio) * 1000
+            tempos_prontos.append(tempo_pronto_ms)
+            
+            print(f"{tempo_ms:.2f}ms (pronto em {tempo_pronto_ms:.2f}ms)")
             
             # Destruir para não acumular janelas
             dashboard.destroy()
@@ -71,6 +78,8 @@ class BenchmarkPerformance:
         print(f"     Média: {tempo_medio:.2f}ms")
         print(f"     Mínimo: {tempo_min:.2f}ms")
         print(f"     Máximo: {tempo_max:.2f}ms")
+        tempo_pronto_medio = sum(tempos_prontos) / len(tempos_prontos)
+        print(f"     Pronto (média): {tempo_pronto_medio:.2f}ms")
         
         # Meta: < 2000ms (2 segundos)
         status = "✅ PASSOU" if tempo_medio < 2000 else "⚠️ ATENÇÃO" if tempo_medio < 3000 else "❌ FALHOU"
@@ -80,6 +89,7 @@ class BenchmarkPerformance:
             'media': tempo_medio,
             'min': tempo_min,
             'max': tempo_max,
+            'pronto_media': tempo_pronto_medio,
             'meta': 2000,
             'passou': tempo_medio < 2000
         }
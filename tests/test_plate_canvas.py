@@ -0,0 +1,83 @@
+"""PlateCanvas: grade em pixels, clique por aritmética e redesenho só dos poços alterados."""
+
+import tkinter as tk
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.plate_model import GEOMETRY_384, GEOMETRY_96, PlateModel, TargetResult
+from services.plate_viewer import CanvasLayout, PlateCanvas
+
+
+def _df_placa(linhas="ABCDEFGH", n_colunas=12):
+    pocos = [f"{r}{c}" for r in linhas for c in range(1, n_colunas + 1)]
+    n = len(pocos)
+    return pd.DataFrame({
+        "Poco": pocos,
+        "Amostra": [f"S{i}" for i in range(n)],
+        "Codigo": [str(1000 + i) for i in range(n)],
+        "Resultado_SC2": ["ND"] * n,
+        "CT_SC2": np.nan,
+    })
+
+
+@pytest.fixture
+def raiz_tk():
+    try:
+        raiz = tk.Tk()
+    except tk.TclError:
+        pytest.skip("Sem display para o Tk")
+    raiz.withdraw()
+    yield raiz
+    raiz.destroy()
+
+
+@pytest.mark.parametrize("geometria", [GEOMETRY_96, GEOMETRY_384])
+def test_layout_clique_no_centro_de_cada_poco(geometria):
+    layout = CanvasLayout(geometria)
+    for k, well_id in enumerate(geometria.well_ids):
+        x0, y0, x1, y1 = layout.cell_box(*divmod(k, geometria.cols))
+        assert layout.well_at((x0 + x1) / 2, (y0 + y1) / 2) == well_id
+    largura, altura = layout.size
+    assert x1 < largura and y1 < altura
+
+
+def test_layout_fora_dos_pocos():
+    layout = CanvasLayout(GEOMETRY_96)
+    x0, y0, x1, y1 = layout.cell_box(0, 0)
+    assert layout.well_at(5, 5) is None  # rótulos
+    assert layout.well_at(x1 + 1, y0 + 5) is None  # espaço entre A01 e A02
+    assert layout.well_at(*layout.size) is None
+    assert layout.truncate("123456789012") == "12345678.."
+
+
+def test_pop_redraw_wells():
+    model = PlateModel.from_df(_df_placa())
+    assert model.pop_redraw_wells() == []
+
+    model.get_well("C05").targets["SC2"] = TargetResult("Det", 22.0)
+    model.get_well("A01").code = "X"
+    model.recompute_dirty()
+
+    assert model.pop_redraw_wells() == ["A01", "C05"]
+    assert model.pop_redraw_wells() == []
+    assert model.dirty_wells == ["A01", "C05"]  # o delta da análise é independente
+
+
+def test_canvas_redesenha_so_os_pocos_alterados(raiz_tk, monkeypatch):
+    model = PlateModel.from_df(_df_placa("ABCDEFGHIJKLMNOP", 24))
+    canvas = PlateCanvas(raiz_tk, model)
+    assert len(canvas._rects) == 384
+
+    desenhados = []
+    original = canvas._draw_well
+    monkeypatch.setattr(canvas, "_draw_well", lambda w: (desenhados.append(w), original(w)))
+
+    model.get_well("P24").code = "NOVO"
+    canvas.schedule_redraw(model.pop_redraw_wells())
+    canvas.schedule_redraw(["P24"])
+    canvas.flush()
+
+    assert desenhados == ["P24"]
+    assert canvas.itemcget(canvas._texts["P24"], "text") == "NOVO"
@@ -0,0 +1,290 @@
+"""Modelo colunar da placa (services.plate_model): geometria 96/384, visões por poço e mapa em Excel."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.plate_model import (
+    CONTROL_CN,
+    CONTROL_CP,
+    GEOMETRY_384,
+    GEOMETRY_96,
+    INCONCLUSIVE,
+    INVALID,
+    NEGATIVE,
+    POSITIVE,
+    PlateGeometry,
+    PlateModel,
+    TargetResult,
+    exportar_placa_excel,
+    normalize_result,
+)
+from services.plate_report import gerar_mapa_placa_final
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _df_placa(linhas="ABCDEFGH", n_colunas=12):
+    pocos = [f"{r}{c}" for r in linhas for c in range(1, n_colunas + 1)]
+    n = len(pocos)
+    positivo = np.arange(n) % 3 == 0
+    return pd.DataFrame({
+        "Poco": pocos,
+        "Amostra": [f"S{i}" for i in range(n)],
+        "Codigo": [str(1000 + i) for i in range(n)],
+        "Resultado_SC2": np.where(positivo, "Detectado", "Não Detectado"),
+        "CT_SC2": np.where(positivo, 21.2345, np.nan),
+        "RP_1": ["25,5"] * n,
+    })
+
+
+def test_geometria():
+    assert (GEOMETRY_96.rows, GEOMETRY_96.cols, GEOMETRY_96.n_wells) == (8, 12, 96)
+    assert PlateGeometry.for_wells(384) is GEOMETRY_384
+    assert GEOMETRY_384.index("P24") == 383
+    assert GEOMETRY_384.index("b1") == GEOMETRY_384.index("B01") == 24
+    assert GEOMETRY_96.index("I01") is None
+    assert GEOMETRY_96.position("H12") == (7, 11)
+    with pytest.raises(ValueError):
+        PlateGeometry.for_wells(48)
+
+
+def test_from_df_96_pocos():
+    model = PlateModel.from_df(_df_placa())
+
+    assert model.geometry is GEOMETRY_96
+    assert len(model.wells) == 96 and list(model.wells)[:2] == ["A01", "A02"]
+    a1, a2 = model.wells["A01"], model.wells["A02"]
+    assert (a1.sample_id, a1.code, a1.status) == ("S0", "1000", POSITIVE)
+    assert a2.status == NEGATIVE
+    assert list(a1.targets) == ["RP_1", "SC2"]
+    assert a1.targets["SC2"] == TargetResult("Det", 21.2345)
+    assert a1.targets["RP_1"].ct == 25.5 and a2.targets["SC2"].ct is None
+    assert model.ct.shape == (96, 2) and model.result_codes.shape == (96, 2)
+
+
+def test_from_df_384_pocos():
+    model = PlateModel.from_df(_df_placa("ABCDEFGHIJKLMNOP", 24))
+
+    assert model.geometry is GEOMETRY_384
+    assert len(model.wells) == 384
+    assert model.wells["P24"].code == "1383"
+    assert PlateModel.from_df(_df_placa(), n_wells=384).geometry is GEOMETRY_384
+
+
+def test_visoes_gravam_nos_arrays():
+    model = PlateModel.from_df(_df_placa())
+    well = model.get_well("A02")
+
+    well.targets["SC2"] = TargetResult("Det", 30.0)
+    model._recompute_status(well)
+    assert well.status == POSITIVE
+    assert model.ct[GEOMETRY_96.index("A02"), model.target_names.index("SC2")] == 30.0
+
+    well.targets["SC2"].ct = None
+    assert well.targets["SC2"].ct is None
+
+    del well.targets["SC2"]
+    model.recompute_all()
+    assert "SC2" not in well.targets and well.status == INVALID
+
+    well.is_control = True
+    well.metadata["control_type"] = "CN"
+    model._recompute_status(well)
+    assert well.status == CONTROL_CN and dict(well.metadata) == {"control_type": "CN"}
+    well.metadata.pop("control_type", None)
+    assert dict(well.metadata) == {}
+
+
+def test_grupos_e_to_dataframe():
+    df = _df_placa().iloc[:4].copy()
+    df["Poco"] = ["A1+A2", "B1+B2", "C1", "CN"]
+    df.loc[2, "Codigo"] = "CN"
+
+    model = PlateModel.from_df(df)
+
+    assert model.exam_type == "48" and model.requires_group_frames
+    assert model.group_dict == {"A01+A02": ["A01", "A02"], "B01+B02": ["B01", "B02"]}
+    b2 = model.wells["B02"]
+    assert (b2.group_id, b2.group_size, b2.group_position, b2.paired_wells) == ("B01+B02", 2, 1, ["B01"])
+    assert model.wells["C01"].is_control  # "CN" no código
+    assert "CN" not in model.wells  # poço inválido é ignorado
+
+    out = model.to_dataframe()
+    assert out["Poco"].tolist() == ["A01+A02", "B01+B02", "C01"]
+    assert out["Resultado_SC2"].tolist() == ["Det", "ND", "ND"]
+    assert out["CT_SC2"].tolist() == [21.2345, "", ""]
+
+
+def test_exportar_placa_excel(tmp_path):
+    caminho = exportar_placa_excel(PlateModel.from_df(_df_placa()), str(tmp_path / "placa.xlsx"))
+
+    ws = openpyxl.load_workbook(caminho)["Placa"]
+    assert ws.dimensions == "A1:M9"
+    assert [ws.cell(row=1, column=c).value for c in (2, 13)] == [1, 12]
+    assert [ws.cell(row=r, column=1).value for r in (2, 9)] == ["A", "H"]
+    assert ws["B2"].value == "1000\nSC2: 21.235\nRP_1: 25.500"
+    assert ws["C2"].value == "1001\nSC2: --\nRP_1: 25.500"
+    assert ws["B2"].fill.fgColor.rgb == "00FFB3B3"
+
+
+def test_mapa_placa_384(tmp_path):
+    caminho = gerar_mapa_placa_final(_df_placa("ABCDEFGHIJKLMNOP", 24), str(tmp_path / "mapa.xlsx"))
+
+    ws = openpyxl.load_workbook(caminho)["Placa"]
+    assert ws.dimensions == "A1:Y17"
+    assert ws["Y17"].value.startswith("1383\n")
+
+
+# ----------------------------------------------------------------------
+# Referência: construção linha a linha do modelo anterior (dataclass por poço)
+# ----------------------------------------------------------------------
+
+_CN_NOMES = {"CN", "CONTROLE NEGATIVO", "C-", "NEGATIVO CONTROLE", "NEGATIVO", "CONTROLE N"}
+_CP_NOMES = {"CP", "CONTROLE POSITIVO", "C+", "POSITIVO CONTROLE", "POSITIVO", "CONTROLE P"}
+
+
+def _ref_ct(valor):
+    try:
+        return float(str(valor).replace(",", ".")) if valor is not None and str(valor).strip() != "" else None
+    except ValueError:
+        return None
+
+
+def _ref_status(poco):
+    if poco["controle"]:
+        return CONTROL_CN if poco["controle"] == "CN" else CONTROL_CP
+    textos = [res.upper() for alvo, (res, _ct) in poco["alvos"].items() if not alvo.upper().startswith("RP")]
+    for status, chaves in ((POSITIVE, ("DET", "POS")), (INCONCLUSIVE, ("INC",)), (NEGATIVE, ("ND",))):
+        if any(any(k in t for k in chaves) for t in textos):
+            return status
+    return INVALID
+
+
+def _referencia(df):
+    """Poços (status, amostra, código, alvos) e linhas de to_dataframe como no modelo anterior."""
+    alvos = [str(c).upper()[len("RESULTADO_"):] for c in df.columns if str(c).upper().startswith("RESULTADO_")]
+    col_ct = {
+        alvo: next((c for c in df.columns if str(c).upper() in (f"CT_{alvo}", f"{alvo} - CT")), None) for alvo in alvos
+    }
+    pocos, grupos = {}, {}
+    for _, row in df.iterrows():
+        ids = [f"{p.strip()[0].upper()}{int(p.strip()[1:]):02d}" for p in str(row["Poco"]).split("+") if p.strip()]
+        amostra = str(row.get("Amostra", "")).strip() or None
+        codigo = str(row.get("Codigo", "")).strip() or amostra
+        dados = {
+            str(c).upper(): ("", _ref_ct(row[c]))
+            for c in df.columns
+            if str(c).upper() == "RP" or str(c).upper().startswith("RP_")
+        }
+        for alvo in alvos:
+            ct = _ref_ct(row[col_ct[alvo]]) if col_ct[alvo] is not None else None
+            dados[alvo] = (normalize_result(str(row[f"Resultado_{alvo}"])), ct)
+        for well_id in ids:
+            poco = pocos.setdefault(well_id, {"amostra": "", "codigo": "", "alvos": {}, "grupo": None})
+            poco["amostra"] = poco["amostra"] or amostra or ""
+            poco["codigo"] = poco["codigo"] or codigo or ""
+            for alvo, (res, ct) in dados.items():
+                atual = poco["alvos"].setdefault(alvo, (res, ct))
+                if atual[1] is None and ct is not None:
+                    poco["alvos"][alvo] = (atual[0], ct)
+            if len(ids) > 1:
+                poco["grupo"] = "+".join(sorted(ids))
+                grupos.setdefault(poco["grupo"], []).append(well_id)
+            valores = {poco["amostra"].upper(), poco["codigo"].upper()} - {""}
+            poco["controle"] = next((t for t, nomes in (("CN", _CN_NOMES), ("CP", _CP_NOMES)) if valores & nomes), None)
+            poco["status"] = _ref_status(poco)
+
+    def linha(rotulo, poco):
+        registro = {"Poco": rotulo, "Amostra": poco["amostra"], "Codigo": poco["codigo"]}
+        for alvo, (res, ct) in poco["alvos"].items():
+            registro[f"Resultado_{alvo}"] = res
+            registro[f"CT_{alvo}"] = "" if ct is None else ct
+        return registro
+
+    linhas = [linha(g, pocos[ids[0]]) for g, ids in grupos.items()]
+    linhas += [linha(w, p) for w, p in pocos.items() if p["grupo"] not in grupos]
+    return pocos, linhas
+
+
+def _linhas(df):
+    """Linhas do DataFrame sem as células NaN de alvos ausentes no poço."""
+    return [{k: v for k, v in r.items() if not (isinstance(v, float) and np.isnan(v))} for r in df.to_dict("records")]
+
+
+def _df_paridade():
+    rng = np.random.default_rng(7)
+    n = 96
+    resultados = ["Detectado", "Não Detectado", "Inconclusivo", "", "SC2 - 1", "HMPV - 2", "ND"]
+    df = pd.DataFrame({
+        "Poco": [f"{r}{c}" for r in "ABCDEFGH" for c in range(1, 13)],
+        "Amostra": [f"S{i}" for i in range(n)],
+        "Codigo": [str(1000 + i) for i in range(n)],
+        "Resultado_SC2": rng.choice(resultados, n),
+        "CT_SC2": rng.choice(["", "20,5", "33.125", 18.0], n).astype(object),
+        "Resultado_HMPV": rng.choice(resultados, n),
+        "HMPV - CT": rng.choice(["", "31,2"], n),
+        "RP_1": rng.choice(["25,5", ""], n),
+    })
+    df.loc[5, "Codigo"] = "CN"
+    df.loc[6, ["Amostra", "Codigo"]] = ["CP", "123"]
+    df.loc[7, "Codigo"] = ""  # código cai para a amostra
+    df.loc[8, "Amostra"] = ""
+    return df
+
+
+def _comparar_com_referencia(df):
+    model = PlateModel.from_df(df)
+    pocos, linhas = _referencia(df)
+
+    assert list(model.wells) == list(pocos)
+    for well_id, poco in pocos.items():
+        well = model.wells[well_id]
+        assert (well.status, well.sample_id, well.code, well.group_id) == (
+            poco["status"], poco["amostra"], poco["codigo"], poco["grupo"]), well_id
+        assert {alvo: (t.result, t.ct) for alvo, t in well.targets.items()} == poco["alvos"], well_id
+    assert _linhas(model.to_dataframe()) == linhas
+    return model, pocos
+
+
+def test_paridade_com_o_modelo_anterior(tmp_path):
+    df = _df_paridade()
+    model, pocos = _comparar_com_referencia(df)
+    assert {POSITIVE, NEGATIVE, INCONCLUSIVE, INVALID, CONTROL_CN, CONTROL_CP} <= {p["status"] for p in pocos.values()}
+
+    ws = openpyxl.load_workbook(exportar_placa_excel(model, str(tmp_path / "placa.xlsx")))["Placa"]
+    for well_id, poco in pocos.items():
+        r, c = GEOMETRY_96.position(well_id)
+        ordem = sorted(poco["alvos"], key=lambda a: a.upper().startswith("RP"))
+        esperado = [poco["codigo"] or poco["amostra"]] + [
+            f"{a}: {'--' if poco['alvos'][a][1] is None else format(poco['alvos'][a][1], '.3f')}" for a in ordem
+        ]
+        assert ws.cell(row=r + 2, column=c + 2).value == "\n".join(esperado), well_id
+
+
+def test_paridade_pares_e_linhas_repetidas():
+    df = _df_paridade().iloc[:48].copy()
+    df["Poco"] = [f"{r}{c}+{r}{c + 1}" for r in "ABCDEFGH" for c in range(1, 13, 2)]
+    model, _ = _comparar_com_referencia(df)
+    assert model.exam_type == "48"
+
+    repetidas = pd.concat([_df_paridade().iloc[:10], _df_paridade().iloc[:10].assign(Amostra="X", CT_SC2=19.0)])
+    _comparar_com_referencia(repetidas.reset_index(drop=True))
+
+
+def test_diferencas_declaradas_com_o_modelo_anterior():
+    """CT NaN e resultado None: o modelo anterior exportava nan e "NONE"; agora ambos saem ""."""
+    df = _df_paridade().iloc[:4].copy()
+    df["CT_SC2"] = [np.nan, 20.0, np.nan, ""]
+    df["Resultado_SC2"] = [None, "Detectado", "Não Detectado", None]
+
+    model = PlateModel.from_df(df)
+    pocos, linhas = _referencia(df)
+
+    antigo = [(linha["Resultado_SC2"], linha["CT_SC2"]) for linha in linhas]
+    novo = list(zip(model.to_dataframe()["Resultado_SC2"], model.to_dataframe()["CT_SC2"]))
+    assert antigo[1] == novo[1] == ("Det", 20.0)
+    assert antigo[0][0] == antigo[3][0] == "NONE" and np.isnan(antigo[0][1]) and np.isnan(antigo[2][1])
+    assert novo[0] == ("", "") and novo[2] == ("ND", "") and novo[3] == ("", "")
+    # o status não muda: "NONE" e "" são igualmente inválidos
+    assert [model.wells[w].status for w in pocos] == [p["status"] for p in pocos.values()]
@@ -0,0 +1,86 @@
+"""Registro de alterações do PlateModel e delta aplicado no df da janela de análise."""
+
+import numpy as np
+import pandas as pd
+
+from services.plate_model import INVALID, POSITIVE, PlateModel, TargetResult
+
+
+def _df_analise(n_colunas=24):
+    pocos = [f"{r}{c}" for r in "ABCDEFGHIJKLMNOP" for c in range(1, n_colunas + 1)]
+    n = len(pocos)
+    return pd.DataFrame({
+        "Selecionado": False,
+        "Poco": pocos,
+        "Amostra": [f"S{i}" for i in range(n)],
+        "Codigo": [str(1000 + i) for i in range(n)],
+        "Resultado_SC2": ["ND"] * n,
+        "CT_SC2": np.nan,
+    })
+
+
+def test_edicao_gera_delta_de_uma_linha():
+    df = _df_analise()
+    model = PlateModel.from_df(df)
+    assert model.dirty_wells == [] and model.pop_delta().empty
+
+    well = model.get_well("B03")
+    well.targets["SC2"] = TargetResult("Det", 30.5)
+    well.code = well.code  # sem mudança: não marca
+    model.recompute_dirty()
+
+    assert model.dirty_wells == ["B03"] and well.status == POSITIVE
+    delta = model.pop_delta()
+    assert delta.columns == ["CT_SC2", "Resultado_SC2"]
+    assert delta.rows.to_dict("records") == [{"Poco": "B03", "CT_SC2": 30.5, "Resultado_SC2": "Det"}]
+    assert model.dirty_wells == []
+
+    indices = delta.apply_to(df)
+    assert list(indices) == [26]  # "B3" no df casa com "B03"
+    assert df.loc[26, "Resultado_SC2"] == "Det" and df.loc[26, "CT_SC2"] == 30.5
+    assert df["CT_SC2"].dtype == np.float64
+    assert (df.drop(index=26)["Resultado_SC2"] == "ND").all()
+
+
+def test_delta_de_grupo_usa_linha_do_grupo():
+    df = pd.DataFrame({
+        "Poco": ["A1+A2", "B1+B2"],
+        "Amostra": ["S1", "S2"],
+        "Codigo": ["11", "22"],
+        "Resultado_SC2": ["ND", "ND"],
+        "CT_SC2": ["", ""],
+    })
+    model = PlateModel.from_df(df)
+
+    model.get_well("B02").code = "99"
+
+    assert model.dirty_groups == {"B01+B02"}
+    delta = model.pop_delta()
+    assert delta.rows.to_dict("records") == [{"Poco": "B01+B02", "Codigo": "22"}]  # primeiro poço do grupo
+
+
+def test_coluna_nova_pede_sincronizacao_completa():
+    df = _df_analise(n_colunas=12).iloc[:96].copy()
+    model = PlateModel.from_df(df)
+    well = model.get_well("A01")
+    del well.targets["SC2"]
+    well.targets["SC2X"] = TargetResult("Det", 20.0)
+
+    antes = df.copy()
+    assert model.pop_delta().apply_to(df) is None
+    pd.testing.assert_frame_equal(df, antes)
+
+
+def test_recompute_dirty_so_nos_grupos_alterados():
+    model = PlateModel.from_df(_df_analise())
+    outro = model.get_well("P24")
+    model.status_codes[model.geometry.index("P24")] = 0  # status desatualizado fora do delta
+
+    well = model.get_well("A01")
+    well.targets["SC2"].result = ""
+    model.recompute_dirty()
+
+    assert well.status == INVALID
+    assert outro.status == "EMPTY"
+    delta = model.pop_delta()
+    assert delta.wells == ["A01"] and delta.columns == ["Resultado_SC2"]
@@ -3,9 +3,15 @@ Testes para Rules Engine - Etapa 2.5
 Testa aplicação de regras customizadas aos resultados.
 """
 
+import numpy as np
+import pandas as pd
 import pytest
 from datetime import datetime
 from services.rules_engine import (
+    CompiledRuleSet,
+    aplicar_regra_threshold,
+    obter_conjunto_regras,
+    limpar_cache_regras,
     Validacao,
     RulesResult,
     aplicar_regra_booleana,
@@ -615,3 +621,123 @@ class TestCasosExtremos:
         
         assert len(resultado.validacoes) == 50
         assert resultado.tempo_execucao_ms < 500  # < 500ms para 50 regras
+
+
+# ============================================================================
+# TESTES DE REGRAS COMPILADAS (POR AMOSTRA)
+# ============================================================================
+
+REGRAS_POR_AMOSTRA = {
+    'requer_dois_alvos': True,
+    'formulas': ['CT_SC2 < 30', '(CT_SC2 + CT_HMPV) / 2 < 33'],
+    'condicoes': [
+        {'if': 'CT_SC2 < 30', 'then': 'CT_HMPV < 35', 'descricao': 'SC2 exige HMPV', 'impacto': 'alto'},
+        {'if': "resultado_HMPV == 'Detectado'", 'then': 'CT_RP_1 < 30', 'descricao': 'HMPV com RP', 'impacto': 'baixo'},
+    ],
+    'thresholds': [{'variavel': 'CT_RP_1', 'min': 15, 'max': 35, 'descricao': 'RP na faixa', 'impacto': 'alto'}],
+    'sequencia': {'alvos_obrigatorios': ['SC2'], 'descricao': 'SC2 obrigatório'},
+    'exclusao_mutua': {'alvos': ['SC2', 'HMPV'], 'descricao': 'SC2 xor HMPV'},
+}
+
+
+def _df_final_sintetico() -> pd.DataFrame:
+    ct = [12.0, 25.0, 29.9, 30.0, 34.0, 36.0, np.nan]
+    linhas = []
+    for i, (sc2, hmpv, rp) in enumerate(
+        (a, b, r) for a in ct for b in ct for r in (10.0, 20.0, 40.0, np.nan)
+    ):
+        linhas.append({
+            'Poco': f"A{i}",
+            'Amostra': f"AM{i:03d}",
+            'Resultado_SC2': '' if np.isnan(sc2) else ('Detectado' if sc2 < 30 else 'Nao Detectado'),
+            'Resultado_HMPV': '' if np.isnan(hmpv) else ('Detectado' if hmpv < 35 else 'Nao Detectado'),
+            'SC2': sc2,
+            'HMPV': hmpv,
+            'RP_1': rp,
+            'Status_Corrida': 'Valida',
+        })
+    return pd.DataFrame(linhas)
+
+
+def _resultados_da_linha(linha: pd.Series) -> dict:
+    """Mesma amostra no formato de `aplicar_regras` (escalar)."""
+    alvos = {}
+    for alvo in ('SC2', 'HMPV'):
+        if linha[f'Resultado_{alvo}']:
+            alvos[alvo] = {
+                'resultado': linha[f'Resultado_{alvo}'],
+                'ct': None if pd.isna(linha[alvo]) else linha[alvo],
+            }
+    controles = {'RP_1': {'ct': None if pd.isna(linha['RP_1']) else linha['RP_1']}}
+    return {'alvos': alvos, 'controles': controles}
+
+
+class TestCompiledRuleSet:
+    """Testes do conjunto de regras compilado (uma passada por corrida)"""
+    
+    def test_paridade_com_aplicar_regras_por_amostra(self):
+        """Cada linha da matriz bate com aplicar_regras na amostra isolada"""
+        df = _df_final_sintetico()
+        
+        matriz, resultado = CompiledRuleSet(REGRAS_POR_AMOSTRA).aplicar(df)
+        
+        assert list(matriz.index) == list(df.index)
+        assert matriz.shape == (len(df), 8)
+        for idx, linha in df.iterrows():
+            esperado = aplicar_regras(REGRAS_POR_AMOSTRA, _resultados_da_linha(linha))
+            obtido = matriz.loc[idx].tolist()
+            assert obtido == [v.resultado for v in esperado.validacoes], linha.to_dict()
+        assert isinstance(resultado, RulesResult)
+    
+    def test_resultado_da_corrida_agrega_amostras(self):
+        """RulesResult da corrida falha a regra se alguma amostra falhou"""
+        df = pd.DataFrame({
+            'Amostra': ['AM1', 'AM2', 'AM3'],
+            'Resultado_SC2': ['Detectado', 'Detectado', ''],
+            'SC2': [20.0, 31.0, np.nan],
+        })
+        regras = {
+            'formulas': ['CT_SC2 < 30'],
+            'thresholds': [{'variavel': 'CT_SC2', 'max': 40, 'descricao': 'CT SC2 <= 40', 'impacto': 'baixo'}],
+        }
+        
+        matriz, resultado = CompiledRuleSet(regras).aplicar(df)
+        
+        assert matriz['Fórmula: CT_SC2 < 30'].tolist() == ['passou', 'falhou', 'falhou']
+        assert matriz['CT SC2 <= 40'].tolist() == ['passou', 'passou', 'nao_aplicavel']
+        assert resultado.status == "invalida"
+        formula, threshold = resultado.validacoes
+        assert formula.resultado == "falhou"
+        assert "AM2" in formula.detalhes and "AM3" in formula.detalhes
+        assert threshold.resultado == "passou"
+    
+    def test_df_vazio(self):
+        """Sem amostras, regras não se aplicam"""
+        matriz, resultado = CompiledRuleSet({'formulas': ['CT_SC2 < 30']}).aplicar(pd.DataFrame())
+        assert matriz.empty
+        assert resultado.validacoes[0].resultado == "nao_aplicavel"
+        assert resultado.status == "valida"
+    
+    def test_cache_por_exame_e_invalidacao(self):
+        """Conjunto é reutilizado até as regras do exame mudarem"""
+        limpar_cache_regras()
+        regras = {'formulas': ['CT_SC2 < 30']}
+        
+        primeiro = obter_conjunto_regras('VR1', regras)
+        assert obter_conjunto_regras('VR1', {'formulas': ['CT_SC2 < 30']}) is primeiro
+        assert obter_conjunto_regras('VR2', regras) is not primeiro
+        
+        alterado = obter_conjunto_regras('VR1', {'formulas': ['CT_SC2 < 35']})
+        assert alterado is not primeiro
+        assert obter_conjunto_regras('VR1', {'formulas': ['CT_SC2 < 35']}) is alterado
+    
+    def test_threshold_escalar(self, resultados_basicos):
+        """Regra de threshold na avaliação escalar"""
+        regra = {'variavel': 'CT_IC', 'min': 15, 'max': 30, 'descricao': 'IC na faixa'}
+        assert aplicar_regra_threshold(regra, resultados_basicos).resultado == "passou"
+        
+        regra = {'variavel': 'CT_IC', 'max': 20}
+        assert aplicar_regra_threshold(regra, resultados_basicos).resultado == "falhou"
+        
+        regra = {'variavel': 'CT_RP', 'min': 15}
+        assert aplicar_regra_threshold(regra, resultados_basicos).resultado == "nao_aplicavel"
@@ -0,0 +1,119 @@
+"""Tabela virtual (utils.gui_utils.TabelaVirtual) e suas fontes de dados."""
+
+import tkinter as tk
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.gui_utils import FonteDadosConsulta, FonteDadosDataFrame, LinhaTabela, TabelaVirtual
+
+
+@pytest.fixture
+def df_historico():
+    n = 10_000
+    rng = np.random.default_rng(5)
+    datas = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, n), unit="min")
+    return pd.DataFrame({
+        "data_hora": datas.strftime("%d/%m/%Y %H:%M:%S"),
+        "exame": rng.choice(["VR1e2", "ZDC", "HPV"], n),
+        "status": rng.choice(["Válida", "Aviso", None], n),
+    }, index=np.repeat(np.arange(n // 2), 2))  # índice duplicado de propósito
+
+
+def test_fatia_formatada_sem_materializar_o_resto(df_historico):
+    chamadas = []
+
+    def maiusculas(serie):
+        chamadas.append(len(serie))
+        return serie.str.upper()
+
+    fonte = FonteDadosDataFrame(df_historico, ["exame", "status"], formatadores={"exame": maiusculas})
+    linhas = fonte.linhas(100, 130)
+
+    assert chamadas == [30]
+    assert [l.iid for l in linhas] == [str(i) for i in range(100, 130)]
+    assert linhas[0].valores[0] == df_historico["exame"].iloc[100].upper()
+    assert all(l.valores[1] != None for l in linhas)  # noqa: E711 - NaN/None viram ""
+
+
+def test_filtro_e_ordenacao_vetorizados(df_historico):
+    datas = pd.to_datetime(df_historico["data_hora"], format="%d/%m/%Y %H:%M:%S")
+    fonte = FonteDadosDataFrame(
+        df_historico, ["data_hora", "exame"], chaves_ordenacao={"data_hora": lambda _s: datas},
+    )
+
+    fonte.ordenar("data_hora", decrescente=True)
+    fonte.filtrar((df_historico["exame"] == "ZDC").to_numpy())  # reaplica a ordenação
+
+    esperado = df_historico.assign(_d=datas.to_numpy())
+    esperado = esperado[esperado["exame"] == "ZDC"].sort_values("_d", ascending=False, kind="stable")
+    assert fonte.total() == len(esperado)
+    assert fonte.dataframe()["data_hora"].tolist() == esperado["data_hora"].tolist()
+    primeira = fonte.linhas(0, 1)[0]
+    assert fonte.registro(primeira.iid)["data_hora"] == esperado["data_hora"].iloc[0]
+
+    fonte.filtrar(None)
+    assert fonte.total() == len(df_historico)
+
+
+def test_ordenacao_vazios_no_fim(df_historico):
+    fonte = FonteDadosDataFrame(df_historico, ["status"])
+    fonte.ordenar("status")
+    status = fonte.dataframe()["status"]
+    n_vazios = status.isna().sum()
+    assert n_vazios and status.iloc[-n_vazios:].isna().all()
+
+
+def test_fonte_consulta_cacheia_total():
+    contagens = []
+    dados = [f"a{i}" for i in range(500)]
+
+    def contar():
+        contagens.append(1)
+        return len(dados)
+
+    fonte = FonteDadosConsulta(
+        contar=contar,
+        buscar=lambda offset, limite: [LinhaTabela(x, (x,)) for x in dados[offset:offset + limite]],
+    )
+    assert fonte.total() == fonte.total() == 500
+    assert len(contagens) == 1
+    assert [l.iid for l in fonte.linhas(490, 520)] == dados[490:]
+    fonte.invalidar()
+    fonte.total()
+    assert len(contagens) == 2
+
+
+@pytest.fixture
+def raiz_tk():
+    try:
+        raiz = tk.Tk()
+    except tk.TclError:
+        pytest.skip("Sem display para o Tk")
+    raiz.withdraw()
+    yield raiz
+    raiz.destroy()
+
+
+def test_widget_materializa_so_linhas_visiveis(raiz_tk, df_historico):
+    fonte = FonteDadosDataFrame(df_historico, ["data_hora", "exame", "status"])
+    tabela = TabelaVirtual(
+        raiz_tk,
+        colunas=[("data_hora", "Data", 100, "w"), ("exame", "Exame", 100, "w"), ("status", "Status", 80, "w")],
+        fonte=fonte,
+        height=15,
+    )
+    assert len(tabela.tree.get_children()) == 15
+
+    tabela.rolar_para(5000)
+    assert tabela.tree.get_children()[0] == "5000"
+
+    tabela.tree.selection_set("5001")
+    tabela._renderizando = False
+    tabela._on_select()
+    tabela.rolar_para(0)
+    assert tabela.selecao() == ["5001"]
+
+    tabela.rolar_para(10_000_000)
+    assert tabela.tree.get_children()[-1] == str(len(df_historico) - 1)
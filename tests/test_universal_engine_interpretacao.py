@@ -0,0 +1,108 @@
+"""Paridade entre o kernel vetorizado de interpretação de CT e a referência escalar."""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.universal_engine import (
+    AnaliseContexto,
+    _aplicar_regras_ct_e_interpretacao,
+    _ensure_sample_id,
+    _interpretar_com_rp,
+    _interpretar_matriz_ct,
+)
+
+FAIXAS = dict(
+    ct_detect_max=38.0,
+    ct_inconc_min=38.01,
+    ct_inconc_max=40.0,
+    ct_rp_min=15.0,
+    ct_rp_max=35.0,
+)
+
+VALORES_CT = [np.nan, 0.0, 12.5, 38.0, 38.005, 38.01, 39.5, 40.0, 40.01, 45.0]
+VALORES_RP = [np.nan, 10.0, 14.99, 15.0, 25.0, 35.0, 35.01]
+
+
+def _referencia_escalar(ct, rp):
+    return _interpretar_com_rp(
+        ct_rp=None if pd.isna(rp) else rp,
+        ct_alvo=ct,
+        ct_detect_min=0.0,
+        **FAIXAS,
+    )
+
+
+def test_kernel_paridade_com_referencia_escalar():
+    ct = np.array([[v for v in VALORES_CT] for _ in VALORES_RP], dtype=float)
+    rp = np.array(VALORES_RP, dtype=float)
+
+    resultado = _interpretar_matriz_ct(ct, rp, **FAIXAS)
+
+    assert resultado.shape == ct.shape
+    for (i, rp_val), (j, ct_val) in itertools.product(enumerate(VALORES_RP), enumerate(VALORES_CT)):
+        assert resultado[i, j] == _referencia_escalar(ct_val, rp_val), (rp_val, ct_val)
+
+
+def test_kernel_vetor_unico_de_alvo():
+    resultado = _interpretar_matriz_ct(np.array([20.0, 39.0]), np.array([20.0, 20.0]), **FAIXAS)
+    assert resultado.tolist() == [["Detectado"], ["Inconclusivo"]]
+
+
+def _df_norm_sintetico(n_amostras: int, alvos, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    linhas = []
+    for i in range(n_amostras):
+        nome = f"AM{i:04d}"
+        for alvo in list(alvos) + ["RP"]:
+            ct = rng.choice([np.nan, rng.uniform(10, 46)])
+            linhas.append({"well": f"A{i}", "sample_name": nome, "target_name": alvo, "ct": ct})
+    return pd.DataFrame(linhas)
+
+
+def _referencia_df(df_norm: pd.DataFrame, alvos) -> pd.DataFrame:
+    """Reimplementação do laço original (iterrows + _interpretar_com_rp)."""
+    df_sid = _ensure_sample_id(df_norm)
+    upper = df_sid["target_name"].astype(str).str.upper()
+    rp_map = {}
+    for amostra, sub in df_sid[upper == "RP"].groupby("sample_id"):
+        vals = [v for v in sub["ct"].tolist() if v is not None]
+        if vals:
+            rp_map[amostra] = float(sum(vals) / len(vals))
+    df_t = df_sid[upper.isin([a.upper() for a in alvos])].copy()
+    df_t["target_upper"] = df_t["target_name"].astype(str).str.upper()
+    pivot = df_t.pivot_table(index="sample_id", columns="target_upper", values="ct", aggfunc="first")
+    nomes = df_t.groupby("sample_id")["sample_name"].first().to_dict()
+    linhas = []
+    for sample_id, row in pivot.iterrows():
+        linha = {"sample_id": sample_id, "sample_name": nomes.get(sample_id, sample_id)}
+        for alvo in row.index:
+            linha[f"Resultado_{alvo.replace(' ', '')}"] = _interpretar_com_rp(
+                ct_rp=rp_map.get(sample_id), ct_alvo=row[alvo], ct_detect_min=0.0, **FAIXAS
+            )
+        linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+
+@pytest.mark.parametrize("n_amostras", [1, 24, 384])
+def test_aplicar_regras_paridade_df(n_amostras):
+    alvos = ["SC2", "INF A", "INF B", "HMPV", "RSV"]
+    df_norm = _df_norm_sintetico(n_amostras, alvos)
+    ctx = AnaliseContexto(
+        app_state=None,
+        exame="",
+        config_exame={},
+        config_placa={},
+        config_equip={},
+        config_regras={"alvos": ";".join(alvos + ["RP"])},
+        caminho_arquivo_corrida="",
+    )
+
+    obtido = _aplicar_regras_ct_e_interpretacao(df_norm, ctx)
+    esperado = _referencia_df(df_norm, alvos)
+
+    pd.testing.assert_frame_equal(
+        obtido.reset_index(drop=True), esperado.reset_index(drop=True), check_dtype=False
+    )
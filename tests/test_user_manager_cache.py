@@ -0,0 +1,110 @@
+"""Índice de usuários em memória e gravação por linha (core.authentication.user_manager)."""
+
+import csv
+import threading
+
+import bcrypt
+import pytest
+
+from core.authentication import user_manager as um
+from core.authentication.user_manager import NivelAcesso, StatusUsuario, UserManager
+
+
+@pytest.fixture
+def caminho(tmp_path, monkeypatch):
+    gensalt = bcrypt.gensalt
+    monkeypatch.setattr(um.bcrypt, "gensalt", lambda *a, **k: gensalt(rounds=4))
+    caminho = str(tmp_path / "usuarios.csv")
+    manager = UserManager(caminho)
+    for nome in ("ana", "bruno", "carla"):
+        assert manager.criar_usuario(nome, f"senha-{nome}", NivelAcesso.DIAGNOSTICO, "admin")[0]
+    return caminho
+
+
+def _linhas(caminho):
+    with open(caminho, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_lido_uma_vez_por_versao_do_arquivo(caminho, monkeypatch):
+    manager = UserManager(caminho)
+    leituras = []
+    ler = manager._ler_arquivo
+    monkeypatch.setattr(manager, "_ler_arquivo", lambda: leituras.append(1) or ler())
+
+    assert manager.autenticar("ANA", "senha-ana")
+    assert manager.autenticar("bruno", "senha-bruno")
+    assert len(manager.listar_usuarios()) == 3
+    assert len(leituras) == 1
+
+    # outra estação cria um usuário: o índice é relido
+    UserManager(caminho).criar_usuario("davi", "senha-davi", NivelAcesso.MASTER, "admin")
+    assert [u.usuario for u in manager.listar_usuarios()][-1] == "davi"
+    assert len(leituras) == 2
+
+
+def test_falha_de_login_grava_so_a_linha_do_usuario(caminho):
+    antes = open(caminho, "rb").read().splitlines()
+    manager = UserManager(caminho)
+
+    assert manager.autenticar("bruno", "errada") is None
+
+    depois = open(caminho, "rb").read().splitlines()
+    assert [i for i, (a, b) in enumerate(zip(antes, depois)) if a != b] == [2]
+    assert _linhas(caminho)[1]["tentativas_falhas"] == "1"
+
+
+def test_contadores_de_estacoes_diferentes_nao_se_perdem(caminho):
+    estacao_a, estacao_b = UserManager(caminho), UserManager(caminho)
+    estacao_a.listar_usuarios()
+    estacao_b.listar_usuarios()
+
+    assert estacao_a.autenticar("carla", "errada") is None
+    assert estacao_b.autenticar("carla", "errada") is None
+    assert estacao_a.autenticar("carla", "errada") is None
+
+    carla = _linhas(caminho)[2]
+    assert carla["tentativas_falhas"] == "3"
+    assert carla["status"] == StatusUsuario.BLOQUEADO.value
+    assert carla["bloqueado_ate"]
+    # linha mudou de tamanho: as demais continuam íntegras
+    assert [l["usuario"] for l in _linhas(caminho)] == ["ana", "bruno", "carla"]
+    assert UserManager(caminho).autenticar("ana", "senha-ana")
+
+
+def test_login_zera_contador_e_registra_acesso(caminho):
+    manager = UserManager(caminho)
+    manager.autenticar("ana", "errada")
+
+    usuario, token = manager.autenticar("ana", "senha-ana")
+
+    assert usuario.tentativas_falhas == 0 and len(token) == 32
+    assert _linhas(caminho)[0]["tentativas_falhas"] == "0"
+    assert _linhas(caminho)[0]["ultimo_acesso"] == usuario.ultimo_acesso
+
+
+def test_nivel_insuficiente_nao_grava(caminho):
+    antes = open(caminho, "rb").read()
+
+    assert UserManager(caminho).autenticar("ana", "senha-ana", nivel_solicitado="ADMIN") is None
+    assert open(caminho, "rb").read() == antes
+
+
+def test_usuario_duplicado(caminho):
+    assert UserManager(caminho).criar_usuario("Ana", "outra-senha", NivelAcesso.MASTER, "admin") == (
+        False, "Usuário já existe"
+    )
+
+
+def test_autenticar_async_roda_fora_da_thread_chamadora(caminho, monkeypatch):
+    threads = []
+    checkpw = bcrypt.checkpw
+    monkeypatch.setattr(
+        um.bcrypt, "checkpw", lambda *a: threads.append(threading.current_thread()) or checkpw(*a)
+    )
+
+    futuro = UserManager(caminho).autenticar_async("bruno", "senha-bruno")
+
+    usuario, _token = futuro.result(timeout=10)
+    assert usuario.usuario == "bruno"
+    assert threads and threads[0] is not threading.current_thread()
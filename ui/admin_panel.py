@@ -19,7 +19,7 @@ import customtkinter as ctk
 
 from autenticacao.auth_service import AuthService
 from services.config_service import config_service
-from utils.logger import registrar_log
+from utils.logger import descarregar_logs, registrar_log
 
 
 LOG_DEFAULT = "logs/sistema.log"
@@ -174,6 +174,7 @@ class AdminPanel:
 
         cfg = self._ler_config_json()
         log_path = cfg.get("paths", {}).get("log_file", LOG_DEFAULT)
+        descarregar_logs()
         try:
             if os.path.exists(log_path):
                 linhas = Path(log_path).read_text(encoding="utf-8", errors="ignore").splitlines()
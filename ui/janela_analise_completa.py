@@ -370,24 +370,40 @@ class JanelaAnaliseCompleta(AfterManagerMixin, ctk.CTkToplevel):
         
         # Inserir linhas
         for index, row in self.df_analise.iterrows():
-            row_values = list(row)
-            # Formatar primeira coluna (checkbox)
-            if isinstance(row_values[0], bool):
-                row_values[0] = "[X]" if row_values[0] else ""
-            
-            # FASE 2: Formatar CTs e outros valores
-            colunas = self.df_analise.columns.tolist()
-            row_values_formatted = [
-                _formatar_valor_celula(col_name, val)
-                for col_name, val in zip(colunas, row_values)
-            ]
-            
-            # FASE 3: Determinar tag de cor baseada nos resultados
-            tag_cor = _determinar_tag_resultado(row)
-            tags = (tag_cor,) if tag_cor else ()
-            
+            row_values_formatted, tags = self._valores_linha(row)
             self.tree.insert("", "end", values=row_values_formatted, iid=str(index), tags=tags)
     
+    def _valores_linha(self, row: pd.Series):
+        """Valores formatados e tags de cor de uma linha do TreeView."""
+        row_values = list(row)
+        # Formatar primeira coluna (checkbox)
+        if isinstance(row_values[0], bool):
+            row_values[0] = "[X]" if row_values[0] else ""
+        
+        # FASE 2: Formatar CTs e outros valores
+        row_values_formatted = [
+            _formatar_valor_celula(col_name, val)
+            for col_name, val in zip(row.index, row_values)
+        ]
+        
+        # FASE 3: Determinar tag de cor baseada nos resultados
+        tag_cor = _determinar_tag_resultado(row)
+        tags = (tag_cor,) if tag_cor else ()
+        return row_values_formatted, tags
+    
+    def _atualizar_linhas_tabela(self, indices) -> None:
+        """Atualiza no lugar apenas as linhas `indices` do TreeView."""
+        if list(self.tree["columns"]) != list(self.df_analise.columns):
+            self._popular_tabela()
+            return
+        for index in indices:
+            iid = str(index)
+            if not self.tree.exists(iid):
+                self._popular_tabela()
+                return
+            valores, tags = self._valores_linha(self.df_analise.loc[index])
+            self.tree.item(iid, values=valores, tags=tags)
+    
     def _ordenar_coluna(self, col: str, reverse: bool):
         """Ordena tabela por coluna."""
         try:
@@ -556,9 +572,16 @@ class JanelaAnaliseCompleta(AfterManagerMixin, ctk.CTkToplevel):
     def _on_mapa_salvo(self, plate_model: PlateModel):
         """
         Callback quando usuário salva no mapa.
-        RECALCULA TODA A PLACA e sincroniza IMEDIATAMENTE com aba de análise.
+        Aplica só as linhas/colunas alteradas (PlateModel.pop_delta) no df_analise
+        e no TreeView; se o delta não couber (coluna nova, poço ausente...),
+        RECALCULA TODA A PLACA e sincroniza com a aba de análise.
         """
         try:
+            delta = plate_model.pop_delta()
+            if self._aplicar_delta_mapa(delta):
+                self._concluir_sincronizacao(f"Alterações do mapa aplicadas ({len(delta.rows)} linha(s))")
+                return
+            
             # PASSO 1: Converter PlateModel de volta para DataFrame
             df_updated = plate_model.to_dataframe()
             
@@ -650,15 +673,7 @@ class JanelaAnaliseCompleta(AfterManagerMixin, ctk.CTkToplevel):
             # PASSO 4: Recarregar tabela IMEDIATAMENTE (TreeView será reconfigurado)
             self._popular_tabela()
             
-            # PASSO 5: Voltar para aba de análise
-            self.tabview.set("Analise")
-            
-            # PASSO 6: Feedback visual
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            self.title(f"RT-PCR - Analise Completa (OK - Sincronizado: {timestamp})")
-            
-            registrar_log("Sincronização", "Dados do mapa sincronizados com sucesso", "INFO")
+            self._concluir_sincronizacao("Dados do mapa sincronizados com sucesso")
             
         except Exception as e:
             import traceback
@@ -666,6 +681,37 @@ class JanelaAnaliseCompleta(AfterManagerMixin, ctk.CTkToplevel):
             registrar_log("Sincronização", f"Erro: {erro_completo}", "ERROR")
             messagebox.showerror("Erro de Sincronização", f"Falha ao sincronizar:\n{e}\n\nVeja logs para detalhes.", parent=self)
     
+    def _aplicar_delta_mapa(self, delta) -> bool:
+        """
+        Atualiza df_analise e o TreeView só nas linhas do delta.
+        Retorna False quando é preciso a sincronização completa.
+        """
+        indices = delta.apply_to(self.df_analise)
+        if indices is None:
+            registrar_log("Sync", f"Delta do mapa não aplicável (colunas {delta.columns}); sincronização completa", "DEBUG")
+            return False
+        
+        colunas_resultado = [c for c in delta.columns if c.startswith("Resultado_")]
+        if colunas_resultado and len(indices):
+            nan_count = int(self.df_analise.loc[indices, colunas_resultado].isna().sum().sum())
+            if nan_count:
+                registrar_log("Sync", f"AVISO: {nan_count} NaN nas colunas alteradas {colunas_resultado}", "WARNING")
+        
+        self._atualizar_linhas_tabela(indices)
+        registrar_log("Sync", f"Delta do mapa: poços {delta.wells}, colunas {delta.columns}", "DEBUG")
+        return True
+    
+    def _concluir_sincronizacao(self, mensagem: str) -> None:
+        # Voltar para aba de análise
+        self.tabview.set("Analise")
+        
+        # Feedback visual
+        from datetime import datetime
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.title(f"RT-PCR - Analise Completa (OK - Sincronizado: {timestamp})")
+        
+        registrar_log("Sincronização", mensagem, "INFO")
+    
     def _on_tab_change(self):
         """Callback ao trocar de aba."""
         aba_atual = self.tabview.get()
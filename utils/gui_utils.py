@@ -1,6 +1,6 @@
 from tkinter import messagebox, ttk
 
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
 
 
@@ -8,6 +8,10 @@ import customtkinter as ctk
 
 import matplotlib.pyplot as plt
 
+import numpy as np
+
+import pandas as pd
+
 
 
 from db.db_utils import salvar_historico_processamento
@@ -1040,3 +1044,368 @@ class CTkSelectionDialog(ctk.CTkToplevel):
 
         return self._selection
 
+
+
+# ---------------------------------------------------------------------------
+# Tabela virtual (Treeview que materializa só as linhas visíveis)
+# ---------------------------------------------------------------------------
+
+
+class LinhaTabela(NamedTuple):
+    """Linha entregue por uma fonte de dados à TabelaVirtual."""
+    iid: str
+    valores: Tuple[Any, ...]
+    texto: str = ""
+    tags: Tuple[str, ...] = ()
+
+
+class FonteDadosDataFrame:
+    """
+    Fonte da TabelaVirtual sobre um DataFrame.
+
+    Filtro e ordenação trabalham sobre um array de posições (`ordem`) com
+    operações vetorizadas; a formatação (`formatadores`, Series -> Series)
+    é aplicada apenas à fatia pedida pela tabela.
+
+    Args:
+        df: Dados completos (não é copiado)
+        colunas: Colunas exibidas, na ordem da tabela
+        formatadores: Formatação vetorizada por coluna para exibição
+        chaves_ordenacao: Chave de ordenação por coluna (ex.: data em texto
+            convertida para datetime); padrão é a própria coluna
+        coluna_texto: Coluna exibida na coluna de árvore (#0), se houver
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        colunas: Sequence[str],
+        formatadores: Optional[Dict[str, Callable[[pd.Series], pd.Series]]] = None,
+        chaves_ordenacao: Optional[Dict[str, Callable[[pd.Series], pd.Series]]] = None,
+        coluna_texto: Optional[str] = None,
+    ):
+        self.df = df
+        self.colunas = list(colunas)
+        self.formatadores = formatadores or {}
+        self.chaves_ordenacao = chaves_ordenacao or {}
+        self.coluna_texto = coluna_texto
+        self._ordem = np.arange(len(df))
+        self._ordenacao: Optional[Tuple[str, bool]] = None
+        self._chaves_cache: Dict[str, pd.Series] = {}
+
+    def total(self) -> int:
+        return len(self._ordem)
+
+    def linhas(self, inicio: int, fim: int) -> List[LinhaTabela]:
+        posicoes = self._ordem[inicio:fim]
+        if not len(posicoes):
+            return []
+        fatia = self.df.iloc[posicoes]
+        exibicao = pd.DataFrame(index=fatia.index)
+        for coluna in self.colunas:
+            serie = fatia[coluna] if coluna in fatia.columns else pd.Series("", index=fatia.index)
+            formatar = self.formatadores.get(coluna)
+            if formatar is not None:
+                serie = formatar(serie)
+            exibicao[coluna] = serie.astype(object).where(serie.notna(), "")
+        textos = (
+            fatia[self.coluna_texto].astype(str).tolist()
+            if self.coluna_texto and self.coluna_texto in fatia.columns
+            else [""] * len(fatia)
+        )
+        # iid = posição no DataFrame (única mesmo com índice duplicado)
+        return [
+            LinhaTabela(str(pos), tuple(valores), texto)
+            for pos, valores, texto in zip(posicoes, exibicao.itertuples(index=False, name=None), textos)
+        ]
+
+    def filtrar(self, mascara: Optional[Any] = None) -> None:
+        """Mantém as linhas onde `mascara` (booleana, alinhada a `df`) é True; None remove o filtro."""
+        if mascara is None:
+            self._ordem = np.arange(len(self.df))
+        else:
+            self._ordem = np.flatnonzero(np.asarray(mascara, dtype=bool))
+        if self._ordenacao is not None:
+            self.ordenar(*self._ordenacao)
+
+    def ordenar(self, coluna: str, decrescente: bool = False) -> None:
+        """Ordenação estável pela chave da coluna; vazios/NaN ficam no fim."""
+        if coluna not in self.df.columns:
+            return
+        self._ordenacao = (coluna, decrescente)
+        chave = self._chave(coluna).iloc[self._ordem].reset_index(drop=True)
+        posicoes = chave.sort_values(ascending=not decrescente, kind="stable", na_position="last").index
+        self._ordem = self._ordem[posicoes.to_numpy()]
+
+    def dataframe(self) -> pd.DataFrame:
+        """Linhas filtradas, na ordem exibida."""
+        return self.df.iloc[self._ordem]
+
+    def registro(self, iid: str) -> pd.Series:
+        """Linha original do DataFrame correspondente a um iid da tabela."""
+        return self.df.iloc[int(iid)]
+
+    def _chave(self, coluna: str) -> pd.Series:
+        chave = self._chaves_cache.get(coluna)
+        if chave is None:
+            serie = self.df[coluna]
+            converter = self.chaves_ordenacao.get(coluna)
+            chave = converter(serie) if converter is not None else serie
+            self._chaves_cache[coluna] = chave
+        return chave
+
+
+class FonteDadosConsulta:
+    """
+    Fonte da TabelaVirtual sobre um backend paginado.
+
+    Args:
+        contar: Quantidade total de linhas
+        buscar: buscar(offset, limite) -> List[LinhaTabela]
+        ordenar: ordenar(coluna, decrescente), opcional; sem ele os cabeçalhos
+            não reordenam
+    """
+
+    def __init__(
+        self,
+        contar: Callable[[], int],
+        buscar: Callable[[int, int], List[LinhaTabela]],
+        ordenar: Optional[Callable[[str, bool], None]] = None,
+    ):
+        self._contar = contar
+        self._buscar = buscar
+        self._ordenar = ordenar
+        self._total: Optional[int] = None
+
+    def total(self) -> int:
+        if self._total is None:
+            self._total = int(self._contar())
+        return self._total
+
+    def linhas(self, inicio: int, fim: int) -> List[LinhaTabela]:
+        if fim <= inicio:
+            return []
+        return list(self._buscar(inicio, fim - inicio))
+
+    def ordenar(self, coluna: str, decrescente: bool = False) -> None:
+        if self._ordenar is not None:
+            self._ordenar(coluna, decrescente)
+
+    def invalidar(self) -> None:
+        """Descarta o total em cache (dados mudaram no backend)."""
+        self._total = None
+
+
+class TabelaVirtual(ttk.Frame):
+    """
+    Treeview virtual: apenas a janela visível de linhas existe no widget.
+
+    A barra de rolagem e a roda do mouse movem um deslocamento sobre a fonte
+    (FonteDadosDataFrame ou FonteDadosConsulta), que entrega só as linhas
+    necessárias. A seleção é guardada por iid e sobrevive à rolagem.
+
+    Args:
+        master: Widget pai
+        colunas: Lista de (id, título, largura, anchor)
+        fonte: Fonte de dados inicial
+        mostrar_arvore: Exibe a coluna #0 (texto/ícone da linha)
+        ordenavel: Clique no cabeçalho ordena pela coluna (alterna asc/desc)
+        **tree_kwargs: Repassados ao ttk.Treeview (style, selectmode, ...)
+    """
+
+    ALTURA_LINHA_PADRAO = 20
+
+    def __init__(
+        self,
+        master,
+        colunas: Sequence[Tuple[str, str, int, str]],
+        fonte=None,
+        mostrar_arvore: bool = False,
+        ordenavel: bool = True,
+        **tree_kwargs,
+    ):
+        super().__init__(master)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        self.colunas = [c[0] for c in colunas]
+        self.fonte = fonte
+        self.inicio = 0
+        self.linhas_visiveis = int(tree_kwargs.pop("height", 10))
+        self._selecionados: set = set()
+        self._iids_visiveis: List[str] = []
+        self._valores: Dict[str, LinhaTabela] = {}
+        self._ordenacao: Optional[Tuple[str, bool]] = None
+        self._renderizando = False
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=self.colunas,
+            show="tree headings" if mostrar_arvore else "headings",
+            height=self.linhas_visiveis,
+            **tree_kwargs,
+        )
+        for col_id, titulo, largura, anchor in colunas:
+            comando = (lambda c=col_id: self.ordenar(c)) if ordenavel else ""
+            self.tree.heading(col_id, text=titulo, command=comando)
+            self.tree.column(col_id, width=largura, anchor=anchor)
+
+        self.scroll_y = ttk.Scrollbar(self, orient="vertical", command=self._on_scroll)
+        self.scroll_x = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.scroll_x.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scroll_y.grid(row=0, column=1, sticky="ns")
+        self.scroll_x.grid(row=1, column=0, sticky="ew")
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._rolar(-3))
+        self.tree.bind("<Button-5>", lambda e: self._rolar(3))
+        self.tree.bind("<Down>", self._on_tecla_seta)
+        self.tree.bind("<Up>", self._on_tecla_seta)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+
+        if fonte is not None:
+            self.atualizar()
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+    def definir_fonte(self, fonte, manter_posicao: bool = False) -> None:
+        """
+        Troca a fonte de dados.
+
+        Por padrão volta ao topo e limpa a seleção; com `manter_posicao`
+        (mesma consulta com dados atualizados) preserva ambos.
+        """
+        self.fonte = fonte
+        if not manter_posicao:
+            self.inicio = 0
+            self._selecionados.clear()
+        if self._ordenacao is not None and fonte is not None:
+            fonte.ordenar(*self._ordenacao)
+        self.atualizar()
+
+    def atualizar(self) -> None:
+        """Busca novamente a janela visível (após filtro/alteração nos dados)."""
+        if isinstance(self.fonte, FonteDadosConsulta):
+            self.fonte.invalidar()
+        self._renderizar()
+
+    def ordenar(self, coluna: str) -> None:
+        """Ordena pela coluna; repetir o clique inverte a ordem."""
+        if self.fonte is None:
+            return
+        decrescente = bool(self._ordenacao and self._ordenacao[0] == coluna and not self._ordenacao[1])
+        self._ordenacao = (coluna, decrescente)
+        self.fonte.ordenar(coluna, decrescente)
+        self.inicio = 0
+        self._renderizar()
+
+    def rolar_para(self, inicio: int) -> None:
+        total = self.total()
+        self.inicio = max(0, min(int(inicio), max(0, total - self.linhas_visiveis)))
+        self._renderizar()
+
+    def total(self) -> int:
+        return self.fonte.total() if self.fonte is not None else 0
+
+    def selecao(self) -> List[str]:
+        """iids selecionados (inclusive fora da janela visível)."""
+        return list(self._selecionados)
+
+    def valores(self, iid: str) -> Tuple[Any, ...]:
+        """Valores exibidos de uma linha visível."""
+        linha = self._valores.get(iid)
+        return linha.valores if linha is not None else ()
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+    def _renderizar(self) -> None:
+        total = self.total()
+        self.inicio = max(0, min(self.inicio, max(0, total - self.linhas_visiveis)))
+        fim = min(total, self.inicio + self.linhas_visiveis)
+        linhas = self.fonte.linhas(self.inicio, fim) if self.fonte is not None else []
+
+        self._renderizando = True
+        try:
+            self.tree.delete(*self.tree.get_children())
+            self._valores = {}
+            for linha in linhas:
+                self.tree.insert("", "end", iid=linha.iid, text=linha.texto, values=linha.valores, tags=linha.tags)
+                self._valores[linha.iid] = linha
+            self._iids_visiveis = [linha.iid for linha in linhas]
+            visiveis_selecionados = [i for i in self._iids_visiveis if i in self._selecionados]
+            self.tree.selection_set(visiveis_selecionados)
+        finally:
+            # <<TreeviewSelect>> é entregue depois; ignora o evento gerado aqui
+            self.after_idle(self._fim_renderizacao)
+
+        if total:
+            self.scroll_y.set(self.inicio / total, fim / total)
+        else:
+            self.scroll_y.set(0.0, 1.0)
+
+    def _fim_renderizacao(self) -> None:
+        self._renderizando = False
+
+    def _on_select(self, _event=None) -> None:
+        if self._renderizando:
+            return
+        visiveis = set(self._iids_visiveis)
+        self._selecionados = (self._selecionados - visiveis) | set(self.tree.selection())
+
+    def _on_scroll(self, *args) -> None:
+        total = self.total()
+        if not args or not total:
+            return
+        if args[0] == "moveto":
+            self.rolar_para(round(float(args[1]) * total))
+        elif args[0] == "scroll":
+            passo = int(args[1])
+            if len(args) > 2 and args[2] == "pages":
+                passo *= max(1, self.linhas_visiveis - 1)
+            self._rolar(passo)
+
+    def _rolar(self, passo: int) -> None:
+        self.rolar_para(self.inicio + passo)
+
+    def _on_mousewheel(self, event) -> None:
+        if event.delta:
+            self._rolar(-3 if event.delta > 0 else 3)
+
+    def _on_tecla_seta(self, event):
+        foco = self.tree.focus()
+        if not foco or foco not in self._iids_visiveis:
+            return None
+        pos = self._iids_visiveis.index(foco)
+        descer = event.keysym == "Down"
+        if descer and pos == len(self._iids_visiveis) - 1:
+            self._rolar(1)
+        elif not descer and pos == 0:
+            self._rolar(-1)
+        else:
+            return None
+        if self._iids_visiveis:
+            alvo = self._iids_visiveis[-1] if descer else self._iids_visiveis[0]
+            self.tree.focus(alvo)
+            self.tree.selection_set(alvo)
+            self._selecionados = {alvo}
+        return "break"
+
+    def _on_configure(self, event) -> None:
+        altura_linha = self._altura_linha()
+        # desconta o cabeçalho (aprox. uma linha)
+        visiveis = max(1, event.height // altura_linha - 1)
+        if visiveis != self.linhas_visiveis:
+            self.linhas_visiveis = visiveis
+            self._renderizar()
+
+    def _altura_linha(self) -> int:
+        try:
+            estilo = self.tree.cget("style") or "Treeview"
+            valor = ttk.Style().lookup(estilo, "rowheight")
+            return int(valor) if valor else self.ALTURA_LINHA_PADRAO
+        except Exception:
+            return self.ALTURA_LINHA_PADRAO
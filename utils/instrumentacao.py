@@ -0,0 +1,254 @@
+"""
+Instrumentação - tempos por etapa da análise de uma corrida.
+
+Cada etapa (leitura do arquivo, normalização, gabarito, interpretação,
+status, regras...) é medida com tempo de parede, tempo de CPU da thread,
+número de linhas produzidas e, opcionalmente, pico de memória (tracemalloc).
+As etapas podem ser aninhadas: a etapa "motor" do AnalysisService contém as
+etapas do UniversalEngine (campo `pai`).
+
+Uso:
+    medidor = MedidorEtapas()
+    with medidor.etapa("leitura") as etapa:
+        df = ler(...)
+        etapa.linhas = len(df)
+    metadados["instrumentacao"] = medidor.como_dict()
+
+Configuração (variáveis de ambiente ou `configurar_instrumentacao`):
+- ANALISE_METRICAS_JSONL: arquivo JSON lines; cada análise acrescenta uma linha
+- ANALISE_MEMORIA=1: mede o pico de memória por etapa (deixa a análise mais lenta)
+- ANALISE_PERFIL=cprofile|pyinstrument: grava um perfil por análise em
+  ANALISE_PERFIL_DIR (padrão logs/perfis)
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.logger import registrar_log
+
+MODOS_PERFIL = ("cprofile", "pyinstrument")
+PERFIL_DIR_PADRAO = "logs/perfis"
+
+_config: Dict[str, Any] = {
+    "metricas_jsonl": os.environ.get("ANALISE_METRICAS_JSONL", ""),
+    "memoria": os.environ.get("ANALISE_MEMORIA", "").strip().lower() in ("1", "true", "sim"),
+    "perfil": os.environ.get("ANALISE_PERFIL", "").strip().lower(),
+    "perfil_dir": os.environ.get("ANALISE_PERFIL_DIR", PERFIL_DIR_PADRAO),
+}
+_lock_jsonl = threading.Lock()
+
+
+def configurar_instrumentacao(
+    metricas_jsonl: Optional[str] = None,
+    memoria: Optional[bool] = None,
+    perfil: Optional[str] = None,
+    perfil_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Ajusta a instrumentação do processo (argumentos None mantêm o valor atual).
+
+    Returns:
+        Cópia da configuração em vigor.
+    """
+    if metricas_jsonl is not None:
+        _config["metricas_jsonl"] = metricas_jsonl
+    if memoria is not None:
+        _config["memoria"] = bool(memoria)
+    if perfil is not None:
+        perfil = perfil.strip().lower()
+        if perfil and perfil not in MODOS_PERFIL:
+            raise ValueError(f"Modo de perfil inválido: '{perfil}' (use {', '.join(MODOS_PERFIL)})")
+        _config["perfil"] = perfil
+    if perfil_dir is not None:
+        _config["perfil_dir"] = perfil_dir
+    return dict(_config)
+
+
+def configuracao_instrumentacao() -> Dict[str, Any]:
+    """Configuração em vigor (para repassar a processos filhos)."""
+    return dict(_config)
+
+
+@dataclass
+class Etapa:
+    """Medição de uma etapa; `linhas` pode ser preenchido dentro do bloco."""
+
+    nome: str
+    pai: Optional[str] = None
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    linhas: Optional[int] = None
+    pico_memoria_kb: Optional[float] = None
+    erro: Optional[str] = None
+    _pico_parcial: int = field(default=0, repr=False)
+
+    def como_dict(self) -> Dict[str, Any]:
+        dados = asdict(self)
+        dados.pop("_pico_parcial")
+        dados["wall_ms"] = round(self.wall_ms, 3)
+        dados["cpu_ms"] = round(self.cpu_ms, 3)
+        return {k: v for k, v in dados.items() if v is not None}
+
+
+class MedidorEtapas:
+    """Coleta as etapas de uma análise, na ordem em que terminam."""
+
+    def __init__(self, memoria: Optional[bool] = None) -> None:
+        self.etapas: List[Etapa] = []
+        self._pilha: List[Etapa] = []
+        self.memoria = _config["memoria"] if memoria is None else memoria
+        self._iniciou_tracemalloc = False
+
+    @contextmanager
+    def etapa(self, nome: str, linhas: Optional[int] = None) -> Iterator[Etapa]:
+        """Mede o bloco como uma etapa (registrada mesmo se o bloco falhar)."""
+        registro = Etapa(nome=nome, pai=self._pilha[-1].nome if self._pilha else None, linhas=linhas)
+        memoria_inicial = self._iniciar_memoria()
+        self._pilha.append(registro)
+        inicio_wall = time.perf_counter()
+        inicio_cpu = time.thread_time()
+        try:
+            yield registro
+        except BaseException as exc:
+            registro.erro = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            registro.cpu_ms = (time.thread_time() - inicio_cpu) * 1000.0
+            registro.wall_ms = (time.perf_counter() - inicio_wall) * 1000.0
+            self._pilha.pop()
+            if memoria_inicial is not None:
+                pico = max(registro._pico_parcial, tracemalloc.get_traced_memory()[1])
+                registro.pico_memoria_kb = round(max(pico - memoria_inicial, 0) / 1024.0, 1)
+                self._encerrar_memoria()
+            self.etapas.append(registro)
+
+    def _iniciar_memoria(self) -> Optional[int]:
+        if not self.memoria:
+            return None
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciou_tracemalloc = True
+        atual, pico = tracemalloc.get_traced_memory()
+        if self._pilha:
+            # o reset abaixo apagaria o pico da etapa externa até aqui
+            externa = self._pilha[-1]
+            externa._pico_parcial = max(externa._pico_parcial, pico)
+        tracemalloc.reset_peak()
+        return atual
+
+    def _encerrar_memoria(self) -> None:
+        if self._iniciou_tracemalloc and not self._pilha:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+
+    def como_dict(self) -> Dict[str, Any]:
+        """Etapas e totais (somente etapas de nível superior entram nos totais)."""
+        raiz = [e for e in self.etapas if e.pai is None]
+        return {
+            "etapas": [e.como_dict() for e in self.etapas],
+            "total_ms": round(sum(e.wall_ms for e in raiz), 3),
+            "cpu_ms": round(sum(e.cpu_ms for e in raiz), 3),
+        }
+
+    def resumo_texto(self) -> str:
+        """Linha única para log: 'leitura=12ms motor=80ms ...' (nível superior)."""
+        return " ".join(f"{e.nome}={e.wall_ms:.0f}ms" for e in self.etapas if e.pai is None)
+
+
+def gravar_metricas_jsonl(registro: Dict[str, Any], caminho: Optional[str] = None) -> Optional[str]:
+    """
+    Acrescenta `registro` (com data/hora) como uma linha JSON.
+
+    Sem `caminho`, usa ANALISE_METRICAS_JSONL; se nenhum estiver definido, não grava.
+    """
+    caminho = caminho or _config["metricas_jsonl"]
+    if not caminho:
+        return None
+    linha = json.dumps(
+        {"data_hora": datetime.now().isoformat(timespec="seconds"), **registro},
+        ensure_ascii=False, default=str,
+    )
+    Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+    with _lock_jsonl, open(caminho, "a", encoding="utf-8") as f:
+        f.write(linha + "\n")
+    return caminho
+
+
+class CapturaPerfil:
+    """Resultado de `capturar_perfil`: `arquivo` é preenchido ao final do bloco."""
+
+    def __init__(self, modo: str) -> None:
+        self.modo = modo
+        self.arquivo: Optional[str] = None
+
+
+@contextmanager
+def capturar_perfil(nome: str, modo: Optional[str] = None, diretorio: Optional[str] = None) -> Iterator[CapturaPerfil]:
+    """
+    Grava um perfil do bloco (opt-in via ANALISE_PERFIL).
+
+    - cprofile: <diretorio>/<nome>_<data_hora>.prof (abrir com pstats/snakeviz)
+    - pyinstrument: <diretorio>/<nome>_<data_hora>.html; sem o pacote
+      instalado, cai para cprofile.
+    Sem modo configurado, o bloco roda sem perfil.
+    """
+    modo = (_config["perfil"] if modo is None else modo) or ""
+    if modo == "pyinstrument" and importlib.util.find_spec("pyinstrument") is None:
+        registrar_log("Instrumentação", "pyinstrument não instalado; usando cProfile", "WARNING")
+        modo = "cprofile"
+    captura = CapturaPerfil(modo)
+    if modo not in MODOS_PERFIL:
+        yield captura
+        return
+
+    pasta = Path(diretorio or _config["perfil_dir"])
+    base = "".join(c if c.isalnum() or c in "-_." else "_" for c in nome) or "analise"
+    # Extensão concatenada ao nome: with_suffix cortaria o horário de nomes com "." (placa_2024.10.18)
+    arquivo_base = f"{base}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    if modo == "pyinstrument":
+        from pyinstrument import Profiler
+
+        perfilador = Profiler()
+        perfilador.start()
+        try:
+            yield captura
+        finally:
+            perfilador.stop()
+            pasta.mkdir(parents=True, exist_ok=True)
+            captura.arquivo = str(pasta / f"{arquivo_base}.html")
+            Path(captura.arquivo).write_text(perfilador.output_html(), encoding="utf-8")
+    else:
+        import cProfile
+
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+        try:
+            yield captura
+        finally:
+            perfilador.disable()
+            pasta.mkdir(parents=True, exist_ok=True)
+            captura.arquivo = str(pasta / f"{arquivo_base}.prof")
+            perfilador.dump_stats(captura.arquivo)
+    registrar_log("Instrumentação", f"Perfil gravado em {captura.arquivo}", "INFO")
+
+
+__all__ = [
+    "CapturaPerfil",
+    "Etapa",
+    "MedidorEtapas",
+    "capturar_perfil",
+    "configuracao_instrumentacao",
+    "configurar_instrumentacao",
+    "gravar_metricas_jsonl",
+]
@@ -1,11 +1,18 @@
 # FileName: /Integragal/utils/io_utils.py
 import os
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Union
 
 import pandas as pd
 
 from utils.logger import registrar_log  # Importa o logger centralizado
 
+# Quantas linhas do início da planilha são lidas para procurar o cabeçalho
+LINHAS_PREVIA_CABECALHO = 50
+
+# Palavras-chave do cabeçalho das planilhas de resultados (Well, Sample, Target)
+CHAVES_CABECALHO = ("well", "sample", "target")
+
 
 def detectar_separador_csv(filepath: str) -> str:
     """
@@ -62,6 +69,131 @@ def detectar_separador_csv(filepath: str) -> str:
         return ","
 
 
+@dataclass
+class CabecalhoDetectado:
+    """Resultado de detectar_cabecalho_excel."""
+
+    linha: int  # linha do cabeçalho (0-based): skiprows/header do pd.read_excel
+    encontrado: bool
+    previa: List[List[Any]] = field(default_factory=list)  # primeiras linhas lidas, valores brutos
+
+
+def _texto_celula(valor: Any) -> str:
+    return "" if valor is None or pd.isna(valor) else str(valor).strip()
+
+
+def pontuar_linha_cabecalho(
+    valores: Sequence[Any],
+    chaves: Sequence[str],
+    normalizar: Optional[Callable[[str], str]] = None,
+    exato: bool = False,
+) -> int:
+    """
+    Quantas chaves aparecem na linha.
+    normalizar: aplicada às células e às chaves (padrão: casefold).
+    exato: a célula normalizada deve ser igual à chave; senão basta contê-la.
+    """
+    normalizar = normalizar or str.casefold
+    celulas = [normalizar(_texto_celula(v)) for v in valores]
+    celulas = [c for c in celulas if c]
+    pontos = 0
+    for chave in chaves:
+        chave = normalizar(chave)
+        if exato:
+            pontos += chave in celulas
+        else:
+            pontos += any(chave in c for c in celulas)
+    return pontos
+
+
+def localizar_linha_cabecalho(
+    linhas: Iterable[Sequence[Any]],
+    chaves: Sequence[str],
+    normalizar: Optional[Callable[[str], str]] = None,
+    exato: bool = False,
+) -> Optional[int]:
+    """Índice da primeira linha que contém todas as chaves (None se nenhuma)."""
+    chaves = [c for c in chaves if c]
+    if not chaves:
+        return None
+    for idx, valores in enumerate(linhas):
+        if pontuar_linha_cabecalho(valores, chaves, normalizar, exato) == len(chaves):
+            return idx
+    return None
+
+
+def ler_previa_excel(
+    filepath: str,
+    sheet_name: Union[str, int, None] = None,
+    max_linhas: int = LINHAS_PREVIA_CABECALHO,
+) -> List[List[Any]]:
+    """
+    Lê só as primeiras max_linhas de uma aba (openpyxl read_only; xlrd on_demand
+    para .xls), sem carregar a planilha inteira.
+    sheet_name: nome ou índice da aba (padrão: a primeira, como pd.read_excel).
+    Lança KeyError se a aba não existir.
+    """
+    filepath = str(filepath)
+    if filepath.lower().endswith(".xls"):
+        try:
+            import xlrd
+        except ImportError:
+            raise ImportError("Para ler arquivos .xls, instale: pip install xlrd")
+        book = xlrd.open_workbook(filepath, on_demand=True)
+        try:
+            if isinstance(sheet_name, str):
+                if sheet_name not in book.sheet_names():
+                    raise KeyError(sheet_name)
+                sheet = book.sheet_by_name(sheet_name)
+            else:
+                sheet = book.sheet_by_index(sheet_name or 0)
+            return [sheet.row_values(i) for i in range(min(max_linhas, sheet.nrows))]
+        finally:
+            book.release_resources()
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        if isinstance(sheet_name, str):
+            ws = wb[sheet_name]
+        else:
+            ws = wb.worksheets[sheet_name or 0]
+        return [list(linha) for linha in ws.iter_rows(max_row=max_linhas, values_only=True)]
+    finally:
+        wb.close()
+
+
+def detectar_cabecalho_excel(
+    filepath: str,
+    chaves: Sequence[str] = CHAVES_CABECALHO,
+    sheet_name: Union[str, int, None] = None,
+    max_linhas: int = LINHAS_PREVIA_CABECALHO,
+    normalizar: Optional[Callable[[str], str]] = None,
+    exato: bool = False,
+) -> CabecalhoDetectado:
+    """
+    Procura o cabeçalho nas primeiras max_linhas da aba, lidas uma única vez
+    (ler_previa_excel); a leitura completa fica para quem chama, com
+    skiprows/header=linha. Sem cabeçalho (ou sem a aba), retorna linha 0 e
+    encontrado=False.
+    """
+    try:
+        previa = ler_previa_excel(filepath, sheet_name=sheet_name, max_linhas=max_linhas)
+    except Exception as e:
+        registrar_log(
+            "IO Utils",
+            f"Não foi possível ler o início de '{os.path.basename(str(filepath))}' (aba {sheet_name!r}): {e}",
+            level="WARNING",
+        )
+        return CabecalhoDetectado(linha=0, encontrado=False)
+
+    linha = localizar_linha_cabecalho(previa, chaves, normalizar=normalizar, exato=exato)
+    if linha is None:
+        return CabecalhoDetectado(linha=0, encontrado=False, previa=previa)
+    return CabecalhoDetectado(linha=linha, encontrado=True, previa=previa)
+
+
 def detectar_linha_cabecalho(filepath: str, sep: str = ",") -> int:
     """
     Tenta detectar a linha de cabeçalho em um arquivo CSV ou Excel,
@@ -102,31 +234,16 @@ def detectar_linha_cabecalho(filepath: str, sep: str = ",") -> int:
             )
             return 0  # Padrão se não encontrar
 
-        # Para Excel (tentativa de leitura para encontrar sheet 'Results' e cabeçalho)
+        # Para Excel: procura na sheet 'Results', lendo só as primeiras linhas
         elif filepath.lower().endswith((".xls", ".xlsx")):
-            # Tenta ler a sheet 'Results' e procurar o cabeçalho
-            for skip_rows in range(50):  # Tenta pular até 50 linhas
-                try:
-                    temp_df = pd.read_excel(
-                        filepath,
-                        sheet_name="Results",
-                        skiprows=skip_rows,
-                        engine="openpyxl",
-                    )
-                    temp_df.columns = [str(col).strip() for col in temp_df.columns]
-                    if (
-                        any("Well" in col for col in temp_df.columns)
-                        and any("Sample" in col for col in temp_df.columns)
-                        and any("Target" in col for col in temp_df.columns)
-                    ):
-                        registrar_log(
-                            "IO Utils",
-                            f"Cabeçalho detectado em Excel '{os.path.basename(filepath)}' na linha {skip_rows} (skiprows).",
-                            level="DEBUG",
-                        )
-                        return skip_rows
-                except Exception:
-                    continue  # Tenta a próxima skiprows
+            cabecalho = detectar_cabecalho_excel(filepath, sheet_name="Results")
+            if cabecalho.encontrado:
+                registrar_log(
+                    "IO Utils",
+                    f"Cabeçalho detectado em Excel '{os.path.basename(filepath)}' na linha {cabecalho.linha} (skiprows).",
+                    level="DEBUG",
+                )
+                return cabecalho.linha
             registrar_log(
                 "IO Utils",
                 f"Cabeçalho não detectado em Excel '{os.path.basename(filepath)}'. Usando linha 0.",
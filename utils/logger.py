@@ -1,9 +1,13 @@
 # utils/logger.py
+import atexit
 import csv
 import getpass
+import io
 import os
 import socket
+import threading
 from datetime import datetime
+from typing import List, Optional
 
 # --- Bloco de Configuração Inicial ---
 # Define o diretório base do projeto de forma robusta
@@ -14,40 +18,168 @@ from services.system_paths import BASE_DIR
 # Isto resolve o erro de importação circular.
 LOG_FILE_PATH = os.path.join(BASE_DIR, "logs", "sistema.log")
 
+# Níveis aceites por registrar_log (nível mínimo via LOG_LEVEL ou definir_nivel_log)
+NIVEIS_LOG = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+
+# Buffer: grava quando atinge MAX_REGISTROS_BUFFER ou a cada INTERVALO_FLUSH_S
+MAX_REGISTROS_BUFFER = 200
+INTERVALO_FLUSH_S = 1.0
+
+
+def _nivel_numerico(level: str) -> int:
+    return NIVEIS_LOG.get(str(level).upper(), NIVEIS_LOG["INFO"])
+
+
+_nivel_minimo = _nivel_numerico(os.environ.get("LOG_LEVEL", "DEBUG"))
+
+
+def definir_nivel_log(level: str) -> None:
+    """Define o nível mínimo gravado (registos abaixo dele são descartados)."""
+    global _nivel_minimo
+    _nivel_minimo = _nivel_numerico(level)
+
+
+def log_habilitado(level: str) -> bool:
+    """
+    Indica se um registo deste nível seria gravado.
+
+    Útil para evitar montar mensagens caras em ciclos (ex.: value_counts em DEBUG).
+    """
+    return NIVEIS_LOG.get(str(level).upper(), NIVEIS_LOG["INFO"]) >= _nivel_minimo
+
+
+class _EscritorLogBuffer:
+    """
+    Acumula linhas do log em memória e grava-as em lote numa thread de fundo.
+
+    A thread acorda quando o buffer atinge `max_registros` (ou chega um
+    ERROR/CRITICAL) ou a cada `intervalo` segundos. `descarregar()` grava de
+    imediato o que estiver pendente (também chamado no encerramento).
+    """
+
+    def __init__(self, max_registros: int = MAX_REGISTROS_BUFFER, intervalo: float = INTERVALO_FLUSH_S):
+        self.max_registros = max_registros
+        self.intervalo = intervalo
+        self._pendentes: List[list] = []
+        self._lock = threading.Lock()
+        self._escrita_lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._utilizador: Optional[str] = None
+        self._host: Optional[str] = None
+
+    def identificacao(self):
+        """Utilizador e IP da máquina, resolvidos uma única vez por processo."""
+        if self._host is None:
+            try:
+                self._utilizador = getpass.getuser()
+            except Exception:
+                self._utilizador = ""
+            try:
+                self._host = socket.gethostbyname(socket.gethostname())
+            except Exception:
+                self._host = "127.0.0.1"
+        return self._utilizador, self._host
+
+    def adicionar(self, acao: str, detalhes: str, level: str) -> None:
+        utilizador, host = self.identificacao()
+        linha = [
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            utilizador,
+            host,
+            acao,
+            detalhes,
+            level.upper(),
+        ]
+        with self._lock:
+            self._pendentes.append(linha)
+            cheio = len(self._pendentes) >= self.max_registros
+        self._garantir_thread()
+        if cheio or _nivel_numerico(level) >= NIVEIS_LOG["ERROR"]:
+            self._acordar.set()
+
+    def descarregar(self) -> None:
+        """Grava no ficheiro todas as linhas pendentes."""
+        with self._escrita_lock:
+            with self._lock:
+                linhas, self._pendentes = self._pendentes, []
+            if not linhas:
+                return
+            try:
+                log_dir = os.path.dirname(LOG_FILE_PATH)
+                if not os.path.exists(log_dir):
+                    os.makedirs(log_dir, exist_ok=True)
+                    # Log para a consola na primeira criação do diretório
+                    print(f"[LOGGER] Diretório de log criado: {log_dir}")
+
+                texto = io.StringIO()
+                csv.writer(texto, delimiter=";").writerows(linhas)
+                # Abre o ficheiro em modo de adição ('a') com codificação UTF-8
+                with open(LOG_FILE_PATH, "a", newline="", encoding="utf-8") as f:
+                    f.write(texto.getvalue())
+            except Exception as e:
+                # Se o logging falhar, imprime o erro na consola para não passar despercebido.
+                print("--- ERRO CRÍTICO NO LOGGER ---")
+                print(f"Não foi possível registar {len(linhas)} linha(s) de log:")
+                for _, _, _, acao, detalhes, nivel in linhas[-5:]:
+                    print(f"Ação: {acao}, Detalhes: {detalhes}, Nível: {nivel}")
+                print(f"Erro: {e}")
+                print("--- FIM DO ERRO DO LOGGER ---")
+
+    def reiniciar_apos_fork(self) -> None:
+        """No processo filho: descarta o estado herdado (a thread não existe lá)."""
+        self._pendentes = []
+        self._lock = threading.Lock()
+        self._escrita_lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread = None
+
+    def _garantir_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._ciclo, name="logger-flush", daemon=True)
+            self._thread.start()
+
+    def _ciclo(self) -> None:
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            self.descarregar()
+
+
+_escritor = _EscritorLogBuffer()
+atexit.register(_escritor.descarregar)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_escritor.reiniciar_apos_fork)
+
+
+def descarregar_logs() -> None:
+    """Grava de imediato os registos pendentes (antes de ler o ficheiro de log)."""
+    _escritor.descarregar()
+
 
 def registrar_log(acao: str, detalhes: str, level: str = "INFO"):
     """
     Regista uma entrada de log no ficheiro CSV centralizado.
-    Cria o diretório do log se ele não existir.
+
+    A linha (data;utilizador;ip;ação;detalhes;nível) é colocada num buffer em
+    memória e gravada em lote por uma thread de fundo; use `descarregar_logs()`
+    para forçar a escrita. Registos abaixo do nível mínimo são descartados sem
+    custo.
 
     Args:
         acao (str): Ação que está a ser logada (ex: "Login", "Análise").
         detalhes (str): Detalhes específicos sobre a ação.
         level (str): Nível do log (INFO, WARNING, ERROR, CRITICAL, DEBUG).
     """
+    if NIVEIS_LOG.get(str(level).upper(), NIVEIS_LOG["INFO"]) < _nivel_minimo:
+        return
     try:
-        # Garante que o diretório do log exista
-        log_dir = os.path.dirname(LOG_FILE_PATH)
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir, exist_ok=True)
-            # Log para a consola na primeira criação do diretório
-            print(f"[LOGGER] Diretório de log criado: {log_dir}")
-
-        # Abre o ficheiro em modo de adição ('a') com codificação UTF-8
-        with open(LOG_FILE_PATH, "a", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f, delimiter=";")
-            writer.writerow(
-                [
-                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    getpass.getuser(),
-                    socket.gethostbyname(socket.gethostname()),
-                    acao,
-                    detalhes,
-                    level.upper(),
-                ]
-            )
+        _escritor.adicionar(acao, detalhes, level)
     except Exception as e:
-        # Se o logging falhar, imprime o erro na consola para não passar despercebido.
         print("--- ERRO CRÍTICO NO LOGGER ---")
         print("Não foi possível registar o log:")
         print(f"Ação: {acao}, Detalhes: {detalhes}, Nível: {level}")